@@ -0,0 +1,271 @@
+# analytics.py
+
+from datetime import date
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import event, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from extensions import db
+from models import Task, TaskStat
+
+# Dimensões mantidas na tabela de resumo. "total" tem um único valor ("").
+DIMENSIONS = ("status", "priority", "category")
+COMPLETED_STATUS = "Concluída"
+
+
+def _stat_keys(values):
+    """Chaves (dimensão, valor) afetadas por uma tarefa com os valores informados."""
+    keys = [("total", "")]
+    for dimension in DIMENSIONS:
+        keys.append((dimension, values.get(dimension) or ""))
+    return keys
+
+
+def _current_values(task):
+    values = {dimension: getattr(task, dimension) for dimension in DIMENSIONS}
+    values["cost"] = task.cost or 0.0
+    return values
+
+
+def _previous_values(task):
+    """Valores da tarefa antes das alterações pendentes; None se algum não estiver carregado."""
+    state = inspect(task)
+    values = {}
+    for name in DIMENSIONS + ("cost",):
+        history = state.attrs[name].history
+        if history.deleted:
+            values[name] = history.deleted[0]
+        elif history.unchanged:
+            values[name] = history.unchanged[0]
+        elif history.added:
+            # Atributo não estava carregado antes da alteração: valor antigo desconhecido
+            return None
+        else:
+            values[name] = getattr(task, name)
+    values["cost"] = values["cost"] or 0.0
+    return values
+
+
+def _add_delta(deltas, user_id, values, sign):
+    for key in _stat_keys(values):
+        count, cost = deltas.get((user_id,) + key, (0, 0.0))
+        deltas[(user_id,) + key] = (count + sign, cost + sign * values["cost"])
+
+
+def _collect_deltas(session, flush_context, instances):
+    deltas = session.info.setdefault("task_stat_deltas", {})
+    rebuild = session.info.setdefault("task_stat_rebuild", set())
+    for obj in session.new:
+        if isinstance(obj, Task):
+            _add_delta(deltas, obj.user_id, _current_values(obj), 1)
+    for obj in session.deleted:
+        if isinstance(obj, Task):
+            previous = _previous_values(obj)
+            if previous is None:
+                rebuild.add(obj.user_id)
+            else:
+                _add_delta(deltas, obj.user_id, previous, -1)
+    for obj in session.dirty:
+        if not isinstance(obj, Task) or not session.is_modified(obj):
+            continue
+        state = inspect(obj)
+        if not any(state.attrs[name].history.has_changes() for name in DIMENSIONS + ("cost",)):
+            continue
+        previous = _previous_values(obj)
+        if previous is None:
+            rebuild.add(obj.user_id)
+            continue
+        _add_delta(deltas, obj.user_id, previous, -1)
+        _add_delta(deltas, obj.user_id, _current_values(obj), 1)
+
+
+def _upsert_statement(dialect_name):
+    table = TaskStat.__table__
+    insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    statement = insert(table)
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.dimension, table.c.value],
+        set_={
+            "task_count": table.c.task_count + statement.excluded.task_count,
+            "total_cost": table.c.total_cost + statement.excluded.total_cost,
+        },
+    )
+
+
+def _apply_deltas(session, flush_context):
+    deltas = session.info.pop("task_stat_deltas", {})
+    rebuild = session.info.pop("task_stat_rebuild", set())
+    rows = [
+        {"user_id": user_id, "dimension": dimension, "value": value, "task_count": count, "total_cost": cost}
+        for (user_id, dimension, value), (count, cost) in deltas.items()
+        if (count or cost) and user_id not in rebuild
+    ]
+    connection = session.connection()
+    if rows:
+        connection.execute(_upsert_statement(connection.dialect.name), rows)
+    for user_id in rebuild:
+        rebuild_user_stats(user_id, connection)
+
+
+def init_app(app):
+    """Liga a manutenção incremental da tabela de resumo (ANALYTICS_SUMMARY_TABLE)."""
+    app.config.setdefault("ANALYTICS_SUMMARY_TABLE", True)
+    if app.config["ANALYTICS_SUMMARY_TABLE"] and not event.contains(db.session, "before_flush", _collect_deltas):
+        event.listen(db.session, "before_flush", _collect_deltas)
+        event.listen(db.session, "after_flush", _apply_deltas)
+    app.cli.add_command(analytics_cli)
+
+
+def _dimension_column(dimension):
+    # Vazio e NULL contam como o mesmo valor ("")
+    return db.func.coalesce(getattr(Task, dimension), "")
+
+
+def _grouped(query_filter, dimension):
+    column = _dimension_column(dimension)
+    return [
+        (value or "", count, cost or 0.0)
+        for value, count, cost in db.session.query(
+            column, db.func.count(Task.id), db.func.sum(Task.cost)
+        ).filter(*query_filter).group_by(column).order_by(db.func.count(Task.id).desc(), column)
+    ]
+
+
+def rebuild_user_stats(user_id, connection=None):
+    """Recalcula do zero as linhas de resumo de um usuário com consultas agrupadas."""
+    connection = connection or db.session.connection()
+    table = TaskStat.__table__
+    connection.execute(table.delete().where(table.c.user_id == user_id))
+    query_filter = (Task.user_id == user_id,)
+    count, cost = connection.execute(
+        db.select(db.func.count(Task.id), db.func.sum(Task.cost)).where(*query_filter)
+    ).one()
+    rows = [{"user_id": user_id, "dimension": "total", "value": "", "task_count": count, "total_cost": cost or 0.0}]
+    for dimension in DIMENSIONS:
+        column = _dimension_column(dimension)
+        for value, group_count, group_cost in connection.execute(
+            db.select(column, db.func.count(Task.id), db.func.sum(Task.cost)).where(*query_filter).group_by(column)
+        ):
+            rows.append({
+                "user_id": user_id,
+                "dimension": dimension,
+                "value": value or "",
+                "task_count": group_count,
+                "total_cost": group_cost or 0.0,
+            })
+    if count:
+        connection.execute(table.insert(), rows)
+
+
+def _lead_time_days():
+    """Expressão SQL com os dias entre a criação e a conclusão da tarefa."""
+    if db.engine.dialect.name == "postgresql":
+        return db.func.extract("epoch", db.cast(Task.completion_date, db.DateTime) - Task.creation_date) / 86400.0
+    return db.func.julianday(Task.completion_date) - db.func.julianday(Task.creation_date)
+
+
+def live_aggregates(user_id, task_ids=None, today=None):
+    """Indicadores exatos calculados no banco, para todas as tarefas ou só as selecionadas."""
+    today = today or date.today()
+    query_filter = [Task.user_id == user_id]
+    if task_ids is not None:
+        query_filter.append(Task.id.in_(task_ids))
+
+    count, total_cost = db.session.query(db.func.count(Task.id), db.func.sum(Task.cost)).filter(*query_filter).one()
+    aggregates = {
+        "count": count,
+        "total_cost": total_cost or 0.0,
+        "by_status": _grouped(query_filter, "status"),
+        "by_priority": _grouped(query_filter, "priority"),
+        "by_category": _grouped(query_filter, "category"),
+    }
+    aggregates.update(time_aggregates(query_filter, today))
+    return aggregates
+
+
+def time_aggregates(query_filter, today):
+    """Atrasos e tempos de conclusão dependem da data atual; sempre calculados na hora."""
+    overdue_filter = list(query_filter) + [
+        Task.due_date < today,
+        Task.completion_date.is_(None),
+        db.or_(Task.status.is_(None), Task.status != COMPLETED_STATUS),
+    ]
+    overdue_count, overdue_cost = db.session.query(
+        db.func.count(Task.id), db.func.sum(Task.cost)
+    ).filter(*overdue_filter).one()
+    overdue = db.session.query(Task.id, Task.task_name, Task.due_date, Task.cost).filter(
+        *overdue_filter
+    ).order_by(Task.due_date).limit(10).all()
+
+    lead_time = _lead_time_days()
+    completed, average, shortest, longest = db.session.query(
+        db.func.count(Task.id), db.func.avg(lead_time), db.func.min(lead_time), db.func.max(lead_time)
+    ).filter(*query_filter, Task.completion_date.isnot(None)).one()
+    return {
+        "overdue_count": overdue_count,
+        "overdue_cost": overdue_cost or 0.0,
+        "overdue": overdue,
+        "completed_count": completed,
+        "lead_time_avg": average,
+        "lead_time_min": shortest,
+        "lead_time_max": longest,
+    }
+
+
+def user_aggregates(user_id, today=None):
+    """Indicadores de todas as tarefas do usuário, lendo contagens da tabela de resumo quando ativa."""
+    if not current_app.config.get("ANALYTICS_SUMMARY_TABLE", True):
+        return live_aggregates(user_id, today=today)
+
+    rows = TaskStat.query.filter(TaskStat.user_id == user_id, TaskStat.task_count > 0).order_by(
+        TaskStat.task_count.desc(), TaskStat.value
+    ).all()
+    aggregates = {"count": 0, "total_cost": 0.0, "by_status": [], "by_priority": [], "by_category": []}
+    for row in rows:
+        if row.dimension == "total":
+            aggregates["count"] = row.task_count
+            aggregates["total_cost"] = row.total_cost
+        else:
+            aggregates[f"by_{row.dimension}"].append((row.value, row.task_count, row.total_cost))
+    aggregates.update(time_aggregates([Task.user_id == user_id], today or date.today()))
+    return aggregates
+
+
+def format_aggregates(aggregates):
+    """Texto com os indicadores para o prompt do relatório."""
+    lines = [
+        "### Indicadores\n\n",
+        "Números exatos: use-os como estão, sem recalcular.\n\n",
+        f"- **Tarefas:** {aggregates['count']}\n",
+        f"- **Custo total:** R${aggregates['total_cost']:.2f}\n",
+    ]
+    for title, key in (("Status", "by_status"), ("Prioridade", "by_priority"), ("Categoria", "by_category")):
+        parts = [f"{value or 'N/A'}: {count} (R${cost:.2f})" for value, count, cost in aggregates[key]]
+        lines.append(f"- **Por {title}:** {'; '.join(parts) if parts else 'N/A'}\n")
+    lines.append(f"- **Tarefas atrasadas:** {aggregates['overdue_count']} (R${aggregates['overdue_cost']:.2f})\n")
+    if aggregates["completed_count"]:
+        lines.append(
+            f"- **Tempo médio até a conclusão:** {aggregates['lead_time_avg']:.1f} dias "
+            f"(mínimo {aggregates['lead_time_min']:.1f}, máximo {aggregates['lead_time_max']:.1f}; "
+            f"{aggregates['completed_count']} tarefas concluídas)\n"
+        )
+    lines.append("\n")
+    return "".join(lines)
+
+
+@click.group("analytics", help="Indicadores das tarefas.")
+def analytics_cli():
+    pass
+
+
+@analytics_cli.command("rebuild")
+@with_appcontext
+def rebuild_command():
+    """Recalcula a tabela de resumo de todos os usuários."""
+    user_ids = [row.user_id for row in db.session.query(Task.user_id).distinct()]
+    db.session.query(TaskStat).delete()
+    for user_id in user_ids:
+        rebuild_user_stats(user_id)
+    db.session.commit()
+    click.echo(f"Resumo recalculado para {len(user_ids)} usuários.")
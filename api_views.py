@@ -0,0 +1,496 @@
+# api_views.py
+
+import secrets
+from collections import Counter
+from datetime import datetime
+import click
+from flask import Blueprint, current_app, g, jsonify, request, url_for
+from flask.cli import with_appcontext
+from sqlalchemy.exc import IntegrityError
+from werkzeug.exceptions import HTTPException
+from extensions import db
+from models import User, Task, Message, ApiToken
+from auth_views import api_login_required, hash_token
+from pagination import filtered_tasks, paginate_tasks, parse_page_size, parse_task_filters
+from chat_context import history_page
+from task_cache import task_cache
+import ordering
+import task_io
+
+# API JSON versionada. Autenticação por token (Authorization: Bearer) ou pela sessão do
+# navegador. Corpo e respostas em JSON; as datas usam dd/mm/yyyy, como na importação
+# e na exportação de tarefas.
+bp = Blueprint("api", __name__, url_prefix="/api/v1")
+
+TASK_FIELDS = ("id",) + task_io.FIELDS + ("display_order", "creation_date")
+# Sem os campos de texto longo (description e notes), como na listagem
+DEFAULT_TASK_FIELDS = ("id", "task_name", "cost", "due_date", "status", "priority", "category", "display_order")
+MESSAGE_FIELDS = ("id", "role", "content", "timestamp")
+MESSAGE_ROLES = ("user", "assistant")
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400, errors=None):
+        super().__init__(message)
+        self.status = status
+        self.errors = errors
+
+
+@bp.errorhandler(ApiError)
+def handle_api_error(error):
+    body = {"error": str(error)}
+    if error.errors:
+        body["errors"] = error.errors
+    return jsonify(body), error.status
+
+
+@bp.errorhandler(HTTPException)
+def handle_http_error(error):
+    # 404 de first_or_404, 405 etc. em JSON, não na página HTML padrão
+    return jsonify(error=error.description), error.code
+
+
+def _json_body(kind=dict):
+    """Corpo JSON da requisição. Exigir application/json também impede formulários de outros sites."""
+    if not request.is_json:
+        raise ApiError("Envie o corpo em JSON (Content-Type: application/json).", 415)
+    body = request.get_json(silent=True)
+    if not isinstance(body, kind):
+        raise ApiError("Corpo JSON inválido.")
+    return body
+
+
+def _batch_items(body):
+    items = body.get("items")
+    if not isinstance(items, list) or not items:
+        raise ApiError('Informe a lista "items".')
+    limit = current_app.config["API_BATCH_MAX"]
+    if len(items) > limit:
+        raise ApiError(f"No máximo {limit} itens por lote.")
+    return items
+
+
+def _batch_ids(items):
+    """Ids inteiros dos itens do lote; os demais recebem erro na validação de cada item."""
+    return [item["id"] for item in items if isinstance(item, dict) and _valid_id(item.get("id"))]
+
+
+def _valid_id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def parse_fields(allowed, default):
+    """Campos pedidos em ?fields=a,b; o id sempre vem na resposta."""
+    value = request.args.get("fields")
+    if not value:
+        return default
+    fields = [field.strip() for field in value.split(",") if field.strip()]
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ApiError(f"Campos desconhecidos: {', '.join(unknown)}.")
+    return ("id",) + tuple(field for field in fields if field != "id")
+
+
+def _value(value):
+    if isinstance(value, datetime):
+        return value.isoformat(timespec="seconds")
+    if hasattr(value, "strftime"):
+        return value.strftime(task_io.DATE_FORMAT)
+    return value
+
+
+def project(obj, fields):
+    return {field: _value(getattr(obj, field)) for field in fields}
+
+
+# Tarefas
+
+def _task_values(record, index=None):
+    """Valida com as regras do TaskForm (task_io.validate_row); campos desconhecidos são recusados."""
+    unknown = [field for field in record if field not in task_io.FIELDS]
+    error = f"campos desconhecidos: {', '.join(unknown)}." if unknown else None
+    values = None
+    if error is None:
+        values, error = task_io.validate_row(record)
+    if error and index is None:
+        raise ApiError(error[0].upper() + error[1:])
+    return values, error
+
+
+def _taken_names(names, exclude_ids=()):
+    """Nomes (entre `names`) já usados por outras tarefas do usuário."""
+    if not names:
+        return set()
+    query = db.session.query(Task.task_name).filter(Task.user_id == g.user_id, Task.task_name.in_(names))
+    if exclude_ids:
+        query = query.filter(Task.id.notin_(exclude_ids))
+    return {name for (name,) in query}
+
+
+def _new_name_errors(names):
+    """Erros dos itens cujo nome já existe no usuário ou repete um item anterior do lote."""
+    taken = _taken_names(names)
+    seen = set()
+    errors = []
+    for index, name in enumerate(names):
+        if name in taken or name in seen:
+            errors.append({"index": index, "error": f"nome da tarefa já existe: {name}."})
+        seen.add(name)
+    return errors
+
+
+def _commit_names(conflict):
+    """Confirma a transação. Um nome gravado por outra requisição depois da verificação
+    esbarra no índice único: desfaz tudo e responde com o erro da verificação, conflict()."""
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        raise conflict()
+
+
+def _name_taken():
+    return ApiError("Nome da tarefa já existe.", 409)
+
+
+def _check_batch(items, validate):
+    """Valida todos os itens antes de gravar; qualquer erro cancela o lote inteiro."""
+    results, errors = [], []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append({"index": index, "error": "item não é um objeto."})
+            continue
+        result, error = validate(item, index)
+        if error:
+            errors.append({"index": index, "error": error})
+        results.append(result)
+    if errors:
+        raise ApiError("Nenhum item foi gravado.", errors=errors)
+    return results
+
+
+def _new_task(values, display_order):
+    return Task(**values, display_order=display_order, creation_date=datetime.utcnow(), user_id=g.user_id)
+
+
+@bp.route("/tasks")
+@api_login_required
+def list_tasks():
+    """Tarefas na ordem da lista, com os filtros da listagem e paginação por cursor (?after=)."""
+    fields = parse_fields(TASK_FIELDS, DEFAULT_TASK_FIELDS)
+    version = task_cache.version(g.user_id)
+    etag = task_cache.etag(g.user_id, version, request.args, fields)
+    not_modified = task_cache.not_modified(etag)
+    if not_modified is not None:
+        return not_modified
+    # O cursor usa display_order e id, que sempre são carregados
+    columns = [getattr(Task, field) for field in dict.fromkeys(fields + ("display_order",))]
+    page = paginate_tasks(
+        filtered_tasks(g.user_id, parse_task_filters(request.args), columns),
+        after=request.args.get("after"),
+        per_page=parse_page_size(request.args),
+    )
+    response = jsonify(items=[project(task, fields) for task in page.items], next=page.next_cursor)
+    return task_cache.conditional(response, etag)
+
+
+@bp.route("/tasks/<int:task_id>")
+@api_login_required
+def get_task(task_id):
+    fields = parse_fields(TASK_FIELDS, TASK_FIELDS)
+    version = task_cache.version(g.user_id)
+    etag = task_cache.etag(g.user_id, version, request.args, task_id, fields)
+    not_modified = task_cache.not_modified(etag)
+    if not_modified is not None:
+        return not_modified
+    task = Task.query.filter_by(id=task_id, user_id=g.user_id).first_or_404()
+    return task_cache.conditional(jsonify(project(task, fields)), etag)
+
+
+@bp.route("/tasks", methods=["POST"])
+@api_login_required
+def create_task():
+    fields = parse_fields(TASK_FIELDS, ("id",))
+    values, _ = _task_values(_json_body())
+    if _taken_names([values["task_name"]]):
+        raise _name_taken()
+    task = _new_task(values, ordering.next_display_order(g.user_id))
+    db.session.add(task)
+    _commit_names(_name_taken)
+    response = jsonify(project(task, fields))
+    response.status_code = 201
+    response.headers["Location"] = url_for("api.get_task", task_id=task.id)
+    return response
+
+
+@bp.route("/tasks/<int:task_id>", methods=["PATCH"])
+@api_login_required
+def update_task(task_id):
+    fields = parse_fields(TASK_FIELDS, ("id",))
+    changes = _json_body()
+    task = Task.query.filter_by(id=task_id, user_id=g.user_id).first_or_404()
+    values, _ = _task_values({**task_io.task_record(task), **changes})
+    if values["task_name"] != task.task_name and _taken_names([values["task_name"]], [task.id]):
+        raise _name_taken()
+    _apply(task, values)
+    _commit_names(_name_taken)
+    return jsonify(project(task, fields))
+
+
+def _apply(obj, values):
+    # Só os campos que mudaram: o ORM grava apenas essas colunas
+    for field, value in values.items():
+        if getattr(obj, field) != value:
+            setattr(obj, field, value)
+
+
+@bp.route("/tasks/<int:task_id>", methods=["DELETE"])
+@api_login_required
+def delete_task(task_id):
+    task = Task.query.filter_by(id=task_id, user_id=g.user_id).first_or_404()
+    db.session.delete(task)
+    db.session.commit()
+    return "", 204
+
+
+@bp.route("/tasks/batch", methods=["POST"])
+@api_login_required
+def create_tasks():
+    """Cria várias tarefas em uma transação, no final da lista e na ordem enviada."""
+    items = _batch_items(_json_body())
+    rows = _check_batch(items, _task_values)
+    names = [values["task_name"] for values in rows]
+    errors = _new_name_errors(names)
+    if errors:
+        raise ApiError("Nenhum item foi gravado.", errors=errors)
+
+    def conflict():
+        # Depois do rollback, a mesma verificação já vê o nome gravado pela outra requisição
+        errors = _new_name_errors(names)
+        return ApiError("Nenhum item foi gravado.", errors=errors) if errors else _name_taken()
+
+    display_order = ordering.next_display_order(g.user_id)
+    tasks = [_new_task(values, display_order + index * ordering.GAP) for index, values in enumerate(rows)]
+    # Um único flush: INSERTs em lote, eventos do resumo, dos vetores e do cache uma vez por lote
+    db.session.add_all(tasks)
+    _commit_names(conflict)
+    return jsonify(ids=[task.id for task in tasks]), 201
+
+
+@bp.route("/tasks/batch", methods=["PATCH"])
+@api_login_required
+def update_tasks():
+    """Altera várias tarefas (cada item com "id" e os campos alterados) em uma transação."""
+    items = _batch_items(_json_body())
+    tasks = {task.id: task for task in Task.query.filter(Task.user_id == g.user_id, Task.id.in_(_batch_ids(items)))}
+
+    def validate(item, index):
+        if not _valid_id(item.get("id")):
+            return None, "id inválido: informe um número inteiro."
+        task = tasks.get(item["id"])
+        if task is None:
+            return None, f"tarefa não encontrada: {item.get('id')}."
+        changes = {field: value for field, value in item.items() if field != "id"}
+        values, error = _task_values({**task_io.task_record(task), **changes}, index)
+        return (task, values), error
+
+    updates = _check_batch(items, validate)
+    if len(tasks) != len(updates):
+        raise ApiError("A mesma tarefa aparece mais de uma vez no lote.")
+    # Nomes finais únicos: entre os itens do lote e contra as demais tarefas do usuário
+    counts = Counter(values["task_name"] for _, values in updates)
+    taken = _taken_names(list(counts), list(tasks))
+    errors = [
+        {"index": index, "error": f"nome da tarefa já existe: {values['task_name']}."}
+        for index, (task, values) in enumerate(updates)
+        if values["task_name"] in taken or counts[values["task_name"]] > 1
+    ]
+    if errors:
+        raise ApiError("Nenhum item foi gravado.", errors=errors)
+    for task, values in updates:
+        _apply(task, values)
+    # Troca de nomes entre tarefas do lote: o índice único é verificado a cada UPDATE
+    _commit_names(lambda: ApiError(
+        "Conflito de nomes entre as tarefas do lote; envie as trocas em lotes separados.", 409
+    ))
+    return jsonify(ids=[task.id for task, _ in updates])
+
+
+# Mensagens do chat
+
+def _message_values(record, index=None, partial=False):
+    unknown = [field for field in record if field not in ("content", "role")]
+    content = record.get("content")
+    role = record.get("role", "user")
+    error = None
+    if unknown:
+        error = f"campos desconhecidos: {', '.join(unknown)}."
+    elif (not partial or "content" in record) and (not isinstance(content, str) or not content.strip()):
+        error = "conteúdo é obrigatório."
+    elif role not in MESSAGE_ROLES:
+        error = f"papel inválido: {role}. Use user ou assistant."
+    if error and index is None:
+        raise ApiError(error[0].upper() + error[1:])
+    values = {field: record[field] for field in ("content", "role") if field in record}
+    if not partial:
+        values.setdefault("role", "user")
+    return values, error
+
+
+@bp.route("/messages")
+@api_login_required
+def list_messages():
+    """Histórico em ordem cronológica; "next" é o cursor (?before=) da página mais antiga."""
+    fields = parse_fields(MESSAGE_FIELDS, MESSAGE_FIELDS)
+    messages, older = history_page(g.user_id, request.args.get("before", type=int), parse_page_size(request.args))
+    return jsonify(items=[project(message, fields) for message in messages], next=older)
+
+
+@bp.route("/messages/<int:message_id>")
+@api_login_required
+def get_message(message_id):
+    message = Message.query.filter_by(id=message_id, user_id=g.user_id).first_or_404()
+    return jsonify(project(message, parse_fields(MESSAGE_FIELDS, MESSAGE_FIELDS)))
+
+
+@bp.route("/messages", methods=["POST"])
+@api_login_required
+def create_message():
+    """Grava uma mensagem no histórico (sem chamar a IA)."""
+    fields = parse_fields(MESSAGE_FIELDS, ("id",))
+    values, _ = _message_values(_json_body())
+    message = Message(user_id=g.user_id, **values)
+    db.session.add(message)
+    db.session.commit()
+    response = jsonify(project(message, fields))
+    response.status_code = 201
+    response.headers["Location"] = url_for("api.get_message", message_id=message.id)
+    return response
+
+
+@bp.route("/messages/<int:message_id>", methods=["PATCH"])
+@api_login_required
+def update_message(message_id):
+    fields = parse_fields(MESSAGE_FIELDS, ("id",))
+    values, _ = _message_values(_json_body(), partial=True)
+    message = Message.query.filter_by(id=message_id, user_id=g.user_id).first_or_404()
+    _apply(message, values)
+    db.session.commit()
+    return jsonify(project(message, fields))
+
+
+@bp.route("/messages/<int:message_id>", methods=["DELETE"])
+@api_login_required
+def delete_message(message_id):
+    message = Message.query.filter_by(id=message_id, user_id=g.user_id).first_or_404()
+    db.session.delete(message)
+    db.session.commit()
+    return "", 204
+
+
+@bp.route("/messages/batch", methods=["POST"])
+@api_login_required
+def create_messages():
+    items = _batch_items(_json_body())
+    rows = _check_batch(items, _message_values)
+    messages = [Message(user_id=g.user_id, **values) for values in rows]
+    db.session.add_all(messages)
+    db.session.commit()
+    return jsonify(ids=[message.id for message in messages]), 201
+
+
+@bp.route("/messages/batch", methods=["PATCH"])
+@api_login_required
+def update_messages():
+    items = _batch_items(_json_body())
+    messages = {
+        message.id: message
+        for message in Message.query.filter(Message.user_id == g.user_id, Message.id.in_(_batch_ids(items)))
+    }
+
+    def validate(item, index):
+        if not _valid_id(item.get("id")):
+            return None, "id inválido: informe um número inteiro."
+        message = messages.get(item["id"])
+        if message is None:
+            return None, f"mensagem não encontrada: {item.get('id')}."
+        values, error = _message_values({k: v for k, v in item.items() if k != "id"}, index, partial=True)
+        return (message, values), error
+
+    updates = _check_batch(items, validate)
+    for message, values in updates:
+        _apply(message, values)
+    db.session.commit()
+    return jsonify(ids=[message.id for message, _ in updates])
+
+
+# Tokens de acesso
+
+def create_token(user_id, name):
+    """Cria um token para o usuário; o valor só é conhecido agora (o banco guarda o hash)."""
+    value = secrets.token_urlsafe(32)
+    token = ApiToken(user_id=user_id, name=name, token_hash=hash_token(value))
+    db.session.add(token)
+    db.session.commit()
+    return token, value
+
+
+@bp.route("/tokens")
+@api_login_required
+def list_tokens():
+    tokens = ApiToken.query.filter_by(user_id=g.user_id).order_by(ApiToken.id).all()
+    return jsonify(items=[project(token, ("id", "name", "created_at")) for token in tokens])
+
+
+@bp.route("/tokens", methods=["POST"])
+@api_login_required
+def create_api_token():
+    name = str(_json_body().get("name") or "").strip()
+    if not name or len(name) > 100:
+        raise ApiError("Informe um nome de até 100 caracteres.")
+    token, value = create_token(g.user_id, name)
+    return jsonify(id=token.id, name=token.name, token=value), 201
+
+
+@bp.route("/tokens/<int:token_id>", methods=["DELETE"])
+@api_login_required
+def delete_api_token(token_id):
+    token = ApiToken.query.filter_by(id=token_id, user_id=g.user_id).first_or_404()
+    db.session.delete(token)
+    db.session.commit()
+    return "", 204
+
+
+def init_app(app):
+    app.config.setdefault("API_BATCH_MAX", 500)
+    app.cli.add_command(api_cli)
+
+
+@click.group("api", help="Tokens de acesso à API JSON.")
+def api_cli():
+    pass
+
+
+@api_cli.command("create-token")
+@click.option("--user", "username", required=True, help="Dono do token.")
+@click.option("--name", default="cli", help="Nome para identificar o token.")
+@with_appcontext
+def create_token_command(username, name):
+    """Cria um token e mostra o valor (ele não pode ser recuperado depois)."""
+    user = User.query.filter_by(username=username).first()
+    if user is None:
+        raise click.ClickException(f"Usuário não encontrado: {username}")
+    token, value = create_token(user.id, name)
+    click.echo(f"Token {token.id} ({name}): {value}")
+
+
+@api_cli.command("revoke-token")
+@click.argument("token_id", type=int)
+@with_appcontext
+def revoke_token_command(token_id):
+    token = db.session.get(ApiToken, token_id)
+    if token is None:
+        raise click.ClickException(f"Token não encontrado: {token_id}")
+    db.session.delete(token)
+    db.session.commit()
+    click.echo(f"Token {token_id} revogado.")
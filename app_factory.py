@@ -0,0 +1,119 @@
+# app_factory.py
+
+import os
+from datetime import datetime
+import click
+from flask import Flask
+from config import Config
+from extensions import db, jobs
+
+# Templates, arquivos estáticos e migrações ficam na raiz do projeto
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+BLUEPRINTS = (
+    "auth_views", "task_views", "report_views", "chat_views", "search_views", "metrics_views", "api_views",
+)
+
+
+def init_migrations(app):
+    """Registra o Flask-Migrate (e o comando "flask db") na aplicação."""
+    from flask_migrate import Migrate
+    import search
+
+    # O índice de busca é criado por SQL próprio e não aparece nos modelos
+    Migrate(app, db, directory=os.path.join(BASE_DIR, "migrations"), include_object=search.include_object)
+
+
+class LazyMigrateGroup(click.Group):
+    """Comando "flask db" que só importa o Flask-Migrate quando um subcomando é listado ou chamado."""
+
+    def __init__(self, app):
+        super().__init__("db", help="Migrações do banco (Flask-Migrate).")
+        self.app = app
+
+    def _migrate_group(self):
+        if "migrate" not in self.app.extensions:
+            init_migrations(self.app)
+        from flask_migrate.cli import db as group
+
+        return group
+
+    def list_commands(self, ctx):
+        return self._migrate_group().list_commands(ctx)
+
+    def get_command(self, ctx, name):
+        return self._migrate_group().get_command(ctx, name)
+
+
+def create_app(config=None):
+    """Cria a aplicação. `config` (dicionário) sobrescreve os valores de config.Config.
+
+    Nada aqui conecta ao banco nem carrega o SDK da IA: o esquema é criado com
+    "flask db upgrade" e o Gemini só é importado na primeira chamada à IA.
+    """
+    app = Flask(
+        __name__,
+        template_folder=os.path.join(BASE_DIR, "templates"),
+        static_folder=os.path.join(BASE_DIR, "static"),
+    )
+    app.config.from_object(Config)
+    if config:
+        app.config.update(config)
+
+    import search
+    import metrics
+    import engine_profiles
+
+    # O perfil entra nas opções da engine, criada por db.init_app
+    engine_profiles.init_app(app)
+    db.init_app(app)
+    engine_profiles.configure_engines(app)
+    # Primeiro, para que o tempo das requisições inclua os demais before_request
+    metrics.init_app(app)
+    # Flask-Migrate importa o alembic inteiro: nos processos web ele não é carregado, e o
+    # "flask db" o carrega só quando é chamado. MIGRATIONS_ENABLED carrega já na criação,
+    # para scripts e testes que chamam flask_migrate.upgrade() diretamente
+    if app.config["MIGRATIONS_ENABLED"]:
+        init_migrations(app)
+    else:
+        app.cli.add_command(LazyMigrateGroup(app))
+    jobs.init_app(app)
+
+    from llm import llm_gateway
+    from llm_cache import response_cache
+    import analytics
+    import task_io
+    import api_views
+    import message_archive
+    from semantic import semantic_index
+    from async_db import async_db
+    from task_cache import task_cache
+    from task_feed import task_feed
+    from fragment_cache import fragment_cache
+    from auth_guard import auth_guard
+
+    llm_gateway.init_app(app)
+    response_cache.init_app(app)
+    analytics.init_app(app)
+    task_io.init_app(app)
+    api_views.init_app(app)
+    message_archive.init_app(app)
+    search.init_app(app)
+    semantic_index.init_app(app)
+    async_db.init_app(app)
+    task_cache.init_app(app)
+    # Depois do task_cache, que aumenta a versão da lista no mesmo flush
+    task_feed.init_app(app)
+    fragment_cache.init_app(app)
+    auth_guard.init_app(app)
+
+    for module_name in BLUEPRINTS:
+        module = __import__(module_name)
+        app.register_blueprint(module.bp)
+
+    # Função para injetar o ano atual no contexto do template
+    @app.context_processor
+    def inject_current_year():
+        return {'current_year': datetime.utcnow().year}
+
+    return app
@@ -0,0 +1,256 @@
+# asgi.py
+
+import asyncio
+import io
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import Response
+from werkzeug.exceptions import RequestEntityTooLarge
+import async_views
+
+# Rotas da IA e o feed da lista de tarefas atendidos por handlers assíncronos; o resto continua no Flask (WSGI), em threads
+ASYNC_ROUTES = {
+    ("POST", "/chat"): async_views.chat,
+    ("POST", "/chat/stream"): async_views.chat_stream,
+    ("GET", "/feed"): async_views.task_feed_stream,
+}
+
+
+def build_environ(scope, body):
+    """Monta o environ WSGI de uma requisição ASGI com o corpo já lido."""
+    script_name = scope.get("root_path", "")
+    path = scope["path"]
+    if script_name and path.startswith(script_name):
+        path = path[len(script_name):]
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": script_name.encode("utf8").decode("latin1"),
+        "PATH_INFO": path.encode("utf8").decode("latin1"),
+        "QUERY_STRING": scope["query_string"].decode("ascii"),
+        "SERVER_PROTOCOL": f"HTTP/{scope['http_version']}",
+        "SERVER_NAME": scope["server"][0] if scope.get("server") else "localhost",
+        "SERVER_PORT": str(scope["server"][1]) if scope.get("server") else "80",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+        # Marca as requisições vindas do modo ASGI (ver TaskFeed.streams)
+        "asgi.scope": scope,
+    }
+    if scope.get("client"):
+        environ["REMOTE_ADDR"] = scope["client"][0]
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin1").upper().replace("-", "_")
+        if name not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            name = "HTTP_" + name
+        value = value.decode("latin1")
+        environ[name] = f"{environ[name]},{value}" if name in environ else value
+    # O corpo já foi lido inteiro: o tamanho é conhecido mesmo em requisições "chunked"
+    environ["CONTENT_LENGTH"] = str(len(body))
+    return environ
+
+
+async def read_body(scope, receive, limit=None):
+    """Lê o corpo inteiro; None se o cliente desconectar.
+
+    Com `limit` (MAX_CONTENT_LENGTH), corpos maiores geram RequestEntityTooLarge sem
+    serem guardados: pelo Content-Length, antes de ler, ou ao passar do limite.
+    """
+    if limit is not None:
+        for name, value in scope.get("headers", []):
+            if name.lower() == b"content-length" and value.isdigit() and int(value) > limit:
+                raise RequestEntityTooLarge()
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if limit is not None and size > limit:
+            raise RequestEntityTooLarge()
+        chunks.append(chunk)
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+def _encode(headers):
+    return [(name.lower().encode("latin1"), value.encode("latin1")) for name, value in headers]
+
+
+async def _send_response(response, send):
+    """Envia uma resposta pronta (sem passar pelo Flask)."""
+    headers = _encode(response.headers.items())
+    await send({"type": "http.response.start", "status": response.status_code, "headers": headers})
+    await send({"type": "http.response.body", "body": response.get_data()})
+
+
+class AsgiApp:
+    """Entrada ASGI (uvicorn) da aplicação Flask.
+
+    As rotas de ASYNC_ROUTES rodam no event loop: a espera pela IA não ocupa thread
+    nem processo, então muitas respostas em andamento não atrasam as páginas. As
+    demais rotas rodam sem mudança no Flask, em um pool de ASGI_WSGI_THREADS threads.
+
+    O corpo das requisições é lido inteiro antes de chamar a aplicação, até
+    MAX_CONTENT_LENGTH bytes (acima disso, 413). Respostas WSGI em partes passam por
+    uma fila de ASGI_STREAM_BUFFER partes: a thread do Flask espera enquanto o
+    cliente não recebe as anteriores.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        app.config.setdefault("ASGI_WSGI_THREADS", 16)
+        app.config.setdefault("ASGI_STREAM_BUFFER", 16)
+        app.config.setdefault("MAX_CONTENT_LENGTH", 16 * 1024 * 1024)
+        self.executor = ThreadPoolExecutor(max_workers=app.config["ASGI_WSGI_THREADS"], thread_name_prefix="wsgi")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        try:
+            body = await read_body(scope, receive, self.app.config["MAX_CONTENT_LENGTH"])
+        except RequestEntityTooLarge as e:
+            await _send_response(e.get_response(), send)
+            return
+        if body is None:
+            return
+        environ = build_environ(scope, body)
+        handler = ASYNC_ROUTES.get((environ["REQUEST_METHOD"], environ["PATH_INFO"]))
+        if handler is None:
+            await self._call_wsgi(environ, send)
+        else:
+            await self._call_async(handler, environ, receive, send)
+
+    async def _lifespan(self, receive, send):
+        from async_db import async_db
+
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await async_db.dispose()
+                self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _call_async(self, handler, environ, receive, send):
+        """Roda o handler dentro de um request context do Flask, como em Flask.full_dispatch_request.
+
+        Sessão, flash, before/after_request e métricas funcionam como nas rotas síncronas.
+        Respostas com `async_body` (gerador assíncrono de str) são enviadas em partes.
+        """
+        app = self.app
+        with app.request_context(environ):
+            try:
+                try:
+                    rv = app.preprocess_request()
+                    if rv is None:
+                        rv = await handler()
+                except Exception as e:
+                    rv = app.handle_user_exception(e)
+                response = app.finalize_request(rv)
+            except Exception as e:
+                response = app.handle_exception(e)
+            body = getattr(response, "async_body", None)
+            headers = _encode(response.headers.items())
+            await send({"type": "http.response.start", "status": response.status_code, "headers": headers})
+            if body is None:
+                await send({"type": "http.response.body", "body": response.get_data()})
+            else:
+                await self._send_stream(body, receive, send)
+
+    async def _send_stream(self, body, receive, send):
+        """Envia as partes de um gerador assíncrono; se o cliente desconectar, fecha o gerador."""
+        disconnected = asyncio.Event()
+
+        async def watch():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected.set()
+
+        watcher = asyncio.create_task(watch())
+        try:
+            async for chunk in body:
+                if disconnected.is_set():
+                    break
+                await send({"type": "http.response.body", "body": chunk.encode("utf-8"), "more_body": True})
+            else:
+                await send({"type": "http.response.body", "body": b""})
+        except OSError:
+            # Conexão encerrada durante o envio
+            pass
+        finally:
+            await body.aclose()
+            watcher.cancel()
+
+    async def _call_wsgi(self, environ, send):
+        """Roda o Flask em uma thread do pool e repassa status, cabeçalhos e corpo ao servidor ASGI."""
+        loop = asyncio.get_running_loop()
+        # Fila limitada: se o cliente lê devagar, a thread do Flask espera em vez de acumular o corpo em memória
+        queue = asyncio.Queue(self.app.config["ASGI_STREAM_BUFFER"])
+        closed = threading.Event()
+
+        def put(*item):
+            """Entrega um item ao event loop, esperando por espaço na fila; False se o envio foi interrompido."""
+            if closed.is_set():
+                return False
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+            return True
+
+        def run():
+            def start_response(status, headers, exc_info=None):
+                put("start", int(status.split(" ", 1)[0]), headers)
+                return lambda data: put("body", data)
+
+            try:
+                result = self.app.wsgi_app(environ, start_response)
+                try:
+                    for chunk in result:
+                        if chunk and not put("body", chunk):
+                            break
+                finally:
+                    if hasattr(result, "close"):
+                        result.close()
+            finally:
+                put("end")
+
+        future = loop.run_in_executor(self.executor, run)
+        started = False
+        try:
+            while True:
+                item = await queue.get()
+                if item[0] == "start":
+                    status, headers = item[1], item[2]
+                elif item[0] == "body":
+                    if not started:
+                        await send({"type": "http.response.start", "status": status, "headers": _encode(headers)})
+                        started = True
+                    await send({"type": "http.response.body", "body": item[1], "more_body": True})
+                else:
+                    break
+        except BaseException:
+            # Envio interrompido: libera a thread que espera por espaço na fila e encerra o gerador
+            closed.set()
+            while not queue.empty():
+                queue.get_nowait()
+            raise
+        try:
+            await future
+        except Exception:
+            self.app.logger.exception("Erro na aplicação WSGI")
+            if not started:
+                response = Response("Erro interno.", status=500)
+                status, headers = response.status_code, list(response.headers.items())
+        if not started:
+            await send({"type": "http.response.start", "status": status, "headers": _encode(headers)})
+        await send({"type": "http.response.body", "body": b""})
@@ -0,0 +1,115 @@
+# async_db.py
+
+import asyncio
+import threading
+from extensions import db
+import engine_profiles
+
+# Driver assíncrono de cada banco suportado
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+
+def async_database_uri(uri):
+    """Troca o driver da URI síncrona pelo assíncrono; None se o banco não tem driver assíncrono.
+
+    SQLite em memória também fica de fora: uma segunda engine abriria outro banco vazio.
+    """
+    scheme, separator, rest = uri.partition("://")
+    dialect = scheme.split("+")[0]
+    if not separator or dialect not in ASYNC_DRIVERS:
+        return None
+    if dialect == "sqlite" and rest.strip("/") in ("", ":memory:"):
+        return None
+    return f"{ASYNC_DRIVERS[dialect]}://{rest}"
+
+
+class AsyncDatabase:
+    """Sessões assíncronas do SQLAlchemy para as rotas do modo ASGI (ver asgi.py).
+
+    Configuração:
+    - ASYNC_DATABASE_URI: URI com driver assíncrono; por padrão derivada de
+      SQLALCHEMY_DATABASE_URI (sqlite+aiosqlite, postgresql+asyncpg);
+    - o perfil da engine (engine_profiles.py) vale também aqui.
+
+    Sem driver assíncrono, as operações rodam em uma thread com db.session, com o
+    mesmo resultado. Eventos de sessão (analytics, semantic) não valem aqui: use só
+    para modelos que não dependem deles, como Message.
+    """
+
+    def __init__(self, app=None):
+        self.config = {}
+        self._sessionmaker = None
+        self._engine = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if not app.config.get("ASYNC_DATABASE_URI"):
+            app.config["ASYNC_DATABASE_URI"] = async_database_uri(app.config["SQLALCHEMY_DATABASE_URI"])
+        self.config = app.config
+        self._sessionmaker = None
+        self._engine = None
+        app.extensions["async_db"] = self
+
+    @property
+    def enabled(self):
+        return bool(self.config.get("ASYNC_DATABASE_URI"))
+
+    @property
+    def sessionmaker(self):
+        """async_sessionmaker criado na primeira chamada; o SQLAlchemy assíncrono (greenlet) só é importado aqui."""
+        if self._sessionmaker is None:
+            with self._lock:
+                if self._sessionmaker is None:
+                    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+                    options = {
+                        **engine_profiles.engine_options(self.config, is_async=True),
+                        **self.config.get("ASYNC_ENGINE_OPTIONS", {}),
+                    }
+                    self._engine = create_async_engine(self.config["ASYNC_DATABASE_URI"], **options)
+                    engine_profiles.configure_engine(self._engine.sync_engine, self.config)
+                    self._sessionmaker = async_sessionmaker(self._engine, expire_on_commit=False)
+        return self._sessionmaker
+
+    async def add(self, *instances):
+        """Grava os objetos em uma transação; ao retornar, os ids e defaults já estão preenchidos."""
+        if not self.enabled:
+            await asyncio.to_thread(self._add_sync, instances)
+            return
+        async with self.sessionmaker() as session:
+            session.add_all(instances)
+            await session.commit()
+
+    def _add_sync(self, instances):
+        db.session.add_all(instances)
+        db.session.commit()
+        for instance in instances:
+            db.session.refresh(instance)
+            db.session.expunge(instance)
+
+    async def run_sync(self, fn, *args):
+        """Roda código síncrono que usa db.session em uma thread, com o mesmo app/request context.
+
+        A sessão é fechada ao final: nenhuma transação (nem trava de leitura do SQLite)
+        fica aberta enquanto a requisição aguarda a IA.
+        """
+        def call():
+            try:
+                return fn(*args)
+            finally:
+                db.session.close()
+
+        return await asyncio.to_thread(call)
+
+    async def dispose(self):
+        if self._engine is not None:
+            await self._engine.dispose()
+
+
+async_db = AsyncDatabase()
@@ -0,0 +1,124 @@
+# async_views.py
+
+import asyncio
+from flask import Response, current_app, flash, jsonify, redirect, request, session, url_for
+from extensions import jobs
+from models import Message
+from streaming import sse_event, SSE_HEADERS
+from llm_cache import response_cache
+from llm import llm_gateway
+from chat_context import build_chat_prompt, refresh_summary
+from async_db import async_db
+from task_cache import task_cache
+from task_feed import task_feed, feed_since
+
+# Versões assíncronas das rotas do chat (chat_views.py) e do feed da lista de tarefas
+# (task_views.feed), usadas no modo ASGI (asgi.py).
+# A chamada à IA e as gravações de mensagens não ocupam thread; a montagem do prompt e
+# o cache de respostas, que usam db.session, rodam em uma thread (async_db.run_sync).
+
+ERROR_REPLY = "Desculpe, ocorreu um erro ao processar sua solicitação."
+
+
+def _login_redirect():
+    flash("Por favor, faça login primeiro.", "warning")
+    return redirect(url_for("auth.login"))
+
+
+async def _save_reply(user_id, content):
+    ai_message = Message(user_id=user_id, content=content, role="assistant")
+    await async_db.add(ai_message)
+    # Mensagens que saíram da janela recente entram no resumo, em segundo plano
+    await async_db.run_sync(jobs.submit, refresh_summary, user_id)
+    return ai_message.id
+
+
+async def chat():
+    """POST /chat: mesmo comportamento da rota síncrona."""
+    if "user_id" not in session:
+        return _login_redirect()
+    user_id = session["user_id"]
+    user_message = request.form.get("message")
+    if user_message:
+        message = Message(user_id=user_id, content=user_message, role="user")
+        await async_db.add(message)
+        try:
+            prompt = await async_db.run_sync(build_chat_prompt, message)
+            model_name = llm_gateway.model_name
+            ai_response = await async_db.run_sync(response_cache.get, model_name, prompt)
+            if ai_response is None:
+                ai_response = await llm_gateway.agenerate(prompt, user_id=user_id)
+                await async_db.run_sync(response_cache.set, model_name, prompt, ai_response)
+        except Exception as e:
+            current_app.logger.error(f"Erro ao gerar a resposta: {e}")
+            flash("Erro ao gerar a resposta. Verifique sua chave de API e tente novamente.", "danger")
+            ai_response = ERROR_REPLY
+        await _save_reply(user_id, ai_response)
+    return redirect(url_for("chat.chat"))
+
+
+async def chat_stream():
+    """POST /chat/stream: a resposta da IA em Server-Sent Events, com os mesmos eventos da rota síncrona."""
+    if "user_id" not in session:
+        return _login_redirect()
+    user_message = (request.form.get("message") or "").strip()
+    if not user_message:
+        return jsonify(error="Mensagem vazia."), 400
+
+    # Salvar a mensagem do usuário antes de chamar a API
+    user_id = session["user_id"]
+    message = Message(user_id=user_id, content=user_message, role="user")
+    await async_db.add(message)
+    prompt = await async_db.run_sync(build_chat_prompt, message)
+    model_name = llm_gateway.model_name
+    logger = current_app.logger
+
+    async def events():
+        # Primeiro evento sai imediatamente, antes da primeira parte da resposta
+        yield sse_event({"id": message.id}, event="start")
+        cached = await async_db.run_sync(response_cache.get, model_name, prompt)
+        if cached is not None:
+            yield sse_event({"text": cached})
+            yield sse_event({"id": await _save_reply(user_id, cached)}, event="done")
+            return
+        parts = []
+        stream = llm_gateway.astream(prompt, user_id=user_id)
+        try:
+            async for chunk in stream:
+                parts.append(chunk)
+                yield sse_event({"text": chunk})
+        except GeneratorExit:
+            # Navegador desconectou: guarda o que já foi gerado
+            if parts:
+                await _save_reply(user_id, "".join(parts))
+            raise
+        except Exception as e:
+            logger.error(f"Erro ao gerar a resposta: {e}")
+            yield sse_event({"text": ERROR_REPLY}, event="error")
+            yield sse_event({"id": await _save_reply(user_id, ERROR_REPLY)}, event="done")
+            return
+        finally:
+            # Libera já as vagas de concorrência da IA, sem esperar o coletor de lixo
+            await stream.aclose()
+        # A resposta completa é gravada uma única vez, ao final do streaming
+        ai_response = "".join(parts)
+        await async_db.run_sync(response_cache.set, model_name, prompt, ai_response)
+        yield sse_event({"id": await _save_reply(user_id, ai_response)}, event="done")
+
+    response = Response(mimetype="text/event-stream", headers=SSE_HEADERS)
+    response.async_body = events()
+    return response
+
+
+async def task_feed_stream():
+    """GET /feed: o feed da lista de tarefas; cada conexão aberta não ocupa uma thread."""
+    if "user_id" not in session:
+        return _login_redirect()
+    if not task_feed.enabled:
+        return "", 204
+    user_id = session["user_id"]
+    subscriber = task_feed.subscribe(user_id, loop=asyncio.get_running_loop())
+    current = await async_db.run_sync(task_cache.version, user_id)
+    response = Response(mimetype="text/event-stream", headers=SSE_HEADERS)
+    response.async_body = task_feed.astream(subscriber, feed_since(request), current)
+    return response
@@ -0,0 +1,262 @@
+# auth_guard.py
+
+import math
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+from flask import request
+from werkzeug.security import generate_password_hash, check_password_hash
+from extensions import db
+from models import User
+from llm_cache import LRUCache
+import metrics
+
+# Usuário guardado no cache do login: só as colunas usadas para conferir a senha
+CachedUser = namedtuple("CachedUser", "id username password")
+# Nome sem conta: guardado também, para que tentativas repetidas não consultem o banco
+MISSING = CachedUser(None, None, None)
+
+
+class ThrottledError(Exception):
+    """Tentativa recusada antes de calcular o hash: limite de tentativas ou de hashes simultâneos."""
+
+    def __init__(self, retry_after, message=None):
+        super().__init__(message or f"Muitas tentativas. Tente novamente em {retry_after} segundos.")
+        self.retry_after = retry_after
+
+
+class LocalBuckets:
+    """Baldes de fichas em memória: cada processo aplica os limites sozinho."""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate):
+        """Tira uma ficha do balde `key` (até `capacity` fichas, `rate` novas por segundo).
+
+        Retorna 0 se havia ficha, senão os segundos até a próxima.
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            # Baldes esquecidos voltam cheios: os mais antigos são os que já teriam se enchido
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class RedisBuckets:
+    """Baldes compartilhados entre processos e instâncias. O cliente redis só é importado aqui."""
+
+    SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+    local tokens = tonumber(state[1]) or capacity
+    local updated = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+    local wait = 0
+    if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return tostring(wait)
+    """
+
+    def __init__(self, url):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self._take = self.client.register_script(self.SCRIPT)
+
+    def take(self, key, capacity, rate):
+        return float(self._take(keys=[key], args=[capacity, rate, time.time()]))
+
+    def clear(self):
+        for key in self.client.scan_iter("auth:*"):
+            self.client.delete(key)
+
+
+BACKENDS = {"local": LocalBuckets, "redis": RedisBuckets}
+
+
+class AuthGuard:
+    """Limita o custo de CPU da autenticação por senha (login e registro).
+
+    Cada tentativa tira uma ficha do balde do IP e, no login, do balde do nome de
+    usuário naquele IP, antes de qualquer hash: um ataque de força bruta ou de
+    credenciais vazadas recebe 429 em vez de ocupar os workers calculando hashes,
+    sem bloquear o dono da conta, que entra de outro endereço. Os hashes
+    também têm um número máximo por processo. Senhas gravadas com outro método ou
+    custo são refeitas no próximo login correto.
+
+    Configuração:
+    - AUTH_THROTTLE_ENABLED: liga os limites de tentativas;
+    - AUTH_THROTTLE_BACKEND: "local" (por processo), "redis" (AUTH_THROTTLE_REDIS_URL)
+      ou um objeto com take(key, capacity, rate);
+    - AUTH_IP_BURST e AUTH_IP_PER_MINUTE: tentativas seguidas e por minuto de cada IP
+      (maiores que zero);
+    - AUTH_USER_BURST e AUTH_USER_PER_MINUTE: o mesmo para cada nome de usuário em cada IP
+      no login;
+    - AUTH_PROXY_COUNT: proxies confiáveis à frente da aplicação; com 1 ou mais, o IP
+      vem do X-Forwarded-For;
+    - AUTH_HASH_METHOD: método do Werkzeug com o custo ("pbkdf2:sha256:600000",
+      "scrypt:32768:8:1"...);
+    - AUTH_HASH_CONCURRENCY e AUTH_HASH_WAIT: hashes simultâneos por processo e
+      segundos de espera por uma vaga;
+    - AUTH_USER_CACHE_SIZE, AUTH_USER_CACHE_TTL e AUTH_MISSING_USER_TTL: usuários
+      guardados para o login e validade (em segundos) dos existentes e dos inexistentes.
+    """
+
+    def __init__(self, app=None):
+        self.config = {}
+        self.users = LRUCache()
+        self._backend = None
+        self._hash_slots = None
+        self._method_prefix = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("AUTH_THROTTLE_ENABLED", True)
+        app.config.setdefault("AUTH_THROTTLE_BACKEND", "local")
+        app.config.setdefault("AUTH_IP_BURST", 20)
+        app.config.setdefault("AUTH_IP_PER_MINUTE", 10)
+        app.config.setdefault("AUTH_USER_BURST", 5)
+        app.config.setdefault("AUTH_USER_PER_MINUTE", 5)
+        app.config.setdefault("AUTH_PROXY_COUNT", 0)
+        app.config.setdefault("AUTH_HASH_METHOD", "pbkdf2:sha256:600000")
+        app.config.setdefault("AUTH_HASH_CONCURRENCY", 2)
+        app.config.setdefault("AUTH_HASH_WAIT", 5.0)
+        app.config.setdefault("AUTH_USER_CACHE_SIZE", 10000)
+        app.config.setdefault("AUTH_USER_CACHE_TTL", 300)
+        app.config.setdefault("AUTH_MISSING_USER_TTL", 5)
+        for name in ("AUTH_IP_BURST", "AUTH_IP_PER_MINUTE", "AUTH_USER_BURST", "AUTH_USER_PER_MINUTE"):
+            # Sem fichas novas o balde nunca calcularia a espera: para desligar os limites, AUTH_THROTTLE_ENABLED
+            if not app.config[name] > 0:
+                raise ValueError(f"{name} deve ser maior que zero.")
+        self.config = app.config
+        self.users = LRUCache(app.config["AUTH_USER_CACHE_SIZE"])
+        self._backend = None
+        self._hash_slots = threading.BoundedSemaphore(app.config["AUTH_HASH_CONCURRENCY"])
+        self._method_prefix = None
+        app.extensions["auth_guard"] = self
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    backend = self.config.get("AUTH_THROTTLE_BACKEND") or "local"
+                    if backend == "redis":
+                        backend = RedisBuckets(self.config["AUTH_THROTTLE_REDIS_URL"])
+                    elif isinstance(backend, str):
+                        backend = BACKENDS[backend]()
+                    self._backend = backend
+        return self._backend
+
+    @backend.setter
+    def backend(self, value):
+        self._backend = value
+
+    def client_ip(self):
+        """IP do cliente: o adicionado ao X-Forwarded-For pelo proxy confiável mais distante."""
+        count = self.config.get("AUTH_PROXY_COUNT", 0)
+        if count:
+            forwarded = [part.strip() for part in request.headers.get("X-Forwarded-For", "").split(",") if part.strip()]
+            if len(forwarded) >= count:
+                return forwarded[-count]
+        return request.remote_addr or "-"
+
+    def throttle(self, username=None):
+        """Gasta uma ficha do IP (e do nome de usuário nesse IP, se informado); ThrottledError se acabaram."""
+        if not self.config.get("AUTH_THROTTLE_ENABLED", True):
+            return
+        ip = self.client_ip()
+        limits = [("ip", ip, self.config["AUTH_IP_BURST"], self.config["AUTH_IP_PER_MINUTE"])]
+        if username is not None:
+            # Por nome e IP: tentativas de outros endereços não bloqueiam o login do dono da conta
+            user_burst, user_per_minute = self.config["AUTH_USER_BURST"], self.config["AUTH_USER_PER_MINUTE"]
+            limits.append(("user", f"{username}:{ip}", user_burst, user_per_minute))
+        for kind, value, burst, per_minute in limits:
+            wait = self.backend.take(f"auth:{kind}:{value}", burst, per_minute / 60)
+            if wait:
+                metrics.AUTH_ATTEMPTS.inc(f"throttled_{kind}")
+                raise ThrottledError(math.ceil(wait))
+
+    @contextmanager
+    def _hash_slot(self):
+        if not self._hash_slots.acquire(timeout=self.config.get("AUTH_HASH_WAIT", 5.0)):
+            metrics.AUTH_ATTEMPTS.inc("busy")
+            raise ThrottledError(1, "Servidor ocupado. Tente novamente em instantes.")
+        try:
+            yield
+        finally:
+            self._hash_slots.release()
+
+    def hash_password(self, password):
+        with self._hash_slot():
+            return generate_password_hash(password, self.config.get("AUTH_HASH_METHOD", "pbkdf2:sha256:600000"))
+
+    def check_password(self, stored, password):
+        with self._hash_slot():
+            return check_password_hash(stored, password)
+
+    def needs_rehash(self, stored):
+        """O hash gravado usa outro método ou custo que o de AUTH_HASH_METHOD."""
+        if self._method_prefix is None:
+            # O Werkzeug completa o método ("pbkdf2" vira "pbkdf2:sha256:600000"): o prefixo vem de um hash real
+            self._method_prefix = self.hash_password("").split("$", 1)[0]
+        return stored.split("$", 1)[0] != self._method_prefix
+
+    def lookup(self, username):
+        """Usuário pelo nome, do cache ou do banco; MISSING se não existe."""
+        cached = self.users.get(username)
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+        row = db.session.query(User.id, User.username, User.password).filter(User.username == username).first()
+        user = CachedUser(*row) if row is not None else MISSING
+        ttl = self.config["AUTH_USER_CACHE_TTL"] if row is not None else self.config["AUTH_MISSING_USER_TTL"]
+        self.users.set(username, (user, time.monotonic() + ttl))
+        return user
+
+    def forget(self, username):
+        """Tira o usuário do cache deste processo (depois de criar a conta ou trocar o hash)."""
+        self.users.delete(username)
+
+    def authenticate(self, username, password):
+        """Confere o login e retorna o CachedUser, ou None. ThrottledError antes do hash, se for o caso."""
+        self.throttle(username)
+        user = self.lookup(username)
+        if user is MISSING or not self.check_password(user.password, password):
+            metrics.AUTH_ATTEMPTS.inc("failed")
+            return None
+        if self.needs_rehash(user.password):
+            # Só troca se o hash ainda é o conferido: outro login pode ter refeito antes
+            db.session.execute(
+                db.update(User).where(User.id == user.id, User.password == user.password)
+                .values(password=self.hash_password(password))
+            )
+            db.session.commit()
+            self.forget(username)
+            metrics.AUTH_ATTEMPTS.inc("rehashed")
+        metrics.AUTH_ATTEMPTS.inc("ok")
+        return user
+
+
+auth_guard = AuthGuard()
@@ -0,0 +1,104 @@
+# auth_views.py
+
+import hashlib
+from functools import wraps
+from flask import Blueprint, render_template, redirect, url_for, flash, session, request, jsonify, g, make_response
+from extensions import db
+from forms import RegistrationForm, LoginForm
+from models import User, ApiToken
+from auth_guard import auth_guard, ThrottledError
+
+bp = Blueprint("auth", __name__)
+
+# Decorador para verificar se o usuário está logado
+def login_required(f):
+    @wraps(f)
+    def wrap(*args, **kwargs):
+        if "user_id" in session:
+            return f(*args, **kwargs)
+        else:
+            flash("Por favor, faça login primeiro.", "warning")
+            return redirect(url_for("auth.login"))
+    return wrap
+
+def hash_token(token):
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+def token_user_id():
+    """Usuário do cabeçalho "Authorization: Bearer <token>", ou None se o token não existe."""
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token.strip():
+        return None
+    return db.session.query(ApiToken.user_id).filter(ApiToken.token_hash == hash_token(token.strip())).scalar()
+
+# Decorador da API: aceita token (integrações) ou a sessão do navegador; sem login responde 401 em JSON
+def api_login_required(f):
+    @wraps(f)
+    def wrap(*args, **kwargs):
+        user_id = token_user_id() if "Authorization" in request.headers else session.get("user_id")
+        if user_id is None:
+            response = jsonify(error="Autenticação necessária.")
+            response.status_code = 401
+            response.headers["WWW-Authenticate"] = "Bearer"
+            return response
+        g.user_id = user_id
+        return f(*args, **kwargs)
+    return wrap
+
+def _throttled(template, form, error):
+    # 429 com a página do formulário; nenhum hash foi calculado
+    flash(str(error), "danger")
+    response = make_response(render_template(template, form=form), 429)
+    response.headers["Retry-After"] = str(error.retry_after)
+    return response
+
+# Rotas de Autenticação
+@bp.route("/register", methods=["GET", "POST"])
+def register():
+    # Se o usuário já estiver logado, redireciona para a lista de tarefas
+    if "user_id" in session:
+        return redirect(url_for("tasks.index"))
+
+    form = RegistrationForm()
+    if form.validate_on_submit():
+        try:
+            auth_guard.throttle()
+            hashed_password = auth_guard.hash_password(form.password.data)
+        except ThrottledError as e:
+            return _throttled("register.html", form, e)
+        new_user = User(username=form.username.data, password=hashed_password)
+        db.session.add(new_user)
+        db.session.commit()
+        # O nome pode estar no cache do login como inexistente
+        auth_guard.forget(new_user.username)
+        flash("Registro realizado com sucesso! Faça login.", "success")
+        return redirect(url_for("auth.login"))
+    return render_template("register.html", form=form)
+
+@bp.route("/login", methods=["GET", "POST"])
+def login():
+    # Se o usuário já estiver logado, redireciona para a lista de tarefas
+    if "user_id" in session:
+        return redirect(url_for("tasks.index"))
+
+    form = LoginForm()
+    if form.validate_on_submit():
+        try:
+            user = auth_guard.authenticate(form.username.data, form.password.data)
+        except ThrottledError as e:
+            return _throttled("login.html", form, e)
+        if user:
+            session["user_id"] = user.id
+            session["username"] = user.username
+            flash("Login realizado com sucesso!", "success")
+            return redirect(url_for("tasks.index"))
+        else:
+            flash("Credenciais inválidas.", "danger")
+    return render_template("login.html", form=form)
+
+@bp.route("/logout")
+@login_required
+def logout():
+    session.clear()
+    flash("Você saiu da conta.", "info")
+    return redirect(url_for("auth.login"))
@@ -0,0 +1,258 @@
+# benchmarks/bench_asgi.py
+#
+# Compara os dois modos de servir a aplicação com muitas respostas da IA em
+# andamento: gunicorn com workers síncronos (api.app:app) e uvicorn (api.app:asgi,
+# ver asgi.py). Cada servidor roda em um subprocesso com o mesmo SQLite e a IA
+# simulada (LLM_BACKEND=fake, LLM_FAKE_DELAY segundos por resposta).
+#
+# Para cada modo, mede a latência de GET / (lista de tarefas) primeiro sem carga
+# e depois com --ai-clients clientes enviando mensagens ao chat sem parar. No modo
+# síncrono cada chamada à IA prende um worker e as páginas esperam na fila; no
+# modo ASGI a latência das páginas deve ficar perto da medida sem carga.
+#
+# Precisa de requirements-asgi.txt instalado.
+#
+# Uso: python benchmarks/bench_asgi.py [--workers 2] [--ai-clients 32] [--llm-delay 2]
+#          [--duration 10] [--modes wsgi,asgi]
+
+import argparse
+import http.client
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+from urllib.parse import urlencode
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from werkzeug.security import generate_password_hash  # noqa: E402
+from app_factory import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from models import User, Task  # noqa: E402
+import ordering  # noqa: E402
+
+PASSWORD = "senha-de-carga"
+FORM = {"Content-Type": "application/x-www-form-urlencoded"}
+
+
+def seed(database, users, tasks):
+    app = create_app({"SQLALCHEMY_DATABASE_URI": database, "MIGRATIONS_ENABLED": False})
+    with app.app_context():
+        db.create_all()
+        password = generate_password_hash(PASSWORD)
+        accounts = [User(username=f"carga{number}", password=password) for number in range(users)]
+        db.session.add_all(accounts)
+        db.session.commit()
+        for user in accounts:
+            db.session.execute(db.insert(Task), [
+                {
+                    "task_name": f"Tarefa {i} de {user.username}",
+                    "cost": float(i),
+                    "due_date": date(2030, 1, 1),
+                    "display_order": (i + 1) * ordering.GAP,
+                    "user_id": user.id,
+                }
+                for i in range(tasks)
+            ])
+        db.session.commit()
+        return [user.username for user in accounts]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(mode, port, workers, env):
+    if mode == "wsgi":
+        command = [sys.executable, "-m", "gunicorn", "-w", str(workers), "-k", "sync",
+                   "-b", f"127.0.0.1:{port}", "--timeout", "120", "api.app:app"]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "api.app:asgi", "--host", "127.0.0.1", "--port", str(port),
+                   "--workers", str(workers), "--no-access-log", "--log-level", "warning"]
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"Servidor {mode} não subiu:\n{process.stderr.read().decode()}")
+        try:
+            request(port, "GET", "/login")
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise SystemExit(f"Servidor {mode} não respondeu em 30s")
+
+
+def request(port, method, path, body=None, headers=None, cookie=None, timeout=120):
+    """Uma requisição em uma conexão nova (os workers síncronos do gunicorn não mantêm conexões)."""
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+    try:
+        headers = dict(headers or {})
+        if cookie:
+            headers["Cookie"] = cookie
+        connection.request(method, path, body=body, headers=headers)
+        response = connection.getresponse()
+        response.text = response.read().decode("utf-8", "replace")
+        return response
+    finally:
+        connection.close()
+
+
+def login(port, username):
+    # O formulário de login tem token CSRF, ligado ao cookie de sessão da página
+    page = request(port, "GET", "/login")
+    token = re.search(r'name="csrf_token" type="hidden" value="([^"]+)"', page.text).group(1)
+    body = urlencode({"username": username, "password": PASSWORD, "csrf_token": token})
+    response = request(port, "POST", "/login", body, FORM, page.getheader("Set-Cookie").split(";", 1)[0])
+    cookie = response.getheader("Set-Cookie")
+    if response.status != 302 or not cookie:
+        raise SystemExit(f"Login de {username} falhou ({response.status})")
+    return cookie.split(";", 1)[0]
+
+
+def measure_pages(port, cookie, duration):
+    """Latências (ms) de GET / feitas em sequência durante `duration` segundos."""
+    samples = []
+    errors = 0
+    stop_at = time.perf_counter() + duration
+    while time.perf_counter() < stop_at:
+        started = time.perf_counter()
+        try:
+            status = request(port, "GET", "/", cookie=cookie).status
+        except OSError:
+            status = None
+        samples.append((time.perf_counter() - started) * 1000)
+        errors += status != 200
+    return samples, errors
+
+
+class ChatClient(threading.Thread):
+    """Envia mensagens ao chat (POST /chat) até `stop` ser sinalizado."""
+
+    def __init__(self, port, cookie, stop):
+        super().__init__(daemon=True)
+        self.port = port
+        self.cookie = cookie
+        self.stop = stop
+        self.done = 0
+        self.errors = 0
+
+    def run(self):
+        number = 0
+        while not self.stop.is_set():
+            number += 1
+            body = urlencode({"message": f"Pergunta {number} sobre as minhas tarefas"})
+            try:
+                status = request(self.port, "POST", "/chat", body, FORM, self.cookie).status
+            except OSError:
+                status = None
+            if status == 302:
+                self.done += 1
+            else:
+                self.errors += 1
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def summary(samples):
+    if not samples:
+        return "sem amostras"
+    return (
+        f"{len(samples):>5} req  p50 {statistics.median(samples):8.1f}  p95 {percentile(samples, 0.95):8.1f}  "
+        f"p99 {percentile(samples, 0.99):8.1f}  máx {max(samples):8.1f}"
+    )
+
+
+def run_mode(mode, args, accounts, env):
+    port = free_port()
+    process = start_server(mode, port, args.workers, env)
+    try:
+        cookies = [login(port, username) for username in accounts]
+        page_cookie = cookies[0]
+        # Aquecimento: carrega módulos e conexões em todos os workers
+        for _ in range(args.workers * 4):
+            request(port, "GET", "/", cookie=page_cookie)
+
+        idle, idle_errors = measure_pages(port, page_cookie, args.duration)
+
+        stop = threading.Event()
+        clients = [ChatClient(port, cookies[1 + number % (len(cookies) - 1)], stop) for number in range(args.ai_clients)]
+        for client in clients:
+            client.start()
+        # Espera as primeiras chamadas à IA ocuparem o servidor
+        time.sleep(min(args.llm_delay, 2.0))
+        started = time.perf_counter()
+        loaded, loaded_errors = measure_pages(port, page_cookie, args.duration)
+        elapsed = time.perf_counter() - started
+        stop.set()
+        for client in clients:
+            client.join(timeout=args.llm_delay * 4 + 30)
+
+        chats = sum(client.done for client in clients)
+        chat_errors = sum(client.errors for client in clients)
+        print(f"\n== {mode} ({args.workers} workers) ==")
+        print(f"  GET / sem carga        {summary(idle)}  erros {idle_errors}")
+        print(f"  GET / com IA ocupada   {summary(loaded)}  erros {loaded_errors}")
+        print(f"  chat: {chats} respostas ({chats / elapsed:.1f}/s), {chat_errors} erros")
+        return statistics.median(idle), statistics.median(loaded) if loaded else float("inf")
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latência das páginas com respostas da IA em andamento: WSGI x ASGI")
+    parser.add_argument("--workers", type=int, default=2, help="processos de cada servidor")
+    parser.add_argument("--ai-clients", type=int, default=32, help="clientes enviando mensagens ao chat")
+    parser.add_argument("--llm-delay", type=float, default=2.0, help="latência simulada da IA (s)")
+    parser.add_argument("--duration", type=float, default=10.0, help="segundos de medição em cada fase")
+    parser.add_argument("--users", type=int, default=9)
+    parser.add_argument("--tasks", type=int, default=100, help="tarefas por usuário")
+    parser.add_argument("--modes", default="wsgi,asgi")
+    args = parser.parse_args()
+    if args.users < 2:
+        raise SystemExit("São necessários pelo menos 2 usuários (um para as páginas, os demais para o chat).")
+
+    database = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_asgi.db")
+    accounts = seed(database, args.users, args.tasks)
+    env = dict(
+        os.environ,
+        DATABASE_URL=database,
+        SECRET_KEY="bench-asgi",
+        MIGRATIONS_ENABLED="0",
+        LLM_BACKEND="fake",
+        LLM_FAKE_DELAY=str(args.llm_delay),
+        LLM_TIMEOUT=str(args.llm_delay * 4 + 30),
+        # Os limites de concorrência da IA ficam fora do teste: o que se mede é o servidor
+        LLM_MAX_CONCURRENCY="10000",
+        LLM_MAX_CONCURRENCY_PER_USER="10000",
+        # Todos os logins saem do mesmo IP
+        AUTH_THROTTLE_ENABLED="0",
+    )
+    print(
+        f"{args.ai_clients} clientes no chat, IA com {args.llm_delay}s por resposta, "
+        f"{args.users} usuários x {args.tasks} tarefas; latências em ms"
+    )
+    results = {mode: run_mode(mode, args, accounts, env) for mode in args.modes.split(",")}
+    print()
+    for mode, (idle, loaded) in results.items():
+        print(f"{mode}: p50 de GET / com a IA ocupada = {loaded / idle:.1f}x o valor sem carga")
+
+
+if __name__ == "__main__":
+    main()
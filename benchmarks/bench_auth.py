@@ -0,0 +1,185 @@
+# benchmarks/bench_auth.py
+#
+# Login sob ataque de credenciais vazadas: --attackers threads enviam logins com
+# senhas erradas (nomes existentes e inexistentes) de --attacker-ips endereços,
+# enquanto um usuário legítimo navega na lista de tarefas e faz login de vez em
+# quando de outro IP. Três cenários do auth_guard.py:
+#
+# - "nenhum": sem limites e sem teto de hashes simultâneos (o login de antes);
+#   cada tentativa calcula um hash (AUTH_HASH_METHOD) e as páginas esperam pela CPU;
+# - "vagas": só AUTH_HASH_CONCURRENCY; a CPU fica livre para as páginas, mas os
+#   logins legítimos entram na fila dos hashes do ataque;
+# - "limites": vagas e baldes por IP e por usuário em cada IP; depois que o ataque gasta os
+#   baldes, as tentativas recebem 429 sem hash.
+#
+# As medições começam depois de --warmup segundos de ataque.
+#
+# Uso: python benchmarks/bench_auth.py [--attackers 4] [--attacker-ips 4] [--users 50]
+#          [--warmup 15] [--duration 15] [--hash-method pbkdf2:sha256:600000]
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+from app_factory import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from models import User, Task  # noqa: E402
+from auth_guard import auth_guard  # noqa: E402
+import metrics  # noqa: E402
+import ordering  # noqa: E402
+
+PASSWORD = "senha-legitima"
+
+
+def seed(app, users, hash_method):
+    with app.app_context():
+        db.create_all()
+        password = generate_password_hash(PASSWORD, hash_method)
+        accounts = [User(username=f"pessoa{i}", password=password) for i in range(users)]
+        db.session.add_all(accounts)
+        db.session.commit()
+        db.session.execute(db.insert(Task), [
+            {
+                "task_name": f"Tarefa {i}",
+                "cost": 1.0,
+                "due_date": date(2030, 1, 1),
+                "display_order": (i + 1) * ordering.GAP,
+                "user_id": accounts[0].id,
+            }
+            for i in range(200)
+        ])
+        db.session.commit()
+        return [account.username for account in accounts]
+
+
+class Worker(threading.Thread):
+    def __init__(self, stop, action, pause=0.0):
+        super().__init__(daemon=True)
+        self.stop = stop
+        self.action = action
+        self.pause = pause
+        self.samples = []
+        self.statuses = {}
+
+    def run(self):
+        rng = random.Random(self.name)
+        while not self.stop.is_set():
+            started = time.perf_counter()
+            status = self.action(rng)
+            self.samples.append((time.perf_counter() - started) * 1000)
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            if self.pause:
+                self.stop.wait(self.pause)
+
+
+SCENARIOS = {
+    "nenhum": {"AUTH_THROTTLE_ENABLED": False, "AUTH_HASH_CONCURRENCY": 10000},
+    "vagas": {"AUTH_THROTTLE_ENABLED": False},
+    "limites": {"AUTH_THROTTLE_ENABLED": True},
+}
+
+
+def run(scenario, args):
+    path = os.path.join(tempfile.mkdtemp(), "bench_auth.db")
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///" + path,
+        "MIGRATIONS_ENABLED": False,
+        "WTF_CSRF_ENABLED": False,
+        "AUTH_HASH_METHOD": args.hash_method,
+        **SCENARIOS[scenario],
+    })
+    auth_guard.init_app(app)
+    metrics.registry.reset()
+    usernames = seed(app, args.users, args.hash_method)
+    legit = app.test_client()
+    legit.post("/login", data={"username": usernames[0], "password": PASSWORD}, environ_base={"REMOTE_ADDR": "10.0.0.1"})
+
+    def attack(rng):
+        username = rng.choice(usernames) if rng.random() < 0.5 else f"vazado{rng.randrange(10 ** 6)}"
+        client = app.test_client()
+        return client.post(
+            "/login",
+            data={"username": username, "password": f"tentativa{rng.randrange(10 ** 6)}"},
+            environ_base={"REMOTE_ADDR": f"203.0.113.{rng.randrange(args.attacker_ips)}"},
+        ).status_code
+
+    def browse(rng):
+        return legit.get("/").status_code
+
+    def log_in(rng):
+        client = app.test_client()
+        status = client.post(
+            "/login",
+            data={"username": rng.choice(usernames[1:]), "password": PASSWORD},
+            environ_base={"REMOTE_ADDR": "10.0.0.2"},
+        ).status_code
+        return status
+
+    stop = threading.Event()
+    attackers = [Worker(stop, attack) for _ in range(args.attackers)]
+    browser = Worker(stop, browse)
+    # Um login legítimo a cada meio segundo, de um IP fora do ataque
+    login_worker = Worker(stop, log_in, pause=0.5)
+    workers = attackers + [browser, login_worker]
+    for worker in workers:
+        worker.start()
+    time.sleep(args.warmup)
+    for worker in workers:
+        worker.samples, worker.statuses = [], {}
+    metrics.AUTH_ATTEMPTS.reset()
+    time.sleep(args.duration)
+    stop.set()
+    for worker in workers:
+        worker.join()
+    with app.app_context():
+        db.engine.dispose()
+    attempts = {}
+    for worker in attackers:
+        for status, count in worker.statuses.items():
+            attempts[status] = attempts.get(status, 0) + count
+    hashed = metrics.AUTH_ATTEMPTS.value("failed") + metrics.AUTH_ATTEMPTS.value("ok")
+    return attempts, hashed, browser, login_worker
+
+
+def summary(samples):
+    if not samples:
+        return "sem amostras"
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return f"p50 {statistics.median(samples):8.2f}  p95 {p95:8.2f}  máx {samples[-1]:8.2f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput do login e das páginas durante um ataque de credenciais")
+    parser.add_argument("--attackers", type=int, default=4, help="threads enviando logins inválidos")
+    parser.add_argument("--attacker-ips", type=int, default=4)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--warmup", type=float, default=15.0, help="segundos de ataque antes de medir")
+    parser.add_argument("--duration", type=float, default=15.0, help="segundos de medição por cenário")
+    parser.add_argument("--hash-method", default="pbkdf2:sha256:600000")
+    args = parser.parse_args()
+
+    print(f"{args.attackers} atacantes de {args.attacker_ips} IPs, hash {args.hash_method}; latências em ms")
+    for scenario in SCENARIOS:
+        attempts, hashed, browser, login_worker = run(scenario, args)
+        total = sum(attempts.values())
+        print(f"\n== proteção: {scenario} ==")
+        print(f"  ataque      {total / args.duration:8.1f} tentativas/s, {hashed / args.duration:6.1f} hashes/s, "
+              f"respostas {dict(sorted(attempts.items()))}")
+        print(f"  lista       {len(browser.samples) / args.duration:8.1f}/s  {summary(browser.samples)}")
+        print(f"  login real  {summary(login_worker.samples)}  respostas {login_worker.statuses}")
+
+
+if __name__ == "__main__":
+    main()
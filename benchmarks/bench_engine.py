@@ -0,0 +1,152 @@
+# benchmarks/bench_engine.py
+#
+# Compara perfis da engine (engine_profiles.py) no SQLite com leituras e escritas
+# concorrentes: --readers threads lendo páginas da lista de tarefas e --writers
+# threads alterando tarefas pelo ORM (com os eventos de resumo, vetores e cache,
+# como nas rotas). Cada perfil usa um banco novo com os mesmos dados.
+#
+# No perfil "none" (journal padrão, rollback) cada escrita trava o arquivo e as
+# leituras esperam; no perfil "sqlite" (WAL, synchronous=NORMAL) as leituras
+# seguem durante as escritas e cada commit não espera o fsync do banco inteiro.
+#
+# Uso: python benchmarks/bench_engine.py [--readers 4] [--writers 2] [--duration 5]
+#          [--tasks 2000] [--profiles none,sqlite]
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from app_factory import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from models import User, Task  # noqa: E402
+from pagination import filtered_tasks, paginate_tasks  # noqa: E402
+import ordering  # noqa: E402
+
+
+def seed(app, tasks):
+    with app.app_context():
+        db.create_all()
+        user = User(username="motor", password="x")
+        db.session.add(user)
+        db.session.commit()
+        db.session.execute(db.insert(Task), [
+            {
+                "task_name": f"Tarefa {i}",
+                "cost": float(i % 100),
+                "due_date": date(2030, 1, 1 + i % 28),
+                "status": ("Pendente", "Em Andamento", "Concluída")[i % 3],
+                "display_order": (i + 1) * ordering.GAP,
+                "user_id": user.id,
+            }
+            for i in range(tasks)
+        ])
+        db.session.commit()
+        return user.id, [task_id for (task_id,) in db.session.query(Task.id)]
+
+
+class Worker(threading.Thread):
+    def __init__(self, app, stop, action):
+        super().__init__(daemon=True)
+        self.app = app
+        self.stop = stop
+        self.action = action
+        self.samples = []
+        self.errors = 0
+
+    def run(self):
+        rng = random.Random(self.name)
+        with self.app.app_context():
+            while not self.stop.is_set():
+                started = time.perf_counter()
+                try:
+                    self.action(rng)
+                except OperationalError:
+                    # "database is locked": a espera passou de busy_timeout
+                    db.session.rollback()
+                    self.errors += 1
+                    continue
+                finally:
+                    db.session.remove()
+                self.samples.append((time.perf_counter() - started) * 1000)
+
+
+def run_profile(profile, args):
+    path = os.path.join(tempfile.mkdtemp(), f"bench_engine_{profile}.db")
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///" + path, "DB_PROFILE": profile,
+                      "MIGRATIONS_ENABLED": False, "TASK_CACHE_ENABLED": False})
+    user_id, ids = seed(app, args.tasks)
+
+    def read(rng):
+        filters = {"status": rng.choice(("Pendente", "Concluída"))} if rng.random() < 0.5 else {}
+        paginate_tasks(filtered_tasks(user_id, filters), per_page=50).items
+
+    def write(rng):
+        task = db.session.get(Task, rng.choice(ids))
+        task.cost = rng.randint(1, 1000)
+        db.session.commit()
+
+    stop = threading.Event()
+    readers = [Worker(app, stop, read) for _ in range(args.readers)]
+    writers = [Worker(app, stop, write) for _ in range(args.writers)]
+    for worker in readers + writers:
+        worker.start()
+    time.sleep(args.duration)
+    stop.set()
+    for worker in readers + writers:
+        worker.join()
+    with app.app_context():
+        db.engine.dispose()
+
+    def totals(workers):
+        samples = [sample for worker in workers for sample in worker.samples]
+        return samples, sum(worker.errors for worker in workers)
+
+    return totals(readers), totals(writers)
+
+
+def summary(samples, errors, duration):
+    if not samples:
+        return f"sem amostras, {errors} erros"
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return (
+        f"{len(samples) / duration:8.1f}/s  p50 {statistics.median(samples):7.2f}  p95 {p95:7.2f}  "
+        f"máx {samples[-1]:8.2f}  erros {errors}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Leituras e escritas concorrentes no SQLite por perfil da engine")
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=5.0, help="segundos de medição por perfil")
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--profiles", default="none,sqlite")
+    args = parser.parse_args()
+
+    print(f"{args.readers} leitores, {args.writers} escritores, {args.tasks} tarefas; latências em ms")
+    results = {}
+    for profile in args.profiles.split(","):
+        (reads, read_errors), (writes, write_errors) = run_profile(profile, args)
+        results[profile] = (len(reads) + len(writes)) / args.duration
+        print(f"\n== perfil {profile} ==")
+        print(f"  leituras  {summary(reads, read_errors, args.duration)}")
+        print(f"  escritas  {summary(writes, write_errors, args.duration)}")
+    print()
+    for profile, throughput in results.items():
+        print(f"{profile}: {throughput:.1f} operações/s")
+
+
+if __name__ == "__main__":
+    main()
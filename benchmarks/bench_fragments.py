@@ -0,0 +1,127 @@
+# benchmarks/bench_fragments.py
+#
+# Mede o tempo das páginas com muitos fragmentos (lista de tarefas com --per-page
+# linhas e chat com CHAT_HISTORY_PAGE mensagens), com e sem o cache de fragmentos
+# (fragment_cache.py). Antes de cada leitura da lista, --changes tarefas são
+# alteradas pelo ORM: só essas linhas precisam ser renderizadas de novo.
+#
+# Uso: python benchmarks/bench_fragments.py [--tasks 1000] [--per-page 200]
+#          [--messages 200] [--changes 1] [--repeat 50]
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app_factory import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from models import User, Task, Message  # noqa: E402
+from fragment_cache import fragment_cache  # noqa: E402
+import ordering  # noqa: E402
+
+
+def seed(app, args):
+    with app.app_context():
+        db.create_all()
+        client = app.test_client()
+        client.post("/register", data={"username": "fragmentos", "password": "x", "confirm": "x"})
+        user_id = User.query.filter_by(username="fragmentos").one().id
+        db.session.execute(db.insert(Task), [
+            {
+                "task_name": f"Tarefa {i}",
+                "cost": float(i % 100),
+                "due_date": date(2030, 1, 1 + i % 28),
+                "status": ("Pendente", "Em Andamento", "Concluída")[i % 3],
+                "priority": ("Alta", "Média", "Baixa")[i % 3],
+                "display_order": (i + 1) * ordering.GAP,
+                "creation_date": datetime(2029, 1, 1),
+                "user_id": user_id,
+            }
+            for i in range(args.tasks)
+        ])
+        db.session.execute(db.insert(Message), [
+            {
+                "user_id": user_id,
+                "content": f"Mensagem {i} " + "texto " * 20,
+                "role": "user" if i % 2 else "assistant",
+                "timestamp": datetime(2029, 1, 1) + timedelta(seconds=i),
+            }
+            for i in range(args.messages)
+        ])
+        db.session.commit()
+        ids = [task_id for (task_id,) in db.session.query(Task.id).order_by(Task.display_order).limit(args.per_page)]
+    return ids
+
+
+def measure(app, client, path, ids, changes, repeat):
+    rng = random.Random(1)
+    samples = []
+    for _ in range(repeat):
+        if changes:
+            with app.app_context():
+                for task in Task.query.filter(Task.id.in_(rng.sample(ids, changes))):
+                    task.cost += 1
+                db.session.commit()
+        started = time.perf_counter()
+        response = client.get(path)
+        samples.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.status_code
+    return samples
+
+
+def run(enabled, args):
+    path = os.path.join(tempfile.mkdtemp(), "bench_fragments.db")
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///" + path,
+        "MIGRATIONS_ENABLED": False,
+        "WTF_CSRF_ENABLED": False,
+        "FRAGMENT_CACHE_ENABLED": enabled,
+        "CHAT_HISTORY_PAGE": args.messages,
+    })
+    fragment_cache.clear()
+    ids = seed(app, args)
+    client = app.test_client()
+    client.post("/login", data={"username": "fragmentos", "password": "x"})
+    tasks = measure(app, client, f"/?per_page={args.per_page}", ids, args.changes, args.repeat)
+    chat = measure(app, client, "/chat", ids, 0, args.repeat)
+    with app.app_context():
+        db.engine.dispose()
+    return tasks, chat, fragment_cache.stats()
+
+
+def summary(samples):
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return f"p50 {statistics.median(samples):7.2f}  p95 {p95:7.2f}  máx {samples[-1]:7.2f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Páginas com muitos fragmentos, com e sem o cache de fragmentos")
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--per-page", type=int, default=200)
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--changes", type=int, default=1, help="tarefas alteradas antes de cada leitura da lista")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"lista com {args.per_page} linhas ({args.changes} alteradas por leitura), chat com {args.messages} "
+          f"mensagens, {args.repeat} leituras; latências em ms")
+    for enabled in (False, True):
+        tasks, chat, stats = run(enabled, args)
+        print(f"\n== cache de fragmentos {'ligado' if enabled else 'desligado'} ==")
+        print(f"  lista  {summary(tasks)}")
+        print(f"  chat   {summary(chat)}")
+        if enabled:
+            print(f"  acertos {stats['hits']}  faltas {stats['misses']}  taxa {stats['hit_rate']:.1%}  "
+                  f"renderização poupada {stats['saved_seconds'] * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
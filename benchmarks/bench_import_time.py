@@ -0,0 +1,152 @@
+# benchmarks/bench_import_time.py
+#
+# Mede o tempo de cold start: cada módulo é importado em um processo Python novo
+# com "python -X importtime" e o tempo acumulado da importação é registrado
+# (mediana de várias rodadas). Também mede create_app() + primeira requisição.
+#
+# A entrada do Vercel (api/app.py) é importada como no Vercel (VERCEL=1) e o
+# script falha (código de saída 1) se ela carregar módulos que deveriam ser
+# tardios, como o SDK da IA ou o alembic, ou se algum tempo passar do limite
+# em relação a uma medição anterior salva com --save.
+#
+# Uso: python benchmarks/bench_import_time.py [--repeat 5] [--save base.json] [--compare base.json] [--tolerance 1.3]
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    "extensions",
+    "models",
+    "forms",
+    "llm",
+    "reports",
+    "chat_context",
+    "auth_views",
+    "task_views",
+    "report_views",
+    "chat_views",
+    "app_factory",
+    "app",
+]
+
+# Não devem ser importados no cold start da função do Vercel
+LAZY_MODULES = ["google.generativeai", "alembic", "flask_migrate", "numpy"]
+
+FIRST_REQUEST = """
+import time
+started = time.perf_counter()
+from app_factory import create_app
+app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://"})
+created = time.perf_counter()
+app.test_client().get("/login")
+print(created - started, time.perf_counter() - created)
+"""
+
+LOADED_MODULES = """
+import sys, json
+import app
+print(json.dumps(sorted(sys.modules)))
+"""
+
+
+def _env(vercel=True):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([ROOT, os.path.join(ROOT, "api")])
+    if vercel:
+        env["VERCEL"] = "1"
+    else:
+        env.pop("VERCEL", None)
+    env.setdefault("DATABASE_URL", "sqlite://")
+    return env
+
+
+def import_time(module):
+    """Tempo acumulado (ms) da importação de `module` em um processo novo."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=_env(), cwd=ROOT, check=True,
+    )
+    for line in result.stderr.splitlines():
+        # Formato: "import time: <self us> | <cumulative us> | <indentação><módulo>"
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module and parts[2][1:2] != " ":
+            return int(parts[1]) / 1000.0
+    raise RuntimeError(f"Importação de {module} não encontrada na saída de -X importtime")
+
+
+def first_request_time():
+    result = subprocess.run(
+        [sys.executable, "-c", FIRST_REQUEST], capture_output=True, text=True, env=_env(), cwd=ROOT, check=True
+    )
+    create, request = (float(value) * 1000 for value in result.stdout.split())
+    return create, request
+
+
+def loaded_lazy_modules(vercel=True):
+    result = subprocess.run(
+        [sys.executable, "-c", LOADED_MODULES], capture_output=True, text=True, env=_env(vercel), cwd=ROOT,
+        check=True,
+    )
+    loaded = json.loads(result.stdout)
+    return [name for name in LAZY_MODULES if name in loaded]
+
+
+def measure(repeat):
+    samples = {module: [] for module in MODULES}
+    samples["create_app"] = []
+    samples["first_request"] = []
+    # Primeira rodada descartada: aquece o cache de bytecode (__pycache__)
+    import_time("app")
+    for _ in range(repeat):
+        for module in MODULES:
+            samples[module].append(import_time(module))
+        create, request = first_request_time()
+        samples["create_app"].append(create)
+        samples["first_request"].append(request)
+    return {name: round(statistics.median(values), 2) for name, values in samples.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede o tempo de importação (cold start) por módulo.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", help="grava os resultados em JSON")
+    parser.add_argument("--compare", help="compara com resultados gravados anteriormente")
+    parser.add_argument("--tolerance", type=float, default=1.3, help="razão máxima aceita em relação à base")
+    args = parser.parse_args()
+
+    results = measure(args.repeat)
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    failed = False
+    print(f"{'módulo':<16}{'ms':>10}{'base':>10}")
+    for name, value in results.items():
+        base = baseline.get(name)
+        flag = ""
+        # Diferenças de poucos milissegundos são ruído do sistema
+        if base is not None and value > base * args.tolerance and value - base > 5:
+            flag = "  <- regressão"
+            failed = True
+        print(f"{name:<16}{value:>10.1f}{(f'{base:.1f}' if base is not None else '-'):>10}{flag}")
+
+    lazy = loaded_lazy_modules()
+    if lazy:
+        print(f"\nMódulos que deveriam ser tardios carregados por api/app.py: {', '.join(lazy)}")
+        failed = True
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
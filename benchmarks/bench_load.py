@@ -0,0 +1,423 @@
+# benchmarks/bench_load.py
+#
+# Teste de carga reproduzível: cria N usuários com M tarefas e K mensagens cada,
+# e dispara requisições de várias threads (cada uma com seu test client e seu
+# usuário logado) contra a aplicação real: listagem, inclusão, edição, exclusão,
+# reordenação, relatório e chat. A IA é um llm.FakeBackend com latência
+# configurável, então o teste roda sem rede e sem chave de API.
+#
+# Mostra p50/p95/p99, vazão e consultas SQL por operação (das métricas do
+# metrics.py). --save grava os resultados em JSON e --compare compara com uma
+# execução anterior, saindo com código 1 se alguma operação piorar além da
+# tolerância.
+#
+# Por padrão usa um SQLite temporário. Com --database (SQLite ou Postgres) o banco
+# informado é APAGADO e recriado; por isso é preciso confirmar com --reset.
+#
+# Uso: python benchmarks/bench_load.py [--users 20] [--tasks 200] [--messages 100] [--threads 8]
+#          [--duration 10] [--llm-delay 0.2] [--mix index=30,chat=15,...] [--save r.json] [--compare base.json]
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from werkzeug.security import generate_password_hash  # noqa: E402
+from app_factory import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from models import User, Task, Message  # noqa: E402
+from llm import FakeBackend  # noqa: E402
+from semantic import semantic_index  # noqa: E402
+import analytics  # noqa: E402
+import metrics  # noqa: E402
+import ordering  # noqa: E402
+
+PASSWORD = "senha-de-carga"
+STATUSES = ["Pendente", "Em Andamento", "Concluída", None]
+PRIORITIES = ["Baixa", "Média", "Alta", None]
+CATEGORIES = ["Financeiro", "Infra", "Comercial", "Marketing", "RH"]
+WORDS = "relatório orçamento reunião cliente contrato entrega revisão equipe projeto servidor backup prazo".split()
+
+# Peso de cada operação na carga (--mix sobrescreve)
+DEFAULT_MIX = {
+    "index": 30,
+    "add_task": 10,
+    "edit_task": 15,
+    "delete_task": 5,
+    "move_up": 8,
+    "move_down": 8,
+    "generate_report": 4,
+    "chat": 20,
+}
+# Endpoints de cada operação, para ler as consultas SQL por requisição
+ENDPOINTS = {
+    "index": ["tasks.index"],
+    "add_task": ["tasks.add_task"],
+    "edit_task": ["tasks.edit_task"],
+    "delete_task": ["tasks.delete_task"],
+    "move_up": ["tasks.move_up"],
+    "move_down": ["tasks.move_down"],
+    "generate_report": ["reports.generate_report", "reports.report_job_status"],
+    "chat": ["chat.chat"],
+}
+JOB_ID = re.compile(r"/reports/(\d+)")
+
+
+def _text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def seed(users, tasks, messages, rng, batch=2000):
+    """Cria os usuários, tarefas e mensagens com inserções em lote; devolve {user_id: [(id, nome)]}."""
+    db.drop_all()
+    db.create_all()
+    password = generate_password_hash(PASSWORD)
+    accounts = [User(username=f"carga{i}", password=password) for i in range(users)]
+    db.session.add_all(accounts)
+    db.session.commit()
+    started = datetime(2029, 1, 1)
+    for account in accounts:
+        for start in range(0, tasks, batch):
+            rows = [
+                {
+                    "task_name": f"Tarefa {i} {_text(rng, 2)}",
+                    "cost": round(rng.uniform(10, 1000), 2),
+                    "due_date": date(2030, 1, 1) + timedelta(days=rng.randint(0, 365)),
+                    "description": _text(rng, 12),
+                    "status": rng.choice(STATUSES),
+                    "priority": rng.choice(PRIORITIES),
+                    "category": rng.choice(CATEGORIES),
+                    "creation_date": started,
+                    "display_order": (i + 1) * ordering.GAP,
+                    "user_id": account.id,
+                }
+                for i in range(start, min(start + batch, tasks))
+            ]
+            db.session.execute(db.insert(Task), semantic_index.embed_rows(rows))
+        for start in range(0, messages, batch):
+            db.session.execute(db.insert(Message), [
+                {
+                    "user_id": account.id,
+                    "content": _text(rng, 20),
+                    "role": "user" if i % 2 == 0 else "assistant",
+                    "timestamp": started + timedelta(minutes=i),
+                }
+                for i in range(start, min(start + batch, messages))
+            ])
+        # Inserções em lote não passam pelos eventos do ORM
+        analytics.rebuild_user_stats(account.id)
+        db.session.commit()
+    owned = {account.id: [] for account in accounts}
+    for task_id, user_id, name in db.session.query(Task.id, Task.user_id, Task.task_name).order_by(Task.id):
+        owned[user_id].append((task_id, name))
+    return [(account.username, account.id) for account in accounts], owned
+
+
+def percentile(samples, p):
+    """Percentil pelo método nearest-rank (samples ordenada)."""
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, max(0, math.ceil(p / 100 * len(samples)) - 1))]
+
+
+class Worker(threading.Thread):
+    """Uma thread de carga: um test client, um usuário logado e uma sequência aleatória de operações."""
+
+    def __init__(self, number, app, username, tasks, mix, stop_at, warmup_until, seed):
+        super().__init__(daemon=True)
+        self.number = number
+        self.client = app.test_client()
+        self.username = username
+        self.tasks = list(tasks)
+        self.created = []
+        self.operations = list(mix)
+        self.weights = [mix[name] for name in self.operations]
+        self.stop_at = stop_at
+        self.warmup_until = warmup_until
+        self.rng = random.Random(seed)
+        self.samples = {name: [] for name in self.operations}
+        self.errors = {name: 0 for name in self.operations}
+        self.sequence = 0
+
+    def run(self):
+        self.client.post("/login", data={"username": self.username, "password": PASSWORD})
+        while time.perf_counter() < self.stop_at:
+            name = self.rng.choices(self.operations, self.weights)[0]
+            # Preparação fora do tempo medido (por exemplo, achar o id da tarefa a excluir)
+            prepare = getattr(self, "prepare_" + name, None)
+            target = prepare() if prepare else None
+            started = time.perf_counter()
+            try:
+                ok = getattr(self, name)(target)
+            except Exception as e:
+                print(f"[thread {self.number}] {name}: {e!r}", file=sys.stderr)
+                ok = False
+            elapsed = time.perf_counter() - started
+            if started < self.warmup_until:
+                continue
+            self.samples[name].append(elapsed)
+            if not ok:
+                self.errors[name] += 1
+
+    def _form(self, name):
+        return {
+            "task_name": name,
+            "cost": f"{self.rng.uniform(10, 1000):.2f}",
+            "due_date": "15/06/2030",
+            "description": _text(self.rng, 12),
+            "status": self.rng.choice(STATUSES[:3]),
+            "priority": self.rng.choice(PRIORITIES[:3]),
+            "category": self.rng.choice(CATEGORIES),
+        }
+
+    def index(self, target=None):
+        page = self.rng.choice(["/", "/", "/?status=Pendente", "/?priority=Alta&per_page=50"])
+        return self.client.get(page).status_code == 200
+
+    def add_task(self, target=None):
+        self.sequence += 1
+        name = f"Carga {self.number}-{self.sequence}"
+        response = self.client.post("/add", data=self._form(name))
+        if response.status_code != 302:
+            return False
+        # O id da nova tarefa não volta no redirect; ela é a última da lista do usuário
+        self.created.append(name)
+        return True
+
+    def edit_task(self, target=None):
+        task_id, name = self.rng.choice(self.tasks)
+        return self.client.post(f"/edit/{task_id}", data=self._form(name)).status_code == 302
+
+    def prepare_delete_task(self):
+        # Só exclui tarefas criadas pela própria thread, para não esvaziar a base
+        if not self.created:
+            return None
+        name = self.created.pop()
+        with self.client.application.app_context():
+            return db.session.query(Task.id).filter(Task.task_name == name).scalar()
+
+    def delete_task(self, target=None):
+        if target is None:
+            return self.add_task()
+        return self.client.post(f"/delete/{target}").status_code == 302
+
+    def move_up(self, target=None):
+        task_id, _ = self.rng.choice(self.tasks)
+        return self.client.post(f"/move_up/{task_id}").status_code == 302
+
+    def move_down(self, target=None):
+        task_id, _ = self.rng.choice(self.tasks)
+        return self.client.post(f"/move_down/{task_id}").status_code == 302
+
+    def generate_report(self, target=None):
+        """Tempo até o relatório ficar pronto: POST + consultas ao status do job."""
+        task_ids = [str(task_id) for task_id, _ in self.rng.sample(self.tasks, min(5, len(self.tasks)))]
+        response = self.client.post("/generate_report", data={"task_ids": task_ids})
+        match = JOB_ID.search(response.headers.get("Location", ""))
+        if not match:
+            return False
+        deadline = time.perf_counter() + 60
+        while time.perf_counter() < deadline:
+            status = self.client.get(f"/reports/{match.group(1)}/status").get_json()
+            if status["finished"]:
+                return status["status"] == "done"
+            time.sleep(0.02)
+        return False
+
+    def chat(self, target=None):
+        self.sequence += 1
+        # Mensagens diferentes a cada chamada: o cache de respostas não esconde a latência da IA
+        message = f"{_text(self.rng, 6)}? ({self.number}-{self.sequence})"
+        return self.client.post("/chat", data={"message": message}).status_code == 302
+
+
+def parse_mix(value):
+    mix = dict(DEFAULT_MIX)
+    if value:
+        for item in value.split(","):
+            name, _, weight = item.partition("=")
+            if name not in DEFAULT_MIX:
+                raise SystemExit(f"Operação desconhecida em --mix: {name}")
+            mix[name] = float(weight)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+def summarize(workers, duration):
+    operations = {}
+    all_samples = []
+    for name in workers[0].operations:
+        samples = sorted(sample for worker in workers for sample in worker.samples[name])
+        errors = sum(worker.errors[name] for worker in workers)
+        all_samples.extend(samples)
+        requests = sum(metrics.REQUEST_QUERIES.count(endpoint) for endpoint in ENDPOINTS[name])
+        queries = sum(metrics.REQUEST_QUERIES.total(endpoint) for endpoint in ENDPOINTS[name])
+        operations[name] = {
+            "count": len(samples),
+            "errors": errors,
+            "throughput": round(len(samples) / duration, 2),
+            "mean_ms": round(sum(samples) / len(samples) * 1000, 2) if samples else 0.0,
+            "p50_ms": round(percentile(samples, 50) * 1000, 2),
+            "p95_ms": round(percentile(samples, 95) * 1000, 2),
+            "p99_ms": round(percentile(samples, 99) * 1000, 2),
+            "queries_per_request": round(queries / requests, 1) if requests else 0.0,
+        }
+    all_samples.sort()
+    total = {
+        "count": len(all_samples),
+        "errors": sum(operation["errors"] for operation in operations.values()),
+        "throughput": round(len(all_samples) / duration, 2),
+        "p50_ms": round(percentile(all_samples, 50) * 1000, 2),
+        "p95_ms": round(percentile(all_samples, 95) * 1000, 2),
+        "p99_ms": round(percentile(all_samples, 99) * 1000, 2),
+    }
+    return operations, total
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=ROOT, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, tolerance):
+    """Operações que pioraram: p95 acima de base * tolerância (e mais de 5 ms) ou vazão abaixo de base / tolerância."""
+    regressions = []
+    for name, current in results["operations"].items():
+        base = baseline.get("operations", {}).get(name)
+        if not base or not current["count"] or not base["count"]:
+            continue
+        if current["p95_ms"] > base["p95_ms"] * tolerance and current["p95_ms"] - base["p95_ms"] > 5:
+            regressions.append(f"{name}: p95 {base['p95_ms']:.1f} -> {current['p95_ms']:.1f} ms")
+        if current["throughput"] < base["throughput"] / tolerance:
+            regressions.append(f"{name}: vazão {base['throughput']:.1f} -> {current['throughput']:.1f} req/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga da aplicação com IA simulada")
+    parser.add_argument("--database", help="URL do banco (APAGADO e recriado; exige --reset). Padrão: SQLite temporário")
+    parser.add_argument("--reset", action="store_true", help="confirma que o banco de --database pode ser apagado")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--tasks", type=int, default=200, help="tarefas por usuário")
+    parser.add_argument("--messages", type=int, default=100, help="mensagens de chat por usuário")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="segundos de carga medidos")
+    parser.add_argument("--warmup", type=float, default=1.0, help="segundos iniciais descartados")
+    parser.add_argument("--llm-delay", type=float, default=0.2, help="latência simulada da IA (s)")
+    parser.add_argument("--llm-chunk-delay", type=float, default=0.0)
+    parser.add_argument("--job-backend", default="thread", choices=["thread", "inline"])
+    parser.add_argument("--mix", help="pesos das operações, ex.: index=50,chat=10,generate_report=0")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", help="grava os resultados em JSON")
+    parser.add_argument("--compare", help="compara com resultados gravados anteriormente")
+    parser.add_argument("--tolerance", type=float, default=1.3, help="razão máxima aceita em relação à base")
+    args = parser.parse_args()
+
+    if args.database and not args.reset:
+        raise SystemExit("O banco de --database será apagado; confirme com --reset.")
+    database = args.database or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_load.db")
+    mix = parse_mix(args.mix)
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": database,
+        "WTF_CSRF_ENABLED": False,
+        "JOB_BACKEND": args.job_backend,
+        "JOB_WORKERS": max(2, args.threads // 2),
+        "LLM_BACKEND": FakeBackend(delay=args.llm_delay, chunk_delay=args.llm_chunk_delay),
+        "METRICS_SLOW_REQUEST_MS": 0,
+        # Todos os usuários simulados fazem login do mesmo IP
+        "AUTH_THROTTLE_ENABLED": False,
+    })
+    rng = random.Random(args.seed)
+
+    with app.app_context():
+        started = time.perf_counter()
+        accounts, owned = seed(args.users, args.tasks, args.messages, rng)
+        print(
+            f"Base: {args.users} usuários x {args.tasks} tarefas x {args.messages} mensagens "
+            f"em {time.perf_counter() - started:.1f}s ({db.engine.dialect.name})"
+        )
+
+    metrics.registry.reset()
+    now = time.perf_counter()
+    warmup_until = now + args.warmup
+    stop_at = warmup_until + args.duration
+    workers = []
+    for number in range(args.threads):
+        username, user_id = accounts[number % len(accounts)]
+        workers.append(Worker(number, app, username, owned[user_id], mix, stop_at, warmup_until, args.seed + number))
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    operations, total = summarize(workers, args.duration)
+    results = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "database": app.config["SQLALCHEMY_DATABASE_URI"].split(":", 1)[0],
+            "users": args.users,
+            "tasks": args.tasks,
+            "messages": args.messages,
+            "threads": args.threads,
+            "duration": args.duration,
+            "llm_delay": args.llm_delay,
+            "job_backend": args.job_backend,
+            "mix": mix,
+            "seed": args.seed,
+        },
+        "operations": operations,
+        "total": total,
+    }
+
+    print(f"\n{'operação':<16}{'n':>7}{'erros':>7}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'SQL/req':>9}")
+    for name, row in list(operations.items()) + [("total", dict(total, queries_per_request=None))]:
+        queries = f"{row['queries_per_request']:.1f}" if row.get("queries_per_request") is not None else "-"
+        print(
+            f"{name:<16}{row['count']:>7}{row['errors']:>7}{row['throughput']:>8.1f}"
+            f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{queries:>9}"
+        )
+
+    failed = False
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        # Resultados só são comparáveis com os mesmos parâmetros de carga
+        changed = [
+            key for key, value in results["meta"].items()
+            if key not in ("timestamp", "commit", "python") and baseline.get("meta", {}).get(key) != value
+        ]
+        if changed:
+            print(f"\nAviso: parâmetros diferentes da base: {', '.join(changed)}")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            failed = True
+            print("\nRegressões em relação a " + args.compare + ":")
+            for line in regressions:
+                print("  " + line)
+        else:
+            print(f"\nSem regressões em relação a {args.compare}.")
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
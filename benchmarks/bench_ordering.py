@@ -0,0 +1,119 @@
+# benchmarks/bench_ordering.py
+#
+# Mede a latência de delete/move_up/move_down/move em função do número de tarefas
+# do usuário e quantas linhas cada operação altera. Com display_order esparso os
+# valores devem permanecer estáveis conforme a lista cresce.
+#
+# Uso: python benchmarks/bench_ordering.py [--sizes 100 1000 10000] [--repeat 50]
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sqlalchemy import event  # noqa: E402
+
+from app_factory import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from models import User, Task  # noqa: E402
+import ordering  # noqa: E402
+
+_db_dir = tempfile.mkdtemp()
+app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///" + os.path.join(_db_dir, "bench_ordering.db"), "MIGRATIONS_ENABLED": True})
+
+
+class StatementCounter:
+    def __init__(self, engine):
+        self.updates = 0
+        self.deletes = 0
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, conn, cursor, statement, parameters, context, executemany):
+        rows = len(parameters) if executemany else 1
+        verb = statement.lstrip().split(" ", 1)[0].upper()
+        if verb == "UPDATE":
+            self.updates += rows
+        elif verb == "DELETE":
+            self.deletes += rows
+
+    def reset(self):
+        self.updates = 0
+        self.deletes = 0
+
+
+def seed(size):
+    db.drop_all()
+    db.create_all()
+    user = User(username=f"bench{size}", password="x")
+    db.session.add(user)
+    db.session.commit()
+    db.session.execute(
+        db.insert(Task),
+        [
+            {
+                "task_name": f"Tarefa {i}",
+                "cost": 1.0,
+                "due_date": date(2030, 1, 1),
+                "display_order": (i + 1) * ordering.GAP,
+                "user_id": user.id,
+            }
+            for i in range(size)
+        ],
+    )
+    db.session.commit()
+    return user.id
+
+
+def timed(client, url, data=None):
+    start = time.perf_counter()
+    response = client.post(url, data=data or {})
+    elapsed = time.perf_counter() - start
+    assert response.status_code in (200, 302), response.status_code
+    return elapsed
+
+
+def run(size, repeat):
+    with app.app_context():
+        user_id = seed(size)
+        counter = StatementCounter(db.engine)
+        ids = [row.id for row in db.session.query(Task.id).filter_by(user_id=user_id).order_by(Task.display_order)]
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess["user_id"] = user_id
+        sess["username"] = f"bench{size}"
+
+    middle = ids[len(ids) // 2:]
+    results = {}
+    for name, make_request in (
+        ("move_up", lambda i: (f"/move_up/{middle[i]}", None)),
+        ("move_down", lambda i: (f"/move_down/{middle[i]}", None)),
+        ("move_to", lambda i: (f"/move/{middle[i]}", {"position": str(1 + (i * 7) % size)})),
+        ("delete", lambda i: (f"/delete/{middle.pop()}", None)),
+    ):
+        counter.reset()
+        samples = [timed(client, *make_request(i)) for i in range(repeat)]
+        results[name] = (statistics.median(samples) * 1000, (counter.updates + counter.deletes) / repeat)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de reordenação de tarefas")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'tarefas':>8} {'operação':>10} {'mediana (ms)':>14} {'linhas/op':>10}")
+    for size in args.sizes:
+        for name, (median_ms, rows) in run(size, args.repeat).items():
+            print(f"{size:>8} {name:>10} {median_ms:>14.2f} {rows:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# benchmarks/bench_search.py
+#
+# Mede a latência da busca textual (search.search_tasks / search_messages) com
+# muitas linhas. As tarefas e mensagens são divididas entre vários usuários; a
+# busca é feita para um usuário com muitas linhas e para um com poucas, com um
+# termo comum, um raro e um prefixo.
+#
+# Uso: python benchmarks/bench_search.py [--rows 100000] [--users 100] [--repeat 30]
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app_factory import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from models import User, Task, Message  # noqa: E402
+import ordering  # noqa: E402
+import search  # noqa: E402
+
+_db_dir = tempfile.mkdtemp()
+app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///" + os.path.join(_db_dir, "bench_search.db")})
+
+WORDS = (
+    "relatório orçamento reunião cliente contrato entrega revisão equipe projeto servidor "
+    "banco dados migração planilha custo prazo fornecedor auditoria backup deploy"
+).split()
+QUERIES = {"comum": "projeto", "raro": "xilofone", "prefixo": "audit", "dois termos": "cliente contrato"}
+
+
+def _text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def seed(rows, users, batch=5000):
+    """Distribui as linhas entre os usuários: metade para o primeiro, o resto igualmente."""
+    rng = random.Random(42)
+    db.drop_all()
+    db.create_all()
+    accounts = [User(username=f"busca{i}", password="x") for i in range(users)]
+    db.session.add_all(accounts)
+    db.session.commit()
+    owners = [accounts[0].id] * (rows // 2) + [accounts[1 + i % (users - 1)].id for i in range(rows - rows // 2)]
+    for start in range(0, rows, batch):
+        chunk = range(start, min(start + batch, rows))
+        db.session.execute(db.insert(Task), [
+            {
+                "task_name": f"{_text(rng, 3)} {i}",
+                "cost": 1.0,
+                "due_date": date(2030, 1, 1),
+                "description": _text(rng, 20) + (" xilofone" if i % 5000 == 0 else ""),
+                "notes": _text(rng, 8),
+                "category": rng.choice(WORDS),
+                "display_order": (i + 1) * ordering.GAP,
+                "user_id": owners[i],
+            }
+            for i in chunk
+        ])
+        db.session.execute(db.insert(Message), [
+            {
+                "user_id": owners[i],
+                "content": _text(rng, 30),
+                "role": "user" if i % 2 else "assistant",
+                "timestamp": datetime(2029, 1, 1) + timedelta(seconds=i),
+            }
+            for i in chunk
+        ])
+        db.session.commit()
+    return accounts[0].id, accounts[-1].id
+
+
+def measure(fn, user_id, query, repeat):
+    samples = []
+    hits = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        page = fn(user_id, query)
+        samples.append((time.perf_counter() - started) * 1000)
+        hits = len(page.items)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1], hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da busca textual")
+    parser.add_argument("--rows", type=int, default=100000, help="tarefas e também mensagens")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    with app.app_context():
+        started = time.perf_counter()
+        big_user, small_user = seed(args.rows, args.users)
+        print(f"{args.rows} tarefas e {args.rows} mensagens indexadas em {time.perf_counter() - started:.1f}s\n")
+
+        print(f"{'tabela':>9} {'usuário':>8} {'consulta':>12} {'p50 (ms)':>10} {'p95 (ms)':>10} {'resultados':>11}")
+        for table, fn in (("tarefas", search.search_tasks), ("mensagens", search.search_messages)):
+            for label, user_id in (("grande", big_user), ("pequeno", small_user)):
+                for name, query in QUERIES.items():
+                    p50, p95, hits = measure(fn, user_id, query, args.repeat)
+                    print(f"{table:>9} {label:>8} {name:>12} {p50:>10.2f} {p95:>10.2f} {hits:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# benchmarks/bench_semantic.py
+#
+# Mede o índice semântico (semantic.py): tempo para calcular os vetores, para
+# carregar o índice de um usuário do banco (float32 em blobs) e para buscar as
+# tarefas mais parecidas, uma consulta por vez e em lote.
+#
+# Uso: python benchmarks/bench_semantic.py [--sizes 1000,10000,50000] [--repeat 50]
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app_factory import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from models import User, Task  # noqa: E402
+from semantic import semantic_index  # noqa: E402
+import ordering  # noqa: E402
+
+_db_dir = tempfile.mkdtemp()
+app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///" + os.path.join(_db_dir, "bench_semantic.db")})
+
+WORDS = (
+    "relatório orçamento reunião cliente contrato entrega revisão equipe projeto servidor banco dados "
+    "migração planilha custo prazo fornecedor auditoria backup deploy campanha marketing contratação "
+    "treinamento suporte chamado fatura imposto inventário estoque compras viagem"
+).split()
+QUESTIONS = [
+    "quais tarefas de backup do servidor estão atrasadas?",
+    "o que falta para a auditoria de impostos?",
+    "resumo das tarefas de contratação e treinamento da equipe",
+    "tarefas de marketing com prazo neste mês",
+]
+
+
+def _text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def seed(size, batch=2000):
+    """Um usuário com `size` tarefas, inseridas em lote com os vetores já calculados."""
+    rng = random.Random(7)
+    db.drop_all()
+    db.create_all()
+    user = User(username="vetores", password="x")
+    db.session.add(user)
+    db.session.commit()
+    embed_time = 0.0
+    for start in range(0, size, batch):
+        rows = [
+            {
+                "task_name": f"{_text(rng, 3)} {i}",
+                "cost": 1.0,
+                "due_date": date(2030, 1, 1),
+                "description": _text(rng, 15),
+                "notes": _text(rng, 5),
+                "category": rng.choice(WORDS),
+                "display_order": (i + 1) * ordering.GAP,
+                "user_id": user.id,
+            }
+            for i in range(start, min(start + batch, size))
+        ]
+        started = time.perf_counter()
+        semantic_index.embed_rows(rows)
+        embed_time += time.perf_counter() - started
+        db.session.execute(db.insert(Task), rows)
+        db.session.commit()
+    return user.id, embed_time
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return statistics.median(samples), samples[max(0, int(len(samples) * 0.95) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do índice semântico")
+    parser.add_argument("--sizes", default="1000,10000,50000", help="tarefas do usuário, separadas por vírgula")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+
+    print(
+        f"{'tarefas':>8} {'vetores/s':>10} {'carga (ms)':>11} {'busca p50':>10} {'busca p95':>10} "
+        f"{'lote p50':>9} {'texto p50':>10}"
+    )
+    with app.app_context():
+        for size in (int(value) for value in args.sizes.split(",")):
+            user_id, embed_time = seed(size)
+            semantic_index.clear()
+
+            started = time.perf_counter()
+            index = semantic_index.user_index(user_id)
+            load_ms = (time.perf_counter() - started) * 1000
+
+            # Só o produto de matrizes + top-k, com o vetor da pergunta já calculado
+            query = semantic_index.embed(QUESTIONS[:1])
+            single = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                index.top_k(query, args.k)
+                single.append((time.perf_counter() - started) * 1000)
+
+            # Várias perguntas em um único produto de matrizes (tempo por pergunta)
+            queries = semantic_index.embed(QUESTIONS * 8)
+            batched = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                index.top_k(queries, args.k)
+                batched.append((time.perf_counter() - started) * 1000 / len(queries))
+
+            # Caminho completo do chat: índice em cache, embedding da pergunta e carga das tarefas
+            full = []
+            for i in range(args.repeat):
+                started = time.perf_counter()
+                semantic_index.related_tasks(user_id, QUESTIONS[i % len(QUESTIONS)], args.k)
+                full.append((time.perf_counter() - started) * 1000)
+
+            single_p50, single_p95 = percentiles(single)
+            batched_p50, _ = percentiles(batched)
+            full_p50, _ = percentiles(full)
+            print(
+                f"{size:>8} {size / embed_time:>10.0f} {load_ms:>11.1f} {single_p50:>10.3f} {single_p95:>10.3f} "
+                f"{batched_p50:>9.3f} {full_p50:>10.2f}"
+            )
+    print("\nTempos em ms; \"lote\" é o tempo por pergunta com 32 perguntas em um único produto de matrizes.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# bulk_ops.py
+
+from datetime import date
+from extensions import db
+from forms import STATUS_CHOICES, PRIORITY_CHOICES
+from models import Task
+import analytics
+from semantic import semantic_index, TEXT_FIELDS
+from task_cache import task_cache
+from task_feed import task_feed
+
+COMPLETED_STATUS = analytics.COMPLETED_STATUS
+STATUS_VALUES = {value for value, _ in STATUS_CHOICES}
+PRIORITY_VALUES = {value for value, _ in PRIORITY_CHOICES}
+CATEGORY_LENGTH = Task.__table__.c.category.type.length
+
+
+class BulkError(ValueError):
+    pass
+
+
+def parse_task_ids(values, limit=1000):
+    """Converte a lista de ids recebida (strings) em inteiros únicos, na ordem recebida."""
+    task_ids = []
+    seen = set()
+    for value in values:
+        try:
+            task_id = int(value)
+        except (TypeError, ValueError):
+            raise BulkError(f"Id de tarefa inválido: {value}.")
+        if task_id not in seen:
+            seen.add(task_id)
+            task_ids.append(task_id)
+    if not task_ids:
+        raise BulkError("Selecione pelo menos uma tarefa.")
+    if len(task_ids) > limit:
+        raise BulkError(f"Selecione no máximo {limit} tarefas por vez.")
+    return task_ids
+
+
+def parse_changes(status=None, priority=None, category=None):
+    """Valida os campos a alterar; campos vazios ficam como estão."""
+    changes = {}
+    status = (status or "").strip()
+    priority = (priority or "").strip()
+    category = (category or "").strip()
+    if status:
+        if status not in STATUS_VALUES:
+            raise BulkError(f"Status inválido: {status}.")
+        changes["status"] = status
+    if priority:
+        if priority not in PRIORITY_VALUES:
+            raise BulkError(f"Prioridade inválida: {priority}.")
+        changes["priority"] = priority
+    if category:
+        if len(category) > CATEGORY_LENGTH:
+            raise BulkError(f"A categoria passa de {CATEGORY_LENGTH} caracteres.")
+        changes["category"] = category
+    if not changes:
+        raise BulkError("Informe o status, a prioridade ou a categoria.")
+    return changes
+
+
+def _selected(user_id, task_ids):
+    # O filtro por user_id impede alterar tarefas de outros usuários, mesmo com ids forjados
+    return Task.user_id == user_id, Task.id.in_(task_ids)
+
+
+def _finish(user_id, result, task_ids, op):
+    # UPDATE/DELETE em massa não passam pelos eventos do ORM: recalcula o resumo uma vez por lote
+    if result.rowcount:
+        analytics.rebuild_user_stats(user_id)
+        task_cache.bump(user_id)
+        task_feed.record(user_id, [{"op": op, "id": task_id} for task_id in task_ids])
+    db.session.commit()
+    semantic_index.invalidate(user_id)
+    return result.rowcount
+
+
+def bulk_update(user_id, task_ids, changes):
+    """Aplica as mesmas alterações a todas as tarefas selecionadas em um único UPDATE."""
+    result = db.session.execute(
+        db.update(Task).where(*_selected(user_id, task_ids)).values(**changes),
+        execution_options={"synchronize_session": False},
+    )
+    if result.rowcount and TEXT_FIELDS.keys() & changes.keys():
+        # A categoria entra no vetor da tarefa: recalcula só as tarefas alteradas
+        semantic_index.refresh_tasks(user_id, task_ids)
+    return _finish(user_id, result, task_ids, "upsert")
+
+
+def bulk_complete(user_id, task_ids, completion_date=None):
+    """Marca as tarefas selecionadas como concluídas na data informada (hoje, por padrão)."""
+    return bulk_update(
+        user_id, task_ids, {"status": COMPLETED_STATUS, "completion_date": completion_date or date.today()}
+    )
+
+
+def bulk_delete(user_id, task_ids):
+    """Exclui as tarefas selecionadas em um único DELETE.
+
+    Com display_order esparso as demais tarefas não precisam ser renumeradas.
+    """
+    result = db.session.execute(
+        db.delete(Task).where(*_selected(user_id, task_ids)),
+        execution_options={"synchronize_session": False},
+    )
+    return _finish(user_id, result, task_ids, "delete")
@@ -0,0 +1,172 @@
+# chat_context.py
+
+from datetime import datetime
+from flask import current_app
+from extensions import db
+from models import Message, ConversationSummary
+from llm import estimate_tokens, llm_gateway
+from semantic import semantic_index
+
+CHAT_INSTRUCTIONS = (
+    "Você é o assistente de um gerenciador de tarefas. Responda de forma objetiva, "
+    "considerando o contexto da conversa abaixo.\n\n"
+)
+
+SUMMARY_PROMPT = (
+    "Atualize o resumo de uma conversa entre um usuário e um assistente. Mantenha fatos, "
+    "decisões e pedidos do usuário; descarte cumprimentos e repetições. Responda apenas com o novo resumo, "
+    "em no máximo {limit} palavras.\n\n"
+    "### Resumo atual\n{summary}\n\n"
+    "### Novas mensagens\n{messages}\n"
+)
+
+ROLE_LABELS = {"user": "Usuário", "assistant": "Assistente"}
+
+
+def _format_message(message):
+    return f"{ROLE_LABELS.get(message.role, message.role)}: {message.content}\n"
+
+
+def _truncate(text, limit):
+    text = " ".join((text or "").split())
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+def _format_task(task):
+    details = [
+        f"status: {task.status or 'N/A'}",
+        f"prioridade: {task.priority or 'N/A'}",
+        f"prevista para {task.due_date.strftime('%d/%m/%Y')}",
+        f"custo R${task.cost:.2f}",
+    ]
+    if task.category:
+        details.append(f"categoria: {task.category}")
+    line = f"- {task.task_name} ({'; '.join(details)})"
+    if task.description:
+        line += f": {_truncate(task.description, 200)}"
+    return line + "\n"
+
+
+def related_tasks_section(user_id, text, k):
+    """Só as `k` tarefas do usuário mais parecidas com a pergunta, em vez de nenhuma ou de todas."""
+    if k <= 0:
+        return ""
+    related = semantic_index.related_tasks(user_id, text, k)
+    if not related:
+        return ""
+    lines = ["### Tarefas do usuário relacionadas à pergunta\n"]
+    lines.extend(_format_task(task) for task, _ in related)
+    lines.append("\n")
+    return "".join(lines)
+
+
+def _newest_first(user_id, before=None, inclusive=False):
+    """Mensagens do usuário da mais nova para a mais antiga (keyset em timestamp, id).
+
+    Com `inclusive`, a própria mensagem `before` entra no resultado.
+    """
+    query = Message.query.filter(Message.user_id == user_id)
+    if before is not None:
+        same_timestamp = Message.id <= before.id if inclusive else Message.id < before.id
+        query = query.filter(
+            db.or_(
+                Message.timestamp < before.timestamp,
+                db.and_(Message.timestamp == before.timestamp, same_timestamp),
+            )
+        )
+    return query.order_by(Message.timestamp.desc(), Message.id.desc())
+
+
+def history_page(user_id, before_id=None, per_page=30, inclusive=False):
+    """Uma página do histórico em ordem cronológica e a mensagem que serve de cursor para a anterior.
+
+    Com `inclusive`, a página termina na própria mensagem `before_id` (links da busca).
+    """
+    before = None
+    if before_id:
+        before = Message.query.filter_by(id=before_id, user_id=user_id).first()
+    rows = _newest_first(user_id, before, inclusive).limit(per_page + 1).all()
+    messages = list(reversed(rows[:per_page]))
+    older_cursor = messages[0].id if len(rows) > per_page and messages else None
+    return messages, older_cursor
+
+
+def recent_window(user_id, before, token_budget, max_messages=50):
+    """Mensagens mais recentes (anteriores a `before`) que cabem no orçamento de tokens."""
+    window = []
+    used = 0
+    for message in _newest_first(user_id, before).limit(max_messages):
+        tokens = estimate_tokens(message.content)
+        if window and used + tokens > token_budget:
+            break
+        window.append(message)
+        used += tokens
+    window.reverse()
+    return window
+
+
+def build_chat_prompt(user_message):
+    """Monta o prompt do chat: resumo das conversas antigas + tarefas relacionadas + mensagens recentes + pergunta atual.
+
+    `user_message` é o Message do usuário já gravado; o histórico considerado é o anterior a ele.
+    """
+    config = current_app.config
+    summary = db.session.get(ConversationSummary, user_message.user_id)
+    window = recent_window(
+        user_message.user_id,
+        user_message,
+        config["CHAT_CONTEXT_TOKENS"],
+        config["CHAT_CONTEXT_MAX_MESSAGES"],
+    )
+    if summary is not None and summary.covered_until_id:
+        window = [message for message in window if message.id > summary.covered_until_id]
+
+    parts = [CHAT_INSTRUCTIONS]
+    if summary is not None and summary.summary:
+        parts.append(f"### Resumo da conversa anterior\n{summary.summary}\n\n")
+    parts.append(related_tasks_section(user_message.user_id, user_message.content, config["CHAT_CONTEXT_TASKS"]))
+    if window:
+        parts.append("### Mensagens recentes\n")
+        parts.extend(_format_message(message) for message in window)
+        parts.append("\n")
+    parts.append(f"Usuário: {user_message.content}\nAssistente:")
+    return "".join(parts)
+
+
+def refresh_summary(user_id):
+    """Incorpora ao resumo as mensagens que já saíram da janela recente.
+
+    Roda em segundo plano após cada resposta. Só chama a IA quando há pelo menos
+    CHAT_SUMMARY_MIN_MESSAGES mensagens novas fora da janela, e cada chamada processa
+    apenas essas mensagens (o resumo anterior entra como contexto).
+    """
+    config = current_app.config
+    summary = db.session.get(ConversationSummary, user_id) or ConversationSummary(user_id=user_id, summary="")
+    # A janela inclui a mensagem mais recente, como na próxima pergunta
+    window = recent_window(
+        user_id, None, config["CHAT_CONTEXT_TOKENS"], config["CHAT_CONTEXT_MAX_MESSAGES"]
+    )
+    if not window:
+        return
+    boundary = window[0]
+    pending = Message.query.filter(
+        Message.user_id == user_id,
+        Message.id > (summary.covered_until_id or 0),
+        db.or_(
+            Message.timestamp < boundary.timestamp,
+            db.and_(Message.timestamp == boundary.timestamp, Message.id < boundary.id),
+        ),
+    ).order_by(Message.timestamp, Message.id).limit(config["CHAT_SUMMARY_BATCH"]).all()
+    if len(pending) < config["CHAT_SUMMARY_MIN_MESSAGES"]:
+        return
+
+    prompt = SUMMARY_PROMPT.format(
+        limit=config["CHAT_SUMMARY_WORDS"],
+        summary=summary.summary or "(vazio)",
+        messages="".join(_format_message(message) for message in pending),
+    )
+    summary.summary = llm_gateway.generate(prompt, user_id=user_id).strip()
+    summary.covered_until_id = max(message.id for message in pending)
+    summary.updated_at = datetime.utcnow()
+    db.session.add(summary)
+    db.session.commit()
@@ -0,0 +1,153 @@
+# chat_views.py
+
+from datetime import date
+from flask import Blueprint, render_template, redirect, url_for, flash, request, session, jsonify, Response, stream_with_context, current_app, abort
+from extensions import db, jobs
+from models import Message
+from auth_views import login_required
+from streaming import sse_event, SSE_HEADERS
+from llm_cache import response_cache
+from llm import llm_gateway
+from chat_context import build_chat_prompt, history_page, refresh_summary
+import message_archive
+
+bp = Blueprint("chat", __name__)
+
+# Rota para o Chatbot
+@bp.route("/chat", methods=["GET", "POST"])
+@login_required
+def chat():
+    if request.method == "POST":
+        user_message = request.form.get("message")
+        if user_message:
+            # Salvar a mensagem do usuário
+            message = Message(user_id=session["user_id"], content=user_message, role="user")
+            db.session.add(message)
+            db.session.commit()
+
+            # Chamar a API Gemini com o contexto da conversa (prompts repetidos vêm do cache)
+            try:
+                prompt = build_chat_prompt(message)
+                ai_response = response_cache.cached(
+                    llm_gateway.model_name, prompt, lambda text: llm_gateway.generate(text, user_id=session["user_id"])
+                )
+
+                # Salvar a resposta da IA
+                ai_message = Message(user_id=session["user_id"], content=ai_response, role="assistant")
+                db.session.add(ai_message)
+                db.session.commit()
+            except Exception as e:
+                current_app.logger.error(f"Erro ao gerar a resposta: {e}")
+                flash("Erro ao gerar a resposta. Verifique sua chave de API e tente novamente.", "danger")
+                ai_response = "Desculpe, ocorreu um erro ao processar sua solicitação."
+                ai_message = Message(user_id=session["user_id"], content=ai_response, role="assistant")
+                db.session.add(ai_message)
+                db.session.commit()
+            # Mensagens que saíram da janela recente entram no resumo, em segundo plano
+            jobs.submit(refresh_summary, session["user_id"])
+
+        return redirect(url_for("chat.chat"))
+    else:
+        # "at" (vindo da busca) mostra a página que termina na mensagem encontrada
+        at_id = request.args.get("at", type=int)
+        before_id = at_id or request.args.get("before", type=int)
+        messages, older_cursor = history_page(
+            session["user_id"], before_id, current_app.config["CHAT_HISTORY_PAGE"], inclusive=bool(at_id)
+        )
+        # Na página mais antiga do banco, o link para as conversas arquivadas
+        has_archive = older_cursor is None and message_archive.has_archive(session["user_id"])
+        return render_template(
+            "chat.html", messages=messages, older_cursor=older_cursor, before_id=before_id, at_id=at_id,
+            has_archive=has_archive,
+        )
+
+@bp.route("/chat/stream", methods=["POST"])
+@login_required
+def chat_stream():
+    """Envia a resposta da IA ao navegador em partes, via Server-Sent Events."""
+    user_message = (request.form.get("message") or "").strip()
+    if not user_message:
+        return jsonify(error="Mensagem vazia."), 400
+
+    # Salvar a mensagem do usuário antes de chamar a API
+    user_id = session["user_id"]
+    message = Message(user_id=user_id, content=user_message, role="user")
+    db.session.add(message)
+    db.session.commit()
+    message_id = message.id
+    prompt = build_chat_prompt(message)
+
+    def save_reply(content):
+        ai_message = Message(user_id=user_id, content=content, role="assistant")
+        db.session.add(ai_message)
+        db.session.commit()
+        # Mensagens que saíram da janela recente entram no resumo, em segundo plano
+        jobs.submit(refresh_summary, user_id)
+        return ai_message.id
+
+    @stream_with_context
+    def events():
+        # Primeiro evento sai imediatamente, antes da primeira parte da resposta
+        yield sse_event({"id": message_id}, event="start")
+        cached = response_cache.get(llm_gateway.model_name, prompt)
+        if cached is not None:
+            yield sse_event({"text": cached})
+            yield sse_event({"id": save_reply(cached)}, event="done")
+            return
+        parts = []
+        try:
+            for chunk in llm_gateway.stream(prompt, user_id=user_id):
+                parts.append(chunk)
+                yield sse_event({"text": chunk})
+        except GeneratorExit:
+            # Navegador desconectou: guarda o que já foi gerado
+            if parts:
+                save_reply("".join(parts))
+            raise
+        except Exception as e:
+            current_app.logger.error(f"Erro ao gerar a resposta: {e}")
+            ai_response = "Desculpe, ocorreu um erro ao processar sua solicitação."
+            yield sse_event({"text": ai_response}, event="error")
+            yield sse_event({"id": save_reply(ai_response)}, event="done")
+            return
+        # A resposta completa é gravada uma única vez, ao final do streaming
+        ai_response = "".join(parts)
+        response_cache.set(llm_gateway.model_name, prompt, ai_response)
+        yield sse_event({"id": save_reply(ai_response)}, event="done")
+
+    return Response(events(), mimetype="text/event-stream", headers=SSE_HEADERS)
+
+@bp.route("/delete_message/<int:message_id>", methods=["POST"])
+@login_required
+def delete_message(message_id):
+    message = Message.query.filter_by(id=message_id, user_id=session["user_id"]).first_or_404()
+    db.session.delete(message)
+    db.session.commit()
+    flash("Mensagem excluída com sucesso!", "success")
+    return redirect(url_for("chat.chat"))
+
+def _parse_day(value):
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+@bp.route("/chat/archive")
+@login_required
+def archive():
+    """Dias com conversas arquivadas (ver message_archive.py), do mais recente ao mais antigo."""
+    days, next_cursor = message_archive.archived_days(
+        session["user_id"], _parse_day(request.args.get("before")), current_app.config["CHAT_HISTORY_PAGE"]
+    )
+    return render_template("chat_archive.html", days=days, next_cursor=next_cursor)
+
+@bp.route("/chat/archive/<day>")
+@login_required
+def archive_day(day):
+    """Conversa de um dia arquivado; o blob só é descomprimido aqui."""
+    day = _parse_day(day)
+    messages = message_archive.read_day(session["user_id"], day) if day else None
+    if messages is None:
+        abort(404)
+    older, newer = message_archive.neighbour_days(session["user_id"], day)
+    return render_template("chat_archive_day.html", day=day, messages=messages, older=older, newer=newer)
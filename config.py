@@ -9,4 +9,160 @@ class Config:
     SECRET_KEY = os.getenv("SECRET_KEY") or "chave_secreta_padrao_para_desenvolvimento"
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL") or "sqlite:///tasks.db"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Perfil da engine (ver engine_profiles.py): "auto" (pelo banco da URI), "sqlite", "postgresql" ou "none".
+    # SQLite: PRAGMAs aplicados a cada conexão (WAL: leituras não esperam pelas escritas)
+    DB_PROFILE = os.getenv("DB_PROFILE") or "auto"
+    SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE") or "wal"
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS") or "normal"
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS") or 5000)
+    SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE") or -16000)
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE") or 128 * 1024 * 1024)
+    # Postgres: pool por processo (no Vercel, cada instância atende uma requisição por vez), conexões
+    # testadas antes do uso, limite de tempo das consultas e modo PgBouncer (pool fora da aplicação)
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE") or (1 if os.getenv("VERCEL") else 5))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW") or (2 if os.getenv("VERCEL") else 10))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE") or 300)
+    DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT") or 30)
+    DB_POOL_PRE_PING = (os.getenv("DB_POOL_PRE_PING") or "1") == "1"
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS") or 30000)
+    DB_PGBOUNCER = (os.getenv("DB_PGBOUNCER") or "0") == "1"
     API_KEY = os.getenv("API_KEY")
+
+    # Migrações (Flask-Migrate/alembic): o "flask db" as carrega quando é chamado; com 1, já na criação
+    # da aplicação (para chamar flask_migrate.upgrade() em scripts). Os processos web não as carregam
+    MIGRATIONS_ENABLED = (os.getenv("MIGRATIONS_ENABLED") or "0") == "1"
+
+    # Operações em lote: máximo de tarefas selecionadas por requisição
+    BULK_MAX_TASKS = int(os.getenv("BULK_MAX_TASKS") or 1000)
+    # Importação de tarefas (CSV/JSON): registros gravados por transação
+    TASK_IMPORT_BATCH_SIZE = int(os.getenv("TASK_IMPORT_BATCH_SIZE") or 500)
+
+    # Cache da listagem de tarefas: páginas no LRU de cada processo e, opcionalmente, em um
+    # cache compartilhado ("local" para testes ou "redis" com TASK_CACHE_REDIS_URL)
+    TASK_CACHE_ENABLED = (os.getenv("TASK_CACHE_ENABLED") or "1") == "1"
+    TASK_CACHE_SIZE = int(os.getenv("TASK_CACHE_SIZE") or 1024)
+    TASK_CACHE_BACKEND = os.getenv("TASK_CACHE_BACKEND") or None
+    TASK_CACHE_REDIS_URL = os.getenv("TASK_CACHE_REDIS_URL")
+    TASK_CACHE_TTL = int(os.getenv("TASK_CACHE_TTL") or 300)
+
+    # Feed da lista de tarefas (SSE em /feed): alterações feitas em outras abas aparecem sem recarregar.
+    # Desligado no Vercel, onde as funções não mantêm conexões. No modo ASGI as conexões ficam no event
+    # loop; no modo WSGI cada uma prende um worker enquanto está aberta, então o /feed só transmite com
+    # TASK_FEED_WSGI=1 (gunicorn com workers gthread ou gevent) e, sem ele, responde 204.
+    # "redis" (TASK_FEED_REDIS_URL) entrega entre processos e instâncias
+    TASK_FEED_ENABLED = (os.getenv("TASK_FEED_ENABLED") or ("0" if os.getenv("VERCEL") else "1")) == "1"
+    TASK_FEED_WSGI = (os.getenv("TASK_FEED_WSGI") or "0") == "1"
+    TASK_FEED_BACKEND = os.getenv("TASK_FEED_BACKEND") or "local"
+    TASK_FEED_REDIS_URL = os.getenv("TASK_FEED_REDIS_URL")
+    TASK_FEED_KEEPALIVE = int(os.getenv("TASK_FEED_KEEPALIVE") or 15)
+    TASK_FEED_MAX_SECONDS = int(os.getenv("TASK_FEED_MAX_SECONDS") or 300)
+    # Mensagens pendentes por conexão e eventos por mensagem; acima disso, a página recarrega a lista
+    TASK_FEED_QUEUE_SIZE = int(os.getenv("TASK_FEED_QUEUE_SIZE") or 100)
+    TASK_FEED_MAX_EVENTS = int(os.getenv("TASK_FEED_MAX_EVENTS") or 100)
+    # HTML das linhas da lista de tarefas e das mensagens do chat já renderizado, em memória
+    FRAGMENT_CACHE_ENABLED = (os.getenv("FRAGMENT_CACHE_ENABLED") or "1") == "1"
+    FRAGMENT_CACHE_SIZE = int(os.getenv("FRAGMENT_CACHE_SIZE") or 5000)
+
+    # Login e registro (auth_guard.py): tentativas por IP e por nome de usuário em cada IP antes de calcular
+    # o hash, e hashes simultâneos por processo. Com vários processos ou instâncias (Vercel),
+    # "redis" (AUTH_THROTTLE_REDIS_URL) aplica os limites a todos juntos
+    AUTH_THROTTLE_ENABLED = (os.getenv("AUTH_THROTTLE_ENABLED") or "1") == "1"
+    AUTH_THROTTLE_BACKEND = os.getenv("AUTH_THROTTLE_BACKEND") or "local"
+    AUTH_THROTTLE_REDIS_URL = os.getenv("AUTH_THROTTLE_REDIS_URL")
+    AUTH_IP_BURST = int(os.getenv("AUTH_IP_BURST") or 20)
+    AUTH_IP_PER_MINUTE = float(os.getenv("AUTH_IP_PER_MINUTE") or 10)
+    AUTH_USER_BURST = int(os.getenv("AUTH_USER_BURST") or 5)
+    AUTH_USER_PER_MINUTE = float(os.getenv("AUTH_USER_PER_MINUTE") or 5)
+    # No Vercel o IP do cliente vem do X-Forwarded-For adicionado pela plataforma
+    AUTH_PROXY_COUNT = int(os.getenv("AUTH_PROXY_COUNT") or (1 if os.getenv("VERCEL") else 0))
+    # Método e custo dos hashes novos; as senhas antigas são refeitas no próximo login
+    AUTH_HASH_METHOD = os.getenv("AUTH_HASH_METHOD") or "pbkdf2:sha256:600000"
+    AUTH_HASH_CONCURRENCY = int(os.getenv("AUTH_HASH_CONCURRENCY") or 2)
+    AUTH_HASH_WAIT = float(os.getenv("AUTH_HASH_WAIT") or 5)
+    # Usuários guardados em memória para o login e validade (segundos) dos existentes e dos inexistentes
+    AUTH_USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE") or 10000)
+    AUTH_USER_CACHE_TTL = int(os.getenv("AUTH_USER_CACHE_TTL") or 300)
+    AUTH_MISSING_USER_TTL = int(os.getenv("AUTH_MISSING_USER_TTL") or 5)
+
+    # API JSON: máximo de itens em cada lote (POST/PATCH em /api/v1/.../batch)
+    API_BATCH_MAX = int(os.getenv("API_BATCH_MAX") or 500)
+
+    # Busca textual: resultados por página
+    SEARCH_PAGE_SIZE = int(os.getenv("SEARCH_PAGE_SIZE") or 20)
+
+    # Métricas (formato Prometheus) e log de requisições lentas (0 desliga). A página /metrics
+    # só responde com METRICS_TOKEN definido (exige "Authorization: Bearer <token>") ou, sem
+    # token, com METRICS_PUBLIC=1; nos demais casos, 404
+    METRICS_ENABLED = (os.getenv("METRICS_ENABLED") or "1") == "1"
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+    METRICS_PUBLIC = os.getenv("METRICS_PUBLIC") == "1"
+    METRICS_SLOW_REQUEST_MS = int(os.getenv("METRICS_SLOW_REQUEST_MS") or 0)
+
+    # Jobs em segundo plano: "thread" (pool no próprio processo) ou "inline" (executa na requisição).
+    # No Vercel a função é congelada depois da resposta e uma thread não terminaria o job
+    JOB_BACKEND = os.getenv("JOB_BACKEND") or ("inline" if os.getenv("VERCEL") else "thread")
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS") or 2)
+    # Segundos até um relatório que não terminou ser dado como falho (processo encerrado no meio)
+    REPORT_JOB_TIMEOUT = int(os.getenv("REPORT_JOB_TIMEOUT") or 600)
+
+    # IA: backend ("gemini" ou "fake"; em testes, um llm.FakeBackend(...)), modelo, prazo e limites
+    LLM_BACKEND = os.getenv("LLM_BACKEND") or "gemini"
+    LLM_MODEL = os.getenv("LLM_MODEL") or "gemini-1.5-flash"
+    LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT") or 60)
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES") or 3)
+    LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE") or 0.5)
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY") or 16)
+    LLM_MAX_CONCURRENCY_PER_USER = int(os.getenv("LLM_MAX_CONCURRENCY_PER_USER") or 4)
+    LLM_FAKE_DELAY = float(os.getenv("LLM_FAKE_DELAY") or 0)
+
+    # Modo ASGI (uvicorn api.app:asgi): banco com driver assíncrono (padrão: derivado de
+    # DATABASE_URL, com aiosqlite ou asyncpg) e threads para as rotas que continuam síncronas
+    ASYNC_DATABASE_URI = os.getenv("ASYNC_DATABASE_URL")
+    ASGI_WSGI_THREADS = int(os.getenv("ASGI_WSGI_THREADS") or 16)
+    # Partes de uma resposta WSGI em espera no modo ASGI antes de a thread do Flask parar e esperar o cliente
+    ASGI_STREAM_BUFFER = int(os.getenv("ASGI_STREAM_BUFFER") or 16)
+
+    # Tamanho máximo do corpo das requisições em bytes (413 acima disso; no modo ASGI, antes de ler o corpo todo)
+    MAX_CONTENT_LENGTH = int(os.getenv("MAX_CONTENT_LENGTH") or 16 * 1024 * 1024)
+
+    # Chat: orçamento de tokens e máximo de mensagens do histórico enviado à IA; o resumo das mensagens
+    # antigas é refeito com pelo menos CHAT_SUMMARY_MIN_MESSAGES novas, no máximo CHAT_SUMMARY_BATCH por
+    # chamada e CHAT_SUMMARY_WORDS palavras; tamanho da página do histórico
+    CHAT_CONTEXT_TOKENS = int(os.getenv("CHAT_CONTEXT_TOKENS") or 3000)
+    CHAT_CONTEXT_MAX_MESSAGES = int(os.getenv("CHAT_CONTEXT_MAX_MESSAGES") or 50)
+    CHAT_SUMMARY_MIN_MESSAGES = int(os.getenv("CHAT_SUMMARY_MIN_MESSAGES") or 10)
+    CHAT_SUMMARY_BATCH = int(os.getenv("CHAT_SUMMARY_BATCH") or 200)
+    CHAT_SUMMARY_WORDS = int(os.getenv("CHAT_SUMMARY_WORDS") or 300)
+    CHAT_HISTORY_PAGE = int(os.getenv("CHAT_HISTORY_PAGE") or 30)
+
+    # Retenção do chat: mensagens com mais de MESSAGE_RETENTION_DAYS dias vão para o arquivo comprimido
+    # ("flask chat archive", periódico), em transações de MESSAGE_ARCHIVE_BATCH mensagens com uma pausa
+    # entre elas; codec "zlib" ou "zstd" (pacote zstandard)
+    MESSAGE_RETENTION_DAYS = int(os.getenv("MESSAGE_RETENTION_DAYS") or 90)
+    MESSAGE_ARCHIVE_CODEC = os.getenv("MESSAGE_ARCHIVE_CODEC") or "zlib"
+    MESSAGE_ARCHIVE_LEVEL = int(os.getenv("MESSAGE_ARCHIVE_LEVEL") or 6)
+    MESSAGE_ARCHIVE_BATCH = int(os.getenv("MESSAGE_ARCHIVE_BATCH") or 500)
+    MESSAGE_ARCHIVE_PAUSE = float(os.getenv("MESSAGE_ARCHIVE_PAUSE") or 0.05)
+
+    # Tarefas semelhantes e tarefas enviadas ao chat: embedder ("hashing", local), dimensões,
+    # índices em memória (usuários e validade em segundos), similaridade mínima e quantas tarefas
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND") or "hashing"
+    EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM") or 256)
+    SEMANTIC_INDEX_CACHE_SIZE = int(os.getenv("SEMANTIC_INDEX_CACHE_SIZE") or 128)
+    SEMANTIC_INDEX_TTL = int(os.getenv("SEMANTIC_INDEX_TTL") or 60)
+    SEMANTIC_MIN_SCORE = float(os.getenv("SEMANTIC_MIN_SCORE") or 0.2)
+    CHAT_CONTEXT_TASKS = int(os.getenv("CHAT_CONTEXT_TASKS") or 5)
+    SIMILAR_TASKS = int(os.getenv("SIMILAR_TASKS") or 5)
+
+    # Indicadores (painel e relatórios): tabela de resumo por usuário atualizada a cada gravação;
+    # com 0 o painel calcula os totais direto na tabela de tarefas
+    ANALYTICS_SUMMARY_TABLE = (os.getenv("ANALYTICS_SUMMARY_TABLE") or "1") == "1"
+
+    # Relatórios grandes são divididos em lotes (tokens estimados) resumidos em paralelo
+    REPORT_TOKEN_BUDGET = int(os.getenv("REPORT_TOKEN_BUDGET") or 6000)
+    REPORT_MAP_CONCURRENCY = int(os.getenv("REPORT_MAP_CONCURRENCY") or 4)
+
+    # Cache de respostas da IA: LRU em memória + tabela no banco com validade (segundos)
+    LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE") or 256)
+    LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL") or 7 * 24 * 3600)
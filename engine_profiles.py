@@ -0,0 +1,156 @@
+# engine_profiles.py
+
+from uuid import uuid4
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import event
+from sqlalchemy.pool import NullPool
+from extensions import db
+
+PROFILES = ("auto", "sqlite", "postgresql", "none")
+
+
+def normalize_uri(uri):
+    """postgres:// (Heroku, Vercel, Neon) vira postgresql://, o único nome aceito pelo SQLAlchemy 2."""
+    if uri.startswith("postgres://"):
+        return "postgresql://" + uri[len("postgres://"):]
+    return uri
+
+
+def profile_for(config):
+    """Perfil da engine: DB_PROFILE, ou pelo banco da URI quando "auto"."""
+    profile = config.get("DB_PROFILE") or "auto"
+    if profile != "auto":
+        return profile
+    dialect = config["SQLALCHEMY_DATABASE_URI"].partition(":")[0].split("+")[0]
+    return dialect if dialect in PROFILES else "none"
+
+
+def sqlite_pragmas(config):
+    """PRAGMAs aplicados a cada conexão nova, na ordem."""
+    pragmas = [
+        ("journal_mode", config.get("SQLITE_JOURNAL_MODE")),
+        ("synchronous", config.get("SQLITE_SYNCHRONOUS")),
+        ("busy_timeout", config.get("SQLITE_BUSY_TIMEOUT_MS")),
+        ("cache_size", config.get("SQLITE_CACHE_SIZE")),
+        ("mmap_size", config.get("SQLITE_MMAP_SIZE")),
+    ]
+    return [(name, value) for name, value in pragmas if value is not None and value != ""]
+
+
+def postgresql_options(config, is_async=False):
+    """Opções de create_engine para o Postgres.
+
+    Com DB_PGBOUNCER o pool fica com o PgBouncer (NullPool aqui), o statement_timeout
+    vai em SET LOCAL a cada transação (o PgBouncer recusa o parâmetro "options" na
+    conexão) e o asyncpg não reaproveita prepared statements, que não sobrevivem à troca
+    de conexão no modo transaction.
+    """
+    timeout = config.get("DB_STATEMENT_TIMEOUT_MS")
+    if config.get("DB_PGBOUNCER"):
+        options = {"poolclass": NullPool}
+        if is_async:
+            options["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": _statement_name,
+            }
+        return options
+    options = {
+        "pool_size": config.get("DB_POOL_SIZE", 5),
+        "max_overflow": config.get("DB_MAX_OVERFLOW", 10),
+        "pool_recycle": config.get("DB_POOL_RECYCLE", 300),
+        "pool_timeout": config.get("DB_POOL_TIMEOUT", 30),
+        "pool_pre_ping": config.get("DB_POOL_PRE_PING", True),
+    }
+    if timeout:
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(timeout)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return options
+
+
+def _statement_name():
+    # Nomes únicos: outra conexão do PgBouncer pode já ter um prepared statement com o nome padrão
+    return f"__asyncpg_{uuid4()}__"
+
+
+def engine_options(config, is_async=False):
+    """Opções de create_engine do perfil; as de SQLALCHEMY_ENGINE_OPTIONS têm prioridade."""
+    if profile_for(config) == "postgresql":
+        return postgresql_options(config, is_async)
+    return {}
+
+
+def _set_pragmas(pragmas):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f"PRAGMA {name} = {value}")
+        finally:
+            cursor.close()
+
+    return on_connect
+
+
+def _set_local_timeout(timeout):
+    def on_begin(connection):
+        cursor = connection.connection.cursor()
+        try:
+            cursor.execute(f"SET LOCAL statement_timeout = {int(timeout)}")
+        finally:
+            cursor.close()
+
+    return on_begin
+
+
+def configure_engine(engine, config):
+    """Liga os eventos do perfil à engine (síncrona; para a assíncrona, engine.sync_engine)."""
+    profile = profile_for(config)
+    if profile == "sqlite":
+        event.listen(engine, "connect", _set_pragmas(sqlite_pragmas(config)))
+    elif profile == "postgresql" and config.get("DB_PGBOUNCER") and config.get("DB_STATEMENT_TIMEOUT_MS"):
+        event.listen(engine, "begin", _set_local_timeout(config["DB_STATEMENT_TIMEOUT_MS"]))
+
+
+def init_app(app):
+    """Aplica o perfil da engine. Deve rodar antes de db.init_app, que cria a engine."""
+    app.config.setdefault("DB_PROFILE", "auto")
+    app.config.setdefault("SQLITE_JOURNAL_MODE", "wal")
+    app.config.setdefault("SQLITE_SYNCHRONOUS", "normal")
+    app.config.setdefault("SQLITE_BUSY_TIMEOUT_MS", 5000)
+    app.config.setdefault("SQLITE_CACHE_SIZE", -16000)
+    app.config.setdefault("SQLITE_MMAP_SIZE", 128 * 1024 * 1024)
+    app.config.setdefault("DB_STATEMENT_TIMEOUT_MS", 30000)
+    app.config.setdefault("DB_PGBOUNCER", False)
+    app.config["SQLALCHEMY_DATABASE_URI"] = normalize_uri(app.config["SQLALCHEMY_DATABASE_URI"])
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        **engine_options(app.config),
+        **(app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {}),
+    }
+    app.cli.add_command(engine_command)
+
+
+def configure_engines(app):
+    """Depois de db.init_app: eventos de conexão nas engines criadas pelo Flask-SQLAlchemy."""
+    with app.app_context():
+        for engine in db.engines.values():
+            configure_engine(engine, app.config)
+
+
+@click.command("engine-profile", help="Mostra o perfil da engine do banco e o estado da conexão.")
+@with_appcontext
+def engine_command():
+    config = current_app.config
+    engine = db.engine
+    click.echo(f"perfil: {profile_for(config)}  banco: {engine.url.render_as_string(hide_password=True)}")
+    click.echo(f"pool: {engine.pool.status()}")
+    with engine.connect() as connection:
+        if engine.dialect.name == "sqlite":
+            for name, _ in sqlite_pragmas(config):
+                click.echo(f"{name} = {connection.exec_driver_sql(f'PRAGMA {name}').scalar()}")
+        elif engine.dialect.name == "postgresql":
+            click.echo(f"statement_timeout = {connection.exec_driver_sql('SHOW statement_timeout').scalar()}")
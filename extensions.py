@@ -1,5 +1,7 @@
 # extensions.py
 
 from flask_sqlalchemy import SQLAlchemy
+from jobs import JobQueue
 
 db = SQLAlchemy()
+jobs = JobQueue()
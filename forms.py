@@ -1,6 +1,7 @@
 # forms.py
 
 from flask_wtf import FlaskForm
+from flask_wtf.file import FileField, FileRequired, FileAllowed
 from wtforms import (
     StringField,
     FloatField,
@@ -14,6 +15,20 @@ from models import User, Task
 from flask import session
 from datetime import datetime
 
+# Opções compartilhadas entre o formulário, os filtros da listagem e a validação
+# das operações em lote (bulk_ops.py) e da importação (task_io.py)
+STATUS_CHOICES = [
+    ("Pendente", "Pendente"),
+    ("Em Andamento", "Em Andamento"),
+    ("Concluída", "Concluída"),
+]
+
+PRIORITY_CHOICES = [
+    ("Baixa", "Baixa"),
+    ("Média", "Média"),
+    ("Alta", "Alta"),
+]
+
 class RegistrationForm(FlaskForm):
     username = StringField("Usuário", validators=[DataRequired()])
     password = PasswordField(
@@ -47,20 +62,12 @@ class TaskForm(FlaskForm):
     description = TextAreaField("Descrição", validators=[Optional()])
     status = SelectField(
         "Status",
-        choices=[
-            ("Pendente", "Pendente"),
-            ("Em Andamento", "Em Andamento"),
-            ("Concluída", "Concluída"),
-        ],
+        choices=STATUS_CHOICES,
         validators=[Optional()],
     )
     priority = SelectField(
         "Prioridade",
-        choices=[
-            ("Baixa", "Baixa"),
-            ("Média", "Média"),
-            ("Alta", "Alta"),
-        ],
+        choices=PRIORITY_CHOICES,
         validators=[Optional()],
     )
     assigned_to = StringField("Atribuída a", validators=[Optional()])
@@ -93,3 +100,10 @@ class TaskForm(FlaskForm):
                 datetime.strptime(completion_date.data, "%d/%m/%Y")
             except ValueError:
                 raise ValidationError("Formato de data inválido. Use dd/mm/yyyy.")
+
+class ImportForm(FlaskForm):
+    file = FileField(
+        "Arquivo (CSV ou JSON)",
+        validators=[FileRequired(), FileAllowed(["csv", "json", "jsonl"], "Envie um arquivo CSV ou JSON.")],
+    )
+    submit = SubmitField("Importar")
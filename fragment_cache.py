@@ -0,0 +1,94 @@
+# fragment_cache.py
+
+import threading
+import time
+from flask import current_app
+from markupsafe import Markup
+from llm_cache import LRUCache
+
+# Para cada template de fragmento: o nome da variável do objeto no template e a chave do
+# HTML renderizado. A chave muda sempre que o HTML mudaria: Task.version aumenta em todo
+# UPDATE da tarefa e as mensagens não são editadas. A data de criação entra na chave
+# porque o SQLite reaproveita o id da última linha excluída.
+FRAGMENTS = {
+    "task_row.html": ("task", lambda task, context: (task.id, task.version, task.creation_date)),
+    "chat_message.html": (
+        "message", lambda message, context: (message.id, message.timestamp, message.id == context.get("at_id")),
+    ),
+}
+
+
+def _render(name, context):
+    # Como um {% include %}: sem os sinais de render_template, que mediriam cada linha separadamente
+    app = current_app._get_current_object()
+    app.update_template_context(context)
+    return Markup(app.jinja_env.get_template(name).render(context))
+
+
+class FragmentCache:
+    """Cache do HTML dos fragmentos repetidos das páginas: linhas da lista de tarefas e mensagens do chat.
+
+    A página é montada com os fragmentos já renderizados; só os novos ou alterados
+    passam pelo Jinja. Nos templates: {{ fragment("task_row.html", task) }}.
+
+    Configuração: FRAGMENT_CACHE_ENABLED e FRAGMENT_CACHE_SIZE (fragmentos em memória
+    em cada processo).
+    """
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.memory = LRUCache()
+        self._counters = {"hits": 0, "misses": 0}
+        self._render_seconds = 0.0
+        self._saved_seconds = 0.0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("FRAGMENT_CACHE_ENABLED", True)
+        app.config.setdefault("FRAGMENT_CACHE_SIZE", 5000)
+        self.enabled = app.config["FRAGMENT_CACHE_ENABLED"]
+        self.memory = LRUCache(app.config["FRAGMENT_CACHE_SIZE"])
+        app.add_template_global(self.render, "fragment")
+        app.extensions["fragment_cache"] = self
+
+    def render(self, name, obj, **context):
+        """HTML do fragmento `name` para `obj`, do cache ou renderizado agora (e guardado)."""
+        variable, key = FRAGMENTS[name]
+        context[variable] = obj
+        if not self.enabled:
+            return _render(name, context)
+        cache_key = (name, *key(obj, context))
+        cached = self.memory.get(cache_key)
+        if cached is not None:
+            html, seconds = cached
+            with self._lock:
+                self._counters["hits"] += 1
+                # Tempo que a renderização deste fragmento levou quando foi guardado
+                self._saved_seconds += seconds
+            return html
+        started = time.perf_counter()
+        html = _render(name, context)
+        seconds = time.perf_counter() - started
+        self.memory.set(cache_key, (html, seconds))
+        with self._lock:
+            self._counters["misses"] += 1
+            self._render_seconds += seconds
+        return html
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["render_seconds"] = self._render_seconds
+            stats["saved_seconds"] = self._saved_seconds
+        lookups = stats["hits"] + stats["misses"]
+        stats["entries"] = len(self.memory)
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        self.memory.clear()
+
+
+fragment_cache = FragmentCache()
@@ -0,0 +1,62 @@
+# jobs.py
+
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ThreadBackend:
+    """Executa os jobs em um pool de threads do próprio processo (padrão)."""
+
+    def __init__(self, max_workers=2):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="jobs")
+
+    def submit(self, fn, *args):
+        self.executor.submit(fn, *args)
+
+
+class InlineBackend:
+    """Executa o job na hora, dentro da requisição (testes e ambientes sem threads em segundo plano)."""
+
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+BACKENDS = {
+    "thread": ThreadBackend,
+    "inline": InlineBackend,
+}
+
+
+class JobQueue:
+    """Fila de jobs em segundo plano com backend configurável.
+
+    O backend é escolhido por JOB_BACKEND ("thread", "inline" ou qualquer objeto
+    com um método submit(fn, *args)). Cada job roda dentro de um app context próprio,
+    com sua própria sessão do banco.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.backend = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        backend = app.config.get("JOB_BACKEND", "thread")
+        if isinstance(backend, str):
+            if backend == "thread":
+                backend = ThreadBackend(max_workers=app.config.get("JOB_WORKERS", 2))
+            else:
+                backend = BACKENDS[backend]()
+        self.backend = backend
+        app.extensions["jobs"] = self
+
+    def _run(self, fn, *args):
+        with self.app.app_context():
+            try:
+                fn(*args)
+            except Exception:
+                self.app.logger.exception(f"Erro ao executar o job {fn.__name__}")
+
+    def submit(self, fn, *args):
+        self.backend.submit(self._run, fn, *args)
@@ -0,0 +1,444 @@
+# llm.py
+
+import asyncio
+import random
+import threading
+import time
+import metrics
+
+DEFAULT_MODEL_NAME = "gemini-1.5-flash"
+
+# Erros do google.api_core que valem nova tentativa (comparados pelo nome, sem importar o SDK)
+TRANSIENT_ERROR_NAMES = {
+    "ServiceUnavailable",
+    "ResourceExhausted",
+    "TooManyRequests",
+    "InternalServerError",
+    "DeadlineExceeded",
+    "GatewayTimeout",
+    "BadGateway",
+}
+
+
+class LLMError(Exception):
+    pass
+
+
+class TransientLLMError(LLMError):
+    """Falha temporária: a chamada pode ser repetida."""
+
+
+class LLMBusyError(LLMError):
+    """Limite de chamadas simultâneas atingido até o fim do prazo."""
+
+
+def estimate_tokens(text):
+    """Estimativa barata de tokens (cerca de 4 caracteres por token)."""
+    return len(text) // 4 + 1
+
+
+def is_transient(error):
+    if isinstance(error, (TransientLLMError, TimeoutError, ConnectionError)):
+        return True
+    return type(error).__name__ in TRANSIENT_ERROR_NAMES
+
+
+class GeminiBackend:
+    """Google Gemini. O SDK é importado e configurado só na primeira chamada."""
+
+    def __init__(self, api_key, model_name=DEFAULT_MODEL_NAME):
+        self.api_key = api_key
+        self.model_name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _get_model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    import google.generativeai as genai
+
+                    genai.configure(api_key=self.api_key)
+                    self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def generate(self, prompt, timeout):
+        response = self._get_model().generate_content(prompt, request_options={"timeout": timeout})
+        return response.text
+
+    def stream(self, prompt, timeout):
+        for chunk in self._get_model().generate_content(prompt, stream=True, request_options={"timeout": timeout}):
+            if chunk.text:
+                yield chunk.text
+
+    async def agenerate(self, prompt, timeout):
+        response = await self._get_model().generate_content_async(prompt, request_options={"timeout": timeout})
+        return response.text
+
+    async def astream(self, prompt, timeout):
+        response = await self._get_model().generate_content_async(
+            prompt, stream=True, request_options={"timeout": timeout}
+        )
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+
+class FakeBackend:
+    """Backend local para testes e benchmarks.
+
+    `delay` simula a latência até a primeira resposta e `chunk_delay` o intervalo entre
+    as partes do streaming. As primeiras `fail_times` chamadas lançam TransientLLMError.
+    `respond`, se informado, recebe o prompt e devolve o texto.
+    """
+
+    def __init__(self, text="Resposta de teste.", delay=0.0, chunk_delay=0.0, fail_times=0, respond=None,
+                 model_name="fake"):
+        self.text = text
+        self.delay = delay
+        self.chunk_delay = chunk_delay
+        self.fail_times = fail_times
+        self.respond = respond
+        self.model_name = model_name
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _answer(self, prompt):
+        with self._lock:
+            self.calls += 1
+            if self.fail_times > 0:
+                self.fail_times -= 1
+                raise TransientLLMError("Falha simulada.")
+        return self.respond(prompt) if self.respond else self.text
+
+    def _wait(self, timeout):
+        if self.delay > timeout:
+            time.sleep(timeout)
+            raise TimeoutError("Prazo esgotado (simulado).")
+        if self.delay:
+            time.sleep(self.delay)
+
+    def generate(self, prompt, timeout):
+        self._wait(timeout)
+        return self._answer(prompt)
+
+    def stream(self, prompt, timeout):
+        self._wait(timeout)
+        for index, word in enumerate(self._answer(prompt).split(" ")):
+            if self.chunk_delay:
+                time.sleep(self.chunk_delay)
+            yield word if index == 0 else " " + word
+
+    async def _await(self, timeout):
+        if self.delay > timeout:
+            await asyncio.sleep(timeout)
+            raise TimeoutError("Prazo esgotado (simulado).")
+        if self.delay:
+            await asyncio.sleep(self.delay)
+
+    async def agenerate(self, prompt, timeout):
+        await self._await(timeout)
+        return self._answer(prompt)
+
+    async def astream(self, prompt, timeout):
+        await self._await(timeout)
+        for index, word in enumerate(self._answer(prompt).split(" ")):
+            if self.chunk_delay:
+                await asyncio.sleep(self.chunk_delay)
+            yield word if index == 0 else " " + word
+
+
+BACKENDS = {"gemini": GeminiBackend, "fake": FakeBackend}
+
+
+class LLMGateway:
+    """Ponto único de acesso à IA.
+
+    Configuração:
+    - LLM_BACKEND: "gemini", "fake" ou um objeto com generate/stream; criado uma vez por processo;
+    - LLM_FAKE_DELAY: latência simulada pelo backend "fake" (benchmarks com servidor real);
+    - LLM_MODEL: nome do modelo do Gemini;
+    - LLM_TIMEOUT: prazo em segundos de cada chamada, somando as novas tentativas;
+    - LLM_MAX_RETRIES e LLM_BACKOFF_BASE: novas tentativas em erros temporários, com espera
+      exponencial e aleatória (jitter);
+    - LLM_MAX_CONCURRENCY e LLM_MAX_CONCURRENCY_PER_USER: chamadas simultâneas por processo e por usuário.
+
+    agenerate/astream são as versões assíncronas (modo ASGI, ver asgi.py): esperam a IA
+    sem ocupar uma thread e usam as mesmas vagas de concorrência das chamadas síncronas.
+    """
+
+    def __init__(self, app=None):
+        self.config = {}
+        self._backend = None
+        self._lock = threading.Lock()
+        self._process_slots = None
+        self._user_slots = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("LLM_BACKEND", "gemini")
+        app.config.setdefault("LLM_MODEL", DEFAULT_MODEL_NAME)
+        app.config.setdefault("LLM_TIMEOUT", 60.0)
+        app.config.setdefault("LLM_MAX_RETRIES", 3)
+        app.config.setdefault("LLM_BACKOFF_BASE", 0.5)
+        app.config.setdefault("LLM_MAX_CONCURRENCY", 16)
+        app.config.setdefault("LLM_MAX_CONCURRENCY_PER_USER", 4)
+        self.config = app.config
+        self._backend = None
+        self._process_slots = threading.BoundedSemaphore(app.config["LLM_MAX_CONCURRENCY"])
+        self._user_slots = {}
+        app.extensions["llm"] = self
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    backend = self.config.get("LLM_BACKEND", "gemini")
+                    if backend == "gemini":
+                        backend = GeminiBackend(self.config.get("API_KEY"), self.config.get("LLM_MODEL", DEFAULT_MODEL_NAME))
+                    elif backend == "fake":
+                        backend = FakeBackend(delay=self.config.get("LLM_FAKE_DELAY", 0.0))
+                    elif isinstance(backend, str):
+                        backend = BACKENDS[backend]()
+                    self._backend = backend
+        return self._backend
+
+    @backend.setter
+    def backend(self, value):
+        self._backend = value
+
+    @property
+    def model_name(self):
+        return getattr(self.backend, "model_name", self.config.get("LLM_MODEL", DEFAULT_MODEL_NAME))
+
+    def _user_semaphore(self, user_id):
+        """Vagas do usuário; cada chamada a este método precisa de um _release com o mesmo user_id."""
+        with self._lock:
+            slot = self._user_slots.get(user_id)
+            if slot is None:
+                semaphore = threading.BoundedSemaphore(self.config["LLM_MAX_CONCURRENCY_PER_USER"])
+                slot = self._user_slots[user_id] = [semaphore, 0]
+            # Chamadas do usuário esperando ou em andamento: sem nenhuma, a entrada sai do dicionário
+            slot[1] += 1
+            return slot[0]
+
+    def _acquire(self, user_id, deadline):
+        """Reserva uma vaga do usuário (se informado) e do processo, esperando no máximo até o prazo."""
+        semaphores = [self._process_slots]
+        if user_id is not None:
+            semaphores.insert(0, self._user_semaphore(user_id))
+        acquired = []
+        try:
+            for semaphore in semaphores:
+                if not semaphore.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                    raise LLMBusyError("Muitas chamadas simultâneas à IA. Tente novamente em instantes.")
+                acquired.append(semaphore)
+        except BaseException:
+            self._release(acquired, user_id)
+            raise
+        return acquired
+
+    def _release(self, acquired, user_id=None):
+        for semaphore in reversed(acquired):
+            semaphore.release()
+        if user_id is not None:
+            with self._lock:
+                slot = self._user_slots[user_id]
+                slot[1] -= 1
+                if not slot[1]:
+                    del self._user_slots[user_id]
+
+    def _attempts(self, deadline):
+        """Gera (tentativa, segundos restantes) até o prazo acabar."""
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("Prazo da chamada à IA esgotado.")
+            yield attempt, remaining
+            attempt += 1
+
+    def _retry_delay(self, error, attempt, deadline, operation):
+        """Segundos até a nova tentativa, ou None se o erro não deve ser repetido."""
+        if not is_transient(error) or attempt >= self.config["LLM_MAX_RETRIES"]:
+            return None
+        # Espera aleatória entre 0 e base * 2^tentativa, sem passar do prazo
+        delay = random.uniform(0, self.config["LLM_BACKOFF_BASE"] * (2 ** attempt))
+        remaining = deadline - time.monotonic()
+        if delay >= remaining:
+            return None
+        metrics.LLM_RETRIES.inc(operation)
+        return delay
+
+    def _should_retry(self, error, attempt, deadline, operation):
+        delay = self._retry_delay(error, attempt, deadline, operation)
+        if delay is None:
+            return False
+        time.sleep(delay)
+        return True
+
+    def _acquire_timed(self, user_id, deadline, operation):
+        started = time.perf_counter()
+        try:
+            return self._acquire(user_id, deadline)
+        finally:
+            metrics.LLM_WAIT.observe(time.perf_counter() - started, operation)
+
+    def generate(self, prompt, user_id=None, timeout=None):
+        """Gera a resposta completa."""
+        started = time.perf_counter()
+        deadline = time.monotonic() + (timeout or self.config["LLM_TIMEOUT"])
+        try:
+            acquired = self._acquire_timed(user_id, deadline, "generate")
+        except Exception as e:
+            metrics.observe_llm("generate", started, prompt, error=e)
+            raise
+        try:
+            for attempt, remaining in self._attempts(deadline):
+                try:
+                    response = self.backend.generate(prompt, remaining)
+                    metrics.observe_llm("generate", started, prompt, response)
+                    return response
+                except Exception as e:
+                    if not self._should_retry(e, attempt, deadline, "generate"):
+                        raise
+        except Exception as e:
+            metrics.observe_llm("generate", started, prompt, error=e)
+            raise
+        finally:
+            self._release(acquired, user_id)
+
+    def stream(self, prompt, user_id=None, timeout=None):
+        """Gera a resposta em partes. Só repete a chamada se a falha vier antes da primeira parte."""
+        started_at = time.perf_counter()
+        deadline = time.monotonic() + (timeout or self.config["LLM_TIMEOUT"])
+        try:
+            acquired = self._acquire_timed(user_id, deadline, "stream")
+        except Exception as e:
+            metrics.observe_llm("stream", started_at, prompt, error=e)
+            raise
+        received = []
+        try:
+            for attempt, remaining in self._attempts(deadline):
+                started = False
+                try:
+                    for chunk in self.backend.stream(prompt, remaining):
+                        started = True
+                        received.append(chunk)
+                        yield chunk
+                    metrics.observe_llm("stream", started_at, prompt, "".join(received))
+                    return
+                except Exception as e:
+                    if started or not self._should_retry(e, attempt, deadline, "stream"):
+                        raise
+        except Exception as e:
+            metrics.observe_llm("stream", started_at, prompt, "".join(received), error=e)
+            raise
+        finally:
+            self._release(acquired, user_id)
+
+    async def _acquire_async(self, user_id, deadline, operation):
+        """Como _acquire, sem bloquear o event loop: tenta as vagas sem esperar e dorme entre as tentativas."""
+        started = time.perf_counter()
+        semaphores = [self._process_slots]
+        if user_id is not None:
+            semaphores.insert(0, self._user_semaphore(user_id))
+        acquired = []
+        try:
+            for semaphore in semaphores:
+                pause = 0.005
+                while not semaphore.acquire(blocking=False):
+                    if time.monotonic() + pause >= deadline:
+                        raise LLMBusyError("Muitas chamadas simultâneas à IA. Tente novamente em instantes.")
+                    await asyncio.sleep(pause)
+                    pause = min(pause * 2, 0.1)
+                acquired.append(semaphore)
+        except BaseException:
+            self._release(acquired, user_id)
+            raise
+        finally:
+            metrics.LLM_WAIT.observe(time.perf_counter() - started, operation)
+        return acquired
+
+    async def _backend_generate(self, prompt, remaining):
+        backend = self.backend
+        if hasattr(backend, "agenerate"):
+            return await asyncio.wait_for(backend.agenerate(prompt, remaining), remaining)
+        # Backend só síncrono: a espera fica em uma thread, não no event loop
+        return await asyncio.wait_for(asyncio.to_thread(backend.generate, prompt, remaining), remaining)
+
+    async def _backend_stream(self, prompt, remaining):
+        backend = self.backend
+        if hasattr(backend, "astream"):
+            async for chunk in backend.astream(prompt, remaining):
+                yield chunk
+            return
+        iterator = iter(backend.stream(prompt, remaining))
+        done = object()
+        while True:
+            chunk = await asyncio.to_thread(next, iterator, done)
+            if chunk is done:
+                return
+            yield chunk
+
+    async def agenerate(self, prompt, user_id=None, timeout=None):
+        """Versão assíncrona de generate."""
+        started = time.perf_counter()
+        deadline = time.monotonic() + (timeout or self.config["LLM_TIMEOUT"])
+        try:
+            acquired = await self._acquire_async(user_id, deadline, "generate")
+        except Exception as e:
+            metrics.observe_llm("generate", started, prompt, error=e)
+            raise
+        try:
+            for attempt, remaining in self._attempts(deadline):
+                try:
+                    response = await self._backend_generate(prompt, remaining)
+                    metrics.observe_llm("generate", started, prompt, response)
+                    return response
+                except Exception as e:
+                    delay = self._retry_delay(e, attempt, deadline, "generate")
+                    if delay is None:
+                        raise
+                    await asyncio.sleep(delay)
+        except Exception as e:
+            metrics.observe_llm("generate", started, prompt, error=e)
+            raise
+        finally:
+            self._release(acquired, user_id)
+
+    async def astream(self, prompt, user_id=None, timeout=None):
+        """Versão assíncrona de stream."""
+        started_at = time.perf_counter()
+        deadline = time.monotonic() + (timeout or self.config["LLM_TIMEOUT"])
+        try:
+            acquired = await self._acquire_async(user_id, deadline, "stream")
+        except Exception as e:
+            metrics.observe_llm("stream", started_at, prompt, error=e)
+            raise
+        received = []
+        try:
+            for attempt, remaining in self._attempts(deadline):
+                started = False
+                try:
+                    async for chunk in self._backend_stream(prompt, remaining):
+                        started = True
+                        received.append(chunk)
+                        yield chunk
+                    metrics.observe_llm("stream", started_at, prompt, "".join(received))
+                    return
+                except Exception as e:
+                    delay = None if started else self._retry_delay(e, attempt, deadline, "stream")
+                    if delay is None:
+                        raise
+                    await asyncio.sleep(delay)
+        except Exception as e:
+            metrics.observe_llm("stream", started_at, prompt, "".join(received), error=e)
+            raise
+        finally:
+            self._release(acquired, user_id)
+
+
+llm_gateway = LLMGateway()
@@ -0,0 +1,199 @@
+# llm_cache.py
+
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import click
+from sqlalchemy.dialects import postgresql, sqlite
+from flask import current_app
+from flask.cli import with_appcontext
+from extensions import db
+from models import LLMCacheEntry
+
+
+def normalize_prompt(prompt):
+    """Remove diferenças de espaçamento que não mudam o conteúdo do prompt."""
+    return " ".join(prompt.split())
+
+
+def cache_key(model_name, prompt):
+    """Chave de conteúdo: hash do nome do modelo + prompt normalizado.
+
+    O prompt do relatório contém os textos das tarefas selecionadas e os indicadores
+    calculados sobre elas, então qualquer edição que mude o relatório gera outra
+    chave, sem invalidação explícita.
+    """
+    digest = hashlib.sha256()
+    digest.update(model_name.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(normalize_prompt(prompt).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class LRUCache:
+    """Dicionário limitado em memória que descarta o item usado há mais tempo."""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class ResponseCache:
+    """Cache de respostas da IA em dois níveis: LRU em memória e tabela no banco com TTL.
+
+    Configuração: LLM_CACHE_ENABLED, LLM_CACHE_SIZE (entradas em memória) e
+    LLM_CACHE_TTL (segundos de validade no banco).
+    """
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.ttl = timedelta(days=7)
+        self.memory = LRUCache()
+        self._counters = {"memory_hits": 0, "db_hits": 0, "misses": 0, "stores": 0}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get("LLM_CACHE_ENABLED", True)
+        self.ttl = timedelta(seconds=app.config.get("LLM_CACHE_TTL", 7 * 24 * 3600))
+        self.memory = LRUCache(app.config.get("LLM_CACHE_SIZE", 256))
+        app.extensions["llm_cache"] = self
+        app.cli.add_command(llm_cache_cli)
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+        lookups = stats["memory_hits"] + stats["db_hits"] + stats["misses"]
+        stats["memory_entries"] = len(self.memory)
+        stats["hit_rate"] = (stats["memory_hits"] + stats["db_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    def get(self, model_name, prompt):
+        """Resposta guardada e ainda válida, ou None.
+
+        Só lê: não grava nem confirma a sessão de quem chamou. As entradas expiradas
+        ficam no banco até o "flask llm-cache purge".
+        """
+        if not self.enabled:
+            return None
+        key = cache_key(model_name, prompt)
+        now = datetime.utcnow()
+        cached = self.memory.get(key)
+        if cached is not None:
+            response, expires_at = cached
+            if expires_at > now:
+                self._count("memory_hits")
+                return response
+            self.memory.delete(key)
+
+        row = (
+            db.session.query(LLMCacheEntry.response, LLMCacheEntry.expires_at)
+            .filter(LLMCacheEntry.key == key, LLMCacheEntry.expires_at > now)
+            .first()
+        )
+        if row is not None:
+            # A cópia em memória vence junto com a do banco
+            self.memory.set(key, (row.response, row.expires_at))
+            self._count("db_hits")
+            return row.response
+        self._count("misses")
+        return None
+
+    def set(self, model_name, prompt, response):
+        """Guarda a resposta em memória e no banco.
+
+        A gravação usa uma conexão e uma transação próprias: não confirma nem desfaz
+        o que estiver pendente na sessão de quem chamou.
+        """
+        if not self.enabled:
+            return
+        key = cache_key(model_name, prompt)
+        now = datetime.utcnow()
+        self.memory.set(key, (response, now + self.ttl))
+        with db.engine.begin() as connection:
+            connection.execute(_upsert_statement(connection.dialect.name), {
+                "key": key, "model": model_name, "response": response,
+                "created_at": now, "expires_at": now + self.ttl,
+            })
+        self._count("stores")
+
+    def cached(self, model_name, prompt, generate):
+        """Retorna a resposta em cache ou chama generate(prompt) e guarda o resultado."""
+        response = self.get(model_name, prompt)
+        if response is None:
+            response = generate(prompt)
+            self.set(model_name, prompt, response)
+        return response
+
+    def purge_expired(self):
+        removed = LLMCacheEntry.query.filter(LLMCacheEntry.expires_at <= datetime.utcnow()).delete()
+        db.session.commit()
+        return removed
+
+
+def _upsert_statement(dialect_name):
+    """INSERT que substitui a entrada quando outro processo já gravou a mesma chave."""
+    table = LLMCacheEntry.__table__
+    insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    statement = insert(table)
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.key],
+        set_={name: statement.excluded[name] for name in ("model", "response", "created_at", "expires_at")},
+    )
+
+
+response_cache = ResponseCache()
+
+
+@click.group("llm-cache", help="Cache de respostas da IA.")
+def llm_cache_cli():
+    pass
+
+
+@llm_cache_cli.command("stats")
+@with_appcontext
+def stats_command():
+    """Mostra os contadores do cache neste processo e o total de entradas no banco."""
+    for name, value in current_app.extensions["llm_cache"].stats().items():
+        click.echo(f"{name}: {value}")
+    click.echo(f"db_entries: {LLMCacheEntry.query.count()}")
+
+
+@llm_cache_cli.command("purge")
+@with_appcontext
+def purge_command():
+    """Remove do banco as entradas expiradas."""
+    removed = current_app.extensions["llm_cache"].purge_expired()
+    click.echo(f"{removed} entradas removidas.")
@@ -0,0 +1,264 @@
+# message_archive.py
+
+import json
+import time
+import zlib
+from collections import namedtuple
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from extensions import db
+from models import User, Message, MessageArchive
+import metrics
+
+# Mensagem lida do arquivo: os mesmos atributos que o template do chat usa em Message
+ArchivedMessage = namedtuple("ArchivedMessage", "id role content timestamp")
+
+
+class ZlibCodec:
+    name = "zlib"
+
+    def __init__(self, level=6):
+        self.level = level
+
+    def compress(self, data):
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data):
+        return zlib.decompress(data)
+
+
+class ZstdCodec:
+    """zstd: comprime mais rápido que o zlib, com taxa parecida. O pacote zstandard só é importado aqui."""
+
+    name = "zstd"
+
+    def __init__(self, level=3):
+        import zstandard
+
+        self.zstandard = zstandard
+        self.level = level
+
+    def compress(self, data):
+        return self.zstandard.ZstdCompressor(level=self.level).compress(data)
+
+    def decompress(self, data):
+        return self.zstandard.ZstdDecompressor().decompress(data)
+
+
+CODECS = {"zlib": ZlibCodec, "zstd": ZstdCodec}
+_readers = {}
+
+
+def _codec(name):
+    # Para ler, o codec é o gravado no blob, não o configurado agora
+    if name not in _readers:
+        _readers[name] = CODECS[name]()
+    return _readers[name]
+
+
+def pack(archive, rows, codec):
+    """Grava as linhas [id, role, timestamp, content] no blob do dia, em ordem cronológica."""
+    rows.sort(key=lambda row: (row[2], row[0]))
+    raw = json.dumps(rows, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    archive.codec = codec.name
+    archive.data = codec.compress(raw)
+    archive.raw_size = len(raw)
+    archive.message_count = len(rows)
+    archive.first_message_id = min(row[0] for row in rows)
+    archive.last_message_id = max(row[0] for row in rows)
+    archive.updated_at = datetime.utcnow()
+
+
+def unpack(archive):
+    return json.loads(_codec(archive.codec).decompress(archive.data))
+
+
+def _row(message):
+    return [message.id, message.role, message.timestamp.isoformat(), message.content]
+
+
+def archive_batch(user_id, cutoff, batch_size, codec):
+    """Move até `batch_size` mensagens do usuário anteriores a `cutoff` para o arquivo, em uma transação.
+
+    Mensagens de um dia que já tem blob (arquivamento anterior interrompido no meio do
+    dia) são juntadas a ele. Retorna quantas mensagens foram arquivadas.
+    """
+    messages = (
+        Message.query.filter(Message.user_id == user_id, Message.timestamp < cutoff)
+        .order_by(Message.timestamp, Message.id)
+        .limit(batch_size)
+        .all()
+    )
+    if not messages:
+        return 0
+    by_day = {}
+    for message in messages:
+        by_day.setdefault(message.timestamp.date(), []).append(_row(message))
+    existing = {
+        archive.day: archive
+        for archive in MessageArchive.query.options(db.undefer(MessageArchive.data)).filter(
+            MessageArchive.user_id == user_id, MessageArchive.day.in_(list(by_day))
+        )
+    }
+    for day, rows in by_day.items():
+        archive = existing.get(day)
+        if archive is None:
+            archive = MessageArchive(user_id=user_id, day=day)
+            db.session.add(archive)
+        else:
+            rows = unpack(archive) + rows
+        pack(archive, rows, codec)
+    # O DELETE também tira as mensagens do índice de busca (gatilhos de search.py)
+    db.session.execute(db.delete(Message).where(Message.id.in_([message.id for message in messages])))
+    db.session.commit()
+    metrics.MESSAGE_ARCHIVE.inc("archived", amount=len(messages))
+    return len(messages)
+
+
+def archive_messages(days=None, batch_size=None, pause=None, user_ids=None, codec=None):
+    """Arquiva as mensagens com mais de `days` dias de todos os usuários (ou só de `user_ids`).
+
+    Cada transação move no máximo `batch_size` mensagens de um usuário; entre elas há uma
+    pausa de `pause` segundos, para que as escritas do chat não esperem pela compactação.
+    Pode ser interrompido e executado de novo a qualquer momento.
+    """
+    config = current_app.config
+    days = config["MESSAGE_RETENTION_DAYS"] if days is None else days
+    batch_size = batch_size or config["MESSAGE_ARCHIVE_BATCH"]
+    pause = config["MESSAGE_ARCHIVE_PAUSE"] if pause is None else pause
+    codec = codec or CODECS[config["MESSAGE_ARCHIVE_CODEC"]](config["MESSAGE_ARCHIVE_LEVEL"])
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    if user_ids is None:
+        user_ids = [user_id for (user_id,) in db.session.query(User.id).order_by(User.id)]
+    total = 0
+    for user_id in user_ids:
+        while True:
+            archived = archive_batch(user_id, cutoff, batch_size, codec)
+            total += archived
+            if archived < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+    return total
+
+
+def has_archive(user_id):
+    return db.session.query(MessageArchive.id).filter(MessageArchive.user_id == user_id).first() is not None
+
+
+def archived_days(user_id, before=None, per_page=30):
+    """Dias arquivados do usuário, do mais recente ao mais antigo (só metadados), e o cursor da próxima página."""
+    query = MessageArchive.query.filter(MessageArchive.user_id == user_id)
+    if before is not None:
+        query = query.filter(MessageArchive.day < before)
+    rows = query.order_by(MessageArchive.day.desc()).limit(per_page + 1).all()
+    next_cursor = rows[per_page - 1].day if len(rows) > per_page else None
+    return rows[:per_page], next_cursor
+
+
+def neighbour_days(user_id, day):
+    """Dias arquivados anterior e seguinte a `day` (ou None), para a navegação entre dias."""
+    older = (
+        db.session.query(MessageArchive.day)
+        .filter(MessageArchive.user_id == user_id, MessageArchive.day < day)
+        .order_by(MessageArchive.day.desc())
+        .limit(1)
+        .scalar()
+    )
+    newer = (
+        db.session.query(MessageArchive.day)
+        .filter(MessageArchive.user_id == user_id, MessageArchive.day > day)
+        .order_by(MessageArchive.day)
+        .limit(1)
+        .scalar()
+    )
+    return older, newer
+
+
+def read_day(user_id, day):
+    """Mensagens arquivadas do dia, descomprimidas só agora; None se o dia não está no arquivo."""
+    archive = (
+        MessageArchive.query.options(db.undefer(MessageArchive.data))
+        .filter(MessageArchive.user_id == user_id, MessageArchive.day == day)
+        .first()
+    )
+    if archive is None:
+        return None
+    metrics.MESSAGE_ARCHIVE.inc("read")
+    return [
+        ArchivedMessage(message_id, role, content, datetime.fromisoformat(timestamp))
+        for message_id, role, timestamp, content in unpack(archive)
+    ]
+
+
+def stats(user_id=None):
+    """Mensagens no banco e no arquivo, e o tamanho do arquivo antes e depois da compressão."""
+    hot = db.session.query(db.func.count(Message.id))
+    archived = db.session.query(
+        db.func.count(MessageArchive.id),
+        db.func.coalesce(db.func.sum(MessageArchive.message_count), 0),
+        db.func.coalesce(db.func.sum(MessageArchive.raw_size), 0),
+        db.func.coalesce(db.func.sum(db.func.length(MessageArchive.data)), 0),
+    )
+    if user_id is not None:
+        hot = hot.filter(Message.user_id == user_id)
+        archived = archived.filter(MessageArchive.user_id == user_id)
+    days, messages, raw_size, stored_size = archived.one()
+    return {
+        "hot_messages": hot.scalar(),
+        "archived_days": days,
+        "archived_messages": messages,
+        "raw_bytes": raw_size,
+        "stored_bytes": stored_size,
+    }
+
+
+def init_app(app):
+    app.config.setdefault("MESSAGE_RETENTION_DAYS", 90)
+    app.config.setdefault("MESSAGE_ARCHIVE_CODEC", "zlib")
+    app.config.setdefault("MESSAGE_ARCHIVE_LEVEL", 6)
+    app.config.setdefault("MESSAGE_ARCHIVE_BATCH", 500)
+    app.config.setdefault("MESSAGE_ARCHIVE_PAUSE", 0.05)
+    app.cli.add_command(chat_cli)
+
+
+@click.group("chat", help="Retenção e arquivo das mensagens do chat.")
+def chat_cli():
+    pass
+
+
+def _user_ids(username):
+    if not username:
+        return None
+    user = User.query.filter_by(username=username).first()
+    if user is None:
+        raise click.ClickException(f"Usuário não encontrado: {username}")
+    return [user.id]
+
+
+@chat_cli.command("archive")
+@click.option("--days", type=int, help="Idade mínima das mensagens arquivadas. Padrão: MESSAGE_RETENTION_DAYS.")
+@click.option("--batch-size", type=int, help="Mensagens por transação. Padrão: MESSAGE_ARCHIVE_BATCH.")
+@click.option("--pause", type=float, help="Segundos entre as transações. Padrão: MESSAGE_ARCHIVE_PAUSE.")
+@click.option("--user", "username", help="Só as mensagens deste usuário.")
+@with_appcontext
+def archive_command(days, batch_size, pause, username):
+    """Move as mensagens antigas para o arquivo comprimido (para rodar periodicamente, via cron)."""
+    started = time.perf_counter()
+    total = archive_messages(days, batch_size, pause, _user_ids(username))
+    click.echo(f"{total} mensagens arquivadas em {time.perf_counter() - started:.1f}s.")
+
+
+@chat_cli.command("archive-stats")
+@click.option("--user", "username", help="Só as mensagens deste usuário.")
+@with_appcontext
+def stats_command(username):
+    """Mostra quantas mensagens estão no banco e no arquivo, e a taxa de compressão."""
+    user_ids = _user_ids(username)
+    values = stats(user_ids[0] if user_ids else None)
+    for name, value in values.items():
+        click.echo(f"{name}: {value}")
+    if values["stored_bytes"]:
+        click.echo(f"compression_ratio: {values['raw_bytes'] / values['stored_bytes']:.1f}")
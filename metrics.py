@@ -0,0 +1,370 @@
+# metrics.py
+
+import threading
+import time
+from collections import Counter as Tally
+from flask import current_app, g, request, has_request_context, template_rendered, before_render_template
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Limites dos histogramas (segundos e quantidade de consultas)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+# Consultas guardadas por requisição para o log de requisições lentas
+MAX_LOGGED_STATEMENTS = 200
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Contador que só aumenta, com rótulos (formato texto do Prometheus)."""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            yield self.name, _labels(self.labelnames, labels), value
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Gauge(Counter):
+    """Valor lido no momento da coleta (por exemplo, os contadores do cache da IA)."""
+
+    kind = "gauge"
+
+    def set(self, *labels, value):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram:
+    """Histograma com limites fixos: contagem acumulada por faixa, soma e total."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) + (float("inf"),)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *labels):
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def total(self, *labels):
+        series = self._series.get(labels)
+        return series[1] if series else 0.0
+
+    def samples(self):
+        with self._lock:
+            snapshot = {labels: ([*counts], total, count) for labels, (counts, total, count) in self._series.items()}
+        for labels, (counts, total, count) in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield self.name + "_bucket", _labels(self.labelnames, labels, [("le", _number(bound))]), cumulative
+            yield self.name + "_sum", _labels(self.labelnames, labels), total
+            yield self.name + "_count", _labels(self.labelnames, labels), count
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Todas as métricas no formato texto do Prometheus (versão 0.0.4)."""
+        for collect in self.collectors:
+            collect()
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(f"{name}{labels} {_number(value)}" for name, labels, value in metric.samples())
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        for metric in self.metrics:
+            metric.reset()
+
+
+# Os valores são deste processo: com vários workers, cada um expõe os seus
+registry = Registry()
+
+REQUEST_LATENCY = registry.add(Histogram(
+    "http_request_duration_seconds", "Tempo de cada requisição, até o fim da resposta (inclusive streaming).",
+    ("method", "endpoint", "status"),
+))
+REQUEST_QUERIES = registry.add(Histogram(
+    "http_request_sql_queries", "Consultas SQL executadas por requisição.", ("endpoint",), QUERY_COUNT_BUCKETS,
+))
+REQUEST_SQL_TIME = registry.add(Histogram(
+    "http_request_sql_duration_seconds", "Tempo somado das consultas SQL de cada requisição.", ("endpoint",),
+))
+SLOW_REQUESTS = registry.add(Counter(
+    "http_slow_requests_total", "Requisições acima de METRICS_SLOW_REQUEST_MS.", ("endpoint",),
+))
+SQL_QUERIES = registry.add(Histogram(
+    "sql_query_duration_seconds", "Tempo de cada consulta SQL, dentro ou fora de requisições (jobs, comandos).",
+    ("context",),
+))
+TEMPLATE_RENDER = registry.add(Histogram(
+    "template_render_duration_seconds", "Tempo de renderização de cada template.", ("template",),
+))
+LLM_LATENCY = registry.add(Histogram(
+    "llm_call_duration_seconds", "Tempo das chamadas à IA, incluindo novas tentativas.", ("operation", "outcome"),
+    LLM_BUCKETS,
+))
+LLM_WAIT = registry.add(Histogram(
+    "llm_queue_wait_seconds", "Espera por uma vaga de chamada simultânea à IA.", ("operation",),
+))
+LLM_TOKENS = registry.add(Counter(
+    "llm_tokens_total", "Tokens enviados e recebidos da IA (estimados, cerca de 4 caracteres por token).", ("direction",),
+))
+LLM_ERRORS = registry.add(Counter("llm_errors_total", "Chamadas à IA que falharam, por tipo de erro.", ("operation", "error")))
+LLM_RETRIES = registry.add(Counter("llm_retries_total", "Novas tentativas após erros temporários da IA.", ("operation",)))
+TASK_CACHE = registry.add(Counter(
+    "task_list_cache_total", "Leituras do cache da lista de tarefas, por resultado (memória, compartilhado, banco, 304).",
+    ("result",),
+))
+TASK_FEED = registry.add(Counter(
+    "task_feed_messages_total", "Mensagens do feed da lista de tarefas: publicadas e descartadas (cliente lento).",
+    ("result",),
+))
+AUTH_ATTEMPTS = registry.add(Counter(
+    "auth_attempts_total",
+    "Tentativas de login e registro: aceitas, recusadas, limitadas (por IP, por usuário, hashes ocupados) e senhas refeitas.",
+    ("result",),
+))
+MESSAGE_ARCHIVE = registry.add(Counter(
+    "message_archive_total", "Mensagens do chat movidas para o arquivo comprimido e dias do arquivo lidos.",
+    ("operation",),
+))
+LLM_CACHE = registry.add(Gauge("llm_cache_stats", "Contadores e entradas em memória do cache de respostas da IA neste processo.", ("stat",)))
+
+
+def _collect_llm_cache():
+    # Lido na hora da coleta; o cache mantém os próprios contadores
+    from llm_cache import response_cache
+
+    for name, value in response_cache.stats().items():
+        if name != "hit_rate":
+            LLM_CACHE.set(name, value=value)
+
+
+registry.collectors.append(_collect_llm_cache)
+
+FRAGMENT_CACHE = registry.add(Gauge(
+    "fragment_cache_stats",
+    "Cache de fragmentos HTML neste processo: acertos, faltas, entradas e segundos de renderização gastos e poupados.",
+    ("stat",),
+))
+
+
+def _collect_fragment_cache():
+    from fragment_cache import fragment_cache
+
+    for name, value in fragment_cache.stats().items():
+        if name != "hit_rate":
+            FRAGMENT_CACHE.set(name, value=value)
+
+
+registry.collectors.append(_collect_fragment_cache)
+
+
+def observe_llm(operation, started, prompt, response=None, error=None):
+    """Registra uma chamada à IA (chamado pelo llm.LLMGateway)."""
+    from llm import estimate_tokens
+
+    outcome = "error" if error is not None else "ok"
+    LLM_LATENCY.observe(time.perf_counter() - started, operation, outcome)
+    LLM_TOKENS.inc("prompt", amount=estimate_tokens(prompt))
+    if response:
+        LLM_TOKENS.inc("response", amount=estimate_tokens(response))
+    if error is not None:
+        LLM_ERRORS.inc(operation, type(error).__name__)
+
+
+def _request_state():
+    """Contadores da requisição atual em `g`; None fora de requisições ou com as métricas desligadas."""
+    if not has_request_context():
+        return None
+    return g.get("_metrics")
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_metrics_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["_metrics_started"].pop()
+    elapsed = time.perf_counter() - started
+    state = _request_state()
+    SQL_QUERIES.observe(elapsed, "request" if state is not None else "background")
+    if state is None:
+        return
+    state["queries"] += 1
+    state["sql_time"] += elapsed
+    statements = state["statements"]
+    if statements is not None and len(statements) < MAX_LOGGED_STATEMENTS:
+        statements.append((statement, elapsed))
+
+
+def _discard_timer(exception_context):
+    # Consulta que falhou: after_cursor_execute não é chamado
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("_metrics_started"):
+        connection.info["_metrics_started"].pop()
+
+
+def _before_render(app, template, context, **extra):
+    state = _request_state()
+    if state is not None:
+        state["templates"].append(time.perf_counter())
+
+
+def _after_render(app, template, context, **extra):
+    state = _request_state()
+    if state is not None and state["templates"]:
+        TEMPLATE_RENDER.observe(time.perf_counter() - state["templates"].pop(), template.name or "(string)")
+
+
+def _start_request():
+    g._metrics = {
+        "started": time.perf_counter(),
+        "queries": 0,
+        "sql_time": 0.0,
+        "templates": [],
+        "status": None,
+        # As consultas só são guardadas com o log de requisições lentas ligado
+        "statements": [] if _slow_threshold() else None,
+    }
+
+
+def _slow_threshold():
+    return current_app.config.get("METRICS_SLOW_REQUEST_MS", 0) / 1000.0
+
+
+def _add_server_timing(response):
+    state = _request_state()
+    if state is None:
+        return response
+    state["status"] = response.status_code
+    # Server-Timing aparece na aba de rede do navegador; em streaming cobre só o início da resposta
+    elapsed = time.perf_counter() - state["started"]
+    response.headers.add(
+        "Server-Timing",
+        f'db;dur={state["sql_time"] * 1000:.1f};desc="{state["queries"]} consultas", app;dur={elapsed * 1000:.1f}',
+    )
+    return response
+
+
+def _finish_request(error=None):
+    state = _request_state()
+    if state is None:
+        return
+    g._metrics = None
+    elapsed = time.perf_counter() - state["started"]
+    endpoint = request.endpoint or "(sem rota)"
+    status = state["status"] or (500 if error is not None else 200)
+    REQUEST_LATENCY.observe(elapsed, request.method, endpoint, str(status))
+    REQUEST_QUERIES.observe(state["queries"], endpoint)
+    REQUEST_SQL_TIME.observe(state["sql_time"], endpoint)
+    threshold = _slow_threshold()
+    if threshold and elapsed >= threshold:
+        SLOW_REQUESTS.inc(endpoint)
+        current_app.logger.warning(format_slow_request(request.method, request.full_path.rstrip("?"), status, elapsed, state))
+
+
+def format_slow_request(method, path, status, elapsed, state):
+    """Texto do log: consultas iguais são agrupadas, o que deixa padrões N+1 evidentes."""
+    lines = [
+        f"Requisição lenta: {method} {path} -> {status} em {elapsed * 1000:.0f} ms; "
+        f"{state['queries']} consultas SQL em {state['sql_time'] * 1000:.0f} ms"
+    ]
+    statements = state["statements"] or []
+    counts = Tally(statement for statement, _ in statements)
+    totals = {}
+    for statement, duration in statements:
+        totals[statement] = totals.get(statement, 0.0) + duration
+    for statement, count in sorted(counts.items(), key=lambda item: -totals[item[0]]):
+        text = " ".join(statement.split())
+        lines.append(f"  {count}x {totals[statement] * 1000:.1f} ms  {text[:300]}")
+    if state["queries"] > len(statements):
+        lines.append(f"  ... mais {state['queries'] - len(statements)} consultas não guardadas")
+    return "\n".join(lines)
+
+
+def init_app(app):
+    """Liga a coleta de métricas (METRICS_ENABLED) e o log de requisições lentas (METRICS_SLOW_REQUEST_MS)."""
+    app.config.setdefault("METRICS_ENABLED", True)
+    app.config.setdefault("METRICS_SLOW_REQUEST_MS", 0)
+    app.config.setdefault("METRICS_TOKEN", None)
+    app.config.setdefault("METRICS_PUBLIC", False)
+    if not app.config["METRICS_ENABLED"]:
+        return
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _discard_timer)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+    app.before_request(_start_request)
+    app.after_request(_add_server_timing)
+    app.teardown_request(_finish_request)
@@ -0,0 +1,22 @@
+# metrics_views.py
+
+import hmac
+from flask import Blueprint, Response, request, current_app, abort
+import metrics
+
+bp = Blueprint("metrics", __name__)
+
+
+@bp.route("/metrics")
+def metrics_page():
+    """Métricas deste processo no formato texto do Prometheus.
+
+    Com METRICS_TOKEN definido, exige o cabeçalho "Authorization: Bearer <token>".
+    Sem token, a página só existe com METRICS_PUBLIC ligado.
+    """
+    token = current_app.config.get("METRICS_TOKEN")
+    if not current_app.config["METRICS_ENABLED"] or not (token or current_app.config.get("METRICS_PUBLIC")):
+        abort(404)
+    if token and not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        abort(401)
+    return Response(metrics.registry.render(), mimetype="text/plain; version=0.0.4; charset=utf-8")
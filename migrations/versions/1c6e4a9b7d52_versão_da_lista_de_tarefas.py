@@ -0,0 +1,25 @@
+"""Versão da lista de tarefas
+
+Revision ID: 1c6e4a9b7d52
+Revises: f3c81a6d2e47
+Create Date: 2026-10-17 21:12:44.308517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1c6e4a9b7d52'
+down_revision = 'f3c81a6d2e47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('user', sa.Column('tasks_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('tasks_version')
@@ -0,0 +1,61 @@
+"""Tabela de mensagens e índices compostos
+
+Revision ID: 3b8e5f1c9d2a
+Revises: 24f639256b72
+Create Date: 2026-10-17 10:12:31.482910
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b8e5f1c9d2a'
+down_revision = '24f639256b72'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Bancos criados antes por db.create_all() já têm a tabela de mensagens
+    if not sa.inspect(op.get_bind()).has_table('message'):
+        op.create_table('message',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('role', sa.String(length=20), nullable=False),
+        sa.Column('timestamp', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    # creation_date passa a ser DateTime obrigatório, como no modelo
+    op.execute("UPDATE task SET creation_date = CURRENT_TIMESTAMP WHERE creation_date IS NULL")
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.alter_column('creation_date',
+               existing_type=sa.Date(),
+               type_=sa.DateTime(),
+               nullable=False)
+        batch_op.create_index('ix_task_user_display_order', ['user_id', 'display_order'], unique=False)
+        batch_op.create_index('uq_task_user_task_name', ['user_id', 'task_name'], unique=True)
+        batch_op.create_index('ix_task_user_status_due_date', ['user_id', 'status', 'due_date'], unique=False)
+
+    with op.batch_alter_table('message', schema=None) as batch_op:
+        batch_op.create_index('ix_message_user_timestamp', ['user_id', 'timestamp'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('message', schema=None) as batch_op:
+        batch_op.drop_index('ix_message_user_timestamp')
+
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.drop_index('ix_task_user_status_due_date')
+        batch_op.drop_index('uq_task_user_task_name')
+        batch_op.drop_index('ix_task_user_display_order')
+        batch_op.alter_column('creation_date',
+               existing_type=sa.DateTime(),
+               type_=sa.Date(),
+               nullable=True)
+
+    # A tabela de mensagens fica: em bancos criados por db.create_all() ela é anterior a
+    # esta revisão e guarda o histórico do chat
@@ -0,0 +1,25 @@
+"""Versão das tarefas
+
+Revision ID: d5611acad53c
+Revises: 759b0267d1ff
+Create Date: 2026-10-17 03:54:06.701306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5611acad53c'
+down_revision = '759b0267d1ff'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Sem batch_alter_table, como em f3c81a6d2e47: mantém os gatilhos da busca textual
+    op.add_column('task', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    op.execute('ALTER TABLE task DROP COLUMN version')
@@ -0,0 +1,98 @@
+"""Busca textual em tarefas e mensagens
+
+Revision ID: e5a9c2d7b318
+Revises: d82b4f6a0c57
+Create Date: 2026-10-17 19:12:40.318452
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a9c2d7b318'
+down_revision = 'd82b4f6a0c57'
+branch_labels = None
+depends_on = None
+
+# Cópia das estruturas de search.py no momento desta migração
+SQLITE_UPGRADE = [
+    """CREATE VIRTUAL TABLE task_fts USING fts5(
+        task_name, description, notes, category,
+        content='task', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER task_fts_insert AFTER INSERT ON task BEGIN
+        INSERT INTO task_fts(rowid, task_name, description, notes, category)
+        VALUES (new.id, new.task_name, new.description, new.notes, new.category);
+    END""",
+    """CREATE TRIGGER task_fts_delete AFTER DELETE ON task BEGIN
+        INSERT INTO task_fts(task_fts, rowid, task_name, description, notes, category)
+        VALUES ('delete', old.id, old.task_name, old.description, old.notes, old.category);
+    END""",
+    """CREATE TRIGGER task_fts_update AFTER UPDATE OF task_name, description, notes, category ON task BEGIN
+        INSERT INTO task_fts(task_fts, rowid, task_name, description, notes, category)
+        VALUES ('delete', old.id, old.task_name, old.description, old.notes, old.category);
+        INSERT INTO task_fts(rowid, task_name, description, notes, category)
+        VALUES (new.id, new.task_name, new.description, new.notes, new.category);
+    END""",
+    """CREATE VIRTUAL TABLE message_fts USING fts5(
+        content, content='message', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER message_fts_insert AFTER INSERT ON message BEGIN
+        INSERT INTO message_fts(rowid, content) VALUES (new.id, new.content);
+    END""",
+    """CREATE TRIGGER message_fts_delete AFTER DELETE ON message BEGIN
+        INSERT INTO message_fts(message_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    END""",
+    """CREATE TRIGGER message_fts_update AFTER UPDATE OF content ON message BEGIN
+        INSERT INTO message_fts(message_fts, rowid, content) VALUES ('delete', old.id, old.content);
+        INSERT INTO message_fts(rowid, content) VALUES (new.id, new.content);
+    END""",
+    # Indexa as linhas que já existem
+    "INSERT INTO task_fts(task_fts) VALUES ('rebuild')",
+    "INSERT INTO message_fts(message_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER task_fts_insert",
+    "DROP TRIGGER task_fts_delete",
+    "DROP TRIGGER task_fts_update",
+    "DROP TRIGGER message_fts_insert",
+    "DROP TRIGGER message_fts_delete",
+    "DROP TRIGGER message_fts_update",
+    "DROP TABLE task_fts",
+    "DROP TABLE message_fts",
+]
+
+POSTGRES_UPGRADE = [
+    """ALTER TABLE task ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('portuguese', coalesce(task_name, '')), 'A') ||
+        setweight(to_tsvector('portuguese', coalesce(category, '')), 'B') ||
+        setweight(to_tsvector('portuguese', coalesce(description, '') || ' ' || coalesce(notes, '')), 'C')
+    ) STORED""",
+    "CREATE INDEX ix_task_search_vector ON task USING GIN (search_vector)",
+    """ALTER TABLE message ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        to_tsvector('portuguese', content)
+    ) STORED""",
+    "CREATE INDEX ix_message_search_vector ON message USING GIN (search_vector)",
+]
+
+POSTGRES_DOWNGRADE = [
+    "DROP INDEX ix_message_search_vector",
+    "ALTER TABLE message DROP COLUMN search_vector",
+    "DROP INDEX ix_task_search_vector",
+    "ALTER TABLE task DROP COLUMN search_vector",
+]
+
+
+def _run(sqlite, postgres):
+    statements = postgres if op.get_bind().dialect.name == "postgresql" else sqlite
+    for statement in statements:
+        op.execute(statement)
+
+
+def upgrade():
+    _run(SQLITE_UPGRADE, POSTGRES_UPGRADE)
+
+
+def downgrade():
+    _run(SQLITE_DOWNGRADE, POSTGRES_DOWNGRADE)
@@ -0,0 +1,27 @@
+"""Vetores das tarefas
+
+Revision ID: f3c81a6d2e47
+Revises: e5a9c2d7b318
+Create Date: 2026-10-17 19:41:05.512237
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3c81a6d2e47'
+down_revision = 'e5a9c2d7b318'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Sem batch_alter_table: no SQLite o batch recria a tabela task e apagaria os
+    # gatilhos da busca textual. ADD/DROP COLUMN simples mantêm os gatilhos.
+    # Os vetores são calculados ao carregar o índice de cada usuário ou com "flask semantic rebuild".
+    op.add_column('task', sa.Column('embedding', sa.LargeBinary(), nullable=True))
+
+
+def downgrade():
+    op.execute('ALTER TABLE task DROP COLUMN embedding')
@@ -2,14 +2,18 @@
 
 from extensions import db
 from datetime import datetime
+import json
 
 # Modelo do Usuário
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(150), nullable=False, unique=True)
     password = db.Column(db.String(200), nullable=False)
+    # Aumenta a cada alteração nas tarefas do usuário; invalida o cache da listagem (task_cache.py)
+    tasks_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
     tasks = db.relationship("Task", back_populates="user", lazy=True)
     messages = db.relationship("Message", back_populates="user", lazy=True)
+    report_jobs = db.relationship("ReportJob", back_populates="user", lazy=True)
 
 # Modelo de Mensagem de Chat
 class Message(db.Model):
@@ -21,6 +25,37 @@ class Message(db.Model):
 
     user = db.relationship("User", back_populates="messages")
 
+    __table_args__ = (
+        # Histórico do chat: filtra por usuário e ordena por timestamp
+        db.Index("ix_message_user_timestamp", "user_id", "timestamp"),
+    )
+
+# Mensagens antigas do chat, um blob comprimido por usuário e dia (UTC); ver message_archive.py
+class MessageArchive(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    codec = db.Column(db.String(10), nullable=False)  # 'zlib' ou 'zstd'
+    message_count = db.Column(db.Integer, nullable=False)
+    first_message_id = db.Column(db.Integer, nullable=False)
+    last_message_id = db.Column(db.Integer, nullable=False)
+    raw_size = db.Column(db.Integer, nullable=False)  # bytes do JSON antes da compressão
+    # deferred: a listagem dos dias arquivados não lê os blobs
+    data = db.deferred(db.Column(db.LargeBinary, nullable=False))
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Um blob por usuário e dia; também ordena a listagem dos dias
+        db.Index("uq_message_archive_user_day", "user_id", "day", unique=True),
+    )
+
+# Resumo acumulado das mensagens antigas do chat (ver chat_context.py)
+class ConversationSummary(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    summary = db.Column(db.Text, nullable=False, default="")
+    covered_until_id = db.Column(db.Integer, nullable=False, default=0)  # última mensagem incluída no resumo
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
 # Modelo do Banco de Dados
 class Task(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -37,11 +72,25 @@ class Task(db.Model):
     completion_date = db.Column(db.Date, nullable=True)
     notes = db.Column(db.Text, nullable=True)
     category = db.Column(db.String(100), nullable=True)
+    # Aumenta em todo UPDATE da linha, inclusive os em massa (bulk_ops, ordering.rebalance):
+    # identifica o HTML da linha no cache de fragmentos (fragment_cache.py)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1", onupdate=db.text("version + 1"))
+    # Vetor float32 do texto da tarefa (ver semantic.py); deferred: só é lido pelo índice semântico
+    embedding = db.deferred(db.Column(db.LargeBinary, nullable=True))
 
     # Relacionamento com o usuário
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     user = db.relationship("User", back_populates="tasks")
 
+    __table_args__ = (
+        # Listagem, paginação e reordenação por usuário
+        db.Index("ix_task_user_display_order", "user_id", "display_order"),
+        # Nome da tarefa é único por usuário
+        db.Index("uq_task_user_task_name", "user_id", "task_name", unique=True),
+        # Filtros de status e data prevista
+        db.Index("ix_task_user_status_due_date", "user_id", "status", "due_date"),
+    )
+
     @property
     def duration(self):
         """Calcula o tempo desde o registro até o momento atual."""
@@ -53,3 +102,64 @@ class Task(db.Model):
             return f"{days} dias, {hours} horas e {minutes} minutos"
         else:
             return f"{hours} horas e {minutes} minutos"
+
+# Modelo de Job de Relatório (geração em segundo plano)
+class ReportJob(db.Model):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default=PENDING)
+    task_ids = db.Column(db.Text, nullable=False)  # lista de ids em JSON
+    result = db.Column(db.Text, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    timings = db.Column(db.Text, nullable=True)  # tempo de cada etapa em JSON
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    user = db.relationship("User", back_populates="report_jobs")
+
+    __table_args__ = (
+        # Relatórios recentes do usuário
+        db.Index("ix_report_job_user_created_at", "user_id", "created_at"),
+    )
+
+    @property
+    def task_id_list(self):
+        return json.loads(self.task_ids)
+
+    @property
+    def timing_dict(self):
+        return json.loads(self.timings) if self.timings else {}
+
+    @property
+    def finished(self):
+        return self.status in (self.DONE, self.FAILED)
+
+# Cache persistente de respostas da IA (chave = hash do modelo + prompt)
+class LLMCacheEntry(db.Model):
+    key = db.Column(db.String(64), primary_key=True)
+    model = db.Column(db.String(100), nullable=False)
+    response = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+# Resumo de indicadores por usuário, mantido de forma incremental (ver analytics.py)
+class TaskStat(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    dimension = db.Column(db.String(20), primary_key=True)  # 'total', 'status', 'priority' ou 'category'
+    value = db.Column(db.String(100), primary_key=True)  # '' quando o campo está vazio
+    task_count = db.Column(db.Integer, nullable=False, default=0)
+    total_cost = db.Column(db.Float, nullable=False, default=0.0)
+
+# Token de acesso à API JSON (ver api_views.py); só o hash SHA-256 do token é guardado
+class ApiToken(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False, index=True)
+    name = db.Column(db.String(100), nullable=False)
+    token_hash = db.Column(db.String(64), nullable=False, unique=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
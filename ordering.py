@@ -0,0 +1,115 @@
+# ordering.py
+
+from extensions import db
+from models import Task
+from task_feed import task_feed
+
+# Distância entre posições consecutivas. Os valores de display_order são esparsos:
+# inserir ou mover uma tarefa só altera a própria linha, e a renumeração completa
+# (rebalance) só acontece quando não sobra espaço entre dois vizinhos.
+GAP = 1024
+
+
+def _user_tasks(user_id):
+    return Task.query.filter_by(user_id=user_id)
+
+
+def _ordered(query):
+    return query.order_by(Task.display_order, Task.id)
+
+
+def next_display_order(user_id):
+    """Retorna o display_order para uma nova tarefa no final da lista."""
+    max_order = db.session.query(db.func.max(Task.display_order)).filter_by(user_id=user_id).scalar()
+    return (max_order or 0) + GAP
+
+
+def task_above(task):
+    return _user_tasks(task.user_id).filter(
+        db.or_(
+            Task.display_order < task.display_order,
+            db.and_(Task.display_order == task.display_order, Task.id < task.id),
+        )
+    ).order_by(Task.display_order.desc(), Task.id.desc()).first()
+
+
+def task_below(task):
+    return _ordered(_user_tasks(task.user_id).filter(
+        db.or_(
+            Task.display_order > task.display_order,
+            db.and_(Task.display_order == task.display_order, Task.id > task.id),
+        )
+    )).first()
+
+
+def rebalance(user_id):
+    """Renumera todas as tarefas do usuário com espaçamento GAP."""
+    # O UPDATE em massa não passa pelo flush: grava antes as alterações pendentes
+    db.session.flush()
+    ids = [row.id for row in _ordered(db.session.query(Task.id).filter_by(user_id=user_id))]
+    if ids:
+        db.session.execute(
+            db.update(Task),
+            [{"id": task_id, "display_order": (index + 1) * GAP} for index, task_id in enumerate(ids)],
+        )
+    # Só a posição e a versão das tarefas do usuário já carregadas ficaram velhas
+    for obj in list(db.session.identity_map.values()):
+        if isinstance(obj, Task) and db.inspect(obj).dict.get("user_id", user_id) == user_id:
+            db.session.expire(obj, ["display_order", "version"])
+    # Todas as posições mudaram: as páginas abertas recarregam a lista
+    task_feed.record(user_id, [{"op": "reload"}])
+
+
+def swap(task, other):
+    """Troca a posição de duas tarefas vizinhas, alterando apenas as duas linhas."""
+    if task.display_order == other.display_order:
+        # Empate herdado de dados antigos: abre espaço antes de trocar
+        rebalance(task.user_id)
+    task.display_order, other.display_order = other.display_order, task.display_order
+
+
+def place_between(task, previous, following):
+    """Posiciona a tarefa entre previous e following (qualquer um pode ser None)."""
+    if previous is None and following is None:
+        task.display_order = GAP
+    elif previous is None:
+        task.display_order = following.display_order - GAP
+    elif following is None:
+        task.display_order = previous.display_order + GAP
+    elif following.display_order - previous.display_order > 1:
+        task.display_order = (previous.display_order + following.display_order) // 2
+    else:
+        # Sem espaço entre os vizinhos: renumera uma vez e tenta de novo
+        previous_id, following_id = previous.id, following.id
+        rebalance(task.user_id)
+        place_between(task, db.session.get(Task, previous_id), db.session.get(Task, following_id))
+
+
+def move_to_position(task, position):
+    """Move a tarefa para a posição informada (1 = topo)."""
+    others = _ordered(_user_tasks(task.user_id).filter(Task.id != task.id))
+    if position <= 1:
+        place_between(task, None, others.first())
+        return
+    neighbours = others.offset(position - 2).limit(2).all()
+    if not neighbours:
+        last = others.order_by(None).order_by(Task.display_order.desc(), Task.id.desc()).first()
+        place_between(task, last, None)
+    elif len(neighbours) == 1:
+        place_between(task, neighbours[0], None)
+    else:
+        place_between(task, neighbours[0], neighbours[1])
+
+
+def move_before(task, following):
+    """Move a tarefa para logo antes de following (None = final da lista)."""
+    if following is None:
+        last = _user_tasks(task.user_id).filter(Task.id != task.id).order_by(
+            Task.display_order.desc(), Task.id.desc()
+        ).first()
+        place_between(task, last, None)
+        return
+    previous = task_above(following)
+    if previous is not None and previous.id == task.id:
+        return
+    place_between(task, previous, following)
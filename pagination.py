@@ -0,0 +1,166 @@
+# pagination.py
+
+from datetime import datetime
+from sqlalchemy.orm import load_only
+from extensions import db
+from models import Task
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Colunas exibidas na listagem e no seletor do relatório. Os campos Text
+# (description e notes) ficam de fora e nunca são carregados nessas telas.
+LIST_COLUMNS = (
+    Task.id,
+    Task.task_name,
+    Task.cost,
+    Task.due_date,
+    Task.status,
+    Task.priority,
+    Task.category,
+    Task.display_order,
+    # Chave da linha no cache de fragmentos
+    Task.version,
+    Task.creation_date,
+)
+
+FILTER_FIELDS = ("status", "priority", "category", "due_from", "due_to")
+
+
+class TaskPage:
+    """Uma página da listagem, com cursores para a página seguinte e a anterior."""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None, next_id=None, per_page=DEFAULT_PAGE_SIZE):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        # Id da primeira tarefa da próxima página (usado pelo arrastar e soltar)
+        self.next_id = next_id
+        self.per_page = per_page
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+def encode_cursor(task):
+    return f"{task.display_order}_{task.id}"
+
+
+def decode_cursor(value):
+    """Converte o cursor 'display_order_id' em tupla; retorna None se for inválido."""
+    if not value:
+        return None
+    try:
+        display_order, task_id = value.split("_", 1)
+        return int(display_order), int(task_id)
+    except ValueError:
+        return None
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, "%d/%m/%Y").date()
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_task_filters(args):
+    """Lê os filtros da query string, descartando valores vazios ou inválidos."""
+    filters = {}
+    for field in ("status", "priority", "category"):
+        value = (args.get(field) or "").strip()
+        if value:
+            filters[field] = value
+    for field in ("due_from", "due_to"):
+        if _parse_date(args.get(field)):
+            filters[field] = args.get(field)
+    return filters
+
+
+def parse_page_size(args):
+    per_page = args.get("per_page", type=int) or DEFAULT_PAGE_SIZE
+    return max(1, min(per_page, MAX_PAGE_SIZE))
+
+
+def filtered_tasks(user_id, filters, columns=LIST_COLUMNS):
+    query = Task.query.options(load_only(*columns)).filter(Task.user_id == user_id)
+    if "status" in filters:
+        query = query.filter(Task.status == filters["status"])
+    if "priority" in filters:
+        query = query.filter(Task.priority == filters["priority"])
+    if "category" in filters:
+        query = query.filter(Task.category == filters["category"])
+    if "due_from" in filters:
+        query = query.filter(Task.due_date >= _parse_date(filters["due_from"]))
+    if "due_to" in filters:
+        query = query.filter(Task.due_date <= _parse_date(filters["due_to"]))
+    return query
+
+
+def paginate_tasks(query, after=None, before=None, per_page=DEFAULT_PAGE_SIZE):
+    """Paginação por cursor (keyset) sobre (display_order, id).
+
+    after/before são cursores no formato de encode_cursor. O custo de cada página
+    não depende de quantas páginas vêm antes dela, ao contrário de OFFSET.
+    """
+    after = decode_cursor(after)
+    before = decode_cursor(before)
+    if before is not None:
+        order, task_id = before
+        rows = query.filter(
+            db.or_(
+                Task.display_order < order,
+                db.and_(Task.display_order == order, Task.id < task_id),
+            )
+        ).order_by(Task.display_order.desc(), Task.id.desc()).limit(per_page + 1).all()
+        has_prev = len(rows) > per_page
+        items = list(reversed(rows[:per_page]))
+        following = query.filter(
+            db.or_(
+                Task.display_order > order,
+                db.and_(Task.display_order == order, Task.id >= task_id),
+            )
+        ).order_by(Task.display_order, Task.id).first()
+        return TaskPage(
+            items,
+            next_cursor=encode_cursor(items[-1]) if items and following else None,
+            prev_cursor=encode_cursor(items[0]) if items and has_prev else None,
+            next_id=following.id if following else None,
+            per_page=per_page,
+        )
+
+    if after is not None:
+        order, task_id = after
+        query = query.filter(
+            db.or_(
+                Task.display_order > order,
+                db.and_(Task.display_order == order, Task.id > task_id),
+            )
+        )
+    rows = query.order_by(Task.display_order, Task.id).limit(per_page + 1).all()
+    items = rows[:per_page]
+    extra = rows[per_page] if len(rows) > per_page else None
+    return TaskPage(
+        items,
+        next_cursor=encode_cursor(items[-1]) if extra else None,
+        prev_cursor=encode_cursor(items[0]) if items and after is not None else None,
+        next_id=extra.id if extra else None,
+        per_page=per_page,
+    )
+
+
+def task_page_from_request(user_id, args):
+    """Monta a página de tarefas a partir da query string (filtros, cursor e tamanho)."""
+    filters = parse_task_filters(args)
+    page = paginate_tasks(
+        filtered_tasks(user_id, filters),
+        after=args.get("after"),
+        before=args.get("before"),
+        per_page=parse_page_size(args),
+    )
+    return page, filters
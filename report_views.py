@@ -0,0 +1,72 @@
+# report_views.py
+
+import json
+from flask import Blueprint, render_template, redirect, url_for, flash, request, session, jsonify, make_response
+from extensions import db, jobs
+from forms import STATUS_CHOICES, PRIORITY_CHOICES
+from models import Task, ReportJob
+from auth_views import login_required
+from task_cache import task_cache
+from reports import run_report_job, fail_if_stale
+
+bp = Blueprint("reports", __name__)
+
+@bp.route("/generate_report", methods=["GET", "POST"])
+@login_required
+def generate_report():
+    if request.method == "POST":
+        selected_task_ids = request.form.getlist("task_ids")
+        if not selected_task_ids:
+            flash("Por favor, selecione pelo menos uma tarefa.", "warning")
+            return redirect(url_for("reports.generate_report"))
+        task_ids = [task.id for task in Task.query.with_entities(Task.id).filter(
+            Task.id.in_(selected_task_ids), Task.user_id == session["user_id"]
+        )]
+
+        # A geração roda em segundo plano; a página do job acompanha o andamento
+        job = ReportJob(user_id=session["user_id"], task_ids=json.dumps(task_ids))
+        db.session.add(job)
+        db.session.commit()
+        jobs.submit(run_report_job, job.id)
+        return redirect(url_for("reports.report_job", job_id=job.id))
+    else:
+        recent_jobs = ReportJob.query.filter_by(user_id=session["user_id"]).order_by(
+            ReportJob.created_at.desc()
+        ).limit(10).all()
+        if [job for job in recent_jobs if fail_if_stale(job)]:
+            db.session.commit()
+        # Os relatórios recentes (e o andamento de cada um) também entram no ETag
+        version = task_cache.version(session["user_id"])
+        etag = task_cache.etag(session["user_id"], version, request.args, [(job.id, job.status) for job in recent_jobs])
+        not_modified = task_cache.not_modified(etag)
+        if not_modified is not None:
+            return not_modified
+        page, filters = task_cache.page_from_request(session["user_id"], request.args, version)
+        return task_cache.conditional(make_response(render_template(
+            "generate_report.html",
+            tasks=page.items,
+            recent_jobs=recent_jobs,
+            page=page,
+            filters=filters,
+            status_choices=STATUS_CHOICES,
+            priority_choices=PRIORITY_CHOICES,
+        )), etag)
+
+def _user_job(job_id):
+    """Job do usuário logado (ou 404); um job parado além do limite é dado como falho."""
+    job = ReportJob.query.filter_by(id=job_id, user_id=session["user_id"]).first_or_404()
+    if fail_if_stale(job):
+        db.session.commit()
+    return job
+
+@bp.route("/reports/<int:job_id>")
+@login_required
+def report_job(job_id):
+    job = _user_job(job_id)
+    return render_template("report.html", job=job, report=job.result)
+
+@bp.route("/reports/<int:job_id>/status")
+@login_required
+def report_job_status(job_id):
+    job = _user_job(job_id)
+    return jsonify(id=job.id, status=job.status, result=job.result, finished=job.finished, timings=job.timing_dict)
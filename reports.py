@@ -0,0 +1,222 @@
+# reports.py
+
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from extensions import db
+from models import Task, ReportJob
+from llm_cache import response_cache
+from llm import estimate_tokens, llm_gateway
+import analytics
+
+REPORT_HEADER = (
+    "Você é um assistente responsável por gerar relatórios precisos e objetivos com base nos dados fornecidos. "
+    "Utilize **apenas** as informações abaixo para criar o relatório. Não adicione informações ou detalhes que não estejam presentes nos dados.\n\n"
+    "### Relatório de Tarefas\n\n"
+)
+
+REPORT_FOOTER = (
+    "Com base nas informações acima, gere um relatório detalhado. Mantenha o relatório objetivo, "
+    "evitando adicionar opiniões ou informações que não estejam presentes nos dados fornecidos. "
+    "Estruture o relatório com cabeçalhos claros para cada tarefa e inclua uma visão geral no início."
+)
+
+MAP_HEADER = (
+    "Você é um assistente responsável por resumir dados de tarefas com precisão. "
+    "Utilize **apenas** as informações abaixo. Não adicione informações ou detalhes que não estejam presentes nos dados.\n\n"
+    "### Lote de Tarefas\n\n"
+)
+
+MAP_FOOTER = (
+    "Resuma as tarefas acima em tópicos curtos, mantendo para cada uma o número e o nome exatamente como "
+    "informados. Não invente números nem escreva introdução ou conclusão."
+)
+
+REDUCE_HEADER = (
+    "Você é um assistente responsável por gerar relatórios precisos e objetivos com base nos dados fornecidos. "
+    "Os resumos abaixo cobrem, em partes, todas as tarefas selecionadas. "
+    "Utilize **apenas** essas informações. Não adicione informações ou detalhes que não estejam presentes nos dados.\n\n"
+)
+
+REDUCE_FOOTER = (
+    "Com base nos resumos acima, gere um relatório detalhado. Mantenha o relatório objetivo, "
+    "evitando adicionar opiniões ou informações que não estejam presentes nos dados fornecidos. "
+    "Comece com uma visão geral de todas as tarefas e depois estruture o relatório com cabeçalhos claros."
+)
+
+
+def iter_task_blocks(tasks, start=1):
+    """Gera o bloco de texto de cada tarefa, sem concatenar tudo em uma única string.
+
+    Cada bloco traz os dados que as seções por tarefa do relatório precisam (status,
+    prioridade, data prevista e custo, em uma linha) e os textos livres. Os totais e
+    as contagens chegam ao modelo prontos, pelos indicadores (analytics.format_aggregates).
+    """
+    for idx, task in enumerate(tasks, start=start):
+        block = (
+            f"**Tarefa {idx}:** {task.task_name}\n"
+            f"- **Status:** {task.status or 'N/A'} | **Prioridade:** {task.priority or 'N/A'} | "
+            f"**Data Prevista para Inicialização:** {task.due_date.strftime('%d/%m/%Y')} | "
+            f"**Custo:** R${task.cost:.2f}\n"
+        )
+        if task.description:
+            block += f"- **Descrição:** {task.description}\n"
+        if task.notes:
+            block += f"- **Notas:** {task.notes}\n"
+        yield block + "\n"
+
+
+def iter_prompt(blocks, header=REPORT_HEADER, footer=REPORT_FOOTER, preamble=""):
+    """Gera as partes do prompt (cabeçalho, indicadores, blocos, instruções finais) em sequência."""
+    yield header
+    if preamble:
+        yield preamble
+    yield from blocks
+    yield footer
+
+
+def build_report_prompt(tasks, aggregates=""):
+    """Monta o prompt do relatório com instruções claras para evitar invenções."""
+    return "".join(iter_prompt(iter_task_blocks(tasks), preamble=aggregates))
+
+
+def batch_blocks(blocks, token_budget):
+    """Agrupa os blocos em lotes cujo total estimado não passa de token_budget.
+
+    Um bloco maior que o orçamento forma um lote sozinho.
+    """
+    batch = []
+    used = 0
+    for block in blocks:
+        tokens = estimate_tokens(block)
+        if batch and used + tokens > token_budget:
+            yield batch
+            batch = []
+            used = 0
+        batch.append(block)
+        used += tokens
+    if batch:
+        yield batch
+
+
+class ReportPipeline:
+    """Geração de relatório em map-reduce.
+
+    Seleções que cabem em um lote vão direto ao modelo com o prompt completo. As
+    maiores são divididas em lotes por orçamento de tokens, resumidas em paralelo
+    (no máximo `concurrency` chamadas ao mesmo tempo) e consolidadas em uma etapa
+    final. Os tempos de cada etapa ficam em `timings`.
+    """
+
+    def __init__(self, generate, token_budget=6000, concurrency=4):
+        self.generate = generate
+        self.token_budget = token_budget
+        self.concurrency = concurrency
+        self.timings = {}
+
+    def _timed(self, stage, started):
+        self.timings[stage] = round(self.timings.get(stage, 0.0) + time.perf_counter() - started, 4)
+
+    def _call(self, prompt):
+        return response_cache.cached(llm_gateway.model_name, prompt, self.generate)
+
+    def _map(self, prompts):
+        # Cada thread precisa do próprio app context para usar o cache no banco
+        app = current_app._get_current_object()
+
+        def call(prompt):
+            with app.app_context():
+                return self._call(prompt)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            return list(executor.map(call, prompts))
+
+    def run(self, tasks, aggregates=""):
+        """Gera o relatório; aggregates é o texto de indicadores exatos (analytics.format_aggregates)."""
+        total_started = time.perf_counter()
+        started = time.perf_counter()
+        batches = list(batch_blocks(iter_task_blocks(tasks), self.token_budget))
+        self.timings["batches"] = len(batches)
+        self._timed("prompt", started)
+
+        if len(batches) <= 1:
+            started = time.perf_counter()
+            report = self._call("".join(iter_prompt(batches[0] if batches else [], preamble=aggregates)))
+            self._timed("reduce", started)
+            self._timed("total", total_started)
+            return report
+
+        started = time.perf_counter()
+        summaries = self._map(["".join(iter_prompt(batch, MAP_HEADER, MAP_FOOTER)) for batch in batches])
+        # Resumos que ainda não cabem em uma chamada são consolidados em mais rodadas
+        while len(summaries) > 1 and sum(estimate_tokens(summary) for summary in summaries) > self.token_budget:
+            groups = list(batch_blocks(summaries, self.token_budget))
+            if len(groups) == len(summaries):
+                break
+            summaries = self._map(["".join(iter_prompt(group, MAP_HEADER, MAP_FOOTER)) for group in groups])
+        self._timed("map", started)
+
+        started = time.perf_counter()
+        parts = (f"#### Parte {idx}\n{summary}\n\n" for idx, summary in enumerate(summaries, start=1))
+        report = self._call("".join(iter_prompt(parts, REDUCE_HEADER, REDUCE_FOOTER, preamble=aggregates)))
+        self._timed("reduce", started)
+        self._timed("total", total_started)
+        return report
+
+
+def fail_if_stale(job):
+    """Marca como falho um job que não terminou em REPORT_JOB_TIMEOUT segundos.
+
+    O job fica parado para sempre quando o processo que o executava é encerrado
+    (deploy, reinício). Retorna True se o job mudou; quem chamou faz o commit.
+    """
+    if job.finished:
+        return False
+    limit = timedelta(seconds=current_app.config.get("REPORT_JOB_TIMEOUT", 600))
+    now = datetime.utcnow()
+    if now - (job.started_at or job.created_at) <= limit:
+        return False
+    job.status = ReportJob.FAILED
+    job.error = "Tempo limite excedido."
+    job.finished_at = now
+    return True
+
+
+def run_report_job(job_id):
+    """Executa um ReportJob: carrega as tarefas, chama a IA e grava o resultado."""
+    job = db.session.get(ReportJob, job_id)
+    if job is None or job.finished:
+        return
+    user_id = job.user_id
+    job.status = ReportJob.RUNNING
+    job.started_at = datetime.utcnow()
+    db.session.commit()
+
+    # As chamadas do map rodam em outras threads: usam o user_id já lido, não o objeto job
+    pipeline = ReportPipeline(
+        lambda prompt: llm_gateway.generate(prompt, user_id=user_id),
+        token_budget=current_app.config.get("REPORT_TOKEN_BUDGET", 6000),
+        concurrency=current_app.config.get("REPORT_MAP_CONCURRENCY", 4),
+    )
+    try:
+        started = time.perf_counter()
+        tasks = Task.query.filter(
+            Task.id.in_(job.task_id_list), Task.user_id == job.user_id
+        ).order_by(Task.display_order, Task.id).all()
+        pipeline.timings["load"] = round(time.perf_counter() - started, 4)
+        # Totais, contagens, atrasos e tempos de conclusão vêm prontos do banco
+        started = time.perf_counter()
+        aggregates = analytics.format_aggregates(analytics.live_aggregates(job.user_id, job.task_id_list))
+        pipeline.timings["aggregate"] = round(time.perf_counter() - started, 4)
+        # Mesma seleção com os mesmos dados gera os mesmos prompts: reaproveita as respostas
+        job.result = pipeline.run(tasks, aggregates)
+        job.status = ReportJob.DONE
+    except Exception as e:
+        current_app.logger.error(f"Erro ao gerar o relatório: {e}")
+        job.error = str(e)
+        job.status = ReportJob.FAILED
+    job.timings = json.dumps(pipeline.timings)
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
@@ -0,0 +1,242 @@
+# scripts/check_query_plans.py
+#
+# Verifica os planos de execução das consultas das rotas principais.
+#
+# 1. Cria um banco SQLite temporário aplicando as migrações (flask db upgrade)
+#    e confere se o esquema resultante bate com os modelos.
+# 2. Popula o banco, percorre as rotas com o cliente de teste do Flask e
+#    registra todo SELECT/UPDATE/DELETE executado.
+# 3. Roda EXPLAIN QUERY PLAN em cada consulta e falha (código de saída 1) se
+#    alguma delas fizer varredura completa (SCAN) de task, message ou user.
+#
+# Uso: python scripts/check_query_plans.py [--tasks 2000] [--messages 500] [-v]
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from alembic.autogenerate import compare_metadata  # noqa: E402
+from alembic.migration import MigrationContext  # noqa: E402
+from flask_migrate import upgrade  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app_factory import create_app  # noqa: E402
+from extensions import db, jobs  # noqa: E402
+from jobs import InlineBackend  # noqa: E402
+from llm import llm_gateway, FakeBackend  # noqa: E402
+from models import User, Task, Message  # noqa: E402
+import api_views  # noqa: E402
+import message_archive  # noqa: E402
+import ordering  # noqa: E402
+import search  # noqa: E402
+
+_db_dir = tempfile.mkdtemp()
+app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///" + os.path.join(_db_dir, "query_plans.db"), "MIGRATIONS_ENABLED": True, "METRICS_PUBLIC": True})
+
+# SEARCH usa o índice para localizar as linhas; SCAN percorre a tabela (ou o índice) inteira
+FULL_SCAN = re.compile(r"^SCAN (task|message|user)\b")
+CHECKED_VERBS = ("SELECT", "UPDATE", "DELETE")
+
+
+def check_schema():
+    with db.engine.connect() as connection:
+        context = MigrationContext.configure(connection, opts={"include_object": search.include_object})
+        diff = compare_metadata(context, db.metadata)
+    return diff
+
+
+def seed(task_count, message_count, small_users=50):
+    users = [User(username="plano", password="x"), User(username="outro", password="x")]
+    # Muitos usuários com poucas tarefas: com só dois usuários o ANALYZE considera
+    # user_id pouco seletivo e o SQLite prefere varrer a tabela
+    users += [User(username=f"usuario{i}", password="x") for i in range(small_users)]
+    db.session.add_all(users)
+    db.session.commit()
+    for index, user in enumerate(users):
+        if index >= 2:
+            task_count = message_count = 20
+        db.session.execute(
+            db.insert(Task),
+            [
+                {
+                    "task_name": f"Tarefa {i}",
+                    "cost": float(i),
+                    "due_date": date(2030, 1, 1) + timedelta(days=i % 365),
+                    "status": ("Pendente", "Em Andamento", "Concluída")[i % 3],
+                    "priority": ("Baixa", "Média", "Alta")[i % 3],
+                    "category": f"cat{i % 10}",
+                    "creation_date": datetime(2029, 1, 1),
+                    "display_order": (i + 1) * ordering.GAP,
+                    "user_id": user.id,
+                }
+                for i in range(task_count)
+            ],
+        )
+        db.session.execute(
+            db.insert(Message),
+            [
+                {
+                    "user_id": user.id,
+                    "content": f"mensagem {i}",
+                    "role": "user" if i % 2 else "assistant",
+                    "timestamp": datetime(2029, 1, 1) + timedelta(minutes=i),
+                }
+                for i in range(message_count)
+            ],
+        )
+    db.session.commit()
+    db.session.execute(db.text("ANALYZE"))
+    db.session.commit()
+    return users[0]
+
+
+def exercise_routes(user_id, username):
+    """Percorre as rotas que tocam o banco, como um usuário faria."""
+    app.config["WTF_CSRF_ENABLED"] = False
+    llm_gateway.backend = FakeBackend()
+    jobs.backend = InlineBackend()
+    client = app.test_client()
+    client.post("/login", data={"username": username, "password": "errada"})
+    with client.session_transaction() as sess:
+        sess["user_id"] = user_id
+        sess["username"] = username
+
+    with app.app_context():
+        ids = [row.id for row in db.session.query(Task.id).filter_by(user_id=user_id).order_by(Task.display_order).limit(20)]
+        message_id = db.session.query(Message.id).filter_by(user_id=user_id).order_by(Message.timestamp).first().id
+
+    client.get("/")
+    client.get("/?status=Pendente&priority=Alta")
+    client.get("/?due_from=01/02/2030&due_to=01/03/2030&category=cat1")
+    page = client.get("/?per_page=10").data.decode()
+    cursor = re.search(r"after=([0-9_]+)", page)
+    if cursor:
+        client.get(f"/?after={cursor.group(1)}&per_page=10")
+        client.get(f"/?before={cursor.group(1)}&per_page=10")
+    client.post("/add", data={"task_name": "Nova tarefa", "cost": "10", "due_date": "01/01/2031", "status": "Pendente", "priority": "Alta"})
+    client.get(f"/edit/{ids[1]}")
+    client.post(f"/edit/{ids[1]}", data={"task_name": "Renomeada", "cost": "5", "due_date": "02/01/2031", "status": "Pendente", "priority": "Baixa"})
+    client.post(f"/move_up/{ids[3]}")
+    client.post(f"/move_down/{ids[3]}")
+    client.post(f"/move/{ids[4]}", data={"position": "8"})
+    client.post(f"/move/{ids[5]}", data={"before_id": str(ids[2])})
+    client.post(f"/delete/{ids[6]}")
+    client.get(f"/rows?ids={ids[3]},{ids[4]},{ids[5]}&status=Pendente")
+    client.post("/bulk", data={"action": "update", "task_ids": [str(task_id) for task_id in ids[12:15]], "status": "Em Andamento"})
+    client.post("/bulk", data={"action": "complete", "task_ids": [str(task_id) for task_id in ids[15:17]]})
+    client.post("/bulk", data={"action": "delete", "task_ids": [str(ids[17])]})
+    client.post("/bulk", data={"action": "update", "task_ids": [str(task_id) for task_id in ids[18:20]], "category": "cat2"})
+    client.get(f"/similar/{ids[2]}")
+    client.get("/metrics")
+    client.get("/generate_report")
+    client.get("/generate_report?status=Concluída")
+    report = client.post("/generate_report", data={"task_ids": [str(task_id) for task_id in ids[7:12]]})
+    client.get(report.location)
+    client.get(report.location + "/status")
+    client.get("/dashboard")
+    client.post("/import", data="task_name,cost,due_date\nImportada 1,1,01/01/2031\nImportada 2,2,02/01/2031\n", content_type="text/csv")
+    client.get("/export?format=csv&status=Pendente")
+    client.get("/export?format=json")
+    client.get("/search?q=Tarefa 1")
+    client.get("/search?q=mensagem&scope=messages&page=2")
+    client.get("/chat")
+    client.get(f"/chat?at={message_id + 3}")
+    client.get(f"/chat?before={message_id + 100}")
+    client.post(f"/delete_message/{message_id}")
+
+    # API JSON, com token
+    with app.app_context():
+        _, token = api_views.create_token(user_id, "check_query_plans")
+    api = {"Authorization": f"Bearer {token}"}
+    listing = client.get("/api/v1/tasks?per_page=10&fields=task_name,due_date", headers=api).get_json()
+    client.get(f"/api/v1/tasks?per_page=10&status=Pendente&after={listing['next']}", headers=api)
+    client.get(f"/api/v1/tasks/{ids[8]}", headers=api)
+    client.post("/api/v1/tasks", json={"task_name": "Pela API", "cost": 1, "due_date": "01/01/2031"}, headers=api)
+    client.patch(f"/api/v1/tasks/{ids[9]}", json={"cost": 7}, headers=api)
+    client.delete(f"/api/v1/tasks/{ids[10]}", headers=api)
+    client.post("/api/v1/tasks/batch", json={"items": [
+        {"task_name": f"Lote {number}", "cost": number, "due_date": "01/01/2031"} for number in range(3)
+    ]}, headers=api)
+    client.patch("/api/v1/tasks/batch", json={"items": [{"id": ids[11], "priority": "Alta"}]}, headers=api)
+    client.get("/api/v1/messages?per_page=10", headers=api)
+    client.post("/api/v1/messages/batch", json={"items": [{"content": "pela API"}]}, headers=api)
+    client.patch(f"/api/v1/messages/{message_id + 1}", json={"content": "alterada"}, headers=api)
+
+    # Arquivo do chat: a primeira hora de mensagens vai para o arquivo comprimido
+    with app.app_context():
+        message_archive.archive_batch(user_id, datetime(2029, 1, 1, 1), 100, message_archive.ZlibCodec())
+    client.get(f"/chat?before={message_id + 70}")
+    client.get("/chat/archive")
+    client.get("/chat/archive?before=2029-01-02")
+    client.get("/chat/archive/2029-01-01")
+
+
+def explain(statements):
+    problems = []
+    plans = []
+    raw = db.engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        for statement, parameters in statements:
+            cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+            details = [row[3] for row in cursor.fetchall()]
+            plans.append((statement, details))
+            if any(FULL_SCAN.match(detail) for detail in details):
+                problems.append((statement, details))
+    finally:
+        raw.close()
+    return plans, problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica os planos das consultas quentes")
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+
+    with app.app_context():
+        upgrade()
+        diff = check_schema()
+        if diff:
+            print("Esquema das migrações difere dos modelos:")
+            for entry in diff:
+                print(f"  {entry}")
+            return 1
+        user = seed(args.tasks, args.messages)
+        user_id, username = user.id, user.username
+
+        statements = {}
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            verb = statement.lstrip().split(None, 1)[0].upper()
+            if verb in CHECKED_VERBS and not executemany:
+                statements.setdefault(statement, parameters)
+
+        event.listen(db.engine, "before_cursor_execute", capture)
+        exercise_routes(user_id, username)
+        event.remove(db.engine, "before_cursor_execute", capture)
+
+        plans, problems = explain(statements.items())
+
+    if args.verbose:
+        for statement, details in plans:
+            print(" ".join(statement.split()))
+            for detail in details:
+                print(f"    {detail}")
+    print(f"{len(plans)} consultas verificadas, {len(problems)} com varredura completa.")
+    for statement, details in problems:
+        print("\nSCAN em:", " ".join(statement.split()))
+        for detail in details:
+            print(f"    {detail}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+# search.py
+
+import re
+import click
+from flask.cli import with_appcontext
+from markupsafe import Markup, escape
+from sqlalchemy import event, text, Date, DateTime
+from extensions import db
+
+# Marcadores do trecho destacado; trocados por <mark> depois de escapar o texto
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_END = "\x03"
+WORD = re.compile(r"\w+")
+MAX_TERMS = 8
+# Dicionário do Postgres usado no índice e nas consultas
+TS_CONFIG = "portuguese"
+# Tabelas FTS5 do SQLite (e as tabelas internas task_fts_data, task_fts_idx...)
+SEARCH_TABLES = ("task_fts", "message_fts")
+
+# SQLite: tabelas FTS5 com conteúdo externo (o texto fica só em task/message) e
+# gatilhos que atualizam o índice a cada INSERT/UPDATE/DELETE, inclusive em lote
+SQLITE_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS task_fts USING fts5(
+        task_name, description, notes, category,
+        content='task', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS task_fts_insert AFTER INSERT ON task BEGIN
+        INSERT INTO task_fts(rowid, task_name, description, notes, category)
+        VALUES (new.id, new.task_name, new.description, new.notes, new.category);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS task_fts_delete AFTER DELETE ON task BEGIN
+        INSERT INTO task_fts(task_fts, rowid, task_name, description, notes, category)
+        VALUES ('delete', old.id, old.task_name, old.description, old.notes, old.category);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS task_fts_update AFTER UPDATE OF task_name, description, notes, category ON task BEGIN
+        INSERT INTO task_fts(task_fts, rowid, task_name, description, notes, category)
+        VALUES ('delete', old.id, old.task_name, old.description, old.notes, old.category);
+        INSERT INTO task_fts(rowid, task_name, description, notes, category)
+        VALUES (new.id, new.task_name, new.description, new.notes, new.category);
+    END""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS message_fts USING fts5(
+        content, content='message', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS message_fts_insert AFTER INSERT ON message BEGIN
+        INSERT INTO message_fts(rowid, content) VALUES (new.id, new.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS message_fts_delete AFTER DELETE ON message BEGIN
+        INSERT INTO message_fts(message_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS message_fts_update AFTER UPDATE OF content ON message BEGIN
+        INSERT INTO message_fts(message_fts, rowid, content) VALUES ('delete', old.id, old.content);
+        INSERT INTO message_fts(rowid, content) VALUES (new.id, new.content);
+    END""",
+]
+
+# Postgres: colunas tsvector geradas (atualizadas pelo próprio banco a cada escrita) com índice GIN
+POSTGRES_DDL = [
+    f"""ALTER TABLE task ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('{TS_CONFIG}', coalesce(task_name, '')), 'A') ||
+        setweight(to_tsvector('{TS_CONFIG}', coalesce(category, '')), 'B') ||
+        setweight(to_tsvector('{TS_CONFIG}', coalesce(description, '') || ' ' || coalesce(notes, '')), 'C')
+    ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_task_search_vector ON task USING GIN (search_vector)",
+    f"""ALTER TABLE message ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        to_tsvector('{TS_CONFIG}', content)
+    ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_message_search_vector ON message USING GIN (search_vector)",
+]
+
+SQLITE_TASKS = text(
+    """
+    SELECT task.id, task.task_name, task.status, task.due_date,
+           snippet(task_fts, -1, :start, :end, '…', 16) AS snippet,
+           bm25(task_fts, 10.0, 1.0, 1.0, 4.0) AS rank
+    FROM task_fts JOIN task ON task.id = task_fts.rowid
+    WHERE task_fts MATCH :query AND task.user_id = :user_id
+    ORDER BY rank, task.id
+    LIMIT :limit OFFSET :offset
+    """
+).columns(due_date=Date)
+
+SQLITE_MESSAGES = text(
+    """
+    SELECT message.id, message.role, message.timestamp,
+           snippet(message_fts, 0, :start, :end, '…', 24) AS snippet,
+           bm25(message_fts) AS rank
+    FROM message_fts JOIN message ON message.id = message_fts.rowid
+    WHERE message_fts MATCH :query AND message.user_id = :user_id
+    ORDER BY rank, message.id DESC
+    LIMIT :limit OFFSET :offset
+    """
+).columns(timestamp=DateTime)
+
+POSTGRES_TASKS = text(
+    f"""
+    SELECT task.id, task.task_name, task.status, task.due_date,
+           ts_headline('{TS_CONFIG}', concat_ws(' ', task.task_name, task.category, task.description, task.notes),
+                       query, :options) AS snippet,
+           ts_rank_cd(task.search_vector, query) AS rank
+    FROM task, to_tsquery('{TS_CONFIG}', :query) AS query
+    WHERE task.user_id = :user_id AND task.search_vector @@ query
+    ORDER BY rank DESC, task.id
+    LIMIT :limit OFFSET :offset
+    """
+).columns(due_date=Date)
+
+POSTGRES_MESSAGES = text(
+    f"""
+    SELECT message.id, message.role, message.timestamp,
+           ts_headline('{TS_CONFIG}', message.content, query, :options) AS snippet,
+           ts_rank_cd(message.search_vector, query) AS rank
+    FROM message, to_tsquery('{TS_CONFIG}', :query) AS query
+    WHERE message.user_id = :user_id AND message.search_vector @@ query
+    ORDER BY rank DESC, message.id DESC
+    LIMIT :limit OFFSET :offset
+    """
+).columns(timestamp=DateTime)
+
+HEADLINE_OPTIONS = (
+    f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, MaxFragments=2, MaxWords=20, MinWords=5, "
+    "FragmentDelimiter=\" … \""
+)
+
+
+class SearchPage:
+    """Uma página de resultados, do mais relevante para o menos relevante."""
+
+    def __init__(self, items, page, per_page, has_next):
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.has_next = has_next
+
+    @property
+    def has_prev(self):
+        return self.page > 1
+
+
+def query_terms(value):
+    """Palavras da busca, sem a sintaxe de consulta do FTS5/tsquery."""
+    return [term.lower() for term in WORD.findall(value or "")][:MAX_TERMS]
+
+
+def highlight(snippet):
+    """Escapa o trecho e marca os termos encontrados com <mark>."""
+    escaped = str(escape(snippet or ""))
+    return Markup(escaped.replace(HIGHLIGHT_START, "<mark>").replace(HIGHLIGHT_END, "</mark>"))
+
+
+def _dialect():
+    return db.engine.dialect.name
+
+
+def _search(statements, user_id, value, page, per_page):
+    terms = query_terms(value)
+    if not terms:
+        return SearchPage([], page, per_page, False)
+    params = {"user_id": user_id, "limit": per_page + 1, "offset": (page - 1) * per_page}
+    if _dialect() == "postgresql":
+        statement = statements["postgresql"]
+        # Todos os termos, aceitando prefixos: "relat" encontra "relatório"
+        params.update(query=" & ".join(f"{term}:*" for term in terms), options=HEADLINE_OPTIONS)
+    else:
+        statement = statements["sqlite"]
+        params.update(query=" ".join(f'"{term}"*' for term in terms), start=HIGHLIGHT_START, end=HIGHLIGHT_END)
+    rows = db.session.execute(statement, params).all()
+    items = []
+    for row in rows[:per_page]:
+        item = row._asdict()
+        item["snippet"] = highlight(item["snippet"])
+        items.append(item)
+    return SearchPage(items, page, per_page, len(rows) > per_page)
+
+
+def search_tasks(user_id, value, page=1, per_page=20):
+    return _search({"sqlite": SQLITE_TASKS, "postgresql": POSTGRES_TASKS}, user_id, value, page, per_page)
+
+
+def search_messages(user_id, value, page=1, per_page=20):
+    return _search({"sqlite": SQLITE_MESSAGES, "postgresql": POSTGRES_MESSAGES}, user_id, value, page, per_page)
+
+
+def create_search_index(connection):
+    """Cria as estruturas de busca que ainda não existem (idempotente)."""
+    statements = POSTGRES_DDL if connection.dialect.name == "postgresql" else SQLITE_DDL
+    for statement in statements:
+        connection.execute(text(statement))
+
+
+def rebuild_search_index(connection):
+    """Reconstrói o índice a partir das tabelas (no Postgres as colunas geradas já estão em dia)."""
+    if connection.dialect.name != "postgresql":
+        connection.execute(text("INSERT INTO task_fts(task_fts) VALUES ('rebuild')"))
+        connection.execute(text("INSERT INTO message_fts(message_fts) VALUES ('rebuild')"))
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    """Filtro do autogenerate: ignora o índice de busca, que não faz parte dos modelos."""
+    if type_ == "table" and name and name.startswith(SEARCH_TABLES):
+        return False
+    if type_ == "column" and name == "search_vector":
+        return False
+    if type_ == "index" and name and name.endswith("_search_vector"):
+        return False
+    return True
+
+
+def _after_create(target, connection, **kw):
+    # db.create_all() (testes e benchmarks) também cria o índice de busca
+    if connection.dialect.name in ("sqlite", "postgresql"):
+        create_search_index(connection)
+
+
+def _before_drop(target, connection, **kw):
+    # Os gatilhos somem com as tabelas, mas as tabelas FTS5 ficariam com conteúdo antigo
+    if connection.dialect.name == "sqlite":
+        for table in SEARCH_TABLES:
+            connection.execute(text(f"DROP TABLE IF EXISTS {table}"))
+
+
+def init_app(app):
+    if not event.contains(db.metadata, "after_create", _after_create):
+        event.listen(db.metadata, "after_create", _after_create)
+        event.listen(db.metadata, "before_drop", _before_drop)
+    app.cli.add_command(search_cli)
+
+
+@click.group("search", help="Índice de busca textual.")
+def search_cli():
+    pass
+
+
+@search_cli.command("rebuild")
+@with_appcontext
+def rebuild_command():
+    """Cria o índice de busca, se necessário, e o reconstrói a partir das tabelas."""
+    with db.engine.begin() as connection:
+        create_search_index(connection)
+        rebuild_search_index(connection)
+    click.echo("Índice de busca reconstruído.")
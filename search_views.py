@@ -0,0 +1,32 @@
+# search_views.py
+
+from flask import Blueprint, render_template, request, session, jsonify, current_app
+from auth_views import login_required
+import search
+
+bp = Blueprint("search", __name__)
+
+SCOPES = ("tasks", "messages")
+
+
+@bp.route("/search")
+@login_required
+def search_page():
+    """Busca textual nas tarefas e no histórico do chat, com resultados por relevância."""
+    query = (request.args.get("q") or "").strip()
+    scope = request.args.get("scope") if request.args.get("scope") in SCOPES else "tasks"
+    page = max(request.args.get("page", 1, type=int), 1)
+    per_page = current_app.config["SEARCH_PAGE_SIZE"]
+    if scope == "messages":
+        results = search.search_messages(session["user_id"], query, page, per_page)
+    else:
+        results = search.search_tasks(session["user_id"], query, page, per_page)
+
+    if request.accept_mimetypes.best == "application/json":
+        items = [
+            dict(item, snippet=str(item["snippet"]), rank=float(item["rank"]),
+                 **{key: item[key].isoformat() for key in ("due_date", "timestamp") if item.get(key)})
+            for item in results.items
+        ]
+        return jsonify(q=query, scope=scope, page=page, has_next=results.has_next, items=items)
+    return render_template("search.html", q=query, scope=scope, results=results)
@@ -0,0 +1,451 @@
+# semantic.py
+
+import hashlib
+import heapq
+import math
+import operator
+import re
+import struct
+import threading
+import time
+import unicodedata
+from functools import lru_cache
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import event, inspect
+from extensions import db
+from models import Task
+from llm_cache import LRUCache
+
+# O NumPy é opcional (requirements-numpy.txt) e só é importado quando um embedding é
+# calculado ou o índice é carregado, para não pesar na inicialização da aplicação (ver
+# benchmarks/bench_import_time.py). Sem ele, os vetores são listas de floats e o produto
+# escalar é feito em Python puro: mesmas sugestões, mais lento com muitas tarefas por usuário
+_numpy_module = False
+
+WORD = re.compile(r"\w+")
+# Campos da tarefa que entram no embedding, com o peso de cada um
+TEXT_FIELDS = {"task_name": 2.0, "category": 1.5, "description": 1.0, "notes": 0.5}
+# Palavras muito comuns (sem acento) que aproximariam textos sem relação
+STOPWORDS = frozenset(
+    "a o as os um uma uns umas de do da dos das em no na nos nas por pelo pela para pra com sem "
+    "e ou que se ao aos the of and to is".split()
+)
+# Prefixo usado como "radical" aproximado: relatório, relatórios e relatar compartilham "relat"
+STEM_LENGTH = 5
+
+
+def _numpy():
+    """O módulo numpy, ou None quando não está instalado."""
+    global _numpy_module
+    if _numpy_module is False:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _numpy_module = numpy
+    return _numpy_module
+
+
+def _dot(first, second):
+    return sum(map(operator.mul, first, second))
+
+
+def _strip_accents(value):
+    decomposed = unicodedata.normalize("NFKD", value)
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+@lru_cache(maxsize=65536)
+def _bucket(feature, dim):
+    """Posição e sinal da característica no vetor (hash estável entre processos, ao contrário de hash())."""
+    value = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+    return value % dim, 1.0 if value >> 63 else -1.0
+
+
+class HashingEmbedder:
+    """Embedding local e determinístico por feature hashing.
+
+    Palavras (sem acentos), radicais aproximados e pares de palavras vizinhas são
+    espalhados em `dim` posições. Não precisa de rede nem de modelo treinado: textos
+    que compartilham palavras ficam próximos pela similaridade de cosseno.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dim=256):
+        self.dim = dim
+
+    def features(self, text):
+        words = [word for word in WORD.findall(_strip_accents(text.lower())) if word not in STOPWORDS]
+        for word in words:
+            yield word, 1.0
+            if len(word) > STEM_LENGTH:
+                yield "~" + word[:STEM_LENGTH], 0.5
+        for first, second in zip(words, words[1:]):
+            yield first + " " + second, 0.5
+
+    def embed(self, texts):
+        """Matriz float32 (len(texts), dim) com linhas normalizadas (norma 1, ou zero para texto vazio).
+
+        Sem NumPy, uma lista de vetores (listas de floats) com os mesmos valores.
+        """
+        np = _numpy()
+        if np is None:
+            matrix = [[0.0] * self.dim for _ in texts]
+        else:
+            matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, weight in self.features(text or ""):
+                index, sign = _bucket(feature, self.dim)
+                matrix[row][index] += sign * weight
+        return normalize(matrix)
+
+
+EMBEDDERS = {"hashing": HashingEmbedder}
+
+
+def normalize(matrix):
+    np = _numpy()
+    if np is None:
+        rows = []
+        for vector in matrix:
+            norm = math.sqrt(_dot(vector, vector)) or 1.0
+            rows.append([value / norm for value in vector])
+        return rows
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32, copy=False)
+
+
+def task_text(values):
+    """Texto da tarefa para o embedding; `values` é uma Task ou um dicionário com os campos.
+
+    Campos com peso maior são repetidos, o que aumenta a contagem das suas palavras.
+    """
+    parts = []
+    for field, weight in TEXT_FIELDS.items():
+        value = values.get(field) if isinstance(values, dict) else getattr(values, field)
+        if value:
+            parts.extend([value] * max(1, round(weight * 2)))
+    return "\n".join(parts)
+
+
+def encode_vector(vector):
+    """float32 little-endian: 4 bytes por dimensão (1 KiB com 256 dimensões)."""
+    if hasattr(vector, "astype"):
+        return vector.astype("<f4").tobytes()
+    return struct.pack(f"<{len(vector)}f", *vector)
+
+
+def decode_vector(blob):
+    np = _numpy()
+    if np is None:
+        return list(struct.unpack(f"<{len(blob) // 4}f", blob))
+    return np.frombuffer(blob, dtype="<f4")
+
+
+class UserIndex:
+    """Vetores de todas as tarefas de um usuário em uma matriz (uma linha por tarefa)."""
+
+    def __init__(self, task_ids, matrix, signature):
+        self.task_ids = task_ids
+        self.matrix = matrix
+        self.signature = signature
+        self.loaded_at = time.monotonic()
+
+    def __len__(self):
+        return len(self.task_ids)
+
+    def top_k(self, vectors, k, exclude=(), min_score=0.0):
+        """As `k` tarefas mais parecidas com cada vetor de consulta, como listas de (id, similaridade).
+
+        Como as linhas estão normalizadas, um único produto de matrizes calcula a
+        similaridade de cosseno de todas as tarefas com todas as consultas.
+        """
+        if not len(self) or k <= 0:
+            return [[] for _ in range(len(vectors))]
+        np = _numpy()
+        if np is None:
+            return [self._top_k_python(vector, k, exclude, min_score) for vector in vectors]
+        scores = vectors @ self.matrix.T
+        if exclude:
+            scores[:, np.isin(self.task_ids, list(exclude))] = -np.inf
+        k = min(k, len(self))
+        results = []
+        for row in scores:
+            candidates = np.argpartition(-row, k - 1)[:k]
+            ordered = candidates[np.argsort(-row[candidates], kind="stable")]
+            results.append([
+                (int(self.task_ids[index]), float(row[index])) for index in ordered if row[index] >= min_score
+            ])
+        return results
+
+    def _top_k_python(self, vector, k, exclude, min_score):
+        """top_k de um vetor sem NumPy: um produto escalar por tarefa."""
+        excluded = set(exclude)
+        scores = [
+            (_dot(vector, row), position)
+            for position, (task_id, row) in enumerate(zip(self.task_ids, self.matrix))
+            if task_id not in excluded
+        ]
+        best = heapq.nlargest(k, scores, key=lambda item: item[0])
+        return [(int(self.task_ids[position]), score) for score, position in best if score >= min_score]
+
+
+class SemanticIndex:
+    """Busca por similaridade entre as tarefas de cada usuário.
+
+    Configuração:
+    - EMBEDDING_BACKEND: "hashing" ou um objeto com `name`, `dim` e `embed(texts)`;
+    - EMBEDDING_DIM: dimensões do HashingEmbedder;
+    - SEMANTIC_INDEX_CACHE_SIZE: usuários com o índice em memória (LRU);
+    - SEMANTIC_INDEX_TTL: segundos até recarregar um índice, para ver edições feitas em
+      outros processos (inclusões e exclusões são percebidas pela contagem de tarefas);
+    - SEMANTIC_MIN_SCORE: similaridade mínima para uma tarefa ser sugerida.
+
+    Os vetores ficam em Task.embedding e são atualizados a cada inclusão ou edição;
+    os das tarefas sem vetor (anteriores à migração ou com o embedder fora do ar) são
+    calculados em memória ao carregar o índice, sem gravar, até o próximo
+    `flask semantic rebuild`.
+    """
+
+    def __init__(self, app=None):
+        self.config = {}
+        self._embedder = None
+        self._indexes = LRUCache()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("EMBEDDING_BACKEND", "hashing")
+        app.config.setdefault("EMBEDDING_DIM", 256)
+        app.config.setdefault("SEMANTIC_INDEX_CACHE_SIZE", 128)
+        app.config.setdefault("SEMANTIC_INDEX_TTL", 60)
+        app.config.setdefault("SEMANTIC_MIN_SCORE", 0.2)
+        self.config = app.config
+        self._embedder = None
+        self._indexes = LRUCache(app.config["SEMANTIC_INDEX_CACHE_SIZE"])
+        if not event.contains(db.session, "before_flush", _embed_changed_tasks):
+            event.listen(db.session, "before_flush", _embed_changed_tasks)
+            event.listen(db.session, "after_commit", _invalidate_committed)
+            event.listen(db.session, "after_rollback", _discard_pending)
+        app.extensions["semantic"] = self
+        app.cli.add_command(semantic_cli)
+
+    @property
+    def embedder(self):
+        if self._embedder is None:
+            with self._lock:
+                if self._embedder is None:
+                    embedder = self.config.get("EMBEDDING_BACKEND", "hashing")
+                    if isinstance(embedder, str):
+                        embedder = EMBEDDERS[embedder](self.config.get("EMBEDDING_DIM", 256))
+                    self._embedder = embedder
+        return self._embedder
+
+    @embedder.setter
+    def embedder(self, value):
+        self._embedder = value
+        self._indexes.clear()
+
+    def embed(self, texts):
+        return self.embedder.embed(list(texts))
+
+    def embed_rows(self, rows):
+        """Preenche "embedding" em dicionários de tarefa (inserções em lote, sem eventos do ORM)."""
+        if rows:
+            for values, vector in zip(rows, self.embed(task_text(values) for values in rows)):
+                values["embedding"] = encode_vector(vector)
+        return rows
+
+    def refresh_tasks(self, user_id, task_ids):
+        """Recalcula os vetores das tarefas informadas (após UPDATE em lote dos campos de texto)."""
+        columns = [Task.id] + [getattr(Task, field) for field in TEXT_FIELDS]
+        rows = [
+            row._asdict()
+            for row in db.session.query(*columns).filter(Task.user_id == user_id, Task.id.in_(task_ids))
+        ]
+        self._store(rows)
+        self.invalidate(user_id)
+
+    def _store(self, rows):
+        """Calcula e grava os vetores de linhas (id + campos de texto) em um UPDATE por chave primária."""
+        if not rows:
+            return []
+        vectors = self.embed(task_text(row) for row in rows)
+        db.session.execute(
+            db.update(Task),
+            [{"id": row["id"], "embedding": encode_vector(vector)} for row, vector in zip(rows, vectors)],
+        )
+        return vectors
+
+    def invalidate(self, user_id):
+        self._indexes.delete(user_id)
+
+    def clear(self):
+        self._indexes.clear()
+
+    def _signature(self, user_id):
+        count, last_id = db.session.query(db.func.count(Task.id), db.func.max(Task.id)).filter(
+            Task.user_id == user_id
+        ).one()
+        return count, last_id
+
+    def user_index(self, user_id):
+        """Índice do usuário, da memória ou carregado do banco."""
+        signature = self._signature(user_id)
+        index = self._indexes.get(user_id)
+        ttl = self.config.get("SEMANTIC_INDEX_TTL", 60)
+        if index is not None and index.signature == signature and time.monotonic() - index.loaded_at < ttl:
+            return index
+        index = self._load(user_id, signature)
+        self._indexes.set(user_id, index)
+        return index
+
+    def _load(self, user_id, signature):
+        dim = self.embedder.dim
+        task_ids = []
+        vectors = []
+        missing = []
+        for task_id, blob in db.session.query(Task.id, Task.embedding).filter(Task.user_id == user_id).order_by(Task.id):
+            task_ids.append(task_id)
+            # Vetores ausentes ou de outra dimensão (embedder trocado) são recalculados
+            if blob is None or len(blob) != dim * 4:
+                missing.append(len(vectors))
+                vectors.append(None)
+            else:
+                vectors.append(decode_vector(blob))
+        if missing:
+            columns = [Task.id] + [getattr(Task, field) for field in TEXT_FIELDS]
+            rows = {
+                row.id: row._asdict()
+                for row in db.session.query(*columns).filter(
+                    Task.user_id == user_id, Task.id.in_([task_ids[i] for i in missing])
+                )
+            }
+            # Só em memória: leituras não gravam. O vetor é gravado pelo
+            # `flask semantic rebuild` ou quando o texto da tarefa for editado
+            computed = self.embed(task_text(rows[task_ids[i]]) for i in missing)
+            for position, vector in zip(missing, computed):
+                vectors[position] = vector
+        np = _numpy()
+        if np is None:
+            return UserIndex(task_ids, [list(vector) for vector in vectors], signature)
+        matrix = np.vstack(vectors).astype(np.float32) if vectors else np.zeros((0, dim), dtype=np.float32)
+        return UserIndex(np.array(task_ids, dtype=np.int64), matrix, signature)
+
+    def _tasks(self, user_id, matches):
+        """Carrega as tarefas encontradas, na ordem de similaridade, com a pontuação de cada uma."""
+        if not matches:
+            return []
+        tasks = {
+            task.id: task
+            for task in Task.query.filter(Task.user_id == user_id, Task.id.in_([task_id for task_id, _ in matches]))
+        }
+        return [(tasks[task_id], score) for task_id, score in matches if task_id in tasks]
+
+    def related_tasks(self, user_id, text, k=5, min_score=None):
+        """Tarefas do usuário mais parecidas com um texto livre (por exemplo, uma pergunta no chat)."""
+        if not (text or "").strip():
+            return []
+        index = self.user_index(user_id)
+        if min_score is None:
+            min_score = self.config.get("SEMANTIC_MIN_SCORE", 0.2)
+        matches = index.top_k(self.embed([text]), k, min_score=min_score)[0]
+        return self._tasks(user_id, matches)
+
+    def similar_tasks(self, task, k=5, min_score=None):
+        """Tarefas do mesmo usuário parecidas com `task` (ela própria fica de fora)."""
+        index = self.user_index(task.user_id)
+        if min_score is None:
+            min_score = self.config.get("SEMANTIC_MIN_SCORE", 0.2)
+        matches = index.top_k(self.embed([task_text(task)]), k, exclude=(task.id,), min_score=min_score)[0]
+        return self._tasks(task.user_id, matches)
+
+    def rebuild(self, user_id=None, batch_size=500):
+        """Recalcula todos os vetores (após trocar o embedder), em lotes; devolve o total de tarefas."""
+        columns = [Task.id] + [getattr(Task, field) for field in TEXT_FIELDS]
+        query = db.session.query(*columns).order_by(Task.id)
+        if user_id is not None:
+            query = query.filter(Task.user_id == user_id)
+        total = 0
+        last_id = 0
+        while True:
+            rows = [row._asdict() for row in query.filter(Task.id > last_id).limit(batch_size)]
+            if not rows:
+                break
+            self._store(rows)
+            db.session.commit()
+            total += len(rows)
+            last_id = rows[-1]["id"]
+        self.clear()
+        return total
+
+
+semantic_index = SemanticIndex()
+
+
+def _embed_changed_tasks(session, flush_context, instances):
+    """Calcula, em um único lote, os vetores das tarefas novas ou com texto alterado."""
+    pending = []
+    users = session.info.setdefault("semantic_users", set())
+    for obj in session.new:
+        if isinstance(obj, Task):
+            pending.append(obj)
+    for obj in session.dirty:
+        if isinstance(obj, Task) and session.is_modified(obj):
+            state = inspect(obj)
+            if any(state.attrs[field].history.has_changes() for field in TEXT_FIELDS):
+                pending.append(obj)
+    for obj in session.deleted:
+        if isinstance(obj, Task):
+            users.add(obj.user_id)
+    if not pending:
+        return
+    users.update(task.user_id for task in pending)
+    try:
+        vectors = semantic_index.embed(task_text(task) for task in pending)
+    except Exception as e:
+        # Um embedder externo fora do ar não impede salvar a tarefa: o vetor é
+        # calculado em memória quando o índice do usuário for carregado
+        current_app.logger.warning(f"Erro ao calcular embeddings: {e}")
+        for task in pending:
+            task.embedding = None
+        return
+    for task, vector in zip(pending, vectors):
+        task.embedding = encode_vector(vector)
+
+
+def _invalidate_committed(session):
+    for user_id in session.info.pop("semantic_users", ()):
+        semantic_index.invalidate(user_id)
+
+
+def _discard_pending(session):
+    session.info.pop("semantic_users", None)
+
+
+@click.group("semantic", help="Vetores das tarefas para busca por similaridade.")
+def semantic_cli():
+    pass
+
+
+@semantic_cli.command("rebuild")
+@click.option("--user", "username", default=None, help="Só as tarefas deste usuário.")
+@click.option("--batch-size", type=int, default=500)
+@with_appcontext
+def rebuild_command(username, batch_size):
+    """Recalcula os vetores das tarefas (necessário após trocar EMBEDDING_BACKEND ou EMBEDDING_DIM)."""
+    from models import User
+
+    user_id = None
+    if username:
+        user = User.query.filter_by(username=username).first()
+        if user is None:
+            raise click.ClickException(f"Usuário não encontrado: {username}")
+        user_id = user.id
+    total = semantic_index.rebuild(user_id, batch_size)
+    click.echo(f"Vetores recalculados para {total} tarefas.")
@@ -0,0 +1,19 @@
+# streaming.py
+
+import json
+
+
+def sse_event(data, event=None):
+    """Formata um evento Server-Sent Events com o payload em JSON."""
+    payload = ""
+    if event:
+        payload += f"event: {event}\n"
+    payload += f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+    return payload
+
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    # Impede que proxies (nginx) acumulem a resposta antes de enviá-la
+    "X-Accel-Buffering": "no",
+}
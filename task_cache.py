@@ -0,0 +1,268 @@
+# task_cache.py
+
+import hashlib
+import json
+import threading
+import time
+from collections import namedtuple
+from datetime import date, datetime
+from urllib.parse import urlencode
+from flask import Response, request, session
+from sqlalchemy import event
+from extensions import db
+from models import User, Task
+from llm_cache import LRUCache
+from pagination import LIST_COLUMNS, TaskPage, parse_task_filters, task_page_from_request
+import metrics
+
+# Linha da listagem guardada no cache: só as colunas de LIST_COLUMNS, sem objeto do ORM
+TaskRow = namedtuple("TaskRow", [column.key for column in LIST_COLUMNS])
+# Colunas de data, gravadas como texto ISO no backend compartilhado
+DATE_PARSERS = {"due_date": date.fromisoformat, "creation_date": datetime.fromisoformat}
+# Muda quando TaskRow muda: páginas gravadas no formato anterior deixam de ser lidas
+ROW_FORMAT = 2
+# Parâmetros da query string que mudam a página
+PAGE_PARAMS = ("status", "priority", "category", "due_from", "due_to", "after", "before", "per_page")
+
+
+class LocalBackend:
+    """Substituto local de um cache compartilhado (Redis): mesmo contrato, em memória do processo.
+
+    Guarda bytes com validade, como o backend real, para exercitar a serialização
+    em testes e em instalações de um processo só.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisBackend:
+    """Cache compartilhado entre processos e instâncias. O cliente redis só é importado aqui."""
+
+    def __init__(self, url):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def set(self, key, value, ttl):
+        self.client.set(key, value, ex=ttl)
+
+    def clear(self):
+        for key in self.client.scan_iter("tasks:*"):
+            self.client.delete(key)
+
+
+BACKENDS = {"local": LocalBackend, "redis": RedisBackend}
+
+
+def encode_page(page):
+    return json.dumps({
+        "items": [
+            [value.isoformat() if name in DATE_PARSERS and value is not None else value
+             for name, value in zip(TaskRow._fields, row)]
+            for row in page.items
+        ],
+        "next_cursor": page.next_cursor,
+        "prev_cursor": page.prev_cursor,
+        "next_id": page.next_id,
+        "per_page": page.per_page,
+    }, separators=(",", ":")).encode("utf-8")
+
+
+def decode_page(data):
+    values = json.loads(data)
+    items = [
+        TaskRow(*(DATE_PARSERS[name](value) if name in DATE_PARSERS and value is not None else value
+                  for name, value in zip(TaskRow._fields, row)))
+        for row in values.pop("items")
+    ]
+    return TaskPage(items, **values)
+
+
+class TaskListCache:
+    """Cache de leitura das páginas da listagem de tarefas e do seletor do relatório.
+
+    Cada página é guardada com a versão da lista do usuário (User.tasks_version) na
+    chave. A versão é aumentada na mesma transação de qualquer alteração em tarefas
+    (eventos da sessão e bump() nas operações em lote), então uma página antiga nunca
+    é servida: ela só deixa de ser usada e sai do LRU.
+
+    Configuração:
+    - TASK_CACHE_ENABLED: liga o cache e as respostas condicionais (ETag/304);
+    - TASK_CACHE_SIZE: páginas guardadas no LRU de cada processo;
+    - TASK_CACHE_BACKEND: None (só o LRU), "local", "redis" (TASK_CACHE_REDIS_URL)
+      ou um objeto com get(key) e set(key, bytes, ttl);
+    - TASK_CACHE_TTL: validade em segundos das páginas no backend compartilhado.
+    """
+
+    def __init__(self, app=None):
+        self.config = {}
+        self.memory = LRUCache()
+        self._backend = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("TASK_CACHE_ENABLED", True)
+        app.config.setdefault("TASK_CACHE_SIZE", 1024)
+        app.config.setdefault("TASK_CACHE_BACKEND", None)
+        app.config.setdefault("TASK_CACHE_TTL", 300)
+        self.config = app.config
+        self.memory = LRUCache(app.config["TASK_CACHE_SIZE"])
+        self._backend = None
+        if not event.contains(db.session, "before_flush", _collect_changed_users):
+            event.listen(db.session, "before_flush", _collect_changed_users)
+            event.listen(db.session, "after_flush", _bump_changed_users)
+        app.extensions["task_cache"] = self
+
+    @property
+    def enabled(self):
+        return self.config.get("TASK_CACHE_ENABLED", True)
+
+    @property
+    def backend(self):
+        if self._backend is None and self.config.get("TASK_CACHE_BACKEND"):
+            with self._lock:
+                if self._backend is None:
+                    backend = self.config["TASK_CACHE_BACKEND"]
+                    if backend == "redis":
+                        backend = RedisBackend(self.config["TASK_CACHE_REDIS_URL"])
+                    elif isinstance(backend, str):
+                        backend = BACKENDS[backend]()
+                    self._backend = backend
+        return self._backend
+
+    @backend.setter
+    def backend(self, value):
+        self._backend = value
+
+    def version(self, user_id):
+        return db.session.query(User.tasks_version).filter(User.id == user_id).scalar() or 0
+
+    def bump(self, user_id):
+        """Invalida as páginas do usuário. Para alterações que não passam pelo ORM (UPDATE/INSERT em massa)."""
+        _bump(db.session.connection(), [user_id])
+
+    def _key(self, user_id, version, args):
+        params = urlencode([(name, args[name]) for name in PAGE_PARAMS if args.get(name)])
+        return f"tasks:{user_id}:{version}:{ROW_FORMAT}:{params}"
+
+    def page_from_request(self, user_id, args, version=None):
+        """Como pagination.task_page_from_request, lendo e gravando no cache. Os itens são TaskRow."""
+        filters = parse_task_filters(args)
+        if not self.enabled:
+            return _as_rows(task_page_from_request(user_id, args)[0]), filters
+        if version is None:
+            version = self.version(user_id)
+        key = self._key(user_id, version, args)
+        page = self.memory.get(key)
+        if page is not None:
+            metrics.TASK_CACHE.inc("memory")
+            return page, filters
+        backend = self.backend
+        data = backend.get(key) if backend is not None else None
+        if data is not None:
+            page = decode_page(data)
+            metrics.TASK_CACHE.inc("shared")
+        else:
+            page = _as_rows(task_page_from_request(user_id, args)[0])
+            if backend is not None:
+                backend.set(key, encode_page(page), self.config.get("TASK_CACHE_TTL", 300))
+            metrics.TASK_CACHE.inc("miss")
+        self.memory.set(key, page)
+        return page, filters
+
+    def etag(self, user_id, version, args, *extra):
+        """ETag da página, ou None se ela não pode ser reaproveitada pelo navegador.
+
+        Páginas com mensagens flash pendentes não recebem ETag: um 304 mostraria de novo
+        a mensagem guardada na cópia do navegador.
+        """
+        if not self.enabled or session.get("_flashes"):
+            return None
+        digest = hashlib.sha1(
+            repr((request.endpoint, self._key(user_id, version, args), date.today().year, extra)).encode("utf-8")
+        ).hexdigest()
+        return digest[:32]
+
+    def not_modified(self, etag):
+        """Resposta 304 se o navegador já tem esta versão da página."""
+        if etag is None or not request.if_none_match.contains(etag):
+            return None
+        metrics.TASK_CACHE.inc("not_modified")
+        response = Response(status=304)
+        return self.conditional(response, etag)
+
+    def conditional(self, response, etag):
+        """Marca a resposta com o ETag; o navegador sempre revalida antes de reaproveitar."""
+        if etag is not None:
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = "private, no-cache"
+        return response
+
+    def clear(self):
+        self.memory.clear()
+        if self.backend is not None:
+            self.backend.clear()
+
+
+def _as_rows(page):
+    page.items = [TaskRow(*(getattr(task, column.key) for column in LIST_COLUMNS)) for task in page.items]
+    return page
+
+
+def _bump(connection, user_ids):
+    table = User.__table__
+    connection.execute(
+        table.update().where(table.c.id.in_(list(user_ids))).values(tasks_version=table.c.tasks_version + 1)
+    )
+
+
+def _collect_changed_users(session, flush_context, instances):
+    users = set()
+    for obj in session.new:
+        if isinstance(obj, Task):
+            users.add(obj.user_id)
+    for obj in session.dirty:
+        if isinstance(obj, Task) and session.is_modified(obj):
+            users.add(obj.user_id)
+    for obj in session.deleted:
+        if isinstance(obj, Task):
+            users.add(obj.user_id)
+    users.discard(None)
+    if users:
+        session.info.setdefault("task_cache_users", set()).update(users)
+
+
+def _bump_changed_users(session, flush_context):
+    # Na mesma transação da alteração: a nova versão só fica visível junto com ela
+    users = session.info.pop("task_cache_users", None)
+    if users:
+        _bump(session.connection(), users)
+
+
+task_cache = TaskListCache()
@@ -0,0 +1,361 @@
+# task_feed.py
+
+import asyncio
+import json
+import queue
+import threading
+import time
+from flask import g, has_request_context
+from sqlalchemy import event
+from extensions import db
+from models import User, Task
+from streaming import sse_event
+import metrics
+
+# Colunas que não aparecem na lista: alterações só nelas não geram evento
+IGNORED_ATTRIBUTES = {"embedding", "user"}
+CHANNEL_PREFIX = "tasks-feed:"
+
+
+class Subscriber:
+    """Fila das mensagens de uma conexão do feed.
+
+    Sem `loop`, é lida por um gerador síncrono (WSGI); com `loop`, por uma corrotina
+    nesse event loop (modo ASGI). Um cliente que não acompanha (fila cheia) recebe
+    "reload" em vez de mensagens acumuladas.
+    """
+
+    def __init__(self, user_id, maxsize, loop=None):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize) if loop is not None else queue.Queue(maxsize)
+        self.overflowed = False
+
+    def put(self, data):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._put, data)
+        else:
+            self._put(data)
+
+    def _put(self, data):
+        try:
+            self.queue.put_nowait(data)
+        except (queue.Full, asyncio.QueueFull):
+            self.overflowed = True
+            metrics.TASK_FEED.inc("dropped")
+
+    def get(self, timeout):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    async def aget(self, timeout):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class LocalBroker:
+    """Pub/sub dentro do processo: as mensagens só chegam às conexões abertas neste processo."""
+
+    def __init__(self):
+        self.deliver = None
+
+    def listen(self, deliver):
+        self.deliver = deliver
+
+    def publish(self, user_id, data):
+        if self.deliver is not None:
+            self.deliver(user_id, data)
+
+
+class RedisBroker:
+    """Pub/sub compartilhado entre processos e instâncias. O cliente redis só é importado aqui.
+
+    Cada processo assina os canais de todos os usuários em uma thread e repassa as
+    mensagens às conexões locais.
+    """
+
+    def __init__(self, url):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self._thread = None
+
+    def listen(self, deliver):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.psubscribe(CHANNEL_PREFIX + "*")
+
+        def run():
+            for message in pubsub.listen():
+                user_id = int(message["channel"].decode().rsplit(":", 1)[1])
+                deliver(user_id, message["data"].decode("utf-8"))
+
+        self._thread = threading.Thread(target=run, name="task-feed", daemon=True)
+        self._thread.start()
+
+    def publish(self, user_id, data):
+        self.client.publish(f"{CHANNEL_PREFIX}{user_id}", data)
+
+
+BACKENDS = {"local": LocalBroker, "redis": RedisBroker}
+
+
+def merge_events(events, limit):
+    """Um evento por tarefa (o último vale; "upsert" absorve "move"); acima de `limit`, só "reload"."""
+    merged = {}
+    for item in events:
+        if item["op"] == "reload":
+            return [{"op": "reload"}]
+        previous = merged.pop(item["id"], None)
+        if previous is not None and previous["op"] == "upsert" and item["op"] == "move":
+            item = previous
+        merged[item["id"]] = item
+    if len(merged) > limit:
+        return [{"op": "reload"}]
+    return list(merged.values())
+
+
+def message(version, events):
+    """Mensagem SSE de um commit; o id (versão da lista) volta no Last-Event-ID ao reconectar."""
+    data = json.dumps({"v": version, "events": events}, separators=(",", ":"))
+    return f"id: {version}\ndata: {data}\n\n"
+
+
+class TaskFeed:
+    """Feed de alterações da lista de tarefas de cada usuário, enviado às páginas abertas via SSE.
+
+    Cada commit que altera tarefas gera uma mensagem com a nova versão da lista
+    (User.tasks_version, a mesma do cache) e eventos compactos por tarefa:
+    {"op": "upsert" | "move" | "delete", "id", ["order"]} ou {"op": "reload"}.
+    As alterações pelo ORM são coletadas pelos eventos da sessão; as feitas com
+    UPDATE/DELETE em massa chamam record().
+
+    Configuração:
+    - TASK_FEED_ENABLED: liga o endpoint SSE (/feed) na lista de tarefas;
+    - TASK_FEED_WSGI: transmite também no modo WSGI, em que cada conexão aberta ocupa
+      um worker (só com workers em threads ou gevent); no modo ASGI não é preciso;
+    - TASK_FEED_BACKEND: "local" (só este processo), "redis" (TASK_FEED_REDIS_URL)
+      ou um objeto com listen(deliver) e publish(user_id, data);
+    - TASK_FEED_KEEPALIVE: segundos entre comentários que mantêm a conexão aberta;
+    - TASK_FEED_MAX_SECONDS: duração de cada conexão; o navegador reconecta sozinho;
+    - TASK_FEED_QUEUE_SIZE: mensagens pendentes por conexão antes de pedir "reload";
+    - TASK_FEED_MAX_EVENTS: eventos por mensagem; acima disso, "reload".
+    """
+
+    def __init__(self, app=None):
+        self.config = {}
+        self._broker = None
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("TASK_FEED_ENABLED", True)
+        app.config.setdefault("TASK_FEED_WSGI", False)
+        app.config.setdefault("TASK_FEED_BACKEND", "local")
+        app.config.setdefault("TASK_FEED_KEEPALIVE", 15)
+        app.config.setdefault("TASK_FEED_MAX_SECONDS", 300)
+        app.config.setdefault("TASK_FEED_QUEUE_SIZE", 100)
+        app.config.setdefault("TASK_FEED_MAX_EVENTS", 100)
+        self.config = app.config
+        self._broker = None
+        # Depois do task_cache: a versão lida em _record_flush já inclui o aumento deste flush
+        if not event.contains(db.session, "before_flush", _collect_changes):
+            event.listen(db.session, "before_flush", _collect_changes)
+            event.listen(db.session, "after_flush", _record_flush)
+            event.listen(db.session, "after_commit", _publish_pending)
+            event.listen(db.session, "after_rollback", _discard_pending)
+        app.extensions["task_feed"] = self
+
+    @property
+    def enabled(self):
+        return self.config.get("TASK_FEED_ENABLED", True)
+
+    def streams(self, environ):
+        """Se o /feed transmite na requisição: no modo ASGI (asgi.py), sempre; no WSGI, com TASK_FEED_WSGI."""
+        return self.enabled and ("asgi.scope" in environ or self.config.get("TASK_FEED_WSGI", False))
+
+    @property
+    def broker(self):
+        if self._broker is None:
+            with self._lock:
+                if self._broker is None:
+                    broker = self.config.get("TASK_FEED_BACKEND") or "local"
+                    if broker == "redis":
+                        broker = RedisBroker(self.config["TASK_FEED_REDIS_URL"])
+                    elif isinstance(broker, str):
+                        broker = BACKENDS[broker]()
+                    broker.listen(self._deliver)
+                    self._broker = broker
+        return self._broker
+
+    @broker.setter
+    def broker(self, value):
+        self._broker = value
+        if value is not None:
+            value.listen(self._deliver)
+
+    def subscribe(self, user_id, loop=None):
+        subscriber = Subscriber(user_id, self.config.get("TASK_FEED_QUEUE_SIZE", 100), loop)
+        # Cria o backend (e a escuta do Redis) antes da primeira mensagem
+        self.broker
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(subscriber.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[subscriber.user_id]
+
+    def _deliver(self, user_id, data):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscriber in subscribers:
+            subscriber.put(data)
+
+    def record(self, user_id, events):
+        """Eventos de alterações que não passam pelo ORM, publicados no commit da sessão.
+
+        Chamar depois de task_cache.bump(user_id), na mesma transação.
+        """
+        version = db.session.query(User.tasks_version).filter(User.id == user_id).scalar()
+        _add_pending(db.session, user_id, version, events)
+
+    def publish(self, user_id, version, events):
+        events = merge_events(events, self.config.get("TASK_FEED_MAX_EVENTS", 100))
+        if has_request_context():
+            g.setdefault("task_feed", []).append((user_id, version, events))
+        if self.enabled:
+            self.broker.publish(user_id, message(version, events))
+            metrics.TASK_FEED.inc("published")
+
+    def request_changes(self, user_id):
+        """Versão e eventos publicados nesta requisição, para a resposta JSON de quem fez a alteração."""
+        version = None
+        events = []
+        for owner, published_version, published_events in g.get("task_feed", ()):
+            if owner == user_id:
+                version = published_version
+                events.extend(published_events)
+        return {"v": version, "events": merge_events(events, self.config.get("TASK_FEED_MAX_EVENTS", 100))}
+
+    def _opening(self, since, current):
+        # Alterações entre a renderização da página (ou a última mensagem recebida) e a conexão
+        parts = ["retry: 3000\n\n"]
+        if since is not None and current > since:
+            parts.append(sse_event({"v": current}, event="reload"))
+        return "".join(parts)
+
+    def stream(self, subscriber, since, current):
+        """Gerador do corpo SSE para uma conexão (WSGI). Termina após TASK_FEED_MAX_SECONDS."""
+        keepalive = self.config.get("TASK_FEED_KEEPALIVE", 15)
+        deadline = time.monotonic() + self.config.get("TASK_FEED_MAX_SECONDS", 300)
+        try:
+            yield self._opening(since, current)
+            while (remaining := deadline - time.monotonic()) > 0:
+                data = subscriber.get(min(keepalive, remaining))
+                if subscriber.overflowed:
+                    yield sse_event({}, event="reload")
+                    return
+                yield data if data is not None else ": keep-alive\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+    async def astream(self, subscriber, since, current):
+        """Como stream(), para o modo ASGI: esperar mensagens não ocupa thread."""
+        keepalive = self.config.get("TASK_FEED_KEEPALIVE", 15)
+        deadline = time.monotonic() + self.config.get("TASK_FEED_MAX_SECONDS", 300)
+        try:
+            yield self._opening(since, current)
+            while (remaining := deadline - time.monotonic()) > 0:
+                data = await subscriber.aget(min(keepalive, remaining))
+                if subscriber.overflowed:
+                    yield sse_event({}, event="reload")
+                    return
+                yield data if data is not None else ": keep-alive\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+
+def feed_since(request):
+    """Última versão que a página já mostra: Last-Event-ID ao reconectar, senão ?since= da página."""
+    value = request.headers.get("Last-Event-ID") or request.args.get("since")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _add_pending(session, user_id, version, events):
+    pending = session.info.setdefault("task_feed_pending", {})
+    entry = pending.setdefault(user_id, {"version": version, "events": []})
+    entry["version"] = version
+    entry["events"].extend(events)
+
+
+def _changed_attributes(obj):
+    state = db.inspect(obj)
+    return {attr.key for attr in state.attrs if attr.history.has_changes()} - IGNORED_ATTRIBUTES
+
+
+def _collect_changes(session, flush_context, instances):
+    changes = []
+    for obj in session.new:
+        if isinstance(obj, Task):
+            changes.append(("upsert", obj))
+    for obj in session.dirty:
+        if isinstance(obj, Task):
+            changed = _changed_attributes(obj)
+            if changed == {"display_order"}:
+                changes.append(("move", obj))
+            elif changed:
+                changes.append(("upsert", obj))
+    for obj in session.deleted:
+        if isinstance(obj, Task):
+            changes.append(("delete", obj))
+    if changes:
+        session.info.setdefault("task_feed_flush", []).extend(changes)
+
+
+def _record_flush(session, flush_context):
+    # Depois do flush os ids das tarefas novas já existem; depois do commit os objetos expiram
+    changes = session.info.pop("task_feed_flush", None)
+    if not changes:
+        return
+    by_user = {}
+    for op, obj in changes:
+        item = {"op": op, "id": obj.id}
+        if op == "move":
+            item["order"] = obj.display_order
+        by_user.setdefault(obj.user_id, []).append(item)
+    by_user.pop(None, None)
+    if not by_user:
+        return
+    table = User.__table__
+    versions = dict(session.connection().execute(
+        db.select(table.c.id, table.c.tasks_version).where(table.c.id.in_(list(by_user)))
+    ).all())
+    for user_id, events in by_user.items():
+        _add_pending(session, user_id, versions.get(user_id, 0), events)
+
+
+def _publish_pending(session):
+    pending = session.info.pop("task_feed_pending", None)
+    for user_id, entry in (pending or {}).items():
+        task_feed.publish(user_id, entry["version"], entry["events"])
+
+
+def _discard_pending(session):
+    session.info.pop("task_feed_pending", None)
+    session.info.pop("task_feed_flush", None)
+
+
+task_feed = TaskFeed()
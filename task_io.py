@@ -0,0 +1,339 @@
+# task_io.py
+
+import codecs
+import csv
+import io
+import json
+import re
+from datetime import datetime
+import click
+from flask.cli import with_appcontext
+from extensions import db
+from forms import STATUS_CHOICES, PRIORITY_CHOICES
+from models import User, Task
+from pagination import filtered_tasks
+import ordering
+import analytics
+from semantic import semantic_index
+from task_cache import task_cache
+from task_feed import task_feed
+
+# Colunas importadas/exportadas, na ordem do arquivo
+FIELDS = (
+    "task_name",
+    "cost",
+    "due_date",
+    "description",
+    "status",
+    "priority",
+    "assigned_to",
+    "created_by",
+    "completion_date",
+    "notes",
+    "category",
+)
+DATE_FIELDS = ("due_date", "completion_date")
+DATE_FORMAT = "%d/%m/%Y"
+FORMATS = ("csv", "json")
+
+STATUS_VALUES = {value for value, _ in STATUS_CHOICES}
+PRIORITY_VALUES = {value for value, _ in PRIORITY_CHOICES}
+# Erros guardados no resultado; os demais só entram na contagem
+MAX_REPORTED_ERRORS = 100
+READ_CHUNK = 64 * 1024
+# Tamanho máximo (caracteres) de um registro JSON; um objeto que não fecha antes disso
+# interrompe a importação em vez de acumular o arquivo inteiro em memória
+MAX_RECORD_SIZE = 1024 * 1024
+# Espaços e vírgulas entre os objetos de um array JSON
+SEPARATORS = re.compile(r"[\s,]*")
+
+
+class ImportResult:
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.skipped = 0
+        self.errors = []
+
+    def add_error(self, line, message):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"Linha {line}: {message}")
+
+    def as_dict(self):
+        return {"rows": self.rows, "created": self.created, "skipped": self.skipped, "errors": self.errors}
+
+
+def detect_format(filename=None, mimetype=None):
+    """Formato pelo nome do arquivo ou pelo content type; CSV por padrão."""
+    name = (filename or "").lower()
+    if name.endswith((".json", ".jsonl", ".ndjson")) or "json" in (mimetype or ""):
+        return "json"
+    return "csv"
+
+
+def _text(stream):
+    """Leitor de texto UTF-8 (com ou sem BOM) sobre um stream binário, sem ler tudo de uma vez."""
+    if isinstance(stream, io.TextIOBase):
+        return stream
+    return codecs.getreader("utf-8-sig")(stream)
+
+
+def iter_csv_rows(stream):
+    """Gera (linha, dicionário) para cada registro do CSV; a primeira linha é o cabeçalho."""
+    reader = csv.DictReader(_text(stream))
+    for row in reader:
+        yield reader.line_num, row
+
+
+def iter_json_rows(stream, max_record_size=None):
+    """Gera (posição, dicionário) de um array JSON ou de objetos JSON por linha (JSON Lines).
+
+    O texto é lido em blocos e cada objeto é decodificado assim que fica completo,
+    então o arquivo inteiro nunca fica em memória. Um registro maior que
+    max_record_size (padrão MAX_RECORD_SIZE) gera ValueError.
+    """
+    max_record_size = max_record_size or MAX_RECORD_SIZE
+    reader = _text(stream)
+    decoder = json.JSONDecoder()
+    buffer = ""
+    index = 0
+    position = 0
+    eof = False
+    started = False
+    while True:
+        index = SEPARATORS.match(buffer, index).end()
+        if index == len(buffer):
+            if eof:
+                return
+            buffer = reader.read(READ_CHUNK)
+            index = 0
+            eof = not buffer
+            continue
+        if buffer[index] == "[" and not started:
+            started = True
+            index += 1
+            continue
+        if buffer[index] == "]":
+            return
+        try:
+            value, end = decoder.raw_decode(buffer, index)
+        except json.JSONDecodeError:
+            if eof:
+                raise ValueError(f"JSON inválido próximo ao registro {position + 1}.")
+            if len(buffer) - index > max_record_size:
+                raise ValueError(f"registro {position + 1} passa de {max_record_size} caracteres.")
+            # Objeto incompleto: junta o restante do bloco com o próximo
+            chunk = reader.read(READ_CHUNK)
+            eof = not chunk
+            buffer = buffer[index:] + chunk
+            index = 0
+            continue
+        started = True
+        position += 1
+        index = end
+        yield position, value
+
+
+def iter_rows(stream, file_format):
+    if file_format == "json":
+        return iter_json_rows(stream)
+    return iter_csv_rows(stream)
+
+
+def _clean(value):
+    if value is None:
+        return ""
+    return str(value).strip()
+
+
+def validate_row(row):
+    """Valida um registro com as mesmas regras do TaskForm.
+
+    Retorna (valores, None) com os valores prontos para o banco ou (None, mensagem).
+    """
+    if not isinstance(row, dict):
+        return None, "registro não é um objeto."
+    values = {field: _clean(row.get(field)) for field in FIELDS}
+
+    if not values["task_name"]:
+        return None, "nome da tarefa é obrigatório."
+    if not values["cost"]:
+        return None, "custo é obrigatório."
+    try:
+        values["cost"] = float(values["cost"])
+    except ValueError:
+        return None, "custo inválido."
+    # O DataRequired do formulário também recusa o custo 0
+    if not values["cost"]:
+        return None, "custo é obrigatório."
+    if not values["due_date"]:
+        return None, "data limite é obrigatória."
+    for field in DATE_FIELDS:
+        if values[field]:
+            try:
+                values[field] = datetime.strptime(values[field], DATE_FORMAT).date()
+            except ValueError:
+                return None, "formato de data inválido. Use dd/mm/yyyy."
+        else:
+            values[field] = None
+    if values["status"] and values["status"] not in STATUS_VALUES:
+        return None, f"status inválido: {values['status']}."
+    if values["priority"] and values["priority"] not in PRIORITY_VALUES:
+        return None, f"prioridade inválida: {values['priority']}."
+    for field in FIELDS:
+        length = getattr(Task.__table__.c[field].type, "length", None)
+        if length and isinstance(values[field], str) and len(values[field]) > length:
+            return None, f"{field} passa de {length} caracteres."
+    for field in ("status", "priority"):
+        values[field] = values[field] or None
+    return values, None
+
+
+def import_tasks(user_id, rows, batch_size=500):
+    """Importa tarefas de um iterável de (linha, registro) para o usuário.
+
+    Os nomes já usados são carregados uma única vez; duplicados (no banco ou no
+    próprio arquivo) são ignorados e informados. As posições são atribuídas no
+    final da lista, em sequência, e as inserções são feitas em lotes.
+    """
+    result = ImportResult()
+    names = {name for (name,) in db.session.query(Task.task_name).filter(Task.user_id == user_id)}
+    display_order = ordering.next_display_order(user_id)
+    now = datetime.utcnow()
+    batch = []
+
+    def flush():
+        # Os vetores do índice semântico são calculados por lote, já que o INSERT não passa pelo ORM
+        db.session.execute(db.insert(Task), semantic_index.embed_rows(batch))
+        task_cache.bump(user_id)
+        task_feed.record(user_id, [{"op": "reload"}])
+        db.session.commit()
+        result.created += len(batch)
+        batch.clear()
+
+    try:
+        for line, row in rows:
+            result.rows += 1
+            values, error = validate_row(row)
+            if error:
+                result.add_error(line, error)
+                continue
+            if values["task_name"] in names:
+                result.add_error(line, f"nome da tarefa já existe: {values['task_name']}.")
+                continue
+            names.add(values["task_name"])
+            values.update(user_id=user_id, display_order=display_order, creation_date=now)
+            display_order += ordering.GAP
+            batch.append(values)
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+    finally:
+        # Inserções em lote não passam pelos eventos do ORM: recalcula o resumo do usuário,
+        # inclusive quando o arquivo falha no meio e só parte dos lotes foi gravada
+        if result.created:
+            db.session.rollback()
+            analytics.rebuild_user_stats(user_id)
+            db.session.commit()
+    return result
+
+
+def _export_values(task):
+    values = []
+    for field in FIELDS:
+        value = getattr(task, field)
+        if field in DATE_FIELDS:
+            value = value.strftime(DATE_FORMAT) if value else ""
+        values.append("" if value is None else value)
+    return values
+
+
+def task_record(task):
+    """A tarefa como dicionário, no formato do JSON exportado (e aceito na importação e na API)."""
+    return dict(zip(FIELDS, _export_values(task)))
+
+
+def export_query(user_id, filters=None, batch_size=500):
+    """Tarefas do usuário na ordem da lista, carregadas do banco em lotes."""
+    query = filtered_tasks(user_id, filters or {}, columns=[getattr(Task, field) for field in FIELDS])
+    return query.order_by(Task.display_order, Task.id).yield_per(batch_size)
+
+
+def iter_export_csv(user_id, filters=None):
+    """Gera o CSV linha a linha."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        data = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    writer.writerow(FIELDS)
+    yield flush()
+    for task in export_query(user_id, filters):
+        writer.writerow(_export_values(task))
+        yield flush()
+
+
+def iter_export_json(user_id, filters=None):
+    """Gera um array JSON, um objeto por tarefa."""
+    yield "["
+    separator = "\n"
+    for task in export_query(user_id, filters):
+        yield separator + json.dumps(task_record(task), ensure_ascii=False)
+        separator = ",\n"
+    yield "\n]\n"
+
+
+def iter_export(user_id, file_format, filters=None):
+    if file_format == "json":
+        return iter_export_json(user_id, filters)
+    return iter_export_csv(user_id, filters)
+
+
+def init_app(app):
+    app.config.setdefault("TASK_IMPORT_BATCH_SIZE", 500)
+    app.cli.add_command(tasks_cli)
+
+
+@click.group("tasks", help="Importação e exportação de tarefas.")
+def tasks_cli():
+    pass
+
+
+def _user_id(username):
+    user = User.query.filter_by(username=username).first()
+    if user is None:
+        raise click.ClickException(f"Usuário não encontrado: {username}")
+    return user.id
+
+
+@tasks_cli.command("import")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--user", "username", required=True, help="Usuário dono das tarefas.")
+@click.option("--format", "file_format", type=click.Choice(FORMATS), help="Padrão: pela extensão do arquivo.")
+@click.option("--batch-size", type=int, default=500)
+@with_appcontext
+def import_command(path, username, file_format, batch_size):
+    """Importa tarefas de um arquivo CSV ou JSON."""
+    user_id = _user_id(username)
+    with open(path, "rb") as f:
+        result = import_tasks(user_id, iter_rows(f, file_format or detect_format(path)), batch_size)
+    for error in result.errors:
+        click.echo(error, err=True)
+    click.echo(f"{result.created} tarefas importadas, {result.skipped} ignoradas de {result.rows} registros.")
+
+
+@tasks_cli.command("export")
+@click.option("--user", "username", required=True, help="Usuário dono das tarefas.")
+@click.option("--format", "file_format", type=click.Choice(FORMATS), default="csv")
+@click.option("--output", "-o", type=click.File("w", encoding="utf-8"), default="-")
+@with_appcontext
+def export_command(username, file_format, output):
+    """Exporta as tarefas do usuário em CSV ou JSON."""
+    for chunk in iter_export(_user_id(username), file_format):
+        output.write(chunk)
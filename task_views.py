@@ -0,0 +1,349 @@
+# task_views.py
+
+import csv
+from datetime import datetime
+from flask import Blueprint, render_template, redirect, url_for, flash, request, session, jsonify, Response, stream_with_context, current_app, make_response
+from extensions import db
+from forms import TaskForm, ImportForm, STATUS_CHOICES, PRIORITY_CHOICES
+from models import Task
+from auth_views import login_required
+from pagination import parse_task_filters, filtered_tasks
+import ordering
+import analytics
+import task_io
+import bulk_ops
+from semantic import semantic_index
+from task_cache import task_cache
+from task_feed import task_feed, feed_since
+from streaming import SSE_HEADERS
+from fragment_cache import fragment_cache
+
+bp = Blueprint("tasks", __name__)
+
+# Rotas Principais
+@bp.route("/")
+@login_required
+def index():
+    # Página inalterada desde a última visita: 304 sem consultar as tarefas nem renderizar
+    version = task_cache.version(session["user_id"])
+    etag = task_cache.etag(session["user_id"], version, request.args)
+    not_modified = task_cache.not_modified(etag)
+    if not_modified is not None:
+        return not_modified
+    page, filters = task_cache.page_from_request(session["user_id"], request.args, version)
+    response = make_response(render_template(
+        "tasks.html",
+        tasks=page.items,
+        page=page,
+        filters=filters,
+        status_choices=STATUS_CHOICES,
+        priority_choices=PRIORITY_CHOICES,
+        version=version,
+        feed_url=url_for("tasks.feed", since=version) if task_feed.streams(request.environ) else None,
+    ))
+    return task_cache.conditional(response, etag)
+
+@bp.route("/feed")
+@login_required
+def feed():
+    """Alterações da lista de tarefas do usuário em Server-Sent Events, para as páginas abertas.
+
+    No modo ASGI o /feed é atendido por async_views.task_feed_stream; aqui, só com TASK_FEED_WSGI.
+    """
+    if not task_feed.streams(request.environ):
+        return "", 204
+    user_id = session["user_id"]
+    # Assina antes de ler a versão: nenhum commit fica entre as duas coisas sem ser visto
+    subscriber = task_feed.subscribe(user_id)
+    current = task_cache.version(user_id)
+    # A conexão do banco volta ao pool; o streaming só espera mensagens
+    db.session.close()
+    return Response(
+        task_feed.stream(subscriber, feed_since(request), current),
+        mimetype="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+@bp.route("/rows")
+@login_required
+def task_rows():
+    """HTML das linhas da lista (ids=1,2,...) com os filtros da página; as ausentes saíram da lista."""
+    limit = current_app.config["TASK_FEED_MAX_EVENTS"]
+    ids = [int(value) for value in request.args.get("ids", "").split(",")[:limit] if value.strip().isdigit()]
+    tasks = filtered_tasks(session["user_id"], parse_task_filters(request.args)).filter(Task.id.in_(ids)).all() if ids else []
+    return jsonify(rows={task.id: fragment_cache.render("task_row.html", task) for task in tasks})
+
+@bp.route("/dashboard")
+@login_required
+def dashboard():
+    aggregates = analytics.user_aggregates(session["user_id"])
+    return render_template("dashboard.html", stats=aggregates)
+
+# Tipos aceitos no corpo da requisição para importação sem formulário
+IMPORT_MIMETYPES = {"text/csv": "csv", "application/json": "json", "application/x-ndjson": "json"}
+
+@bp.route("/import", methods=["GET", "POST"])
+@login_required
+def import_tasks():
+    """Importa tarefas de um arquivo enviado pelo formulário ou do corpo da requisição (CSV ou JSON)."""
+    batch_size = current_app.config["TASK_IMPORT_BATCH_SIZE"]
+    if request.method == "POST" and request.mimetype in IMPORT_MIMETYPES:
+        # Corpo lido direto do socket, sem passar pelo parser de formulários
+        try:
+            result = task_io.import_tasks(
+                session["user_id"], task_io.iter_rows(request.stream, IMPORT_MIMETYPES[request.mimetype]), batch_size
+            )
+        except (ValueError, csv.Error) as e:
+            return jsonify(error=f"Arquivo inválido: {e}"), 400
+        return jsonify(result.as_dict())
+
+    form = ImportForm()
+    result = None
+    if form.validate_on_submit():
+        upload = form.file.data
+        try:
+            result = task_io.import_tasks(
+                session["user_id"],
+                task_io.iter_rows(upload.stream, task_io.detect_format(upload.filename, upload.mimetype)),
+                batch_size,
+            )
+        except (ValueError, csv.Error) as e:
+            flash(f"Arquivo inválido: {e}", "danger")
+        else:
+            category = "success" if result.created else "warning"
+            flash(f"{result.created} tarefas importadas, {result.skipped} ignoradas.", category)
+    return render_template("import_tasks.html", form=form, result=result, fields=task_io.FIELDS)
+
+@bp.route("/export")
+@login_required
+def export_tasks():
+    """Exporta as tarefas (com os filtros da listagem) em CSV ou JSON, gerando o arquivo aos poucos."""
+    file_format = request.args.get("format") if request.args.get("format") in task_io.FORMATS else "csv"
+    filters = parse_task_filters(request.args)
+    mimetype = "application/json" if file_format == "json" else "text/csv"
+    return Response(
+        stream_with_context(task_io.iter_export(session["user_id"], file_format, filters)),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename=tarefas.{file_format}"},
+    )
+
+@bp.route("/add", methods=["GET", "POST"])
+@login_required
+def add_task():
+    form = TaskForm()
+    if form.validate_on_submit():
+        # Verificar se o nome da tarefa já existe para este usuário
+        existing_task = Task.query.filter_by(task_name=form.task_name.data, user_id=session["user_id"]).first()
+        if existing_task:
+            form.task_name.errors.append("Nome da tarefa já existe.")
+            return render_template("add_task.html", form=form)
+
+        # Determinar o display_order
+        display_order = ordering.next_display_order(session["user_id"])
+
+        # Converter strings de data para objetos date
+        try:
+            due_date = datetime.strptime(form.due_date.data, "%d/%m/%Y").date()
+        except ValueError:
+            form.due_date.errors.append("Formato de data inválido. Use dd/mm/yyyy.")
+            return render_template("add_task.html", form=form)
+
+        if form.completion_date.data:
+            try:
+                completion_date = datetime.strptime(form.completion_date.data, "%d/%m/%Y").date()
+            except ValueError:
+                form.completion_date.errors.append("Formato de data inválido. Use dd/mm/yyyy.")
+                return render_template("add_task.html", form=form)
+        else:
+            completion_date = None
+
+        new_task = Task(
+            task_name=form.task_name.data,
+            cost=form.cost.data,
+            due_date=due_date,
+            description=form.description.data,
+            status=form.status.data if form.status.data else None,
+            priority=form.priority.data if form.priority.data else None,
+            assigned_to=form.assigned_to.data,
+            created_by=form.created_by.data,
+            creation_date=datetime.utcnow(),
+            completion_date=completion_date,
+            notes=form.notes.data,
+            category=form.category.data,
+            display_order=display_order,
+            user_id=session["user_id"],
+        )
+        db.session.add(new_task)
+        db.session.commit()
+        flash("Tarefa adicionada com sucesso!", "success")
+        return redirect(url_for("tasks.index"))
+    return render_template("add_task.html", form=form)
+
+@bp.route("/edit/<int:task_id>", methods=["GET", "POST"])
+@login_required
+def edit_task(task_id):
+    task = Task.query.filter_by(id=task_id, user_id=session["user_id"]).first_or_404()
+    form = TaskForm(obj=task)
+    form.original_task_name = task.task_name
+    if request.method == "GET":
+        # Pre-popular os campos de data no formato correto
+        form.due_date.data = task.due_date.strftime("%d/%m/%Y")
+        if task.completion_date:
+            form.completion_date.data = task.completion_date.strftime("%d/%m/%Y")
+    if form.validate_on_submit():
+        if form.task_name.data != task.task_name:
+            # Verificar se o novo nome já existe
+            existing_task = Task.query.filter_by(task_name=form.task_name.data, user_id=session["user_id"]).first()
+            if existing_task:
+                form.task_name.errors.append("Nome da tarefa já existe.")
+                return render_template("edit_task.html", form=form, task=task)
+        task.task_name = form.task_name.data
+        task.cost = form.cost.data
+        # Converter strings de data para objetos date
+        try:
+            task.due_date = datetime.strptime(form.due_date.data, "%d/%m/%Y").date()
+        except ValueError:
+            form.due_date.errors.append("Formato de data inválido. Use dd/mm/yyyy.")
+            return render_template("edit_task.html", form=form, task=task)
+
+        if form.completion_date.data:
+            try:
+                task.completion_date = datetime.strptime(form.completion_date.data, "%d/%m/%Y").date()
+            except ValueError:
+                form.completion_date.errors.append("Formato de data inválido. Use dd/mm/yyyy.")
+                return render_template("edit_task.html", form=form, task=task)
+        else:
+            task.completion_date = None
+
+        task.description = form.description.data
+        task.status = form.status.data if form.status.data else None
+        task.priority = form.priority.data if form.priority.data else None
+        task.assigned_to = form.assigned_to.data
+        task.created_by = form.created_by.data
+        task.notes = form.notes.data
+        task.category = form.category.data
+        db.session.commit()
+        flash("Tarefa atualizada com sucesso!", "success")
+        return redirect(url_for("tasks.index"))
+    # As tarefas semelhantes vêm depois, de /similar/<id>, carregadas pela página
+    return render_template("edit_task.html", form=form, task=task)
+
+@bp.route("/similar/<int:task_id>")
+@login_required
+def similar_tasks(task_id):
+    """Tarefas do usuário mais parecidas com a tarefa informada, com a similaridade (0 a 1)."""
+    task = Task.query.filter_by(id=task_id, user_id=session["user_id"]).first_or_404()
+    k = min(request.args.get("k", current_app.config["SIMILAR_TASKS"], type=int), 50)
+    return jsonify(
+        task_id=task.id,
+        similar=[
+            {"id": other.id, "task_name": other.task_name, "status": other.status, "score": round(score, 4)}
+            for other, score in semantic_index.similar_tasks(task, k)
+        ],
+    )
+
+@bp.route("/delete/<int:task_id>", methods=["POST"])
+@login_required
+def delete_task(task_id):
+    task = Task.query.filter_by(id=task_id, user_id=session["user_id"]).first_or_404()
+    # Com display_order esparso não é preciso renumerar as demais tarefas
+    db.session.delete(task)
+    db.session.commit()
+    if request.accept_mimetypes.best == "application/json":
+        return jsonify(task_feed.request_changes(session["user_id"]))
+    flash("Tarefa excluída com sucesso!", "success")
+    return redirect(url_for("tasks.index"))
+
+@bp.route("/move_up/<int:task_id>", methods=["POST"])
+@login_required
+def move_up(task_id):
+    task = Task.query.filter_by(id=task_id, user_id=session["user_id"]).first_or_404()
+    above_task = ordering.task_above(task)
+    if above_task is None:
+        if request.accept_mimetypes.best == "application/json":
+            return jsonify(error="Esta tarefa já está no topo."), 409
+        flash("Esta tarefa já está no topo.", "warning")
+    else:
+        # Trocar os display_order
+        ordering.swap(task, above_task)
+        db.session.commit()
+        if request.accept_mimetypes.best == "application/json":
+            return jsonify(task_feed.request_changes(session["user_id"]))
+        flash("Tarefa movida para cima com sucesso!", "success")
+    return redirect(url_for("tasks.index"))
+
+@bp.route("/move_down/<int:task_id>", methods=["POST"])
+@login_required
+def move_down(task_id):
+    task = Task.query.filter_by(id=task_id, user_id=session["user_id"]).first_or_404()
+    below_task = ordering.task_below(task)
+    if below_task is None:
+        if request.accept_mimetypes.best == "application/json":
+            return jsonify(error="Esta tarefa já está na última posição."), 409
+        flash("Esta tarefa já está na última posição.", "warning")
+    else:
+        # Trocar os display_order
+        ordering.swap(task, below_task)
+        db.session.commit()
+        if request.accept_mimetypes.best == "application/json":
+            return jsonify(task_feed.request_changes(session["user_id"]))
+        flash("Tarefa movida para baixo com sucesso!", "success")
+    return redirect(url_for("tasks.index"))
+
+@bp.route("/move/<int:task_id>", methods=["POST"])
+@login_required
+def move_task(task_id):
+    """Move a tarefa para uma posição (campo position) ou para antes de outra (campo before_id)."""
+    task = Task.query.filter_by(id=task_id, user_id=session["user_id"]).first_or_404()
+    before_id = request.form.get("before_id", type=int)
+    position = request.form.get("position", type=int)
+    if before_id is not None:
+        following = Task.query.filter_by(id=before_id, user_id=session["user_id"]).first_or_404() if before_id else None
+        ordering.move_before(task, following)
+    elif position is not None:
+        ordering.move_to_position(task, position)
+    else:
+        flash("Informe a nova posição da tarefa.", "warning")
+        return redirect(url_for("tasks.index"))
+    db.session.commit()
+    if request.accept_mimetypes.best == "application/json":
+        return jsonify(id=task.id, display_order=task.display_order, **task_feed.request_changes(session["user_id"]))
+    flash("Tarefa movida com sucesso!", "success")
+    return redirect(url_for("tasks.index"))
+
+@bp.route("/bulk", methods=["POST"])
+@login_required
+def bulk_tasks():
+    """Altera status/prioridade/categoria, conclui ou exclui várias tarefas de uma vez."""
+    action = request.form.get("action")
+    try:
+        task_ids = bulk_ops.parse_task_ids(request.form.getlist("task_ids"), current_app.config["BULK_MAX_TASKS"])
+        if action == "update":
+            changes = bulk_ops.parse_changes(
+                request.form.get("status"), request.form.get("priority"), request.form.get("category")
+            )
+            count = bulk_ops.bulk_update(session["user_id"], task_ids, changes)
+            message = f"{count} tarefas atualizadas."
+        elif action == "complete":
+            completion_date = None
+            if request.form.get("completion_date"):
+                try:
+                    completion_date = datetime.strptime(request.form["completion_date"], "%d/%m/%Y").date()
+                except ValueError:
+                    raise bulk_ops.BulkError("Formato de data inválido. Use dd/mm/yyyy.")
+            count = bulk_ops.bulk_complete(session["user_id"], task_ids, completion_date)
+            message = f"{count} tarefas concluídas."
+        elif action == "delete":
+            count = bulk_ops.bulk_delete(session["user_id"], task_ids)
+            message = f"{count} tarefas excluídas."
+        else:
+            raise bulk_ops.BulkError("Ação inválida.")
+    except bulk_ops.BulkError as e:
+        if request.accept_mimetypes.best == "application/json":
+            return jsonify(error=str(e)), 400
+        flash(str(e), "warning")
+        return redirect(url_for("tasks.index"))
+    if request.accept_mimetypes.best == "application/json":
+        return jsonify(action=action, count=count)
+    flash(message, "success")
+    return redirect(url_for("tasks.index"))
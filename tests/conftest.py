@@ -0,0 +1,111 @@
+# tests/conftest.py
+
+import os
+import sys
+from datetime import date, datetime
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app_factory import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from models import User, Task  # noqa: E402
+import ordering  # noqa: E402
+
+# Banco em memória, jobs na própria requisição, IA falsa e hashes baratos; os limites de
+# login só valem nos testes do auth_guard, que os ligam com @pytest.mark.config
+TEST_CONFIG = {
+    "SQLALCHEMY_DATABASE_URI": "sqlite://",
+    "TESTING": True,
+    "WTF_CSRF_ENABLED": False,
+    "MIGRATIONS_ENABLED": False,
+    "JOB_BACKEND": "inline",
+    "LLM_BACKEND": "fake",
+    "AUTH_THROTTLE_ENABLED": False,
+    "AUTH_HASH_METHOD": "pbkdf2:sha256:1000",
+}
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "config(**values): valores de configuração da aplicação do teste")
+    config.addinivalue_line("markers", "file_db: banco em arquivo, para testes que usam o banco em várias threads")
+
+
+@pytest.fixture
+def app(request):
+    """Aplicação com as tabelas criadas; o teste abre o app context quando precisa do banco."""
+    marker = request.node.get_closest_marker("config")
+    config = {**TEST_CONFIG, **(marker.kwargs if marker else {})}
+    if request.node.get_closest_marker("file_db"):
+        # O banco em memória é uma única conexão: threads simultâneas não podem usá-la
+        config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + str(request.getfixturevalue("tmp_path") / "test.db")
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def register(client, username, password="senha"):
+    client.post("/register", data={"username": username, "password": password, "confirm": password})
+    return client.post("/login", data={"username": username, "password": password})
+
+
+@pytest.fixture
+def user_id(app, client):
+    """Registra e autentica "ana" no client; retorna o id."""
+    register(client, "ana")
+    with app.app_context():
+        return User.query.filter_by(username="ana").one().id
+
+
+@pytest.fixture
+def other_client(app):
+    """Outro usuário ("bia") autenticado em um client próprio; retorna (client, id)."""
+    client = app.test_client()
+    register(client, "bia")
+    with app.app_context():
+        return client, User.query.filter_by(username="bia").one().id
+
+
+@pytest.fixture
+def make_tasks(app):
+    """Cria `count` tarefas no final da lista do usuário; retorna os ids na ordem."""
+
+    def make(user_id, count, prefix="Tarefa", **values):
+        values.setdefault("cost", 10.0)
+        values.setdefault("due_date", date(2030, 1, 1))
+        values.setdefault("creation_date", datetime.utcnow())
+        with app.app_context():
+            start = ordering.next_display_order(user_id)
+            tasks = [
+                Task(
+                    task_name=f"{prefix} {index}",
+                    display_order=start + index * ordering.GAP,
+                    user_id=user_id,
+                    **values,
+                )
+                for index in range(count)
+            ]
+            db.session.add_all(tasks)
+            db.session.commit()
+            return [task.id for task in tasks]
+
+    return make
+
+
+def task_names(user_id):
+    """Nomes das tarefas do usuário na ordem da lista (dentro de um app context)."""
+    return [
+        name for (name,) in db.session.query(Task.task_name).filter_by(user_id=user_id)
+        .order_by(Task.display_order, Task.id)
+    ]
@@ -0,0 +1,154 @@
+# tests/test_analytics.py
+
+import json
+from datetime import date, datetime
+import pytest
+from extensions import db
+from llm import llm_gateway, FakeBackend
+from models import Task, TaskStat
+import analytics
+
+
+def summary_rows(user_id):
+    """Linhas da tabela de resumo como {(dimensão, valor): (contagem, custo)}, sem as zeradas."""
+    return {
+        (row.dimension, row.value): (row.task_count, round(row.total_cost, 2))
+        for row in TaskStat.query.filter(TaskStat.user_id == user_id, TaskStat.task_count > 0)
+    }
+
+
+def assert_consistent(app, user_id):
+    """A tabela mantida aos poucos é igual à recalculada do zero a partir das tarefas."""
+    with app.app_context():
+        incremental = summary_rows(user_id)
+        analytics.rebuild_user_stats(user_id)
+        rebuilt = summary_rows(user_id)
+        db.session.rollback()
+    assert incremental == rebuilt
+    return incremental
+
+
+def task_form(name, cost="10", status="Pendente", priority="Alta", category="casa", **values):
+    return {"task_name": name, "cost": cost, "due_date": "01/01/2030", "status": status,
+            "priority": priority, "category": category, **values}
+
+
+def test_summary_follows_add_edit_and_delete(app, client, user_id):
+    client.post("/add", data=task_form("A", cost="10"))
+    client.post("/add", data=task_form("B", cost="5.5", status="Em Andamento", category="trabalho"))
+    rows = assert_consistent(app, user_id)
+    assert rows[("total", "")] == (2, 15.5)
+    assert rows[("category", "trabalho")] == (1, 5.5)
+
+    with app.app_context():
+        task_id = Task.query.filter_by(task_name="A").one().id
+    client.post(f"/edit/{task_id}", data=task_form("A", cost="20", status="Concluída", category=""))
+    rows = assert_consistent(app, user_id)
+    assert rows[("total", "")] == (2, 25.5)
+    assert rows[("status", "Concluída")] == (1, 20.0)
+    assert ("status", "Pendente") not in rows and rows[("category", "")] == (1, 20.0)
+
+    client.post(f"/delete/{task_id}")
+    rows = assert_consistent(app, user_id)
+    assert rows[("total", "")] == (1, 5.5)
+
+
+def test_summary_follows_bulk_operations(app, client, user_id, make_tasks):
+    ids = make_tasks(user_id, 5, status="Pendente", priority="Baixa")
+    client.post("/bulk", data={"action": "update", "task_ids": ids[:3], "priority": "Alta", "category": "lote"})
+    rows = assert_consistent(app, user_id)
+    assert rows[("priority", "Alta")] == (3, 30.0) and rows[("category", "lote")] == (3, 30.0)
+
+    client.post("/bulk", data={"action": "complete", "task_ids": ids[:2]})
+    rows = assert_consistent(app, user_id)
+    assert rows[("status", "Concluída")] == (2, 20.0)
+
+    client.post("/bulk", data={"action": "delete", "task_ids": ids[1:4]})
+    rows = assert_consistent(app, user_id)
+    assert rows[("total", "")] == (2, 20.0)
+
+
+def test_summary_follows_import(app, client, user_id):
+    body = "\n".join(json.dumps(row) for row in [
+        {"task_name": "X", "cost": "3", "due_date": "01/01/2030", "status": "Pendente"},
+        {"task_name": "Y", "cost": "4", "due_date": "01/01/2030", "category": "importada"},
+        {"task_name": "Z", "cost": "inválido", "due_date": "01/01/2030"},
+    ])
+    response = client.post("/import", data=body, content_type="application/x-ndjson")
+    assert response.json["created"] == 2
+    rows = assert_consistent(app, user_id)
+    assert rows[("total", "")] == (2, 7.0) and rows[("category", "importada")] == (1, 4.0)
+
+
+def test_change_to_an_unloaded_attribute_rebuilds_the_user(app, user_id, make_tasks):
+    task_id, = make_tasks(user_id, 1, status="Pendente")
+    with app.app_context():
+        task = db.session.get(Task, task_id)
+        # Sem o valor anterior carregado, o delta não pode ser calculado
+        db.session.expire(task, ["status"])
+        task.status = "Concluída"
+        db.session.commit()
+    rows = assert_consistent(app, user_id)
+    assert rows[("status", "Concluída")] == (1, 10.0) and ("status", "Pendente") not in rows
+
+
+def test_user_aggregates_match_live_aggregates(app, user_id, other_client, make_tasks):
+    _, other_id = other_client
+    make_tasks(user_id, 3, status="Pendente", category="a")
+    make_tasks(user_id, 2, prefix="Outra", status="Concluída", cost=2.5)
+    make_tasks(other_id, 4)
+    with app.app_context():
+        summary = analytics.user_aggregates(user_id)
+        live = analytics.live_aggregates(user_id)
+    assert summary["count"] == live["count"] == 5
+    assert summary["total_cost"] == live["total_cost"] == 35.0
+    for key in ("by_status", "by_priority", "by_category"):
+        assert sorted(summary[key]) == sorted(live[key])
+
+
+def test_time_aggregates_use_the_given_day(app, user_id, make_tasks):
+    make_tasks(user_id, 2, prefix="Atrasada", due_date=date(2020, 1, 1))
+    make_tasks(user_id, 1, prefix="Feita", due_date=date(2020, 1, 1), status="Concluída",
+               creation_date=datetime(2020, 1, 1), completion_date=date(2020, 1, 5))
+    with app.app_context():
+        aggregates = analytics.live_aggregates(user_id, today=date(2024, 1, 1))
+    assert aggregates["overdue_count"] == 2 and aggregates["overdue_cost"] == 20.0
+    assert [task.task_name for task in aggregates["overdue"]] == ["Atrasada 0", "Atrasada 1"]
+    assert aggregates["completed_count"] == 1
+    assert aggregates["lead_time_avg"] == pytest.approx(4.0)
+
+
+def test_format_aggregates():
+    text = analytics.format_aggregates({
+        "count": 2, "total_cost": 12.5, "by_status": [("Pendente", 2, 12.5)], "by_priority": [],
+        "by_category": [("", 2, 12.5)], "overdue_count": 0, "overdue_cost": 0.0, "overdue": [],
+        "completed_count": 0, "lead_time_avg": None, "lead_time_min": None, "lead_time_max": None,
+    })
+    assert "- **Tarefas:** 2\n" in text and "- **Custo total:** R$12.50\n" in text
+    assert "- **Por Status:** Pendente: 2 (R$12.50)\n" in text
+    assert "- **Por Prioridade:** N/A\n" in text and "- **Por Categoria:** N/A: 2 (R$12.50)\n" in text
+    assert "Tempo médio" not in text
+
+
+def test_report_prompt_has_totals_in_the_indicators_and_details_per_task(client, user_id, make_tasks):
+    prompts = []
+    llm_gateway.backend = FakeBackend(respond=lambda prompt: prompts.append(prompt) or "ok")
+    ids = make_tasks(user_id, 2, cost=1234.5, description="detalhes")
+    client.post("/generate_report", data={"task_ids": [str(task_id) for task_id in ids]})
+    prompt, = prompts
+    indicators, tasks = prompt.split("**Tarefa 1:**")
+    assert "- **Custo total:** R$2469.00" in indicators and "1234" not in indicators
+    assert tasks.count("**Custo:** R$1234.50") == 2 and tasks.count("01/01/2030") == 2
+    assert "Custo total" not in tasks
+    assert "- **Descrição:** detalhes" in tasks
+
+
+def test_rebuild_command(app, user_id, make_tasks):
+    make_tasks(user_id, 2)
+    with app.app_context():
+        TaskStat.query.delete()
+        db.session.commit()
+    result = app.test_cli_runner().invoke(args=["analytics", "rebuild"])
+    assert "Resumo recalculado para 1 usuários." in result.output
+    with app.app_context():
+        assert summary_rows(user_id)[("total", "")] == (2, 20.0)
@@ -0,0 +1,217 @@
+# tests/test_api.py
+
+import pytest
+import api_views
+from api_views import create_token
+from extensions import db
+from models import ApiToken, Message, Task
+from conftest import task_names
+
+
+@pytest.fixture
+def token(app, user_id):
+    """Token de acesso de "ana"; as requisições com ele não usam a sessão (nem o flash do login)."""
+    with app.app_context():
+        return create_token(user_id, "testes")[1]
+
+
+@pytest.fixture
+def api(app, token):
+    """Client sem cookies que envia o token em todas as requisições."""
+    client = app.test_client(use_cookies=False)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def call(method, path, **kwargs):
+        return client.open(path, method=method, headers={**headers, **kwargs.pop("headers", {})}, **kwargs)
+
+    return call
+
+
+def new_task(name, **values):
+    return {"task_name": name, "cost": 5, "due_date": "01/02/2030", **values}
+
+
+def test_requests_without_valid_credentials_get_401(app, client, user_id):
+    anonymous = app.test_client()
+    response = anonymous.get("/api/v1/tasks")
+    assert response.status_code == 401
+    assert response.headers["WWW-Authenticate"] == "Bearer"
+    assert response.json == {"error": "Autenticação necessária."}
+    assert anonymous.get("/api/v1/tasks", headers={"Authorization": "Bearer errado"}).status_code == 401
+    # A sessão do navegador também vale
+    assert client.get("/api/v1/tasks").status_code == 200
+
+
+def test_create_get_update_and_delete_a_task(app, api, user_id):
+    response = api("POST", "/api/v1/tasks", json=new_task("Relatório", priority="Alta"))
+    assert response.status_code == 201
+    task_id = response.json["id"]
+    assert response.headers["Location"].endswith(f"/api/v1/tasks/{task_id}")
+    task = api("GET", f"/api/v1/tasks/{task_id}").json
+    assert task["task_name"] == "Relatório" and task["due_date"] == "01/02/2030" and task["priority"] == "Alta"
+
+    response = api("PATCH", f"/api/v1/tasks/{task_id}?fields=cost,status", json={"cost": 7.5, "status": "Concluída"})
+    assert response.json == {"id": task_id, "cost": 7.5, "status": "Concluída"}
+    assert api("DELETE", f"/api/v1/tasks/{task_id}").status_code == 204
+    response = api("GET", f"/api/v1/tasks/{task_id}")
+    assert response.status_code == 404 and "error" in response.json
+
+
+def test_task_validation_errors(api, make_tasks, user_id):
+    make_tasks(user_id, 1)
+    assert api("POST", "/api/v1/tasks", data="x").status_code == 415
+    assert api("POST", "/api/v1/tasks", json=[1]).json == {"error": "Corpo JSON inválido."}
+    response = api("POST", "/api/v1/tasks", json=new_task("A", cost="muito"))
+    assert response.status_code == 400 and response.json["error"] == "Custo inválido."
+    assert "desconhecidos" in api("POST", "/api/v1/tasks", json=new_task("A", color="azul")).json["error"]
+    assert api("POST", "/api/v1/tasks", json=new_task("Tarefa 0")).status_code == 409
+    assert api("GET", "/api/v1/tasks?fields=task_name,senha").status_code == 400
+
+
+def test_list_projects_fields_and_pages_with_a_cursor(api, make_tasks, user_id):
+    ids = make_tasks(user_id, 5)
+    first = api("GET", "/api/v1/tasks?per_page=2&fields=task_name").json
+    assert first["items"] == [{"id": ids[0], "task_name": "Tarefa 0"}, {"id": ids[1], "task_name": "Tarefa 1"}]
+    second = api("GET", f"/api/v1/tasks?per_page=2&fields=task_name&after={first['next']}").json
+    assert [item["id"] for item in second["items"]] == ids[2:4]
+    default = api("GET", "/api/v1/tasks").json["items"][0]
+    assert "description" not in default and "notes" not in default
+
+
+def test_tasks_of_other_users_are_not_visible(api, other_client, make_tasks):
+    other, other_id = other_client
+    other_task = make_tasks(other_id, 1)[0]
+    assert api("GET", "/api/v1/tasks").json["items"] == []
+    assert api("GET", f"/api/v1/tasks/{other_task}").status_code == 404
+    assert api("PATCH", f"/api/v1/tasks/{other_task}", json={"cost": 1}).status_code == 404
+    assert api("DELETE", f"/api/v1/tasks/{other_task}").status_code == 404
+
+
+def test_api_gets_answer_304_until_the_tasks_change(api, make_tasks, user_id):
+    task_id = make_tasks(user_id, 1)[0]
+    for path in ("/api/v1/tasks", f"/api/v1/tasks/{task_id}"):
+        response = api("GET", path)
+        etag = response.headers["ETag"].strip('"')
+        assert api("GET", path, headers={"If-None-Match": etag}).status_code == 304
+    api("PATCH", f"/api/v1/tasks/{task_id}", json={"cost": 99})
+    assert api("GET", "/api/v1/tasks", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_batch_create_is_all_or_nothing(app, api, user_id):
+    response = api("POST", "/api/v1/tasks/batch", json={"items": [new_task("A"), new_task("B")]})
+    assert response.status_code == 201 and len(response.json["ids"]) == 2
+
+    response = api("POST", "/api/v1/tasks/batch", json={"items": [new_task("C"), new_task("C"), new_task("A"), 3]})
+    assert response.status_code == 400
+    assert [error["index"] for error in response.json["errors"]] == [3]
+    response = api("POST", "/api/v1/tasks/batch", json={"items": [new_task("C"), new_task("C"), new_task("A")]})
+    assert [error["index"] for error in response.json["errors"]] == [1, 2]
+    with app.app_context():
+        assert task_names(user_id) == ["A", "B"]
+
+
+def test_names_saved_after_the_check_get_the_same_errors(app, api, make_tasks, user_id, monkeypatch):
+    make_tasks(user_id, 1, prefix="Corrida")
+    checked = []
+    real_taken_names = api_views._taken_names
+
+    # Outra requisição grava o nome entre a verificação e o commit: a primeira verificação não o vê
+    def taken_after_the_check(names, exclude_ids=()):
+        checked.append(names)
+        return set() if len(checked) == 1 else real_taken_names(names, exclude_ids)
+
+    monkeypatch.setattr(api_views, "_taken_names", taken_after_the_check)
+    response = api("POST", "/api/v1/tasks", json=new_task("Corrida 0"))
+    assert response.status_code == 409 and response.json == {"error": "Nome da tarefa já existe."}
+
+    checked.clear()
+    response = api("POST", "/api/v1/tasks/batch", json={"items": [new_task("Nova"), new_task("Corrida 0")]})
+    assert response.status_code == 400
+    assert response.json["errors"] == [{"index": 1, "error": "nome da tarefa já existe: Corrida 0."}]
+
+    checked.clear()
+    task_id = api("POST", "/api/v1/tasks", json=new_task("Outra")).json["id"]
+    checked.clear()
+    response = api("PATCH", f"/api/v1/tasks/{task_id}", json={"task_name": "Corrida 0"})
+    assert response.status_code == 409
+    with app.app_context():
+        assert task_names(user_id) == ["Corrida 0", "Outra"]
+
+
+@pytest.mark.config(API_BATCH_MAX=2)
+def test_batch_size_is_limited(api):
+    assert api("POST", "/api/v1/tasks/batch", json={"items": []}).json["error"] == 'Informe a lista "items".'
+    response = api("POST", "/api/v1/tasks/batch", json={"items": [new_task(str(i)) for i in range(3)]})
+    assert response.json["error"] == "No máximo 2 itens por lote."
+
+
+def test_batch_update_checks_ids_and_names(app, api, make_tasks, user_id):
+    ids = make_tasks(user_id, 3)
+    items = [{"id": ids[0], "cost": 1}, {"id": ids[1], "task_name": "Nova"}]
+    assert api("PATCH", "/api/v1/tasks/batch", json={"items": items}).json == {"ids": ids[:2]}
+
+    bad_ids = [{"id": "1"}, {"id": True}, {"id": 10 ** 6}, {"id": ids[2], "task_name": "Nova"}]
+    errors = api("PATCH", "/api/v1/tasks/batch", json={"items": bad_ids}).json["errors"]
+    assert [error["index"] for error in errors] == [0, 1, 2]
+    assert errors[0]["error"] == "id inválido: informe um número inteiro."
+    errors = api("PATCH", "/api/v1/tasks/batch", json={"items": [{"id": ids[2], "task_name": "Nova"}]}).json["errors"]
+    assert errors == [{"index": 0, "error": "nome da tarefa já existe: Nova."}]
+    response = api("PATCH", "/api/v1/tasks/batch", json={"items": [{"id": ids[2]}, {"id": ids[2]}]})
+    assert response.json["error"] == "A mesma tarefa aparece mais de uma vez no lote."
+    with app.app_context():
+        assert task_names(user_id) == ["Tarefa 0", "Nova", "Tarefa 2"]
+        assert db.session.get(Task, ids[0]).cost == 1
+
+
+def test_batch_name_swap_is_a_conflict(app, api, make_tasks, user_id):
+    ids = make_tasks(user_id, 2)
+    items = [{"id": ids[0], "task_name": "Tarefa 1"}, {"id": ids[1], "task_name": "Tarefa 0"}]
+    response = api("PATCH", "/api/v1/tasks/batch", json={"items": items})
+    assert response.status_code == 409
+    with app.app_context():
+        assert task_names(user_id) == ["Tarefa 0", "Tarefa 1"]
+
+
+def test_messages_crud_and_history_pages(app, api, user_id):
+    response = api("POST", "/api/v1/messages/batch", json={"items": [{"content": f"m{i}"} for i in range(3)]})
+    ids = response.json["ids"]
+    page = api("GET", "/api/v1/messages?per_page=2").json
+    assert [item["content"] for item in page["items"]] == ["m1", "m2"]
+    older = api("GET", f"/api/v1/messages?per_page=2&before={page['next']}").json
+    assert [item["content"] for item in older["items"]] == ["m0"]
+
+    response = api("PATCH", f"/api/v1/messages/{ids[0]}?fields=content,role", json={"role": "assistant"})
+    assert response.json == {"id": ids[0], "content": "m0", "role": "assistant"}
+    assert api("POST", "/api/v1/messages", json={"content": " "}).json["error"] == "Conteúdo é obrigatório."
+    assert "Papel inválido" in api("POST", "/api/v1/messages", json={"content": "oi", "role": "x"}).json["error"]
+    response = api("PATCH", "/api/v1/messages/batch", json={"items": [{"id": ids[1], "content": "novo"}, {"id": "2"}]})
+    assert response.json["errors"] == [{"index": 1, "error": "id inválido: informe um número inteiro."}]
+    assert api("DELETE", f"/api/v1/messages/{ids[2]}").status_code == 204
+    with app.app_context():
+        assert [m.content for m in Message.query.order_by(Message.id)] == ["m0", "m1"]
+
+
+def test_tokens_are_stored_hashed_and_can_be_revoked(app, api, token):
+    response = api("POST", "/api/v1/tokens", json={"name": "integração"})
+    assert response.status_code == 201
+    value = response.json["token"]
+    with app.app_context():
+        assert ApiToken.query.filter_by(token_hash=value).count() == 0
+    assert [item["name"] for item in api("GET", "/api/v1/tokens").json["items"]] == ["testes", "integração"]
+    assert api("POST", "/api/v1/tokens", json={"name": ""}).status_code == 400
+
+    assert api("DELETE", f"/api/v1/tokens/{response.json['id']}").status_code == 204
+    revoked = app.test_client().get("/api/v1/tasks", headers={"Authorization": f"Bearer {value}"})
+    assert revoked.status_code == 401
+
+
+def test_token_cli(app, user_id):
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=["api", "create-token", "--user", "ana", "--name", "ci"])
+    assert result.exit_code == 0 and result.output.startswith("Token ")
+    value = result.output.strip().rsplit(" ", 1)[1]
+    assert app.test_client().get("/api/v1/tasks", headers={"Authorization": f"Bearer {value}"}).status_code == 200
+    assert runner.invoke(args=["api", "create-token", "--user", "ninguém"]).exit_code != 0
+    token_id = result.output.split()[1]
+    assert "revogado" in runner.invoke(args=["api", "revoke-token", token_id]).output
+    assert runner.invoke(args=["api", "revoke-token", token_id]).exit_code != 0
@@ -0,0 +1,43 @@
+# tests/test_app_factory.py
+
+import os
+import sys
+import pytest
+from app_factory import BLUEPRINTS, create_app
+from conftest import ROOT, TEST_CONFIG
+from llm import GeminiBackend, llm_gateway
+
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import bench_import_time  # noqa: E402
+
+
+def test_create_app_does_not_touch_the_database(tmp_path):
+    path = tmp_path / "frio.db"
+    app = create_app({**TEST_CONFIG, "SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}"})
+    assert not path.exists()
+    assert set(app.blueprints) == {"auth", "tasks", "reports", "chat", "search", "metrics", "api"}
+    assert len(app.blueprints) == len(BLUEPRINTS)
+    assert app.test_client().get("/login").status_code == 200
+
+
+@pytest.mark.config(LLM_BACKEND="gemini")
+def test_gemini_sdk_waits_for_the_first_call(app):
+    backend = llm_gateway.backend
+    assert isinstance(backend, GeminiBackend) and backend._model is None
+    assert "google.generativeai" not in sys.modules
+
+
+def test_vercel_entry_point_keeps_heavy_modules_lazy():
+    assert bench_import_time.loaded_lazy_modules() == []
+
+
+def test_web_process_outside_vercel_does_not_load_alembic():
+    assert bench_import_time.loaded_lazy_modules(vercel=False) == []
+
+
+def test_db_command_loads_migrations_when_called(app):
+    assert "migrate" not in app.extensions
+    result = app.test_cli_runner().invoke(args=["db", "--help"])
+    assert result.exit_code == 0 and "upgrade" in result.output
+    assert "migrate" in app.extensions
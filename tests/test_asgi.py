@@ -0,0 +1,177 @@
+# tests/test_asgi.py
+
+import asyncio
+import time
+import pytest
+from asgi import AsgiApp, build_environ, read_body
+from extensions import db
+from llm import llm_gateway, FakeBackend
+from models import Message
+
+pytestmark = pytest.mark.file_db
+
+
+def http_scope(method, path, headers=(), query=b""):
+    return {
+        "type": "http", "method": method, "path": path, "query_string": query, "http_version": "1.1",
+        "headers": list(headers), "server": ("teste", 80), "client": ("10.0.0.1", 5000),
+    }
+
+
+async def call(asgi, scope, chunks=(b"",), send=None):
+    """Chama a aplicação ASGI com o corpo em `chunks`; retorna (status, cabeçalhos, corpo)."""
+    messages = [
+        {"type": "http.request", "body": chunk, "more_body": index < len(chunks) - 1}
+        for index, chunk in enumerate(chunks)
+    ]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(3600)
+
+    async def record(message):
+        sent.append(message)
+        if send is not None:
+            await send(message)
+
+    await asyncio.wait_for(asgi(scope, receive, record), 10)
+    if not sent:
+        return None, {}, b""
+    return sent[0]["status"], dict(sent[0]["headers"]), b"".join(message.get("body", b"") for message in sent[1:])
+
+
+def session_headers(client, content_type=b"application/x-www-form-urlencoded"):
+    cookie = client.get_cookie("session").value
+    return [(b"cookie", f"session={cookie}".encode()), (b"content-type", content_type)]
+
+
+def test_build_environ():
+    scope = http_scope("GET", "/app/chat", [(b"x-tag", b"a"), (b"x-tag", b"b"), (b"content-type", b"text/plain")],
+                       query=b"q=1")
+    scope["root_path"] = "/app"
+    environ = build_environ(scope, b"abc")
+    assert environ["SCRIPT_NAME"] == "/app" and environ["PATH_INFO"] == "/chat"
+    assert environ["QUERY_STRING"] == "q=1" and environ["REMOTE_ADDR"] == "10.0.0.1"
+    assert environ["HTTP_X_TAG"] == "a,b" and environ["CONTENT_TYPE"] == "text/plain"
+    assert environ["CONTENT_LENGTH"] == "3" and environ["wsgi.input"].read() == b"abc"
+
+
+def test_read_body_stops_at_the_limit():
+    async def run(chunks, headers=(), limit=10):
+        messages = [{"type": "http.request", "body": c, "more_body": i < len(chunks) - 1} for i, c in enumerate(chunks)]
+        read = []
+
+        async def receive():
+            read.append(1)
+            return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+        try:
+            return await read_body(http_scope("POST", "/", headers), receive, limit), len(read)
+        except Exception as e:
+            return type(e).__name__, len(read)
+
+    assert asyncio.run(run([b"abc", b"def"])) == (b"abcdef", 2)
+    # Pelo Content-Length, antes de ler; em partes, assim que passa do limite
+    assert asyncio.run(run([b"a" * 20], [(b"content-length", b"20")])) == ("RequestEntityTooLarge", 0)
+    assert asyncio.run(run([b"a" * 6, b"a" * 6, b"a" * 6])) == ("RequestEntityTooLarge", 2)
+    assert asyncio.run(run([])) == (None, 1)
+
+
+@pytest.mark.config(MAX_CONTENT_LENGTH=100)
+def test_large_bodies_get_413(app):
+    asgi = AsgiApp(app)
+    status, _, _ = asyncio.run(call(asgi, http_scope("POST", "/login", [(b"content-length", b"1000")]), [b"a" * 1000]))
+    assert status == 413
+    status, _, _ = asyncio.run(call(asgi, http_scope("POST", "/login"), [b"a" * 60, b"a" * 60]))
+    assert status == 413
+
+
+def test_wsgi_routes_and_errors(app):
+    @app.route("/_falha")
+    def broken():
+        raise RuntimeError("falhou")
+
+    asgi = AsgiApp(app)
+    status, headers, body = asyncio.run(call(asgi, http_scope("GET", "/login")))
+    assert status == 200 and b"<form" in body and b"server-timing" in headers
+    status, _, _ = asyncio.run(call(asgi, http_scope("GET", "/_falha")))
+    assert status == 500
+
+
+def test_async_chat_routes(app, client, user_id):
+    llm_gateway.backend = FakeBackend(text="resposta assíncrona")
+    asgi = AsgiApp(app)
+    headers = session_headers(client)
+    status, response_headers, _ = asyncio.run(call(asgi, http_scope("POST", "/chat", headers), [b"message=oi"]))
+    assert status == 302 and response_headers[b"location"] == b"/chat"
+    status, response_headers, body = asyncio.run(
+        call(asgi, http_scope("POST", "/chat/stream", headers), [b"message=outra"])
+    )
+    assert status == 200 and response_headers[b"content-type"].startswith(b"text/event-stream")
+    text = body.decode("utf-8")
+    assert "event: start" in text and '"text": " assíncrona"' in text and "event: done" in text
+    status, _, _ = asyncio.run(call(asgi, http_scope("POST", "/chat/stream", headers), [b"message="]))
+    assert status == 400
+    with app.app_context():
+        assert [m.role for m in Message.query.order_by(Message.id)] == ["user", "assistant"] * 2
+
+
+def test_task_page_opens_the_feed_only_in_asgi_mode(app, client, user_id):
+    # Sem TASK_FEED_WSGI: a página servida pelo WSGI não abre o feed, a do ASGI abre
+    assert "data-feed-url" not in client.get("/").get_data(as_text=True)
+    status, _, body = asyncio.run(call(AsgiApp(app), http_scope("GET", "/", session_headers(client))))
+    assert status == 200 and 'data-feed-url="/feed?since=' in body.decode("utf-8")
+
+
+@pytest.mark.config(ASGI_STREAM_BUFFER=4)
+def test_slow_clients_hold_the_wsgi_stream(app):
+    produced = []
+
+    @app.route("/_partes")
+    def parts():
+        def generate():
+            try:
+                for index in range(100):
+                    produced.append(index)
+                    yield b"x" * 10
+            finally:
+                produced.append("fechado")
+
+        return app.response_class(generate())
+
+    asgi = AsgiApp(app)
+    seen = {}
+
+    async def slow(message):
+        if message["type"] == "http.response.body" and message.get("more_body"):
+            seen["bodies"] = seen.get("bodies", 0) + 1
+            if seen["bodies"] == 3:
+                await asyncio.sleep(0.3)
+                # A thread do Flask espera por espaço na fila em vez de gerar o resto
+                seen["while_slow"] = len(produced)
+                raise OSError("cliente saiu")
+
+    with pytest.raises(OSError):
+        asyncio.run(call(asgi, http_scope("GET", "/_partes"), send=slow))
+    deadline = time.monotonic() + 5
+    while "fechado" not in produced and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert seen["while_slow"] <= 3 + 4 + 2
+    assert produced[-1] == "fechado" and len(produced) < 20
+
+
+def test_lifespan(app):
+    asgi = AsgiApp(app)
+    events = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+    sent = []
+
+    async def receive():
+        return events.pop(0)
+
+    async def send(message):
+        sent.append(message["type"])
+
+    asyncio.run(asgi({"type": "lifespan"}, receive, send))
+    assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
@@ -0,0 +1,154 @@
+# tests/test_auth_guard.py
+
+import pytest
+from sqlalchemy import event
+from app_factory import create_app
+from auth_guard import MISSING, LocalBuckets, auth_guard
+import auth_guard as auth_guard_module
+from extensions import db
+from models import User
+import metrics
+from conftest import TEST_CONFIG, register
+
+# O login feito pelo register() gasta a primeira ficha de "ana" neste IP
+LIMITS = {"AUTH_THROTTLE_ENABLED": True, "AUTH_IP_BURST": 100, "AUTH_USER_BURST": 3}
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.registry.reset()
+
+
+def login(client, username="ana", password="errada", ip="127.0.0.1"):
+    return client.post("/login", data={"username": username, "password": password}, environ_base={"REMOTE_ADDR": ip})
+
+
+def stored_password(username="ana"):
+    return db.session.query(User.password).filter_by(username=username).scalar()
+
+
+def session_user(client):
+    with client.session_transaction() as session:
+        return session.get("user_id")
+
+
+def test_buckets_refill_over_time(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(auth_guard_module.time, "monotonic", lambda: now[0])
+    buckets = LocalBuckets()
+    assert [buckets.take("k", 2, 0.5) for _ in range(3)] == [0, 0, 2.0]
+    now[0] += 2
+    assert buckets.take("k", 2, 0.5) == 0
+    assert buckets.take("outra", 2, 0.5) == 0
+
+
+def test_forgotten_buckets_are_dropped():
+    buckets = LocalBuckets(max_keys=2)
+    for key in ("a", "b", "c"):
+        buckets.take(key, 1, 1)
+    assert list(buckets._buckets) == ["b", "c"]
+
+
+@pytest.mark.parametrize("name", ["AUTH_IP_PER_MINUTE", "AUTH_USER_BURST"])
+def test_limits_must_be_positive(name):
+    with pytest.raises(ValueError, match=name):
+        create_app({**TEST_CONFIG, name: 0})
+
+
+@pytest.mark.config(**LIMITS)
+def test_login_is_limited_per_username_and_ip(app, client):
+    register(client, "ana")
+    client.get("/logout")
+    assert [login(client).status_code for _ in range(2)] == [200, 200]
+    response = login(client)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+    assert "Muitas tentativas" in response.get_data(as_text=True)
+    # Nem a senha certa passa, mas o dono da conta entra de outro endereço
+    assert login(client, password="senha").status_code == 429
+    assert login(client, password="senha", ip="10.0.0.2").status_code == 302
+    assert metrics.AUTH_ATTEMPTS.value("throttled_user") == 2
+    assert metrics.AUTH_ATTEMPTS.value("failed") == 2
+
+
+@pytest.mark.config(AUTH_THROTTLE_ENABLED=True, AUTH_IP_BURST=2)
+def test_register_and_login_share_the_ip_limit(app, client):
+    register(client, "ana")
+    client.get("/logout")
+    response = login(client, "bia")
+    assert response.status_code == 429
+    assert login(client, "bia", ip="10.0.0.2").status_code == 200
+    assert metrics.AUTH_ATTEMPTS.value("throttled_ip") == 1
+    with app.app_context():
+        assert User.query.count() == 1
+
+
+@pytest.mark.config(AUTH_THROTTLE_ENABLED=True, AUTH_PROXY_COUNT=1)
+def test_client_ip_comes_from_the_trusted_proxy(app):
+    headers = {"X-Forwarded-For": "1.1.1.1, 2.2.2.2"}
+    with app.test_request_context(headers=headers, environ_base={"REMOTE_ADDR": "10.0.0.1"}):
+        assert auth_guard.client_ip() == "2.2.2.2"
+    app.config["AUTH_PROXY_COUNT"] = 2
+    with app.test_request_context(headers=headers):
+        assert auth_guard.client_ip() == "1.1.1.1"
+    app.config["AUTH_PROXY_COUNT"] = 3
+    with app.test_request_context(headers=headers, environ_base={"REMOTE_ADDR": "10.0.0.1"}):
+        assert auth_guard.client_ip() == "10.0.0.1"
+
+
+def test_disabled_throttle_never_limits(app, client):
+    register(client, "ana")
+    client.get("/logout")
+    assert {login(client).status_code for _ in range(30)} == {200}
+
+
+@pytest.mark.config(AUTH_HASH_CONCURRENCY=1, AUTH_HASH_WAIT=0.01)
+def test_busy_hash_slots_answer_429(app, client):
+    register(client, "ana")
+    client.get("/logout")
+    auth_guard._hash_slots.acquire()
+    try:
+        response = login(client, password="senha")
+    finally:
+        auth_guard._hash_slots.release()
+    assert response.status_code == 429 and response.headers["Retry-After"] == "1"
+    assert "Servidor ocupado" in response.get_data(as_text=True)
+    assert metrics.AUTH_ATTEMPTS.value("busy") == 1
+    assert login(client, password="senha").status_code == 302
+
+
+def test_password_is_rehashed_when_the_method_changes(app, client):
+    register(client, "ana")
+    client.get("/logout")
+    with app.app_context():
+        assert stored_password().startswith("pbkdf2:sha256:1000$")
+    app.config["AUTH_HASH_METHOD"] = "pbkdf2:sha256:2000"
+    auth_guard._method_prefix = None
+    assert login(client, password="senha").status_code == 302
+    with app.app_context():
+        assert stored_password().startswith("pbkdf2:sha256:2000$")
+    assert metrics.AUTH_ATTEMPTS.value("rehashed") == 1
+    client.get("/logout")
+    assert login(client, password="senha").status_code == 302
+    assert metrics.AUTH_ATTEMPTS.value("rehashed") == 1
+
+
+def test_users_are_cached_for_login(app, client):
+    with app.app_context():
+        # O nome ainda sem conta fica no cache como inexistente; o registro o tira de lá
+        assert auth_guard.lookup("ana") is MISSING
+        register(client, "ana")
+        # O login do register() já guardou o usuário: nenhuma consulta
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            user = auth_guard.lookup("ana")
+            assert auth_guard.lookup("ana") == user
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+    assert user.username == "ana" and statements == []
+    assert session_user(client) == user.id
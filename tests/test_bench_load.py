@@ -0,0 +1,89 @@
+# tests/test_bench_load.py
+
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import pytest
+from conftest import ROOT
+from extensions import db
+from llm import FakeBackend, TransientLLMError
+from models import Message, Task, TaskStat
+
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import bench_load  # noqa: E402
+
+
+def test_fake_backend():
+    backend = FakeBackend(text="um dois três", fail_times=1)
+    with pytest.raises(TransientLLMError):
+        backend.generate("p", 1)
+    assert list(backend.stream("p", 1)) == ["um", " dois", " três"]
+    assert FakeBackend(respond=str.upper).generate("oi", 1) == "OI"
+    with pytest.raises(TimeoutError):
+        FakeBackend(delay=1).generate("p", 0.01)
+    assert asyncio.run(FakeBackend(text="a").agenerate("p", 1)) == "a"
+    assert backend.calls == 2
+
+
+def test_percentile_is_nearest_rank():
+    samples = list(range(1, 101))
+    assert [bench_load.percentile(samples, p) for p in (50, 95, 99, 100)] == [50, 95, 99, 100]
+    assert bench_load.percentile([7], 99) == 7 and bench_load.percentile([], 50) == 0.0
+
+
+def test_parse_mix():
+    mix = bench_load.parse_mix("index=5,chat=0")
+    assert mix["index"] == 5 and "chat" not in mix and mix["add_task"] == bench_load.DEFAULT_MIX["add_task"]
+    with pytest.raises(SystemExit, match="Operação desconhecida em --mix: nada"):
+        bench_load.parse_mix("nada=1")
+
+
+def test_compare_flags_slower_p95_and_lower_throughput():
+    base = {"operations": {
+        "index": {"count": 10, "p95_ms": 10.0, "throughput": 100.0},
+        "chat": {"count": 10, "p95_ms": 10.0, "throughput": 100.0},
+    }}
+    current = {"operations": {
+        "index": {"count": 10, "p95_ms": 20.0, "throughput": 100.0},
+        "chat": {"count": 10, "p95_ms": 12.0, "throughput": 50.0},
+        "move_up": {"count": 10, "p95_ms": 99.0, "throughput": 1.0},
+    }}
+    assert bench_load.compare(current, base, 1.3) == [
+        "index: p95 10.0 -> 20.0 ms",
+        "chat: vazão 100.0 -> 50.0 req/s",
+    ]
+
+
+def test_seed_creates_consistent_data(app):
+    with app.app_context():
+        accounts, owned = bench_load.seed(2, 5, 3, random.Random(1))
+        assert len(accounts) == 2 and all(len(tasks) == 5 for tasks in owned.values())
+        assert Message.query.count() == 6
+        assert Task.query.filter(Task.embedding.is_(None)).count() == 0
+        totals = {row.user_id: row.task_count for row in TaskStat.query.filter_by(dimension="total")}
+        assert totals == {user_id: 5 for _, user_id in accounts}
+
+
+def test_short_run_saves_and_compares(tmp_path):
+    results = tmp_path / "carga.json"
+    command = [
+        sys.executable, os.path.join(ROOT, "benchmarks", "bench_load.py"), "--users", "2", "--tasks", "10",
+        "--messages", "6", "--threads", "2", "--duration", "1", "--warmup", "0.2", "--llm-delay", "0",
+    ]
+    run = subprocess.run(command + ["--save", str(results)], capture_output=True, text=True, timeout=120)
+    assert run.returncode == 0, run.stderr
+    saved = json.loads(results.read_text())
+    assert saved["meta"]["seed"] == 42 and saved["total"]["count"] > 0
+    assert saved["total"]["errors"] == 0
+    assert set(saved["operations"]) == set(bench_load.DEFAULT_MIX)
+
+    # Uma base muito mais rápida faz a comparação falhar
+    for operation in saved["operations"].values():
+        operation["throughput"] *= 100
+    results.write_text(json.dumps(saved))
+    run = subprocess.run(command + ["--compare", str(results)], capture_output=True, text=True, timeout=120)
+    assert run.returncode == 1 and "Regressões em relação a" in run.stdout
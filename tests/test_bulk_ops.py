@@ -0,0 +1,116 @@
+# tests/test_bulk_ops.py
+
+from datetime import date
+import pytest
+from sqlalchemy import event
+from extensions import db
+from models import Task
+import bulk_ops
+
+JSON = {"Accept": "application/json"}
+
+
+def bulk(client, action, task_ids, **values):
+    return client.post("/bulk", data={"action": action, "task_ids": task_ids, **values}, headers=JSON)
+
+
+def statuses(user_id):
+    return [status for (status,) in db.session.query(Task.status).filter_by(user_id=user_id).order_by(Task.id)]
+
+
+def test_parse_task_ids():
+    assert bulk_ops.parse_task_ids(["3", "1", "3"]) == [3, 1]
+    for values, message in [
+        (["1", "x"], "Id de tarefa inválido: x."),
+        ([], "Selecione pelo menos uma tarefa."),
+        (["1", "2", "3"], "Selecione no máximo 2 tarefas por vez."),
+    ]:
+        with pytest.raises(bulk_ops.BulkError, match=message):
+            bulk_ops.parse_task_ids(values, limit=2)
+
+
+def test_parse_changes():
+    assert bulk_ops.parse_changes(" Concluída ", "", "casa") == {"status": "Concluída", "category": "casa"}
+    for args, message in [
+        (("Arquivada",), "Status inválido: Arquivada."),
+        (("", "Urgente"), "Prioridade inválida: Urgente."),
+        (("", "", "x" * 500), "A categoria passa de"),
+        (("", " ", ""), "Informe o status, a prioridade ou a categoria."),
+    ]:
+        with pytest.raises(bulk_ops.BulkError, match=message):
+            bulk_ops.parse_changes(*args)
+
+
+def test_update_runs_a_single_statement(app, client, user_id, make_tasks):
+    ids = make_tasks(user_id, 4, status="Pendente")
+    updates = []
+
+    def record(conn, cursor, statement, *args):
+        if statement.startswith("UPDATE task"):
+            updates.append(statement)
+
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        response = bulk(client, "update", ids[:3], status="Em Andamento", priority="Alta")
+    finally:
+        with app.app_context():
+            event.remove(db.engine, "before_cursor_execute", record)
+    assert response.json == {"action": "update", "count": 3}
+    assert len(updates) == 1
+    with app.app_context():
+        assert statuses(user_id) == ["Em Andamento"] * 3 + ["Pendente"]
+
+
+def test_other_users_tasks_are_never_changed(app, client, user_id, other_client, make_tasks):
+    _, other_id = other_client
+    mine = make_tasks(user_id, 1, status="Pendente")
+    theirs = make_tasks(other_id, 2, status="Pendente")
+    assert bulk(client, "complete", mine + theirs).json["count"] == 1
+    assert bulk(client, "delete", theirs).json["count"] == 0
+    with app.app_context():
+        assert statuses(other_id) == ["Pendente", "Pendente"]
+        assert statuses(user_id) == ["Concluída"]
+
+
+def test_complete_uses_the_given_date(app, client, user_id, make_tasks):
+    ids = make_tasks(user_id, 2)
+    bulk(client, "complete", ids[:1], completion_date="15/02/2030")
+    bulk(client, "complete", ids[1:])
+    with app.app_context():
+        dates = [task.completion_date for task in Task.query.order_by(Task.id)]
+    assert dates == [date(2030, 2, 15), date.today()]
+    response = bulk(client, "complete", ids, completion_date="2030-02-15")
+    assert response.status_code == 400 and response.json["error"] == "Formato de data inválido. Use dd/mm/yyyy."
+
+
+def test_delete_keeps_the_order_of_the_rest(app, client, user_id, make_tasks):
+    ids = make_tasks(user_id, 5)
+    with app.app_context():
+        before = {task.id: task.display_order for task in Task.query}
+    assert bulk(client, "delete", [ids[1], ids[3]]).json["count"] == 2
+    with app.app_context():
+        assert {task.id: task.display_order for task in Task.query} == {
+            task_id: before[task_id] for task_id in (ids[0], ids[2], ids[4])
+        }
+
+
+def test_list_shows_the_bulk_change(client, user_id, make_tasks):
+    ids = make_tasks(user_id, 2, priority="Baixa")
+    badge = '<span class="badge bg-warning text-dark">{}</span>'
+    assert client.get("/").get_data(as_text=True).count(badge.format("Baixa")) == 2
+    # A página da lista em cache é descartada pela operação em lote
+    bulk(client, "update", ids, priority="Alta")
+    page = client.get("/").get_data(as_text=True)
+    assert page.count(badge.format("Alta")) == 2 and badge.format("Baixa") not in page
+
+
+@pytest.mark.config(BULK_MAX_TASKS=2)
+def test_errors_are_reported(client, user_id, make_tasks):
+    ids = make_tasks(user_id, 3)
+    assert bulk(client, "update", ids, status="Pendente").json["error"] == "Selecione no máximo 2 tarefas por vez."
+    assert bulk(client, "archive", ids[:1]).json["error"] == "Ação inválida."
+    assert bulk(client, "update", ids[:1]).status_code == 400
+    # Sem JSON, a mensagem vai para a página da lista
+    response = client.post("/bulk", data={"action": "update", "task_ids": ["x"]}, follow_redirects=True)
+    assert "Id de tarefa inválido: x." in response.get_data(as_text=True)
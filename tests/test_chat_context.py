@@ -0,0 +1,119 @@
+# tests/test_chat_context.py
+
+from datetime import datetime, timedelta
+import pytest
+from extensions import db
+from llm import llm_gateway, FakeBackend
+from models import Message, ConversationSummary
+from chat_context import build_chat_prompt, history_page, recent_window, refresh_summary
+
+
+def add_messages(user_id, contents, start=datetime(2030, 1, 1)):
+    """Grava as mensagens em ordem, alternando usuário e assistente; retorna os ids (dentro de um app context)."""
+    rows = [
+        Message(user_id=user_id, content=content, role="user" if index % 2 == 0 else "assistant",
+                timestamp=start + timedelta(seconds=index))
+        for index, content in enumerate(contents)
+    ]
+    db.session.add_all(rows)
+    db.session.commit()
+    return [row.id for row in rows]
+
+
+def test_recent_window_fits_the_budget_in_chronological_order(app, user_id):
+    with app.app_context():
+        ids = add_messages(user_id, ["a" * 40, "b" * 40, "c" * 40, "d" * 40])
+        current = db.session.get(Message, ids[-1])
+        # Cada mensagem estima 11 tokens: cabem duas anteriores à atual
+        assert [m.content[0] for m in recent_window(user_id, current, 25)] == ["b", "c"]
+        assert [m.content[0] for m in recent_window(user_id, current, 1000, max_messages=1)] == ["c"]
+        # A mais recente entra mesmo sozinha passando do orçamento
+        assert [m.content[0] for m in recent_window(user_id, current, 1)] == ["c"]
+
+
+def test_history_page_walks_back_with_the_cursor(app, user_id, other_client):
+    _, other_id = other_client
+    with app.app_context():
+        ids = add_messages(user_id, [f"m{i}" for i in range(5)])
+        add_messages(other_id, ["de outra pessoa"])
+        page, cursor = history_page(user_id, per_page=2)
+        assert [m.content for m in page] == ["m3", "m4"] and cursor == ids[3]
+        page, cursor = history_page(user_id, cursor, per_page=2)
+        assert [m.content for m in page] == ["m1", "m2"] and cursor == ids[1]
+        page, cursor = history_page(user_id, cursor, per_page=2)
+        assert [m.content for m in page] == ["m0"] and cursor is None
+        page, _ = history_page(user_id, ids[2], per_page=2, inclusive=True)
+        assert [m.content for m in page] == ["m1", "m2"]
+
+
+@pytest.mark.config(CHAT_CONTEXT_TASKS=0)
+def test_prompt_has_summary_window_and_question_only(app, user_id):
+    with app.app_context():
+        ids = add_messages(user_id, ["antiga", "resumida", "recente", "resposta", "pergunta", "depois"])
+        db.session.add(ConversationSummary(user_id=user_id, summary="RESUMO", covered_until_id=ids[1]))
+        db.session.commit()
+        prompt = build_chat_prompt(db.session.get(Message, ids[4]))
+    assert "### Resumo da conversa anterior\nRESUMO" in prompt
+    # Mensagens já resumidas e posteriores à pergunta ficam de fora
+    assert "antiga" not in prompt and "resumida" not in prompt and "depois" not in prompt
+    assert "Usuário: recente\nAssistente: resposta\n" in prompt
+    assert prompt.endswith("Usuário: pergunta\nAssistente:")
+    assert "### Tarefas" not in prompt
+
+
+@pytest.mark.config(CHAT_CONTEXT_TASKS=1)
+def test_prompt_lists_only_related_tasks(app, user_id, make_tasks):
+    make_tasks(user_id, 1, prefix="Comprar tinta para a parede", category="reforma")
+    make_tasks(user_id, 1, prefix="Revisar contrato", category="jurídico")
+    with app.app_context():
+        ids = add_messages(user_id, ["quanto custa a tinta da parede?"])
+        prompt = build_chat_prompt(db.session.get(Message, ids[0]))
+    assert "### Tarefas do usuário relacionadas à pergunta\n- Comprar tinta para a parede 0" in prompt
+    assert "Revisar contrato" not in prompt
+
+
+@pytest.mark.config(CHAT_CONTEXT_TOKENS=30, CHAT_SUMMARY_MIN_MESSAGES=3)
+def test_summary_takes_only_messages_outside_the_window(app, user_id):
+    prompts = []
+    llm_gateway.backend = FakeBackend(respond=lambda prompt: prompts.append(prompt) or " novo resumo ")
+    with app.app_context():
+        ids = add_messages(user_id, ["x" * 40 for _ in range(2)])
+        refresh_summary(user_id)
+        # Poucas mensagens fora da janela: nenhuma chamada
+        assert prompts == [] and db.session.get(ConversationSummary, user_id) is None
+
+        ids += add_messages(user_id, [f"m{i} " + "y" * 40 for i in range(4)], start=datetime(2030, 1, 2))
+        refresh_summary(user_id)
+        summary = db.session.get(ConversationSummary, user_id)
+        assert summary.summary == "novo resumo"
+        # A janela (as duas últimas) fica fora do resumo
+        assert summary.covered_until_id == ids[3]
+        assert "m1" in prompts[0] and "m2" not in prompts[0] and "(vazio)" in prompts[0]
+
+        refresh_summary(user_id)
+        assert len(prompts) == 1
+
+
+@pytest.mark.config(CHAT_CONTEXT_TOKENS=10, CHAT_SUMMARY_MIN_MESSAGES=2)
+def test_chat_reply_triggers_the_summary(app, client, user_id):
+    llm_gateway.backend = FakeBackend(text="resposta " * 10)
+    for question in ("primeira", "segunda"):
+        client.post("/chat", data={"message": question})
+    with app.app_context():
+        summary = db.session.get(ConversationSummary, user_id)
+        assert summary is not None and summary.covered_until_id
+
+
+@pytest.mark.config(CHAT_CONTEXT_MAX_MESSAGES=2, CHAT_SUMMARY_MIN_MESSAGES=1, CHAT_SUMMARY_BATCH=2,
+                    CHAT_SUMMARY_WORDS=42, CHAT_CONTEXT_TASKS=0)
+def test_window_and_summary_limits_come_from_the_config(app, user_id):
+    prompts = []
+    llm_gateway.backend = FakeBackend(respond=lambda prompt: prompts.append(prompt) or "resumo")
+    with app.app_context():
+        ids = add_messages(user_id, [f"m{i}" for i in range(6)])
+        prompt = build_chat_prompt(db.session.get(Message, ids[-1]))
+        assert "m3" in prompt and "m4" in prompt and "m2" not in prompt
+        refresh_summary(user_id)
+        # Fora da janela ficam m0..m3, mas cada chamada resume no máximo duas mensagens
+        assert db.session.get(ConversationSummary, user_id).covered_until_id == ids[1]
+        assert "42" in prompts[0] and "m1" in prompts[0] and "m2" not in prompts[0]
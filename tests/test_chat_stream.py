@@ -0,0 +1,86 @@
+# tests/test_chat_stream.py
+
+import json
+from extensions import db
+from llm import llm_gateway, FakeBackend
+from models import Message
+from streaming import sse_event
+
+
+def parse_events(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        event = "message"
+        data = None
+        for line in block.splitlines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                data = json.loads(line[len("data: "):])
+        events.append((event, data))
+    return events
+
+
+def messages(user_id):
+    return [
+        (message.role, message.content)
+        for message in Message.query.filter_by(user_id=user_id).order_by(Message.id)
+    ]
+
+
+def test_sse_event_format():
+    assert sse_event({"text": "olá"}) == 'data: {"text": "olá"}\n\n'
+    assert sse_event({"id": 1}, event="done") == 'event: done\ndata: {"id": 1}\n\n'
+
+
+def test_stream_sends_start_chunks_and_done(app, client, user_id):
+    llm_gateway.backend = FakeBackend(text="um dois três")
+    response = client.post("/chat/stream", data={"message": "pergunta"})
+    assert response.mimetype == "text/event-stream"
+    assert response.headers["Cache-Control"] == "no-cache"
+    events = parse_events(response.get_data(as_text=True))
+    assert events[0][0] == "start"
+    assert [data["text"] for event, data in events if event == "message"] == ["um", " dois", " três"]
+    assert events[-1][0] == "done"
+    with app.app_context():
+        assert messages(user_id) == [("user", "pergunta"), ("assistant", "um dois três")]
+        assert events[0][1]["id"] == Message.query.filter_by(role="user").one().id
+        assert events[-1][1]["id"] == Message.query.filter_by(role="assistant").one().id
+
+
+def test_empty_message_is_rejected(app, client, user_id):
+    response = client.post("/chat/stream", data={"message": "   "})
+    assert response.status_code == 400
+    with app.app_context():
+        assert messages(user_id) == []
+
+
+def test_backend_error_sends_error_event_and_saves_reply(app, client, user_id):
+    def fail(prompt):
+        raise ValueError("chave inválida")
+
+    llm_gateway.backend = FakeBackend(respond=fail)
+    events = parse_events(client.post("/chat/stream", data={"message": "oi"}).get_data(as_text=True))
+    assert [event for event, _ in events] == ["start", "error", "done"]
+    with app.app_context():
+        saved = messages(user_id)
+    assert saved[0] == ("user", "oi")
+    assert saved[1] == ("assistant", events[1][1]["text"])
+
+
+def test_disconnect_keeps_the_partial_reply(app, client, user_id):
+    llm_gateway.backend = FakeBackend(text="parte um parte dois")
+    response = client.post("/chat/stream", data={"message": "oi"}, buffered=False)
+    chunks = response.response
+    next(chunks)
+    next(chunks)
+    response.close()
+    with app.app_context():
+        assert messages(user_id) == [("user", "oi"), ("assistant", "parte")]
+
+
+def test_stream_requires_login(client):
+    response = client.post("/chat/stream", data={"message": "oi"})
+    assert response.status_code == 302
+    with client.application.app_context():
+        assert db.session.query(Message).count() == 0
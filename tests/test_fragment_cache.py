@@ -0,0 +1,105 @@
+# tests/test_fragment_cache.py
+
+from datetime import datetime
+import pytest
+from extensions import db
+from fragment_cache import fragment_cache
+from models import Message, Task
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    fragment_cache.clear()
+
+
+def lookups(client, path="/"):
+    """Acertos e faltas do cache durante a leitura da página; retorna (html, acertos, faltas)."""
+    before = fragment_cache.stats()
+    html = client.get(path).get_data(as_text=True)
+    after = fragment_cache.stats()
+    return html, after["hits"] - before["hits"], after["misses"] - before["misses"]
+
+
+def test_rows_are_rendered_again_only_when_the_task_changes(app, client, user_id, make_tasks):
+    ids = make_tasks(user_id, 3)
+    _, hits, misses = lookups(client)
+    assert (hits, misses) == (0, 3)
+    second, hits, misses = lookups(client)
+    assert (hits, misses) == (3, 0)
+    assert "Tarefa 2" in second
+    with app.app_context():
+        db.session.get(Task, ids[1]).cost = 123.45
+        db.session.commit()
+    html, hits, misses = lookups(client)
+    assert (hits, misses) == (2, 1)
+    assert "123.45" in html
+
+
+def test_bulk_updates_change_the_rows(client, user_id, make_tasks):
+    ids = make_tasks(user_id, 2)
+    lookups(client)
+    client.post("/bulk", data={"action": "update", "task_ids": [str(task_id) for task_id in ids], "priority": "Alta"})
+    html, hits, misses = lookups(client)
+    assert (hits, misses) == (0, 2)
+    assert html.count('<span class="badge bg-warning text-dark">Alta</span>') == 2
+
+
+def test_reused_ids_do_not_serve_the_old_row(app, client, user_id, make_tasks):
+    task_id = make_tasks(user_id, 1, prefix="Antiga", creation_date=datetime(2029, 1, 1))[0]
+    lookups(client)
+    with app.app_context():
+        db.session.delete(db.session.get(Task, task_id))
+        db.session.commit()
+    # O SQLite reaproveita o id da última linha excluída
+    assert make_tasks(user_id, 1, prefix="Nova", creation_date=datetime(2029, 1, 2)) == [task_id]
+    html, _, misses = lookups(client)
+    assert misses == 1 and "Nova 0" in html and "Antiga 0" not in html
+
+
+def test_highlighted_message_has_its_own_entry(app, user_id):
+    with app.app_context():
+        message = Message(user_id=user_id, role="user", content="olá")
+        db.session.add(message)
+        db.session.commit()
+        with app.test_request_context():
+            plain = fragment_cache.render("chat_message.html", message)
+            highlighted = fragment_cache.render("chat_message.html", message, at_id=message.id)
+            assert plain != highlighted
+            assert fragment_cache.render("chat_message.html", message) == plain
+    assert len(fragment_cache.memory) == 2
+
+
+def test_chat_page_uses_the_cache(app, client, user_id):
+    with app.app_context():
+        db.session.add_all([Message(user_id=user_id, role="user", content=f"m{i}") for i in range(3)])
+        db.session.commit()
+    lookups(client, "/chat")
+    html, hits, misses = lookups(client, "/chat")
+    assert (hits, misses) == (3, 0) and "m2" in html
+
+
+@pytest.mark.config(FRAGMENT_CACHE_ENABLED=False)
+def test_disabled_cache_renders_every_time(client, user_id, make_tasks):
+    make_tasks(user_id, 2)
+    html, hits, misses = lookups(client)
+    assert (hits, misses) == (0, 0) and "Tarefa 1" in html
+    assert len(fragment_cache.memory) == 0
+
+
+@pytest.mark.config(FRAGMENT_CACHE_SIZE=2)
+def test_cache_size_is_limited(client, user_id, make_tasks):
+    make_tasks(user_id, 5)
+    lookups(client)
+    assert len(fragment_cache.memory) == 2
+
+
+@pytest.mark.config(METRICS_PUBLIC=True)
+def test_stats_are_exported(client, user_id, make_tasks):
+    make_tasks(user_id, 2)
+    lookups(client)
+    lookups(client)
+    stats = fragment_cache.stats()
+    assert stats["entries"] == 2 and stats["saved_seconds"] > 0
+    assert 0 < stats["hit_rate"] < 1
+    body = client.get("/metrics").get_data(as_text=True)
+    assert 'fragment_cache_stats{stat="entries"} 2' in body
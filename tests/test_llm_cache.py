@@ -0,0 +1,119 @@
+# tests/test_llm_cache.py
+
+from datetime import timedelta
+import pytest
+from sqlalchemy import event
+from extensions import db
+from llm import llm_gateway, FakeBackend
+from llm_cache import LRUCache, cache_key, response_cache
+from models import LLMCacheEntry, Message
+
+
+def test_cache_key_ignores_spacing_and_depends_on_the_model():
+    assert cache_key("m", "a  b\n c") == cache_key("m", " a b c ")
+    assert cache_key("m", "a b") != cache_key("outro", "a b")
+    assert cache_key("m", "a b") != cache_key("m", "a c")
+
+
+def test_lru_cache_evicts_the_least_recently_used():
+    cache = LRUCache(2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1 and cache.get("c") == 3
+    cache.delete("a")
+    assert len(cache) == 1
+
+
+def test_cached_generates_once_then_hits_memory_and_database(app):
+    calls = []
+
+    def generate(prompt):
+        calls.append(prompt)
+        return "resposta"
+
+    with app.app_context():
+        before = response_cache.stats()
+        assert response_cache.cached("m", "pergunta", generate) == "resposta"
+        assert response_cache.cached("m", "pergunta", generate) == "resposta"
+        response_cache.memory.clear()
+        assert response_cache.cached("m", "pergunta", generate) == "resposta"
+        after = response_cache.stats()
+    assert calls == ["pergunta"]
+    assert after["memory_hits"] - before["memory_hits"] == 1
+    assert after["db_hits"] - before["db_hits"] == 1
+    assert after["stores"] - before["stores"] == 1
+
+
+def test_get_is_read_only(app):
+    with app.app_context():
+        response_cache.set("m", "pergunta", "resposta")
+        response_cache.memory.clear()
+        writes = []
+
+        def record(conn, cursor, statement, *args):
+            if statement.split()[0] in ("INSERT", "UPDATE", "DELETE"):
+                writes.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            assert response_cache.get("m", "pergunta") == "resposta"
+            assert response_cache.get("m", "outra") is None
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+        assert writes == []
+
+        # Uma alteração pendente de quem chamou não pode ser confirmada pela leitura
+        db.session.add(Message(user_id=1, content="pendente", role="user"))
+        response_cache.get("m", "outra")
+        db.session.rollback()
+        assert Message.query.count() == 0
+
+
+@pytest.mark.file_db
+def test_set_leaves_the_callers_session_alone(app):
+    with app.app_context():
+        pending = Message(user_id=1, content="pendente", role="user")
+        db.session.add(pending)
+        response_cache.set("m", "pergunta", "primeira")
+        response_cache.set("m", "pergunta", "segunda")
+        assert pending in db.session.new
+        db.session.rollback()
+        assert Message.query.count() == 0
+        response_cache.memory.clear()
+        assert response_cache.get("m", "pergunta") == "segunda"
+        assert LLMCacheEntry.query.count() == 1
+
+
+def test_expired_entries_are_ignored_in_memory_and_database(app):
+    with app.app_context():
+        response_cache.ttl = timedelta(seconds=-1)
+        response_cache.set("m", "pergunta", "velha")
+        assert response_cache.get("m", "pergunta") is None
+        response_cache.memory.clear()
+        assert response_cache.get("m", "pergunta") is None
+        assert response_cache.purge_expired() == 1
+        assert LLMCacheEntry.query.count() == 0
+
+
+@pytest.mark.config(LLM_CACHE_ENABLED=False)
+def test_disabled_cache_always_generates(app):
+    with app.app_context():
+        calls = []
+        for _ in range(2):
+            response_cache.cached("m", "pergunta", lambda prompt: calls.append(prompt) or "resposta")
+        assert len(calls) == 2
+        assert LLMCacheEntry.query.count() == 0
+
+
+def test_same_report_selection_reuses_the_answer(client, user_id, make_tasks):
+    backend = llm_gateway.backend = FakeBackend(text="Relatório.")
+    ids = [str(task_id) for task_id in make_tasks(user_id, 2)]
+    client.post("/generate_report", data={"task_ids": ids})
+    client.post("/generate_report", data={"task_ids": ids})
+    assert backend.calls == 1
+    # Com uma tarefa alterada, o prompt muda e a resposta é gerada de novo
+    client.post(f"/edit/{ids[0]}", data={"task_name": "Outro nome", "cost": "10", "due_date": "01/01/2030"})
+    client.post("/generate_report", data={"task_ids": ids})
+    assert backend.calls == 2
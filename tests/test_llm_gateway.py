@@ -0,0 +1,149 @@
+# tests/test_llm_gateway.py
+
+import asyncio
+import threading
+import time
+import pytest
+from llm import llm_gateway, FakeBackend, LLMBusyError, TransientLLMError, is_transient
+
+pytestmark = pytest.mark.config(LLM_BACKOFF_BASE=0.001, LLM_MAX_RETRIES=2)
+
+
+class BrokenStream(FakeBackend):
+    """Falha depois de `parts` partes do streaming."""
+
+    def __init__(self, parts, **kwargs):
+        super().__init__(**kwargs)
+        self.parts = parts
+
+    def stream(self, prompt, timeout):
+        self._answer(prompt)
+        for index in range(self.parts):
+            yield f"parte{index} "
+        raise TransientLLMError("Conexão caiu.")
+
+
+def hold_call(user_id, seconds):
+    """Ocupa uma vaga em outra thread; retorna a thread já dentro do backend."""
+    inside = threading.Event()
+
+    def respond(prompt):
+        inside.set()
+        time.sleep(seconds)
+        return "ok"
+
+    llm_gateway.backend = FakeBackend(respond=respond)
+    thread = threading.Thread(target=llm_gateway.generate, args=("ocupada",), kwargs={"user_id": user_id})
+    thread.start()
+    assert inside.wait(5)
+    return thread
+
+
+def test_transient_errors_are_retried(app):
+    backend = llm_gateway.backend = FakeBackend(text="ok", fail_times=2)
+    assert llm_gateway.generate("p") == "ok"
+    assert backend.calls == 3
+
+
+def test_retries_stop_at_the_limit(app):
+    backend = llm_gateway.backend = FakeBackend(fail_times=10)
+    with pytest.raises(TransientLLMError):
+        llm_gateway.generate("p")
+    assert backend.calls == 3
+
+
+def test_permanent_errors_are_not_retried(app):
+    def fail(prompt):
+        raise ValueError("chave inválida")
+
+    backend = llm_gateway.backend = FakeBackend(respond=fail)
+    with pytest.raises(ValueError):
+        llm_gateway.generate("p")
+    assert backend.calls == 1
+    assert not is_transient(ValueError()) and is_transient(TimeoutError())
+
+
+def test_timeout_bounds_the_whole_call(app):
+    llm_gateway.backend = FakeBackend(delay=5)
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        llm_gateway.generate("p", timeout=0.1)
+    assert time.monotonic() - started < 1
+
+
+def test_stream_retries_only_before_the_first_part(app):
+    backend = llm_gateway.backend = BrokenStream(0)
+    with pytest.raises(TransientLLMError):
+        list(llm_gateway.stream("p"))
+    assert backend.calls == 3
+
+    backend = llm_gateway.backend = BrokenStream(2)
+    received = []
+    with pytest.raises(TransientLLMError):
+        for chunk in llm_gateway.stream("p"):
+            received.append(chunk)
+    assert backend.calls == 1 and received == ["parte0 ", "parte1 "]
+
+
+@pytest.mark.config(LLM_MAX_CONCURRENCY_PER_USER=1)
+def test_per_user_limit_does_not_block_other_users(app):
+    thread = hold_call(1, 0.3)
+    with pytest.raises(LLMBusyError):
+        llm_gateway.generate("p", user_id=1, timeout=0.05)
+    assert llm_gateway.generate("p", user_id=2, timeout=0.05) == "ok"
+    thread.join()
+    assert llm_gateway.generate("p", user_id=1) == "ok"
+    assert llm_gateway._user_slots == {}
+
+
+@pytest.mark.config(LLM_MAX_CONCURRENCY=1)
+def test_process_limit(app):
+    thread = hold_call(1, 0.3)
+    with pytest.raises(LLMBusyError):
+        llm_gateway.generate("p", user_id=2, timeout=0.05)
+    thread.join()
+    assert llm_gateway._user_slots == {}
+
+
+@pytest.mark.config(LLM_MAX_CONCURRENCY=1)
+def test_closed_stream_releases_its_slots(app):
+    llm_gateway.backend = FakeBackend(text="um dois três")
+    stream = llm_gateway.stream("p", user_id=1)
+    assert next(stream) == "um"
+    assert llm_gateway._user_slots[1][1] == 1
+    stream.close()
+    assert llm_gateway._user_slots == {}
+    assert llm_gateway.generate("p", timeout=0.05) == "um dois três"
+
+
+def test_async_calls_retry_and_stream(app):
+    backend = llm_gateway.backend = FakeBackend(text="a b", fail_times=1)
+
+    async def run():
+        text = await llm_gateway.agenerate("p", user_id=1)
+        chunks = [chunk async for chunk in llm_gateway.astream("p", user_id=1)]
+        return text, chunks
+
+    assert asyncio.run(run()) == ("a b", ["a", " b"])
+    assert backend.calls == 3
+    assert llm_gateway._user_slots == {}
+
+
+@pytest.mark.config(LLM_MAX_CONCURRENCY_PER_USER=1)
+def test_async_calls_share_the_limits_and_release_on_cancel(app):
+    llm_gateway.backend = FakeBackend(text="ok", delay=0.3)
+
+    async def run():
+        first = asyncio.create_task(llm_gateway.agenerate("p", user_id=1))
+        await asyncio.sleep(0.05)
+        with pytest.raises(LLMBusyError):
+            await llm_gateway.agenerate("p", user_id=1, timeout=0.05)
+        waiting = asyncio.create_task(llm_gateway.agenerate("p", user_id=1))
+        await asyncio.sleep(0.05)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        return await first
+
+    assert asyncio.run(run()) == "ok"
+    assert llm_gateway._user_slots == {}
@@ -0,0 +1,155 @@
+# tests/test_message_archive.py
+
+from datetime import date, datetime, timedelta
+import pytest
+from extensions import db
+from models import Message, MessageArchive
+import message_archive
+import metrics
+import search
+
+OLD = datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0) - timedelta(days=200)
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.registry.reset()
+
+
+def add_messages(app, user_id, *timestamps, content="mensagem {}"):
+    """Uma mensagem por timestamp, alternando os papéis; retorna os ids."""
+    with app.app_context():
+        messages = [
+            Message(user_id=user_id, role=("user", "assistant")[index % 2], content=content.format(index), timestamp=timestamp)
+            for index, timestamp in enumerate(timestamps)
+        ]
+        db.session.add_all(messages)
+        db.session.commit()
+        return [message.id for message in messages]
+
+
+def archive(**options):
+    return message_archive.archive_messages(pause=0, **options)
+
+
+def test_old_messages_move_to_one_blob_per_day(app, user_id):
+    second_day = OLD + timedelta(days=1)
+    old_ids = add_messages(app, user_id, OLD, OLD + timedelta(minutes=1), second_day, content="conversa ção {0} " * 20)
+    recent = add_messages(app, user_id, datetime.utcnow())
+    with app.app_context():
+        assert archive() == 3
+        assert [message.id for message in Message.query.all()] == recent
+        archives = MessageArchive.query.order_by(MessageArchive.day).all()
+        assert [(a.day, a.message_count, a.codec) for a in archives] == [(OLD.date(), 2, "zlib"), (second_day.date(), 1, "zlib")]
+        assert (archives[0].first_message_id, archives[0].last_message_id) == (old_ids[0], old_ids[1])
+        assert len(archives[0].data) < archives[0].raw_size
+        messages = message_archive.read_day(user_id, OLD.date())
+        assert [(m.id, m.role, m.timestamp) for m in messages] == [
+            (old_ids[0], "user", OLD), (old_ids[1], "assistant", OLD + timedelta(minutes=1)),
+        ]
+        assert messages[0].content.startswith("conversa ção 0")
+        assert message_archive.read_day(user_id, date(2000, 1, 1)) is None
+    assert metrics.MESSAGE_ARCHIVE.value("archived") == 3
+    assert metrics.MESSAGE_ARCHIVE.value("read") == 1
+
+
+def test_small_batches_merge_into_the_same_day(app, user_id):
+    ids = add_messages(app, user_id, *(OLD + timedelta(minutes=minute) for minute in range(5)))
+    with app.app_context():
+        cutoff = datetime.utcnow() - timedelta(days=90)
+        codec = message_archive.ZlibCodec()
+        # Execução interrompida depois do primeiro lote: o resto do dia é juntado ao blob
+        assert message_archive.archive_batch(user_id, cutoff, 2, codec) == 2
+        assert archive(batch_size=2) == 3
+        archived = MessageArchive.query.one()
+        assert archived.message_count == 5
+        assert [m.id for m in message_archive.read_day(user_id, OLD.date())] == ids
+        assert archive() == 0
+
+
+def test_only_the_chosen_users_are_archived(app, user_id, other_client):
+    _, other_id = other_client
+    add_messages(app, user_id, OLD)
+    add_messages(app, other_id, OLD)
+    with app.app_context():
+        assert archive(user_ids=[other_id]) == 1
+        assert Message.query.filter_by(user_id=user_id).count() == 1
+        assert message_archive.has_archive(other_id) and not message_archive.has_archive(user_id)
+
+
+def test_retention_days_come_from_the_config(app, user_id):
+    add_messages(app, user_id, datetime.utcnow() - timedelta(days=10))
+    with app.app_context():
+        assert archive() == 0
+        assert archive(days=5) == 1
+
+
+def test_archived_messages_leave_the_search_index(app, user_id):
+    add_messages(app, user_id, OLD, content="orçamento antigo {}")
+    with app.app_context():
+        assert len(search.search_messages(user_id, "orçamento").items) == 1
+        archive()
+        assert search.search_messages(user_id, "orçamento").items == []
+
+
+def test_blobs_are_read_with_their_own_codec(app, user_id):
+    add_messages(app, user_id, OLD)
+    with app.app_context():
+        archive(codec=message_archive.ZlibCodec(level=1))
+        app.config["MESSAGE_ARCHIVE_CODEC"] = "zstd"
+        assert len(message_archive.read_day(user_id, OLD.date())) == 1
+
+
+def test_zstd_codec_round_trip():
+    pytest.importorskip("zstandard")
+    codec = message_archive.ZstdCodec()
+    assert codec.decompress(codec.compress(b"abc" * 100)) == b"abc" * 100
+
+
+def test_archive_pages_and_day_view(app, client, user_id):
+    days = [OLD + timedelta(days=offset) for offset in range(3)]
+    add_messages(app, user_id, *days)
+    with app.app_context():
+        archive()
+    assert "Ver conversas arquivadas" in client.get("/chat").get_data(as_text=True)
+    app.config["CHAT_HISTORY_PAGE"] = 2
+    listing = client.get("/chat/archive").get_data(as_text=True)
+    assert days[2].strftime("%d/%m/%Y") in listing and days[0].strftime("%d/%m/%Y") not in listing
+    older = client.get("/chat/archive", query_string={"before": days[1].date().isoformat()}).get_data(as_text=True)
+    assert days[0].strftime("%d/%m/%Y") in older
+
+    page = client.get(f"/chat/archive/{days[1].date().isoformat()}").get_data(as_text=True)
+    assert "mensagem 1" in page
+    assert f"/chat/archive/{days[0].date().isoformat()}" in page and f"/chat/archive/{days[2].date().isoformat()}" in page
+
+
+def test_missing_or_foreign_days_are_not_found(app, client, user_id, other_client):
+    other, other_id = other_client
+    add_messages(app, other_id, OLD)
+    with app.app_context():
+        archive()
+    day = OLD.date().isoformat()
+    assert other.get(f"/chat/archive/{day}").status_code == 200
+    assert client.get(f"/chat/archive/{day}").status_code == 404
+    assert client.get("/chat/archive/ontem").status_code == 404
+    assert "Nenhuma conversa arquivada" in client.get("/chat/archive").get_data(as_text=True)
+
+
+def test_api_does_not_serve_archived_messages(app, client, user_id):
+    old_id = add_messages(app, user_id, OLD)[0]
+    with app.app_context():
+        archive()
+    assert client.get("/api/v1/messages").json["items"] == []
+    assert client.get(f"/api/v1/messages/{old_id}").status_code == 404
+
+
+def test_cli_archives_and_reports_stats(app, user_id):
+    add_messages(app, user_id, OLD, OLD, datetime.utcnow(), content="texto repetido " * 50 + "{}")
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=["chat", "archive", "--user", "ana", "--pause", "0"])
+    assert result.exit_code == 0 and result.output.startswith("2 mensagens arquivadas")
+    output = runner.invoke(args=["chat", "archive-stats"]).output
+    assert "hot_messages: 1" in output and "archived_messages: 2" in output
+    assert "compression_ratio" in output
+    result = runner.invoke(args=["chat", "archive", "--user", "ninguém"])
+    assert result.exit_code != 0 and "Usuário não encontrado" in result.output
@@ -0,0 +1,99 @@
+# tests/test_metrics.py
+
+import pytest
+from llm import llm_gateway, FakeBackend
+import metrics
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.registry.reset()
+
+
+def test_metrics_page_is_hidden_by_default(client):
+    assert client.get("/metrics").status_code == 404
+
+
+@pytest.mark.config(METRICS_PUBLIC=True)
+def test_public_metrics_page(client):
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain" and "version=0.0.4" in response.headers["Content-Type"]
+    assert "# TYPE http_request_duration_seconds histogram" in response.get_data(as_text=True)
+
+
+@pytest.mark.config(METRICS_TOKEN="segredo")
+def test_metrics_token(client):
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer errado"}).status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer segredo"}).status_code == 200
+
+
+@pytest.mark.config(METRICS_ENABLED=False, METRICS_PUBLIC=True)
+def test_disabled_metrics(client):
+    assert client.get("/metrics").status_code == 404
+    assert "Server-Timing" not in client.get("/login").headers
+
+
+def test_text_format():
+    counter = metrics.Counter("exemplo_total", "Exemplo.", ("nome",))
+    counter.inc('a"b\nc', amount=2)
+    histogram = metrics.Histogram("exemplo_segundos", "Exemplo.", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value)
+    registry = metrics.Registry()
+    registry.add(counter)
+    registry.add(histogram)
+    assert registry.render().splitlines() == [
+        "# HELP exemplo_total Exemplo.",
+        "# TYPE exemplo_total counter",
+        'exemplo_total{nome="a\\"b\\nc"} 2',
+        "# HELP exemplo_segundos Exemplo.",
+        "# TYPE exemplo_segundos histogram",
+        'exemplo_segundos_bucket{le="0.1"} 1',
+        'exemplo_segundos_bucket{le="1.0"} 2',
+        'exemplo_segundos_bucket{le="+Inf"} 3',
+        "exemplo_segundos_sum 5.55",
+        "exemplo_segundos_count 3",
+    ]
+
+
+def test_requests_are_measured(client, user_id, make_tasks):
+    make_tasks(user_id, 3)
+    response = client.get("/")
+    timing = response.headers["Server-Timing"]
+    assert timing.startswith("db;dur=") and "consultas" in timing and "app;dur=" in timing
+    assert metrics.REQUEST_LATENCY.count("GET", "tasks.index", "200") == 1
+    assert metrics.REQUEST_QUERIES.count("tasks.index") == 1
+    assert metrics.REQUEST_QUERIES.total("tasks.index") >= 1
+    assert metrics.TEMPLATE_RENDER.count("tasks.html") == 1
+    assert metrics.REQUEST_LATENCY.count("GET", "(sem rota)", "404") == 0
+    client.get("/nao-existe")
+    assert metrics.REQUEST_LATENCY.count("GET", "(sem rota)", "404") == 1
+
+
+@pytest.mark.config(METRICS_SLOW_REQUEST_MS=0.001)
+def test_slow_requests_are_logged_with_grouped_queries(client, user_id, caplog):
+    client.get("/")
+    assert metrics.SLOW_REQUESTS.value("tasks.index") == 1
+    log = caplog.text
+    assert "Requisição lenta: GET / -> 200" in log
+    assert "x " in log and " ms  SELECT" in log
+
+
+def test_llm_calls_and_caches_are_reported(app):
+    llm_gateway.backend = FakeBackend(text="resposta " * 8)
+    llm_gateway.generate("pergunta " * 10)
+
+    def fail(prompt):
+        raise ValueError("sem chave")
+
+    llm_gateway.backend = FakeBackend(respond=fail)
+    with pytest.raises(ValueError):
+        llm_gateway.generate("pergunta")
+    assert metrics.LLM_LATENCY.count("generate", "ok") == 1
+    assert metrics.LLM_LATENCY.count("generate", "error") == 1
+    assert metrics.LLM_ERRORS.value("generate", "ValueError") == 1
+    assert metrics.LLM_TOKENS.value("response") == 19
+    text = metrics.registry.render()
+    assert 'llm_cache_stats{stat="misses"}' in text and 'fragment_cache_stats{stat="hits"}' in text
@@ -0,0 +1,100 @@
+# tests/test_migrations.py
+
+import logging
+import os
+from datetime import date
+import pytest
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from flask_migrate import upgrade, downgrade
+from sqlalchemy import inspect
+from app_factory import create_app
+from extensions import db
+from models import User, Task, Message
+import search
+from conftest import TEST_CONFIG
+
+
+@pytest.fixture(autouse=True)
+def keep_loggers():
+    """O fileConfig do migrations/env.py desliga os loggers já criados: religa-os depois do teste."""
+    enabled = [
+        logger for logger in logging.root.manager.loggerDict.values()
+        if isinstance(logger, logging.Logger) and not logger.disabled
+    ]
+    yield
+    for logger in enabled:
+        logger.disabled = False
+
+
+@pytest.fixture
+def migrated_app(tmp_path):
+    app = create_app({
+        **TEST_CONFIG,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///" + os.path.join(tmp_path, "migrations.db"),
+        "MIGRATIONS_ENABLED": True,
+    })
+    with app.app_context():
+        upgrade()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+def plan(statement):
+    compiled = statement.compile(db.engine, compile_kwargs={"literal_binds": True})
+    rows = db.session.execute(db.text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+    return [row[-1] for row in rows]
+
+
+def test_migrations_match_the_models(migrated_app):
+    with db.engine.connect() as connection:
+        context = MigrationContext.configure(connection, opts={"include_object": search.include_object})
+        assert compare_metadata(context, db.metadata) == []
+
+
+def test_composite_indexes_exist(migrated_app):
+    indexes = {index["name"]: index["column_names"] for index in inspect(db.engine).get_indexes("task")}
+    assert indexes["ix_task_user_display_order"] == ["user_id", "display_order"]
+    assert indexes["uq_task_user_task_name"] == ["user_id", "task_name"]
+    assert indexes["ix_task_user_status_due_date"] == ["user_id", "status", "due_date"]
+    message_indexes = {index["name"] for index in inspect(db.engine).get_indexes("message")}
+    assert "ix_message_user_timestamp" in message_indexes
+
+
+def test_hot_queries_use_the_indexes(migrated_app):
+    user = User(username="plano", password="x")
+    db.session.add(user)
+    db.session.commit()
+    db.session.execute(db.insert(Task), [
+        {"task_name": f"t{i}", "cost": 1.0, "due_date": date(2030, 1, 1), "display_order": i, "user_id": user.id}
+        for i in range(50)
+    ])
+    db.session.commit()
+    db.session.execute(db.text("ANALYZE"))
+    listing = db.select(Task.id).where(Task.user_id == user.id).order_by(Task.display_order, Task.id).limit(50)
+    by_status = db.select(Task.id).where(Task.user_id == user.id, Task.status == "Pendente", Task.due_date < date(2030, 6, 1))
+    history = db.select(Message.id).where(Message.user_id == user.id).order_by(Message.timestamp.desc()).limit(30)
+    for statement in (listing, by_status, history):
+        steps = plan(statement)
+        assert not [step for step in steps if step.startswith(("SCAN task", "SCAN message"))], steps
+
+
+def test_downgrade_to_base_and_back(migrated_app):
+    downgrade(revision="base")
+    assert "task" not in inspect(db.engine).get_table_names()
+    upgrade()
+    assert {"task", "message", "user"} <= set(inspect(db.engine).get_table_names())
+
+
+def test_downgrade_keeps_the_message_table_and_its_rows(migrated_app):
+    # Bancos criados por db.create_all() já tinham a tabela antes da revisão 3b8e5f1c9d2a
+    db.session.execute(db.text(
+        "INSERT INTO message (user_id, content, role, timestamp) VALUES (1, 'antiga', 'user', '2020-01-01')"
+    ))
+    db.session.commit()
+    downgrade(revision="24f639256b72")
+    assert "ix_message_user_timestamp" not in {index["name"] for index in inspect(db.engine).get_indexes("message")}
+    assert "ix_task_user_display_order" not in {index["name"] for index in inspect(db.engine).get_indexes("task")}
+    upgrade()
+    assert db.session.execute(db.text("SELECT content FROM message")).scalar_one() == "antiga"
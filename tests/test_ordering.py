@@ -0,0 +1,115 @@
+# tests/test_ordering.py
+
+from extensions import db
+from models import Task
+import ordering
+from conftest import task_names
+
+
+def orders(user_id):
+    return dict(db.session.query(Task.task_name, Task.display_order).filter_by(user_id=user_id))
+
+
+def test_new_tasks_are_appended_with_gaps(app, client, user_id):
+    for name in ("a", "b", "c"):
+        client.post("/add", data={"task_name": name, "cost": "1", "due_date": "01/01/2030"})
+    with app.app_context():
+        assert orders(user_id) == {"a": ordering.GAP, "b": 2 * ordering.GAP, "c": 3 * ordering.GAP}
+
+
+def test_move_up_swaps_only_the_two_neighbours(app, client, user_id, make_tasks):
+    ids = make_tasks(user_id, 4)
+    with app.app_context():
+        before = orders(user_id)
+    response = client.post(f"/move_up/{ids[2]}", headers={"Accept": "application/json"})
+    assert response.status_code == 200
+    with app.app_context():
+        after = orders(user_id)
+        assert task_names(user_id) == ["Tarefa 0", "Tarefa 2", "Tarefa 1", "Tarefa 3"]
+    changed = {name for name in before if before[name] != after[name]}
+    assert changed == {"Tarefa 1", "Tarefa 2"}
+
+
+def test_move_up_at_top_and_move_down_at_bottom_conflict(client, user_id, make_tasks):
+    ids = make_tasks(user_id, 2)
+    headers = {"Accept": "application/json"}
+    assert client.post(f"/move_up/{ids[0]}", headers=headers).status_code == 409
+    assert client.post(f"/move_down/{ids[1]}", headers=headers).status_code == 409
+
+
+def test_move_before_changes_only_the_moved_row(app, client, user_id, make_tasks):
+    ids = make_tasks(user_id, 5)
+    with app.app_context():
+        before = orders(user_id)
+    response = client.post(f"/move/{ids[4]}", data={"before_id": str(ids[1])}, headers={"Accept": "application/json"})
+    assert response.status_code == 200
+    assert response.json["id"] == ids[4]
+    with app.app_context():
+        after = orders(user_id)
+        assert task_names(user_id) == ["Tarefa 0", "Tarefa 4", "Tarefa 1", "Tarefa 2", "Tarefa 3"]
+    assert {name for name in before if before[name] != after[name]} == {"Tarefa 4"}
+    assert before["Tarefa 0"] < after["Tarefa 4"] < before["Tarefa 1"]
+
+
+def test_move_to_position_top_middle_and_end(app, client, user_id, make_tasks):
+    ids = make_tasks(user_id, 4)
+    client.post(f"/move/{ids[3]}", data={"position": "1"})
+    client.post(f"/move/{ids[0]}", data={"position": "99"})
+    client.post(f"/move/{ids[2]}", data={"position": "2"})
+    with app.app_context():
+        assert task_names(user_id) == ["Tarefa 3", "Tarefa 2", "Tarefa 1", "Tarefa 0"]
+
+
+def test_move_without_room_rebalances_once(app, user_id, make_tasks):
+    ids = make_tasks(user_id, 3)
+    with app.app_context():
+        # Vizinhos colados: não há valor inteiro entre 1 e 2
+        db.session.execute(db.update(Task).where(Task.id == ids[0]).values(display_order=1))
+        db.session.execute(db.update(Task).where(Task.id == ids[1]).values(display_order=2))
+        db.session.commit()
+        task = db.session.get(Task, ids[2])
+        ordering.move_before(task, db.session.get(Task, ids[1]))
+        db.session.commit()
+        assert task_names(user_id) == ["Tarefa 0", "Tarefa 2", "Tarefa 1"]
+        values = sorted(orders(user_id).values())
+        assert len(set(values)) == 3
+        assert values[0] == ordering.GAP
+
+
+def test_swap_with_tied_orders_rebalances_first(app, user_id, make_tasks):
+    ids = make_tasks(user_id, 3)
+    with app.app_context():
+        db.session.execute(db.update(Task).values(display_order=5))
+        db.session.commit()
+        task = db.session.get(Task, ids[1])
+        ordering.swap(task, ordering.task_above(task))
+        db.session.commit()
+        assert task_names(user_id) == ["Tarefa 1", "Tarefa 0", "Tarefa 2"]
+        assert sorted(orders(user_id).values()) == [ordering.GAP, 2 * ordering.GAP, 3 * ordering.GAP]
+
+
+def test_rebalance_keeps_pending_changes_and_other_objects(app, user_id, other_client, make_tasks):
+    _, other_id = other_client
+    ids = make_tasks(user_id, 2)
+    other_ids = make_tasks(other_id, 1)
+    with app.app_context():
+        task = db.session.get(Task, ids[0])
+        other = db.session.get(Task, other_ids[0])
+        task.task_name = "Renomeada"
+        ordering.rebalance(user_id)
+        # Só posição e versão das tarefas do usuário são recarregadas
+        assert db.inspect(task).expired_attributes == {"display_order", "version"}
+        assert not db.inspect(other).expired_attributes
+        assert task.display_order == ordering.GAP
+        db.session.commit()
+        assert task_names(user_id) == ["Renomeada", "Tarefa 1"]
+
+
+def test_moves_do_not_touch_other_users(app, client, user_id, other_client, make_tasks):
+    _, other_id = other_client
+    ids = make_tasks(user_id, 2)
+    other_ids = make_tasks(other_id, 2)
+    assert client.post(f"/move_up/{other_ids[1]}").status_code == 404
+    client.post(f"/move/{ids[1]}", data={"position": "1"})
+    with app.app_context():
+        assert task_names(other_id) == ["Tarefa 0", "Tarefa 1"]
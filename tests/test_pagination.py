@@ -0,0 +1,106 @@
+# tests/test_pagination.py
+
+import re
+from werkzeug.datastructures import MultiDict
+from extensions import db
+from models import Task
+import ordering
+from pagination import (
+    MAX_PAGE_SIZE, decode_cursor, filtered_tasks, paginate_tasks, parse_page_size, parse_task_filters,
+)
+
+
+def names(page):
+    return [task.task_name for task in page.items]
+
+
+def walk(user_id, per_page, filters=None):
+    pages = []
+    cursor = None
+    while True:
+        page = paginate_tasks(filtered_tasks(user_id, filters or {}), after=cursor, per_page=per_page)
+        pages.append(names(page))
+        if not page.has_next:
+            return pages
+        cursor = page.next_cursor
+
+
+def test_forward_pages_cover_every_task_once(app, user_id, make_tasks):
+    make_tasks(user_id, 7)
+    with app.app_context():
+        pages = walk(user_id, 3)
+    assert pages == [
+        ["Tarefa 0", "Tarefa 1", "Tarefa 2"], ["Tarefa 3", "Tarefa 4", "Tarefa 5"], ["Tarefa 6"],
+    ]
+
+
+def test_before_cursor_returns_the_previous_page(app, user_id, make_tasks):
+    make_tasks(user_id, 7)
+    with app.app_context():
+        first = paginate_tasks(filtered_tasks(user_id, {}), per_page=3)
+        second = paginate_tasks(filtered_tasks(user_id, {}), after=first.next_cursor, per_page=3)
+        assert not first.has_prev and second.has_prev
+        back = paginate_tasks(filtered_tasks(user_id, {}), before=second.prev_cursor, per_page=3)
+        assert names(back) == names(first)
+        assert not back.has_prev
+        assert back.next_cursor == first.next_cursor
+        assert back.next_id == second.items[0].id
+
+
+def test_cursor_survives_moves_without_duplicates_or_gaps(app, user_id, make_tasks):
+    ids = make_tasks(user_id, 6)
+    with app.app_context():
+        first = paginate_tasks(filtered_tasks(user_id, {}), per_page=3)
+        first_names = names(first)
+        # Depois de ler a primeira página, a última tarefa vai para o topo e a primeira para o fim
+        ordering.move_to_position(db.session.get(Task, ids[5]), 1)
+        ordering.move_before(db.session.get(Task, ids[0]), None)
+        db.session.commit()
+        second = paginate_tasks(filtered_tasks(user_id, {}), after=first.next_cursor, per_page=3)
+    assert first_names == ["Tarefa 0", "Tarefa 1", "Tarefa 2"]
+    # A tarefa movida para o topo já ficou para trás; a movida para o fim aparece de novo no fim
+    assert names(second) == ["Tarefa 3", "Tarefa 4", "Tarefa 0"]
+
+
+def test_filters_restrict_every_page(app, user_id, make_tasks):
+    make_tasks(user_id, 4, prefix="Pendente", status="Pendente", category="casa")
+    make_tasks(user_id, 3, prefix="Feita", status="Concluída", category="casa")
+    with app.app_context():
+        pages = walk(user_id, 2, {"status": "Concluída"})
+        assert pages == [["Feita 0", "Feita 1"], ["Feita 2"]]
+        assert walk(user_id, 10, {"category": "outra"}) == [[]]
+
+
+def test_due_date_range_filter(app, user_id, make_tasks):
+    from datetime import date
+
+    make_tasks(user_id, 1, prefix="Janeiro", due_date=date(2030, 1, 10))
+    make_tasks(user_id, 1, prefix="Março", due_date=date(2030, 3, 10))
+    with app.app_context():
+        filters = parse_task_filters(MultiDict({"due_from": "01/02/2030", "due_to": "31/12/2030"}))
+        assert walk(user_id, 10, filters) == [["Março 0"]]
+
+
+def test_invalid_filters_cursors_and_sizes_are_ignored():
+    assert parse_task_filters(MultiDict({"status": "  ", "due_from": "2030-01-01", "category": "x"})) == {"category": "x"}
+    assert decode_cursor("abc") is None and decode_cursor("1_x") is None
+    assert decode_cursor("2048_7") == (2048, 7)
+    assert parse_page_size(MultiDict({"per_page": "100000"})) == MAX_PAGE_SIZE
+    assert parse_page_size(MultiDict({"per_page": "-3"})) == 1
+
+
+def test_index_links_to_the_next_page_and_keeps_filters(client, user_id, make_tasks):
+    make_tasks(user_id, 5, status="Pendente")
+    html = client.get("/?per_page=2&status=Pendente").get_data(as_text=True)
+    assert len(re.findall(r'data-task-id="\d+"', html)) == 2
+    link = re.search(r'href="(/\?[^"]*after=[^"]+)"', html).group(1).replace("&amp;", "&")
+    assert "status=Pendente" in link and "per_page=2" in link
+    html = client.get(link).get_data(as_text=True)
+    assert "Tarefa 2" in html and "Tarefa 0" not in html
+
+
+def test_report_picker_is_paginated(client, user_id, make_tasks):
+    make_tasks(user_id, 5)
+    html = client.get("/generate_report?per_page=2").get_data(as_text=True)
+    assert "Tarefa 1" in html and "Tarefa 2" not in html
+    assert "after=" in html
@@ -0,0 +1,146 @@
+# tests/test_report_jobs.py
+
+import os
+import runpy
+import threading
+from datetime import datetime, timedelta
+import pytest
+from flask import current_app
+from extensions import db, jobs
+from jobs import JobQueue, ThreadBackend
+from llm import llm_gateway, FakeBackend
+from models import ReportJob
+from conftest import ROOT
+
+
+def submit_report(client, task_ids):
+    return client.post("/generate_report", data={"task_ids": [str(task_id) for task_id in task_ids]})
+
+
+def test_report_job_runs_and_reports_its_status(app, client, user_id, make_tasks):
+    llm_gateway.backend = FakeBackend(text="Relatório pronto.")
+    ids = make_tasks(user_id, 3)
+    response = submit_report(client, ids[:2])
+    assert response.status_code == 302
+    job_url = response.headers["Location"]
+    status = client.get(job_url + "/status").json
+    assert status["status"] == ReportJob.DONE and status["finished"]
+    assert status["result"] == "Relatório pronto."
+    assert "total" in status["timings"]
+    assert "Relatório pronto." in client.get(job_url).get_data(as_text=True)
+    with app.app_context():
+        assert ReportJob.query.one().task_id_list == ids[:2]
+
+
+def test_tasks_of_other_users_are_left_out(app, client, user_id, other_client, make_tasks):
+    _, other_id = other_client
+    ids = make_tasks(user_id, 1)
+    other_ids = make_tasks(other_id, 1)
+    submit_report(client, ids + other_ids)
+    with app.app_context():
+        assert ReportJob.query.one().task_id_list == ids
+
+
+def test_empty_selection_creates_no_job(app, client, user_id):
+    response = client.post("/generate_report", data={})
+    assert response.status_code == 302
+    with app.app_context():
+        assert ReportJob.query.count() == 0
+
+
+def test_failed_generation_is_recorded(client, user_id, make_tasks):
+    def fail(prompt):
+        raise ValueError("sem chave")
+
+    llm_gateway.backend = FakeBackend(respond=fail)
+    response = submit_report(client, make_tasks(user_id, 1))
+    status = client.get(response.headers["Location"] + "/status").json
+    assert status["status"] == ReportJob.FAILED and status["finished"]
+    assert status["result"] is None
+
+
+@pytest.mark.config(REPORT_JOB_TIMEOUT=60)
+def test_stuck_jobs_are_failed_when_read(app, client, user_id):
+    now = datetime.utcnow()
+    with app.app_context():
+        stuck = ReportJob(user_id=user_id, task_ids="[]", status=ReportJob.RUNNING, started_at=now - timedelta(minutes=5))
+        lost = ReportJob(user_id=user_id, task_ids="[]", created_at=now - timedelta(minutes=5))
+        recent = ReportJob(user_id=user_id, task_ids="[]", status=ReportJob.RUNNING, started_at=now)
+        db.session.add_all([stuck, lost, recent])
+        db.session.commit()
+        stuck_id, lost_id, recent_id = stuck.id, lost.id, recent.id
+    status = client.get(f"/reports/{stuck_id}/status").json
+    assert status["status"] == ReportJob.FAILED and status["finished"]
+    assert "Erro ao gerar o relatório" in client.get(f"/reports/{lost_id}").get_data(as_text=True)
+    assert client.get(f"/reports/{recent_id}/status").json["status"] == ReportJob.RUNNING
+    with app.app_context():
+        assert db.session.get(ReportJob, lost_id).error == "Tempo limite excedido."
+        assert db.session.get(ReportJob, lost_id).finished_at is not None
+
+
+@pytest.mark.config(REPORT_JOB_TIMEOUT=60)
+def test_stuck_jobs_are_failed_in_the_recent_list(app, client, user_id):
+    with app.app_context():
+        job = ReportJob(user_id=user_id, task_ids="[]", status=ReportJob.RUNNING,
+                        started_at=datetime.utcnow() - timedelta(hours=1))
+        db.session.add(job)
+        db.session.commit()
+        job_id = job.id
+    client.get("/generate_report")
+    with app.app_context():
+        assert db.session.get(ReportJob, job_id).status == ReportJob.FAILED
+
+
+def test_vercel_runs_jobs_inline(monkeypatch):
+    monkeypatch.delenv("JOB_BACKEND", raising=False)
+    monkeypatch.setenv("VERCEL", "1")
+    assert runpy.run_path(os.path.join(ROOT, "config.py"))["Config"].JOB_BACKEND == "inline"
+    monkeypatch.delenv("VERCEL")
+    assert runpy.run_path(os.path.join(ROOT, "config.py"))["Config"].JOB_BACKEND == "thread"
+
+
+def test_jobs_of_other_users_are_not_found(client, user_id, other_client, make_tasks):
+    other, other_id = other_client
+    response = submit_report(other, make_tasks(other_id, 1))
+    job_url = response.headers["Location"]
+    assert client.get(job_url).status_code == 404
+    assert client.get(job_url + "/status").status_code == 404
+
+
+class RecordingBackend:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, fn, *args):
+        self.submitted.append((fn, args))
+
+
+@pytest.mark.config(JOB_BACKEND=RecordingBackend())
+def test_custom_backend_receives_the_job(app):
+    backend = app.config["JOB_BACKEND"]
+    seen = []
+    jobs.submit(lambda value: seen.append((value, current_app.name)), 7)
+    assert len(backend.submitted) == 1 and seen == []
+    # O backend executa o job dentro de um app context próprio
+    fn, args = backend.submitted[0]
+    fn(*args)
+    assert seen == [(7, app.name)]
+
+
+def test_job_errors_are_logged_not_raised(app, caplog):
+    queue = JobQueue(app)
+
+    def broken():
+        raise RuntimeError("falhou")
+
+    queue.submit(broken)
+    assert "Erro ao executar o job broken" in caplog.text
+
+
+def test_thread_backend_runs_in_the_background(app):
+    queue = JobQueue()
+    queue.init_app(app)
+    queue.backend = ThreadBackend(max_workers=1)
+    done = threading.Event()
+    queue.submit(lambda: done.set() if db.session is not None else None)
+    assert done.wait(5)
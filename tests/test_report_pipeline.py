@@ -0,0 +1,123 @@
+# tests/test_report_pipeline.py
+
+import json
+import threading
+import time
+from datetime import date
+from types import SimpleNamespace
+import pytest
+from llm import estimate_tokens, llm_gateway, FakeBackend
+from models import ReportJob
+from reports import (
+    MAP_HEADER, REDUCE_HEADER, REPORT_HEADER, ReportPipeline, batch_blocks, build_report_prompt, iter_task_blocks,
+)
+
+
+def fake_task(name, description=None, notes=None, status="Pendente", priority=None):
+    return SimpleNamespace(
+        task_name=name, description=description, notes=notes, status=status, priority=priority,
+        due_date=date(2030, 1, 2), cost=12.5,
+    )
+
+
+def test_task_blocks_are_numbered_and_skip_empty_fields():
+    blocks = list(iter_task_blocks([fake_task("A", "desc", priority="Alta"), fake_task("B", notes="nota")], start=3))
+    assert blocks == [
+        "**Tarefa 3:** A\n"
+        "- **Status:** Pendente | **Prioridade:** Alta | **Data Prevista para Inicialização:** 02/01/2030 | "
+        "**Custo:** R$12.50\n- **Descrição:** desc\n\n",
+        "**Tarefa 4:** B\n"
+        "- **Status:** Pendente | **Prioridade:** N/A | **Data Prevista para Inicialização:** 02/01/2030 | "
+        "**Custo:** R$12.50\n- **Notas:** nota\n\n",
+    ]
+
+
+def test_batches_respect_the_token_budget():
+    blocks = ["x" * 39, "y" * 39, "z" * 39, "w" * 400]
+    batches = list(batch_blocks(blocks, 20))
+    # Cada bloco pequeno estima 10 tokens: dois por lote; o grande fica sozinho
+    assert batches == [blocks[:2], blocks[2:3], blocks[3:]]
+    assert list(batch_blocks([], 20)) == []
+    assert all(sum(estimate_tokens(b) for b in batch) <= 20 for batch in batches[:2])
+
+
+def test_small_selection_makes_a_single_call(app):
+    prompts = []
+    tasks = [fake_task(f"Tarefa {i}") for i in range(3)]
+    with app.app_context():
+        pipeline = ReportPipeline(lambda prompt: prompts.append(prompt) or "relatório")
+        assert pipeline.run(tasks, "### Indicadores\n\n") == "relatório"
+    assert prompts == [build_report_prompt(tasks, "### Indicadores\n\n")]
+    assert prompts[0].startswith(REPORT_HEADER)
+    assert pipeline.timings["batches"] == 1
+
+
+@pytest.mark.file_db
+def test_large_selection_is_summarized_in_batches_and_reduced(app):
+    prompts = []
+    lock = threading.Lock()
+
+    def generate(prompt):
+        with lock:
+            prompts.append(prompt)
+        if prompt.startswith(MAP_HEADER):
+            return f"resumo {prompt.count('**Tarefa ')}"
+        return "relatório final"
+
+    tasks = [fake_task(f"Tarefa {i}", description="texto " * 20) for i in range(30)]
+    with app.app_context():
+        pipeline = ReportPipeline(generate, token_budget=200, concurrency=3)
+        assert pipeline.run(tasks, "INDICADORES\n") == "relatório final"
+    maps = [prompt for prompt in prompts if prompt.startswith(MAP_HEADER)]
+    reduces = [prompt for prompt in prompts if prompt.startswith(REDUCE_HEADER)]
+    assert len(maps) == pipeline.timings["batches"] > 1
+    # Toda tarefa aparece em exatamente um lote, e os indicadores só na consolidação
+    assert sum(prompt.count("**Tarefa ") for prompt in maps) == 30
+    assert all("INDICADORES" not in prompt for prompt in maps)
+    assert len(reduces) == 1 and "INDICADORES" in reduces[0] and "#### Parte 1\nresumo" in reduces[0]
+    assert {"prompt", "map", "reduce", "total"} <= pipeline.timings.keys()
+
+
+@pytest.mark.file_db
+def test_map_calls_never_exceed_the_concurrency(app):
+    active, peak = 0, 0
+    lock = threading.Lock()
+
+    def generate(prompt):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.02)
+        with lock:
+            active -= 1
+        return "resumo"
+
+    tasks = [fake_task(f"Tarefa {i}", description="texto " * 40) for i in range(12)]
+    with app.app_context():
+        ReportPipeline(generate, token_budget=100, concurrency=2).run(tasks)
+    assert peak == 2
+
+
+@pytest.mark.file_db
+def test_map_failure_fails_the_report(app):
+    def generate(prompt):
+        raise RuntimeError("lote falhou")
+
+    tasks = [fake_task(f"Tarefa {i}", description="texto " * 40) for i in range(6)]
+    with app.app_context(), pytest.raises(RuntimeError):
+        ReportPipeline(generate, token_budget=100).run(tasks)
+
+
+@pytest.mark.file_db
+@pytest.mark.config(REPORT_TOKEN_BUDGET=50, REPORT_MAP_CONCURRENCY=2)
+def test_report_job_uses_the_configured_budget(app, client, user_id, make_tasks):
+    backend = llm_gateway.backend = FakeBackend(text="parte")
+    ids = make_tasks(user_id, 8, description="descrição longa " * 5)
+    client.post("/generate_report", data={"task_ids": [str(task_id) for task_id in ids]})
+    with app.app_context():
+        job = ReportJob.query.one()
+        assert job.status == ReportJob.DONE
+        timings = json.loads(job.timings)
+    assert timings["batches"] > 1
+    assert backend.calls >= timings["batches"] + 1
@@ -0,0 +1,87 @@
+# tests/test_search.py
+
+from datetime import datetime
+import pytest
+from extensions import db
+from models import Message, Task
+import search
+
+JSON = {"Accept": "application/json"}
+
+
+def found(client, q, scope="tasks", **args):
+    return client.get("/search", query_string={"q": q, "scope": scope, **args}, headers=JSON).json
+
+
+def names(result):
+    return [item["task_name"] for item in result["items"]]
+
+
+def test_query_terms_drop_search_syntax():
+    assert search.query_terms('relat* OR "NEAR" (a') == ["relat", "or", "near", "a"]
+    assert search.query_terms(" ".join(str(i) for i in range(20))) == [str(i) for i in range(8)]
+    assert search.query_terms(None) == []
+
+
+def test_highlight_escapes_the_text():
+    snippet = f"<b>{search.HIGHLIGHT_START}tinta{search.HIGHLIGHT_END}</b>"
+    assert str(search.highlight(snippet)) == "&lt;b&gt;<mark>tinta</mark>&lt;/b&gt;"
+
+
+def test_tasks_are_ranked_and_highlighted(client, user_id, other_client, make_tasks):
+    _, other_id = other_client
+    make_tasks(user_id, 1, prefix="Revisar contrato", notes="relatório anual")
+    make_tasks(user_id, 1, prefix="Relatório mensal")
+    make_tasks(user_id, 1, prefix="Comprar tinta")
+    make_tasks(other_id, 1, prefix="Relatório de outra pessoa")
+    result = found(client, "relat")
+    # Acento e prefixo não importam; o nome pesa mais que as notas
+    assert names(result) == ["Relatório mensal 0", "Revisar contrato 0"]
+    assert "<mark>Relatório</mark>" in result["items"][0]["snippet"]
+    assert names(found(client, "relatorio mensal")) == ["Relatório mensal 0"]
+    assert found(client, "***")["items"] == []
+
+
+def test_index_follows_edits_and_bulk_changes(app, client, user_id, make_tasks):
+    ids = make_tasks(user_id, 2, prefix="Pintar")
+    with app.app_context():
+        db.session.get(Task, ids[0]).description = "usar rolo de espuma"
+        db.session.commit()
+    assert names(found(client, "espuma")) == ["Pintar 0"]
+    client.post("/bulk", data={"action": "update", "task_ids": ids, "category": "reforma"})
+    assert len(found(client, "reforma")["items"]) == 2
+    client.post("/bulk", data={"action": "delete", "task_ids": ids[:1]})
+    assert names(found(client, "pintar")) == ["Pintar 1"]
+
+
+@pytest.mark.config(SEARCH_PAGE_SIZE=2)
+def test_results_are_paginated(client, user_id, make_tasks):
+    make_tasks(user_id, 5, prefix="Relatório")
+    first, second, third = (found(client, "relatório", page=page) for page in (1, 2, 3))
+    assert first["has_next"] and second["has_next"] and not third["has_next"]
+    assert len(set(names(first) + names(second) + names(third))) == 5
+
+
+def test_messages_are_searched_and_link_to_the_chat(app, client, user_id):
+    with app.app_context():
+        db.session.add_all([
+            Message(user_id=user_id, content="Qual o prazo do orçamento?", role="user", timestamp=datetime(2030, 1, 1)),
+            Message(user_id=user_id, content="Sem relação.", role="assistant", timestamp=datetime(2030, 1, 2)),
+        ])
+        db.session.commit()
+    result = found(client, "orcamento", scope="messages")
+    assert [item["role"] for item in result["items"]] == ["user"]
+    assert result["items"][0]["timestamp"] == "2030-01-01T00:00:00"
+    page = client.get("/search", query_string={"q": "orçamento", "scope": "messages"}).get_data(as_text=True)
+    assert f"/chat?at={result['items'][0]['id']}" in page and "<mark>orçamento</mark>" in page
+
+
+def test_rebuild_command_restores_the_index(app, client, user_id, make_tasks):
+    make_tasks(user_id, 1, prefix="Relatório")
+    with app.app_context():
+        db.session.execute(db.text("INSERT INTO task_fts(task_fts) VALUES ('delete-all')"))
+        db.session.commit()
+    assert found(client, "relatório")["items"] == []
+    result = app.test_cli_runner().invoke(args=["search", "rebuild"])
+    assert "Índice de busca reconstruído." in result.output
+    assert names(found(client, "relatório")) == ["Relatório 0"]
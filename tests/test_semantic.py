@@ -0,0 +1,169 @@
+# tests/test_semantic.py
+
+import numpy as np
+import pytest
+from sqlalchemy import event
+from extensions import db
+from models import Task
+import semantic
+from semantic import HashingEmbedder, UserIndex, decode_vector, encode_vector, semantic_index
+
+
+def embedding(task_id):
+    return db.session.query(Task.embedding).filter(Task.id == task_id).scalar()
+
+
+def similar(client, task_id, **args):
+    return client.get(f"/similar/{task_id}", query_string=args)
+
+
+class BrokenEmbedder:
+    name = "fora-do-ar"
+    dim = 256
+
+    def embed(self, texts):
+        raise ConnectionError("sem rede")
+
+
+def test_hashing_embedder_is_deterministic_and_normalized():
+    embedder = HashingEmbedder(64)
+    matrix = embedder.embed(["Relatório financeiro", "relatorio   FINANCEIRO", "", "comprar tinta"])
+    assert matrix.shape == (4, 64) and matrix.dtype == np.float32
+    assert np.allclose(matrix[0], matrix[1]) and np.allclose(np.linalg.norm(matrix[0]), 1.0)
+    assert not matrix[2].any()
+    assert np.allclose(HashingEmbedder(64).embed(["Relatório financeiro"])[0], matrix[0])
+
+
+def test_top_k_orders_excludes_and_filters():
+    matrix = np.eye(3, dtype=np.float32)
+    index = UserIndex(np.array([10, 20, 30]), matrix, (3, 30))
+    query = np.array([[0.9, 0.4, 0.0]], dtype=np.float32)
+    assert index.top_k(query, 5) == [[(10, pytest.approx(0.9)), (20, pytest.approx(0.4)), (30, 0.0)]]
+    assert index.top_k(query, 1, exclude=(10,)) == [[(20, pytest.approx(0.4))]]
+    assert index.top_k(query, 5, min_score=0.5) == [[(10, pytest.approx(0.9))]]
+    assert UserIndex(np.array([], dtype=np.int64), np.zeros((0, 3)), (0, None)).top_k(query, 3) == [[]]
+
+
+def test_pure_python_fallback_gives_the_same_vectors_and_ranking(monkeypatch):
+    texts = ["Relatório financeiro", "relatório mensal de custos", "", "comprar tinta"]
+    expected = [encode_vector(vector) for vector in HashingEmbedder(64).embed(texts)]
+    monkeypatch.setattr(semantic, "_numpy_module", None)
+    vectors = HashingEmbedder(64).embed(texts)
+    assert isinstance(vectors, list) and not any(vectors[2])
+    for vector, blob in zip(vectors, expected):
+        assert len(encode_vector(vector)) == len(blob)
+        assert decode_vector(encode_vector(vector)) == pytest.approx(decode_vector(blob), abs=1e-6)
+
+    index = UserIndex([10, 20, 30], [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]], (3, 30))
+    query = [[0.9, 0.4, 0.0]]
+    assert index.top_k(query, 5) == [[(10, pytest.approx(0.9)), (20, pytest.approx(0.4)), (30, 0.0)]]
+    assert index.top_k(query, 1, exclude=(10,)) == [[(20, pytest.approx(0.4))]]
+    assert index.top_k(query, 5, min_score=0.5) == [[(10, pytest.approx(0.9))]]
+
+
+def test_similar_tasks_without_numpy(app, client, user_id, make_tasks, monkeypatch):
+    target, = make_tasks(user_id, 1, prefix="Pintar parede do quarto")
+    make_tasks(user_id, 1, prefix="Pintar parede da cozinha")
+    make_tasks(user_id, 1, prefix="Revisar contrato")
+    expected = similar(client, target).json["similar"]
+    monkeypatch.setattr(semantic, "_numpy_module", None)
+    semantic_index.clear()
+    items = similar(client, target).json["similar"]
+    assert [item["id"] for item in items] == [item["id"] for item in expected]
+    assert [item["score"] for item in items] == pytest.approx([item["score"] for item in expected], abs=1e-4)
+
+
+def test_vectors_follow_text_edits_only(app, user_id, make_tasks):
+    task_id, = make_tasks(user_id, 1, prefix="Pintar parede")
+    with app.app_context():
+        first = embedding(task_id)
+        assert len(first) == 256 * 4
+        task = db.session.get(Task, task_id)
+        task.cost = 99.0
+        db.session.commit()
+        assert embedding(task_id) == first
+        db.session.get(Task, task_id).description = "usar rolo"
+        db.session.commit()
+        assert embedding(task_id) != first
+
+
+def test_similar_tasks_of_the_same_user(app, client, user_id, other_client, make_tasks):
+    other, other_id = other_client
+    make_tasks(other_id, 1, prefix="Pintar parede da sala")
+    target, = make_tasks(user_id, 1, prefix="Pintar parede do quarto")
+    make_tasks(user_id, 1, prefix="Pintar parede da cozinha")
+    make_tasks(user_id, 1, prefix="Revisar contrato")
+    response = similar(client, target)
+    assert response.json["task_id"] == target
+    items = response.json["similar"]
+    # O sufixo " 0" dos nomes também é uma palavra em comum
+    assert [item["task_name"] for item in items] == ["Pintar parede da cozinha 0", "Revisar contrato 0"]
+    assert 1 >= items[0]["score"] > items[1]["score"] >= 0.2
+    assert similar(client, target, k=1).json["similar"] == items[:1]
+    assert similar(other, target).status_code == 404
+
+
+def test_reads_never_write_missing_vectors(app, client, user_id, make_tasks):
+    ids = make_tasks(user_id, 2, prefix="Pintar parede")
+    with app.app_context():
+        db.session.execute(db.update(Task).values(embedding=None))
+        db.session.commit()
+        semantic_index.clear()
+    writes = []
+
+    def record(conn, cursor, statement, *args):
+        if statement.split()[0] in ("INSERT", "UPDATE", "DELETE"):
+            writes.append(statement)
+
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        assert [item["id"] for item in similar(client, ids[0]).json["similar"]] == [ids[1]]
+    finally:
+        with app.app_context():
+            event.remove(db.engine, "before_cursor_execute", record)
+    assert writes == []
+    with app.app_context():
+        assert embedding(ids[0]) is None
+
+
+def test_edit_page_loads_the_similar_tasks_later(client, user_id, make_tasks, monkeypatch):
+    task_id, = make_tasks(user_id, 1)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("a página de edição não deve calcular as semelhantes")
+
+    monkeypatch.setattr(semantic_index, "similar_tasks", fail)
+    page = client.get(f"/edit/{task_id}").get_data(as_text=True)
+    assert f'data-similar-url="/similar/{task_id}"' in page
+
+
+def test_index_is_reloaded_after_changes(app, client, user_id, make_tasks):
+    target, = make_tasks(user_id, 1, prefix="Relatório anual")
+    assert similar(client, target).json["similar"] == []
+    make_tasks(user_id, 1, prefix="Relatório mensal")
+    assert len(similar(client, target).json["similar"]) == 1
+    other, = similar(client, target).json["similar"]
+    client.post("/bulk", data={"action": "update", "task_ids": [target], "category": "finanças"})
+    client.post(f"/delete/{other['id']}")
+    assert similar(client, target).json["similar"] == []
+
+
+def test_failing_embedder_does_not_block_saving(app, client, user_id, caplog):
+    semantic_index.embedder = BrokenEmbedder()
+    client.post("/add", data={"task_name": "Sem vetor", "cost": "1", "due_date": "01/01/2030"})
+    with app.app_context():
+        task = Task.query.one()
+        assert task.embedding is None
+    assert "Erro ao calcular embeddings: sem rede" in caplog.text
+
+
+def test_rebuild_command_after_changing_the_dimension(app, user_id, make_tasks):
+    ids = make_tasks(user_id, 3)
+    semantic_index.embedder = HashingEmbedder(32)
+    result = app.test_cli_runner().invoke(args=["semantic", "rebuild", "--user", "ana", "--batch-size", "2"])
+    assert "Vetores recalculados para 3 tarefas." in result.output
+    with app.app_context():
+        assert all(len(decode_vector(embedding(task_id))) == 32 for task_id in ids)
+    result = app.test_cli_runner().invoke(args=["semantic", "rebuild", "--user", "ninguém"])
+    assert "Usuário não encontrado: ninguém" in result.output
@@ -0,0 +1,141 @@
+# tests/test_task_cache.py
+
+import pytest
+from sqlalchemy import event
+from werkzeug.datastructures import MultiDict
+from extensions import db
+from llm import llm_gateway, FakeBackend
+from models import Task
+from task_cache import decode_page, encode_page, task_cache
+import metrics
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.registry.reset()
+
+
+@pytest.fixture
+def user_id(user_id, client):
+    """Usuário logado, já sem a mensagem flash do login (páginas com flash não recebem ETag)."""
+    client.get("/")
+    task_cache.memory.clear()
+    metrics.registry.reset()
+    return user_id
+
+
+def revalidate(client, path="/"):
+    """Primeira leitura e a revalidação com o ETag recebido; retorna as duas respostas."""
+    first = client.get(path)
+    return first, client.get(path, headers={"If-None-Match": first.headers["ETag"].strip('"')})
+
+
+def etag(client, path="/"):
+    return client.get(path).headers.get("ETag")
+
+
+def test_unchanged_list_gets_304_without_reading_tasks(app, client, user_id, make_tasks):
+    make_tasks(user_id, 3)
+    first = client.get("/")
+    assert first.headers["ETag"] and first.headers["Cache-Control"] == "private, no-cache"
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        second = client.get("/", headers={"If-None-Match": first.headers["ETag"]})
+    finally:
+        with app.app_context():
+            event.remove(db.engine, "before_cursor_execute", record)
+    assert second.status_code == 304 and second.get_data() == b""
+    assert not any("FROM task" in statement for statement in statements)
+    assert metrics.TASK_CACHE.value("not_modified") == 1
+
+
+@pytest.mark.parametrize("change", ["edit", "move", "bulk", "delete", "import"])
+def test_every_kind_of_change_invalidates_the_list(app, client, user_id, make_tasks, change):
+    ids = make_tasks(user_id, 3)
+    before = etag(client)
+    if change == "edit":
+        client.post(f"/edit/{ids[0]}", data={"task_name": "Renomeada", "cost": "1", "due_date": "01/01/2030"})
+    elif change == "move":
+        client.post(f"/move_down/{ids[0]}")
+    elif change == "bulk":
+        client.post("/bulk", data={"action": "update", "task_ids": ids, "priority": "Alta"})
+    elif change == "delete":
+        client.post(f"/delete/{ids[0]}")
+    else:
+        client.post("/import", data='{"task_name": "Nova", "cost": "1", "due_date": "01/01/2030"}',
+                    content_type="application/json")
+    client.get("/")  # consome a mensagem flash da alteração
+    after = client.get("/", headers={"If-None-Match": before})
+    assert after.status_code == 200 and after.headers["ETag"] != before
+
+
+def test_other_users_changes_keep_my_etag(client, user_id, other_client, make_tasks):
+    other, other_id = other_client
+    make_tasks(user_id, 1)
+    ids = make_tasks(other_id, 1)
+    before = etag(client)
+    other.post(f"/delete/{ids[0]}")
+    assert client.get("/", headers={"If-None-Match": before}).status_code == 304
+
+
+def test_rolled_back_changes_keep_the_version(app, user_id, make_tasks):
+    task_id, = make_tasks(user_id, 1)
+    with app.app_context():
+        version = task_cache.version(user_id)
+        db.session.get(Task, task_id).cost = 99.0
+        db.session.flush()
+        assert task_cache.version(user_id) == version + 1
+        db.session.rollback()
+        assert task_cache.version(user_id) == version
+
+
+def test_filters_and_flash_messages(client, user_id, make_tasks):
+    make_tasks(user_id, 2, status="Pendente")
+    assert etag(client, "/?status=Pendente") != etag(client, "/?status=Concluída")
+    # A página que mostra a mensagem da alteração não pode vir da cópia do navegador
+    response = client.post("/add", data={"task_name": "Nova", "cost": "1", "due_date": "01/01/2030"},
+                           follow_redirects=True)
+    assert "Tarefa adicionada com sucesso!" in response.get_data(as_text=True)
+    assert "ETag" not in response.headers
+
+
+def test_pages_are_served_from_memory(client, user_id, make_tasks):
+    make_tasks(user_id, 2)
+    first = client.get("/").get_data()
+    assert client.get("/").get_data() == first
+    assert metrics.TASK_CACHE.value("miss") == 1 and metrics.TASK_CACHE.value("memory") == 1
+
+
+@pytest.mark.config(TASK_CACHE_BACKEND="local")
+def test_shared_backend_round_trip(app, client, user_id, make_tasks):
+    make_tasks(user_id, 3, status="Pendente", priority="Alta")
+    first = client.get("/").get_data()
+    task_cache.memory.clear()
+    assert client.get("/").get_data() == first
+    assert metrics.TASK_CACHE.value("shared") == 1
+    with app.app_context():
+        page, _ = task_cache.page_from_request(user_id, MultiDict({"per_page": "2"}))
+        assert decode_page(encode_page(page)).__dict__ == page.__dict__
+
+
+@pytest.mark.config(TASK_CACHE_ENABLED=False)
+def test_disabled_cache(client, user_id, make_tasks):
+    make_tasks(user_id, 1)
+    response = client.get("/")
+    assert response.status_code == 200 and "ETag" not in response.headers
+    assert metrics.TASK_CACHE.value("miss") == 0
+
+
+def test_report_page_etag_follows_the_jobs(client, user_id, make_tasks):
+    llm_gateway.backend = FakeBackend()
+    ids = make_tasks(user_id, 1)
+    first, second = revalidate(client, "/generate_report")
+    assert second.status_code == 304
+    client.post("/generate_report", data={"task_ids": [str(ids[0])]})
+    assert client.get("/generate_report", headers={"If-None-Match": first.headers["ETag"]}).status_code == 200
@@ -0,0 +1,201 @@
+# tests/test_task_feed.py
+
+import json
+import os
+import runpy
+from datetime import date
+import pytest
+from flask import request
+from conftest import ROOT
+from extensions import db
+from models import Task, User
+from task_feed import Subscriber, feed_since, merge_events, message, task_feed
+import metrics
+
+JSON = {"Accept": "application/json"}
+
+
+class RecordingBroker:
+    """Backend que guarda as mensagens publicadas e as entrega às conexões, como o local."""
+
+    def __init__(self):
+        self.published = []
+        self.deliver = None
+
+    def listen(self, deliver):
+        self.deliver = deliver
+
+    def publish(self, user_id, data):
+        self.published.append((user_id, data))
+        self.deliver(user_id, data)
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.registry.reset()
+
+
+@pytest.fixture
+def broker(app):
+    task_feed.broker = RecordingBroker()
+    return task_feed.broker
+
+
+def payload(data):
+    return json.loads(data.split("data: ", 1)[1])
+
+
+def published(broker, user_id):
+    """Eventos de cada mensagem publicada para o usuário."""
+    return [payload(data)["events"] for owner, data in broker.published if owner == user_id]
+
+
+def version(user_id):
+    return db.session.query(User.tasks_version).filter(User.id == user_id).scalar()
+
+
+def test_merge_events_keeps_one_event_per_task():
+    events = [
+        {"op": "upsert", "id": 1}, {"op": "move", "id": 1, "order": 5},
+        {"op": "move", "id": 2, "order": 1}, {"op": "delete", "id": 2},
+    ]
+    assert merge_events(events, 10) == [{"op": "upsert", "id": 1}, {"op": "delete", "id": 2}]
+    assert merge_events(events, 1) == [{"op": "reload"}]
+    assert merge_events([{"op": "upsert", "id": 1}, {"op": "reload"}], 10) == [{"op": "reload"}]
+
+
+def test_message_and_last_event_id(app):
+    assert message(3, [{"op": "reload"}]) == 'id: 3\ndata: {"v":3,"events":[{"op":"reload"}]}\n\n'
+    with app.test_request_context("/feed?since=4", headers={"Last-Event-ID": "7"}):
+        assert feed_since(request) == 7
+    with app.test_request_context("/feed?since=x"):
+        assert feed_since(request) is None
+
+
+def test_orm_changes_are_published_on_commit(app, user_id, broker):
+    with app.app_context():
+        task = Task(task_name="Nova", cost=1, due_date=date(2030, 1, 1), display_order=10, user_id=user_id)
+        db.session.add(task)
+        db.session.commit()
+        task_id = task.id
+        assert payload(broker.published[-1][1])["v"] == version(user_id)
+        task.display_order = 20
+        db.session.commit()
+        task.cost = 2
+        db.session.commit()
+        # Colunas que não aparecem na lista não geram evento
+        task.embedding = b"\x00"
+        db.session.commit()
+        db.session.delete(task)
+        db.session.commit()
+    assert published(broker, user_id) == [
+        [{"op": "upsert", "id": task_id}],
+        [{"op": "move", "id": task_id, "order": 20}],
+        [{"op": "upsert", "id": task_id}],
+        [{"op": "delete", "id": task_id}],
+    ]
+    assert metrics.TASK_FEED.value("published") == 4
+
+
+def test_rolled_back_changes_are_not_published(app, user_id, make_tasks, broker):
+    task_id = make_tasks(user_id, 1)[0]
+    broker.published.clear()
+    with app.app_context():
+        db.session.get(Task, task_id).cost = 99
+        db.session.flush()
+        db.session.rollback()
+    assert broker.published == []
+
+
+def test_bulk_changes_and_imports_are_recorded(app, client, user_id, make_tasks, broker):
+    ids = make_tasks(user_id, 3)
+    client.post("/bulk", data={"action": "delete", "task_ids": [str(task_id) for task_id in ids[:2]]})
+    client.post("/import", data=json.dumps([{"task_name": "Importada", "cost": 1, "due_date": "01/01/2030"}]),
+                content_type="application/json")
+    assert published(broker, user_id)[-2:] == [
+        [{"op": "delete", "id": ids[0]}, {"op": "delete", "id": ids[1]}],
+        [{"op": "reload"}],
+    ]
+
+
+def test_json_responses_carry_the_changes(app, client, user_id, make_tasks, broker):
+    ids = make_tasks(user_id, 2)
+    body = client.post(f"/move_down/{ids[0]}", headers=JSON).json
+    with app.app_context():
+        assert body["v"] == version(user_id)
+    assert sorted(event["id"] for event in body["events"]) == ids
+    assert {event["op"] for event in body["events"]} == {"move"}
+    assert client.post(f"/delete/{ids[1]}", headers=JSON).json["events"] == [{"op": "delete", "id": ids[1]}]
+
+
+@pytest.mark.config(TASK_FEED_WSGI=True, TASK_FEED_KEEPALIVE=0.01, TASK_FEED_MAX_SECONDS=5)
+def test_feed_streams_the_changes_of_the_user(app, client, user_id, other_client, make_tasks):
+    _, other_id = other_client
+    response = client.get("/feed", buffered=False)
+    assert response.mimetype == "text/event-stream"
+    chunks = iter(response.response)
+    assert next(chunks) == b"retry: 3000\n\n"
+    make_tasks(other_id, 1)
+    assert next(chunks) == b": keep-alive\n\n"
+    task_id = make_tasks(user_id, 1)[0]
+    data = next(chunks).decode()
+    assert data.startswith("id: ") and payload(data)["events"] == [{"op": "upsert", "id": task_id}]
+    response.close()
+    assert task_feed._subscribers == {}
+
+
+@pytest.mark.config(TASK_FEED_WSGI=True, TASK_FEED_MAX_SECONDS=0)
+def test_feed_asks_for_reload_when_the_page_is_old(app, client, user_id, make_tasks):
+    make_tasks(user_id, 1)
+    with app.app_context():
+        current = version(user_id)
+    body = client.get("/feed", query_string={"since": current - 1}).get_data(as_text=True)
+    assert f'event: reload\ndata: {{"v": {current}}}' in body
+    assert "reload" not in client.get("/feed", query_string={"since": current}).get_data(as_text=True)
+
+
+def test_slow_subscribers_get_reload(app):
+    subscriber = Subscriber(1, maxsize=1)
+    subscriber.put("a")
+    subscriber.put("b")
+    assert subscriber.overflowed
+    assert metrics.TASK_FEED.value("dropped") == 1
+    with app.app_context():
+        stream = task_feed.stream(subscriber, None, 0)
+        assert next(stream) == "retry: 3000\n\n"
+        assert next(stream).startswith("event: reload")
+        assert list(stream) == []
+
+
+@pytest.mark.config(TASK_FEED_ENABLED=False)
+def test_disabled_feed(app, client, user_id, make_tasks):
+    assert client.get("/feed").status_code == 204
+    assert "/feed" not in client.get("/").get_data(as_text=True)
+
+
+def test_default_wsgi_config_does_not_stream(app, client, user_id, monkeypatch):
+    # Com workers síncronos, cada conexão do feed prenderia um worker do gunicorn
+    monkeypatch.delenv("TASK_FEED_WSGI", raising=False)
+    monkeypatch.delenv("VERCEL", raising=False)
+    config = runpy.run_path(os.path.join(ROOT, "config.py"))["Config"]
+    assert config.TASK_FEED_ENABLED and not config.TASK_FEED_WSGI
+    assert not app.config["TASK_FEED_WSGI"]
+    assert client.get("/feed").status_code == 204
+    assert "data-feed-url" not in client.get("/").get_data(as_text=True)
+
+
+@pytest.mark.config(TASK_FEED_WSGI=True)
+def test_page_opens_the_feed_when_wsgi_streaming_is_on(client, user_id):
+    assert 'data-feed-url="/feed?since=' in client.get("/").get_data(as_text=True)
+
+
+def test_feed_requires_login(client):
+    assert client.get("/feed").status_code == 302
+
+
+def test_rows_render_only_the_users_tasks(client, user_id, other_client, make_tasks):
+    _, other_id = other_client
+    ids = make_tasks(user_id, 2, prefix="Minha")
+    other_ids = make_tasks(other_id, 1)
+    rows = client.get("/rows", query_string={"ids": f"{ids[0]},{other_ids[0]},x"}).json["rows"]
+    assert list(rows) == [str(ids[0])] and "Minha 0" in rows[str(ids[0])]
@@ -0,0 +1,151 @@
+# tests/test_task_io.py
+
+import io
+import json
+import pytest
+from conftest import task_names
+from extensions import db
+from models import Task, TaskStat
+import ordering
+import task_io
+
+CSV_HEADER = ",".join(task_io.FIELDS) + "\n"
+
+
+def csv_line(name, cost="10", due_date="01/01/2030", status="", priority="", category=""):
+    return f"{name},{cost},{due_date},,{status},{priority},,,,,{category}\n"
+
+
+def test_validate_row_follows_the_task_form_rules():
+    values, error = task_io.validate_row({"task_name": " A ", "cost": "1.5", "due_date": "02/03/2030",
+                                          "status": "Pendente", "priority": ""})
+    assert error is None
+    assert values["task_name"] == "A" and values["cost"] == 1.5 and values["priority"] is None
+    assert values["due_date"].isoformat() == "2030-03-02" and values["completion_date"] is None
+    base = {"task_name": "A", "cost": "1", "due_date": "01/01/2030"}
+    for changes, message in [
+        ({"task_name": ""}, "nome da tarefa é obrigatório."),
+        ({"cost": "dez"}, "custo inválido."),
+        ({"cost": "0"}, "custo é obrigatório."),
+        ({"cost": "0.00"}, "custo é obrigatório."),
+        ({"due_date": ""}, "data limite é obrigatória."),
+        ({"due_date": "2030-01-01"}, "formato de data inválido. Use dd/mm/yyyy."),
+        ({"status": "Arquivada"}, "status inválido: Arquivada."),
+        ({"priority": "Urgente"}, "prioridade inválida: Urgente."),
+        ({"task_name": "x" * 500}, "task_name passa de"),
+    ]:
+        values, error = task_io.validate_row({**base, **changes})
+        assert values is None and error.startswith(message)
+    assert task_io.validate_row(["lista"]) == (None, "registro não é um objeto.")
+
+
+def test_csv_rows_accept_a_bom_and_report_line_numbers():
+    data = (CSV_HEADER + csv_line("A") + csv_line("B")).encode("utf-8-sig")
+    rows = list(task_io.iter_csv_rows(io.BytesIO(data)))
+    assert [(line, row["task_name"]) for line, row in rows] == [(2, "A"), (3, "B")]
+
+
+@pytest.mark.parametrize("text", [
+    '[{"a": 1}, {"a": 2}, {"a": "}"}]',
+    '{"a": 1}\n{"a": 2}\n{"a": "}"}\n',
+])
+def test_json_rows_are_decoded_across_read_chunks(monkeypatch, text):
+    monkeypatch.setattr(task_io, "READ_CHUNK", 3)
+    rows = list(task_io.iter_json_rows(io.BytesIO(text.encode("utf-8"))))
+    assert rows == [(1, {"a": 1}), (2, {"a": 2}), (3, {"a": "}"})]
+
+
+def test_invalid_json_is_reported():
+    with pytest.raises(ValueError, match="registro 2"):
+        list(task_io.iter_json_rows(io.BytesIO(b'[{"a": 1}, {"a": ')))
+
+
+def test_json_record_over_the_limit_stops_reading(monkeypatch):
+    monkeypatch.setattr(task_io, "READ_CHUNK", 10)
+    stream = io.BytesIO(b'[{"a": 1}, {"a": "' + b"x" * 10000 + b'"}]')
+    rows = task_io.iter_json_rows(stream, max_record_size=50)
+    assert next(rows) == (1, {"a": 1})
+    with pytest.raises(ValueError, match="registro 2 passa de 50 caracteres"):
+        next(rows)
+    # Parou de ler logo depois do limite, sem carregar o resto do arquivo
+    assert stream.tell() < 200
+
+
+def test_import_form_skips_invalid_rows_and_duplicates(app, client, user_id, make_tasks):
+    make_tasks(user_id, 1, prefix="Existente")
+    data = CSV_HEADER + csv_line("Nova 1", status="Pendente") + csv_line("Existente 0") + csv_line("Nova 1") \
+        + csv_line("Nova 2", cost="caro") + csv_line("Nova 3", category="importada")
+    response = client.post("/import", data={"file": (io.BytesIO(data.encode("utf-8")), "tarefas.csv")},
+                           content_type="multipart/form-data")
+    page = response.get_data(as_text=True)
+    assert "2 tarefas importadas, 3 ignoradas." in page
+    assert "Linha 3: nome da tarefa já existe: Existente 0." in page
+    assert "Linha 4: nome da tarefa já existe: Nova 1." in page and "Linha 5: custo inválido." in page
+    with app.app_context():
+        # Novas tarefas no final da lista, na ordem do arquivo, com posições esparsas
+        assert task_names(user_id) == ["Existente 0", "Nova 1", "Nova 3"]
+        orders = [order for (order,) in db.session.query(Task.display_order).order_by(Task.display_order)]
+        assert orders[2] - orders[1] == orders[1] - orders[0] == ordering.GAP
+
+
+@pytest.mark.config(TASK_IMPORT_BATCH_SIZE=2)
+def test_import_body_in_batches(app, client, user_id):
+    body = "\n".join(json.dumps({"task_name": f"T{i}", "cost": "1", "due_date": "01/01/2030"}) for i in range(5))
+    response = client.post("/import", data=body, content_type="application/x-ndjson")
+    assert response.json == {"rows": 5, "created": 5, "skipped": 0, "errors": []}
+    with app.app_context():
+        assert task_names(user_id) == [f"T{i}" for i in range(5)]
+
+
+@pytest.mark.config(TASK_IMPORT_BATCH_SIZE=2)
+def test_broken_file_keeps_the_saved_batches_and_stats(app, client, user_id):
+    body = '[{"task_name": "A", "cost": "1", "due_date": "01/01/2030"},' \
+           ' {"task_name": "B", "cost": "2", "due_date": "01/01/2030"}, {"task_name": '
+    response = client.post("/import", data=body, content_type="application/json")
+    assert response.status_code == 400 and response.json["error"].startswith("Arquivo inválido")
+    with app.app_context():
+        assert task_names(user_id) == ["A", "B"]
+        total = TaskStat.query.filter_by(user_id=user_id, dimension="total").one()
+        assert (total.task_count, total.total_cost) == (2, 3.0)
+
+
+def test_export_streams_filtered_tasks(app, client, user_id, make_tasks):
+    make_tasks(user_id, 2, status="Pendente", description="com, vírgula")
+    make_tasks(user_id, 1, prefix="Feita", status="Concluída")
+    response = client.get("/export?status=Pendente")
+    assert response.is_streamed and response.mimetype == "text/csv"
+    assert response.headers["Content-Disposition"] == "attachment; filename=tarefas.csv"
+    rows = list(task_io.iter_csv_rows(io.BytesIO(response.get_data())))
+    assert [row["task_name"] for _, row in rows] == ["Tarefa 0", "Tarefa 1"]
+    assert rows[0][1]["description"] == "com, vírgula" and rows[0][1]["due_date"] == "01/01/2030"
+
+    records = json.loads(client.get("/export?format=json").get_data(as_text=True))
+    assert [record["task_name"] for record in records] == ["Tarefa 0", "Tarefa 1", "Feita 0"]
+
+
+def test_export_and_import_round_trip(app, client, user_id, other_client, make_tasks):
+    other, other_id = other_client
+    make_tasks(user_id, 3, status="Em Andamento", priority="Alta", category="c", notes="n")
+    for file_format in ("csv", "json"):
+        exported = client.get(f"/export?format={file_format}").get_data()
+        with app.app_context():
+            result = task_io.import_tasks(other_id, task_io.iter_rows(io.BytesIO(exported), file_format))
+            assert result.created == (3 if file_format == "csv" else 0)
+            assert result.skipped == (0 if file_format == "csv" else 3)
+    with app.app_context():
+        mine = [task_io.task_record(task) for task in task_io.export_query(user_id)]
+        theirs = [task_io.task_record(task) for task in task_io.export_query(other_id)]
+    assert mine == theirs
+
+
+def test_cli_import_and_export(app, user_id, tmp_path):
+    path = tmp_path / "tarefas.csv"
+    path.write_text(CSV_HEADER + csv_line("Pela CLI") + csv_line("Sem data", due_date=""), encoding="utf-8")
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=["tasks", "import", str(path), "--user", "ana"])
+    assert "1 tarefas importadas, 1 ignoradas de 2 registros." in result.output
+    assert "Linha 3: data limite é obrigatória." in result.output
+    result = runner.invoke(args=["tasks", "export", "--user", "ana", "--format", "json"])
+    assert json.loads(result.output)[0]["task_name"] == "Pela CLI"
+    result = runner.invoke(args=["tasks", "export", "--user", "ninguém"])
+    assert result.exit_code != 0 and "Usuário não encontrado: ninguém" in result.output